@@ -1,6 +1,10 @@
 """
-Main executor of the algorithm
+Main executor of the algorithm. See uwqsc_algorithmic_trading/src/cli.py for the subcommands.
 """
 
+import sys
+
+from uwqsc_algorithmic_trading.src.cli import main
+
 if __name__ == '__main__':
-    print("Hi Mom")
+    sys.exit(main())
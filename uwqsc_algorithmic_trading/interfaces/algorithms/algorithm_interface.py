@@ -3,14 +3,20 @@ This file stores bare-bones information required for any Stock Prediction Algori
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
 
+import numpy as np
+from numpy import ndarray
 from pandas import DataFrame
 
 from uwqsc_algorithmic_trading.interfaces.preprocessing.preprocessor_interface \
     import IPreProcessData
 from uwqsc_algorithmic_trading.src.common.config import INTERFACE_NOT_IMPLEMENTED_ERROR
+from uwqsc_algorithmic_trading.src.common.instrumentation import instrumentation
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
 
 
 class StockPosition(Enum):
@@ -25,11 +31,53 @@ class StockPosition(Enum):
     LONG = 1
 
 
+POSITIONS_BY_VALUE = {position.value: position for position in StockPosition}
+
+
+class PositionView(MutableMapping):
+    """
+    Positions of an algorithm, stored as an int8 array of StockPosition values with one entry per
+    ticker. Signal generation and sizing work on the array for every ticker at once, and the view
+    reads and writes it like the dictionary of StockPosition by ticker it replaces.
+    """
+
+    def __init__(self, tickers: List[str]):
+        """
+        Initialize every position to HOLD.
+
+        :param tickers: List of ticker symbols, one per entry of the array
+        """
+
+        self.array = np.zeros(len(tickers), dtype=np.int8)
+        self.__columns__ = {ticker: column for column, ticker in enumerate(tickers)}
+
+    def __getitem__(self, ticker: str) -> StockPosition:
+        return POSITIONS_BY_VALUE[int(self.array[self.__columns__[ticker]])]
+
+    def __setitem__(self, ticker: str, position: Union[StockPosition, int]) -> None:
+        self.array[self.__columns__[ticker]] = StockPosition(position).value
+
+    def __delitem__(self, ticker: str) -> None:
+        raise TypeError("Positions cannot be removed, set them to StockPosition.HOLD instead")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__columns__)
+
+    def __len__(self) -> int:
+        return len(self.__columns__)
+
+    def __repr__(self) -> str:
+        return f"PositionView({dict(self)})"
+
+
 class IAlgorithm(ABC):
     """
     Essential functions shared by all algorithmic trading algorithms.
     """
 
+    # Attributes left out of checkpoints, see src.common.checkpoint
+    TRANSIENT_STATE = ("__data__",)
+
     def __init__(self,
                  name: str,
                  tickers: List[str],
@@ -48,12 +96,38 @@ class IAlgorithm(ABC):
         self.tickers = tickers
         self.__data_processor__ = data_processor
         self.parameters = parameters or {}
-        self.__positions__ = {ticker: StockPosition.HOLD for ticker in tickers}
+        self.__position_view__ = PositionView(tickers)
         self.metrics = {}
         self.__data__: Optional[DataFrame] = None
         self.executing: bool = False
         self.__trade_count__: int = 0
 
+    @cached_property
+    def price_columns(self) -> List[str]:
+        """
+        Price columns of the tickers, in ticker order.
+        """
+
+        return ticker_registry().column_names(self.tickers, "price")
+
+    @property
+    def __positions__(self) -> PositionView:
+        """
+        :returns: PositionView of the StockPosition of every ticker.
+        """
+
+        return self.__position_view__
+
+    @__positions__.setter
+    def __positions__(self, positions: Mapping[str, StockPosition]) -> None:
+        """
+        Set the positions of several tickers from a mapping, e.g. a dictionary.
+
+        :param positions: Mapping of ticker symbols to StockPosition
+        """
+
+        self.__position_view__.update(positions)
+
     @abstractmethod
     def generate_signals(self, current_data: DataFrame):
         """
@@ -83,41 +157,185 @@ class IAlgorithm(ABC):
 
         raise INTERFACE_NOT_IMPLEMENTED_ERROR
 
-    def execute_trade(self, capital: float, current_data: DataFrame) -> Dict:
+    def generate_vectorized_signals(self, prices: ndarray) -> ndarray:
+        """
+        Generate trading signals for a complete price history at once. This is an opt-in hook used
+        by the vectorized backtest engine. Algorithms that do not override it are backtested bar by
+        bar through execute_trade.
+
+        :param prices: 2-D NumPy array of shape (bars, tickers), columns ordered like self.tickers
+
+        :returns: 2-D NumPy array of the same shape holding StockPosition values (-1, 0, 1)
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    def calculate_vectorized_position_size(self,
+                                           signals: ndarray,
+                                           prices: ndarray,
+                                           portfolio_value: float) -> ndarray:
+        """
+        Vectorized counterpart of calculate_position_size. Must be overridden together with
+        generate_vectorized_signals, and must size every position like calculate_position_size
+        does for the same position, since on_bar and the vectorized backtests size with it while
+        execute_trade sizes with calculate_position_size.
+
+        :param signals: 2-D NumPy array of StockPosition values, shape (bars, tickers)
+        :param prices: 2-D NumPy array of prices, shape (bars, tickers)
+        :param portfolio_value: Float that represents current portfolio value
+
+        :returns: 2-D NumPy array with the size of the position to be played per bar and ticker.
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    def supports_vectorized_signals(self) -> bool:
+        """
+        Whether this algorithm provides the vectorized signal hooks.
+
+        :returns: True if generate_vectorized_signals is overridden by the implementation.
+        """
+
+        return (type(self).generate_vectorized_signals
+                is not IAlgorithm.generate_vectorized_signals)
+
+    def generate_bar_signals(self, features: Dict[str, ndarray]) -> ndarray:
+        """
+        Streaming counterpart of generate_signals for a single bar, working on NumPy arrays only.
+        This is an opt-in hook used by on_bar, together with the vectorized position sizing.
+
+        :param features: Dictionary of per-ticker feature arrays returned by the preprocessor's
+                         process_bar
+
+        :returns: 1-D int8 NumPy array of StockPosition values, one per ticker
+        :side-effect: Changes positions of the algorithm.
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    def supports_bar_signals(self) -> bool:
+        """
+        Whether this algorithm and its preprocessor provide the streaming hooks.
+
+        :returns: True if generate_bar_signals and the preprocessor's process_bar are overridden.
+        """
+
+        return (type(self).generate_bar_signals is not IAlgorithm.generate_bar_signals
+                and self.__data_processor__.supports_bars())
+
+    def set_positions(self, signals: ndarray) -> None:
+        """
+        Store an array of StockPosition values, one per ticker, as the positions of the algorithm.
+
+        :param signals: 1-D NumPy array of StockPosition values in the order of self.tickers
+        """
+
+        self.__position_view__.array[:] = signals
+
+    def on_bar(self,
+               capital: float,
+               prices: ndarray,
+               timestamp: Any = None,
+               cleaned: bool = False) -> ndarray:
+        """
+        Streaming counterpart of execute_trade for a single bar. Prices are given as an array in
+        the order of self.tickers, and the bar flows through the preprocessor and the signal
+        generation without building DataFrames. Algorithms without the streaming hooks fall back
+        to execute_trade on a one-row DataFrame.
+
+        :param capital: The value of cash allocated to the algorithm
+        :param prices: 1-D NumPy array with one price per ticker, in the order of self.tickers
+        :param timestamp: Timestamp of the bar, preferably a numpy.datetime64
+        :param cleaned: Boolean. True when the bar was already cleaned by a shared preprocessor,
+                        see IPreProcessData.process_data
+
+        :returns: 1-D NumPy array with the cost of the trade per ticker
+        """
+
+        prices = np.asarray(prices, dtype=np.float64)
+
+        if not self.supports_bar_signals():
+            frame = DataFrame(prices[None, :], index=[timestamp], columns=self.price_columns)
+            cost_per_ticker = self.execute_trade(capital, frame, cleaned)
+            return np.array([cost_per_ticker[ticker] for ticker in self.tickers])
+
+        timer = instrumentation().timer
+
+        with timer("on_bar", self.name):
+            with timer("on_bar.process_bar", self.name):
+                features = self.__data_processor__.process_bar(timestamp, prices, cleaned)
+            if not features:
+                # The preprocessor dropped the bar, e.g. because every ticker is stale
+                return np.zeros(len(self.tickers))
+            with timer("on_bar.generate_bar_signals", self.name):
+                signals = self.generate_bar_signals(features)
+            with timer("on_bar.position_size", self.name):
+                position_size = self.calculate_vectorized_position_size(
+                    signals[None, :], prices[None, :], capital
+                )[0]
+
+        costs = position_size * prices
+        trades = int(np.count_nonzero(costs))
+        self.__trade_count__ += trades
+        self._count_bars(1, trades)
+
+        return costs
+
+    def execute_trade(self,
+                      capital: float,
+                      current_data: DataFrame,
+                      cleaned: bool = False) -> Dict:
         """
         Execute a single trade for the list of tickers provided.
 
         :param capital: The integer value of cash allocated to the algorithm
         :param current_data: DataFrame represents the current processed market data
+        :param cleaned: Boolean. True when the data was already cleaned by a shared preprocessor,
+                        see IPreProcessData.process_data
 
         :returns: DataFrame with portfolio performance
         """
 
-        current_data = self.prepare_data(current_data)
-        self.generate_signals(current_data)
-        cost_per_ticker: Dict = {}
+        timer = instrumentation().timer
 
-        for ticker in self.tickers:
-            price_col = f"{ticker}_price"
-            current_price: float = current_data[price_col].iloc[-1]
+        with timer("execute_trade", self.name):
+            with timer("execute_trade.prepare_data", self.name):
+                current_data = self.prepare_data(current_data, cleaned)
+            if current_data.empty:
+                # Every row was dropped, e.g. because the batch was already processed
+                return dict.fromkeys(self.tickers, 0.0)
+            with timer("execute_trade.generate_signals", self.name):
+                self.generate_signals(current_data)
 
-            position_size = self.calculate_position_size(
-                ticker,
-                current_price,
-                capital
-            )
+            with timer("execute_trade.position_size", self.name):
+                prices = current_data[self.price_columns].to_numpy(dtype=np.float64)[-1]
+                position_size = np.array([
+                    self.calculate_position_size(ticker, price, capital)
+                    for ticker, price in zip(self.tickers, prices.tolist())
+                ], dtype=np.float64)
 
-            cost = position_size * current_price
-            cost_per_ticker[ticker] = cost
+        costs = position_size * prices
+        cost_per_ticker = dict(zip(self.tickers, costs.tolist()))
+        trades = int(np.count_nonzero(costs))
 
-            if cost != 0:
-                self.__trade_count__ += 1
+        self.__trade_count__ += trades
+        self._count_bars(len(current_data), trades)
 
         return cost_per_ticker
 
-    def prepare_data(self, current_data: DataFrame) -> DataFrame:
+    def _count_bars(self, bars: int, trades: int) -> None:
+        """
+        Report processed bars and placed trades to the instrumentation.
+        """
+
+        metrics = instrumentation()
+        if metrics.enabled:
+            metrics.count("bars_processed", bars, self.name)
+            metrics.count("trades", trades, self.name)
+
+    def prepare_data(self, current_data: DataFrame, cleaned: bool = False) -> DataFrame:
         """
         Prepare data for the algorithm using the linked data processor.
         """
 
-        return self.__data_processor__.process_data(current_data)
+        return self.__data_processor__.process_data(current_data, cleaned)
@@ -0,0 +1,72 @@
+"""
+This file serves as a standardized interface for the trading costs of the execution simulator.
+Every model works on whole bars at once: arrays with one entry per ticker, in the order of the
+algorithm's tickers.
+"""
+
+from abc import ABC, abstractmethod
+
+from numpy import ndarray
+
+from uwqsc_algorithmic_trading.src.common.config import INTERFACE_NOT_IMPLEMENTED_ERROR
+
+
+class ISlippageModel(ABC):
+    """
+    Price actually paid or received when an order is filled.
+    """
+
+    @abstractmethod
+    def fill_prices(self, prices: ndarray, quantities: ndarray) -> ndarray:
+        """
+        Fill prices of the orders of one bar.
+
+        :param prices: 1-D NumPy array with the price of every ticker on the fill bar
+        :param quantities: 1-D NumPy array with the signed number of shares of every order, 0 for
+                           tickers without an order
+
+        :returns: 1-D NumPy array of fill prices. Buys fill at or above the price, sells at or
+                  below it
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+
+class ICommissionModel(ABC):
+    """
+    Fees charged by the broker on every fill.
+    """
+
+    @abstractmethod
+    def commissions(self, fill_prices: ndarray, quantities: ndarray) -> ndarray:
+        """
+        Commissions of the fills of one bar.
+
+        :param fill_prices: 1-D NumPy array with the fill price of every ticker
+        :param quantities: 1-D NumPy array with the signed number of shares filled, 0 for tickers
+                           without a fill
+
+        :returns: 1-D NumPy array of non-negative commissions, 0 where nothing was filled
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+
+class IBorrowModel(ABC):
+    """
+    Fees charged for holding short positions.
+    """
+
+    @abstractmethod
+    def borrow_costs(self, short_values: ndarray, years: float) -> ndarray:
+        """
+        Borrow fees accrued by short positions over a period.
+
+        :param short_values: 1-D NumPy array with the non-negative market value of the short
+                             position in every ticker
+        :param years: Float. Length of the period in years
+
+        :returns: 1-D NumPy array of non-negative fees
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
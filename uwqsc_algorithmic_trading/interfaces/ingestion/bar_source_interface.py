@@ -0,0 +1,55 @@
+"""
+This file serves as a standardized interface for live sources of market data. The ingestion
+pipeline reads blocks of bars from a source, without knowing whether they come from a replay
+server, a broker feed or a file.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from numpy import ndarray
+
+from uwqsc_algorithmic_trading.src.common.config import INTERFACE_NOT_IMPLEMENTED_ERROR
+
+
+class IBarSource(ABC):
+    """
+    Asynchronous source of bars for a fixed list of tickers.
+    """
+
+    @property
+    @abstractmethod
+    def tickers(self) -> List[str]:
+        """
+        :returns: List of the ticker symbols of the price columns, known once the source is open.
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    @abstractmethod
+    async def open(self) -> None:
+        """
+        Connect to the source.
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    @abstractmethod
+    async def read(self) -> Optional[Tuple[ndarray, ndarray]]:
+        """
+        Wait for the next block of bars. Blocks hold whatever arrived since the previous read, at
+        least one bar.
+
+        :returns: Tuple of a 1-D datetime64[ns] array of timestamps and a 2-D float64 array of
+                  prices of shape (bars, tickers), or None once the source is exhausted
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    @abstractmethod
+    async def close(self) -> None:
+        """
+        Disconnect from the source.
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
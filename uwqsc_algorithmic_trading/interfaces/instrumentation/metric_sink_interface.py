@@ -0,0 +1,44 @@
+"""
+This file serves as a standardized interface for the destinations of hot path measurements. The
+instrumentation of the algorithms and preprocessors hands every timing and counter to the sinks
+that are enabled, and each sink decides how to aggregate, store or export them.
+"""
+
+from abc import ABC, abstractmethod
+
+from uwqsc_algorithmic_trading.src.common.config import INTERFACE_NOT_IMPLEMENTED_ERROR
+
+
+class IMetricSink(ABC):
+    """
+    Destination of timings and counters. Sinks may be called from several threads at once.
+    """
+
+    @abstractmethod
+    def record_timing(self, name: str, component: str, seconds: float) -> None:
+        """
+        Record the duration of one pass through a stage.
+
+        :param name: String representing the stage, e.g. "execute_trade.generate_signals"
+        :param component: String representing the algorithm or preprocessor that ran the stage
+        :param seconds: Float. Duration in seconds
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    @abstractmethod
+    def record_count(self, name: str, component: str, value: int) -> None:
+        """
+        Add to a counter.
+
+        :param name: String representing the counter, e.g. "bars_processed"
+        :param component: String representing the algorithm or preprocessor that counted
+        :param value: Integer added to the counter
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    def flush(self) -> None:
+        """
+        Write out buffered measurements. Sinks without buffers do not need to override it.
+        """
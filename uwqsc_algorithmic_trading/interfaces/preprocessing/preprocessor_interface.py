@@ -4,10 +4,16 @@ implements this interface which includes preprocessing steps.
 """
 
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
 
-from pandas import DataFrame, concat
+from numpy import count_nonzero, float64, ndarray
+from pandas import DataFrame
 
 from uwqsc_algorithmic_trading.src.common.config import INTERFACE_NOT_IMPLEMENTED_ERROR
+from uwqsc_algorithmic_trading.src.common.instrumentation import instrumentation
+from uwqsc_algorithmic_trading.src.common.history_buffer import HistoryBuffer
+from uwqsc_algorithmic_trading.src.common.missing_value_imputer import MissingValueImputer
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import TimestampDeduplicator
 
 
 class IPreProcessData(ABC):
@@ -17,11 +23,26 @@ class IPreProcessData(ABC):
     across different datasets and use cases.
     """
 
-    def __init__(self):
+    # Attributes left out of checkpoints, see src.common.checkpoint
+    TRANSIENT_STATE = ("__processed_data__",)
+
+    def __init__(self,
+                 max_history: Optional[int] = None,
+                 imputer: Optional[MissingValueImputer] = None,
+                 deduplicator: Optional[TimestampDeduplicator] = None):
         """
         Initialize the data preprocessor.
+
+        :param max_history: Optional integer representing the maximum number of rows of history to
+                            keep. None keeps the whole history
+        :param imputer: Optional MissingValueImputer used by _impute_missing_values and _impute_bar
+        :param deduplicator: Optional TimestampDeduplicator used by _remove_duplicate_timestamps and
+                             _accept_bar
         """
 
+        self.max_history = max_history
+        self.__imputer__ = imputer
+        self.__deduplicator__ = deduplicator
         self.__data_history__ = None
         self.__processed_data__ = None
 
@@ -59,21 +80,231 @@ class IPreProcessData(ABC):
 
         raise INTERFACE_NOT_IMPLEMENTED_ERROR
 
-    def process_data(self, current_data: DataFrame) -> DataFrame:
+    def generate_features(self):
+        """
+        Features the algorithm observes, computed from the cleaned prices, e.g. returns. Runs after
+        remove_outliers. Preprocessors without features of their own keep this default.
+        :side-effect: modifies the processed data.
+        """
+
+    def process_data(self, current_data: DataFrame, cleaned: bool = False) -> DataFrame:
         """
         Complete pipeline for data preprocessing for a single occurrence of data.
+
+        :param current_data: DataFrame with the new market data
+        :param cleaned: Boolean. True when missing values and duplicate timestamps were already
+                        handled by a shared preprocessor, e.g. in a PortfolioRunner. Those steps
+                        are then skipped
         :returns: DataFrame containing processed data.
         """
 
         self.__processed_data__ = current_data
+        metrics = instrumentation()
+        timer = metrics.timer
+        component = type(self).__name__
 
-        self.missing_values()
-        self.remove_duplicate_timestamps()
-        self.remove_outliers()
-
-        if self.__data_history__ is None:
-            self.__data_history__ = self.__processed_data__
-        else:
-            self.__data_history__ = concat([self.__data_history__, self.__processed_data__])
+        if not cleaned:
+            # Repeated bars are dropped before they can fill the gaps of the bars that are kept
+            with timer("process_data.remove_duplicate_timestamps", component):
+                self.remove_duplicate_timestamps()
+            if metrics.enabled:
+                metrics.count("duplicate_rows_dropped",
+                              len(current_data) - len(self.__processed_data__), component)
+            with timer("process_data.missing_values", component):
+                self.missing_values()
+        with timer("process_data.remove_outliers", component):
+            self.remove_outliers()
+        with timer("process_data.generate_features", component):
+            self.generate_features()
+        with timer("process_data.update_history", component):
+            self.update_history()
 
         return self.__processed_data__
+
+    def process_bar(self,
+                    timestamp: Any,
+                    prices: ndarray,
+                    cleaned: bool = False) -> Dict[str, ndarray]:
+        """
+        Streaming counterpart of process_data for a single bar, working on NumPy arrays only. This
+        is an opt-in hook used by IAlgorithm.on_bar; preprocessors that do not override it are fed
+        one-row DataFrames through process_data instead.
+
+        :param timestamp: Timestamp of the bar, preferably a numpy.datetime64
+        :param prices: 1-D NumPy array with one price per ticker, in ticker order
+        :param cleaned: Boolean. True when the bar was already cleaned by a shared preprocessor,
+                        see process_data. Duplicate timestamps and missing values are then not
+                        handled again
+
+        :returns: Dictionary mapping feature names (e.g. "price") to 1-D arrays with one value
+                  per ticker
+        """
+
+        raise INTERFACE_NOT_IMPLEMENTED_ERROR
+
+    def supports_bars(self) -> bool:
+        """
+        Whether this preprocessor provides the streaming process_bar hook.
+
+        :returns: True if process_bar is overridden by the implementation.
+        """
+
+        return type(self).process_bar is not IPreProcessData.process_bar
+
+    def append_history_row(self, timestamp: Any, names: List[str], row: ndarray) -> None:
+        """
+        Append a single processed bar to the history without building a DataFrame.
+
+        :param timestamp: Timestamp of the bar
+        :param names: List of history column names, one per value. Pass the same list every time
+        :param row: 1-D float NumPy array of values
+        """
+
+        self._history_buffer().append_row(timestamp, names, row)
+
+    def update_history(self) -> None:
+        """
+        Append the processed data to the history. The history is kept in a HistoryBuffer; a
+        DataFrame assigned to __data_history__ directly is converted on the first update.
+        """
+
+        self._history_buffer().append(self.__processed_data__)
+
+    def _remove_duplicate_timestamps(self) -> None:
+        """
+        Drop the processed bars whose timestamp was already processed, in this batch or in an
+        earlier one, with the deduplicator.
+        """
+
+        self._seed_deduplicator()
+        self.__processed_data__ = self.__deduplicator__.deduplicate(self.__processed_data__)
+
+    def _accept_bar(self, timestamp: Any) -> bool:
+        """
+        Streaming counterpart of _remove_duplicate_timestamps for a single bar.
+
+        :param timestamp: Timestamp of the bar
+
+        :returns: True if the bar is new and is kept.
+        """
+
+        self._seed_deduplicator()
+        return self.__deduplicator__.accept(timestamp)
+
+    def _clean_bar(self,
+                   timestamp: Any,
+                   prices: ndarray,
+                   cleaned: bool,
+                   columns: List[str]) -> Optional[ndarray]:
+        """
+        Streaming counterpart of the duplicate timestamp and missing value steps of process_data.
+
+        :param timestamp: Timestamp of the bar
+        :param prices: 1-D NumPy array of values, one per imputer column
+        :param cleaned: Boolean. True when the bar was already cleaned, which returns it as is
+        :param columns: List of the history columns of the values, see _impute_bar
+
+        :returns: Cleaned values, or None when the bar is dropped
+        """
+
+        if cleaned:
+            return prices
+        if not self._accept_bar(timestamp):
+            return None
+
+        return self._impute_bar(prices, columns)
+
+    def _seed_deduplicator(self) -> None:
+        """
+        Hand the timestamps of an existing history to a deduplicator that has not seen any yet.
+        """
+
+        history = self.__data_history__
+        if self.__deduplicator__.seen() == 0 and history is not None and len(history):
+            self.__deduplicator__.seed(history.index)
+
+    def _impute_missing_values(self, columns: List[str]) -> None:
+        """
+        Fill the missing values of some columns of the processed data with the imputer, dropping
+        the bars it rejects. An imputer that has not seen any bar yet is first seeded from the
+        history.
+
+        :param columns: List of the names of the columns to fill, one per imputer column
+        """
+
+        self._seed_imputer(columns)
+
+        data = self.__processed_data__
+        filled, imputed, keep = self.__imputer__.impute_rows(
+            data[columns].to_numpy(dtype=float64)
+        )
+
+        if imputed.any() or not keep.all():
+            self.__processed_data__ = data.assign(**dict(zip(columns, filled.T)))[keep]
+
+        self._count_imputed(imputed, len(keep) - int(count_nonzero(keep)))
+
+    def _impute_bar(self, values: ndarray, columns: List[str]) -> Optional[ndarray]:
+        """
+        Streaming counterpart of _impute_missing_values for a single bar.
+
+        :param values: 1-D NumPy array of values, one per imputer column
+        :param columns: List of the names of the history columns holding the values, used to
+                        seed an imputer that has not seen any bar yet
+
+        :returns: Filled values, or None when the imputer drops the bar
+        """
+
+        self._seed_imputer(columns)
+        filled, imputed, keep = self.__imputer__.impute(values)
+
+        if not keep or imputed.any():
+            self._count_imputed(imputed, 0 if keep else 1)
+
+        return filled if keep else None
+
+    def _seed_imputer(self, columns: List[str]) -> None:
+        """
+        Hand the tail of an existing history to an imputer that has not seen any bar yet, so that
+        the first gaps after it can be filled.
+
+        :param columns: List of the names of the history columns, one per imputer column
+        """
+
+        imputer = self.__imputer__
+        history = self.__data_history__
+        if imputer.rows_seen == 0 and history is not None and len(history):
+            rows = len(history) if imputer.max_gap is None else imputer.max_gap + 1
+            imputer.seed(history.tail(rows)[columns].to_numpy(dtype=float64))
+
+    def _count_outliers(self, flags: ndarray) -> None:
+        """
+        Report the number of outliers flagged by an OutlierFilter to the instrumentation.
+        """
+
+        metrics = instrumentation()
+        if metrics.enabled:
+            metrics.count("outliers", int(count_nonzero(flags)), type(self).__name__)
+
+    def _count_imputed(self, imputed: ndarray, dropped: int) -> None:
+        """
+        Report the number of imputed values and of bars dropped as stale to the instrumentation.
+        """
+
+        metrics = instrumentation()
+        if metrics.enabled:
+            component = type(self).__name__
+            metrics.count("imputed_values", int(count_nonzero(imputed)), component)
+            metrics.count("stale_rows_dropped", dropped, component)
+
+    def _history_buffer(self) -> HistoryBuffer:
+        """
+        The history as a HistoryBuffer, converting a DataFrame or empty history first.
+        """
+
+        if not isinstance(self.__data_history__, HistoryBuffer):
+            history = HistoryBuffer(self.max_history)
+            history.append(self.__data_history__)
+            self.__data_history__ = history
+
+        return self.__data_history__
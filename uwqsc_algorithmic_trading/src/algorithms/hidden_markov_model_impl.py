@@ -4,30 +4,185 @@ Implementation of the Hidden Markov Model (HMM) algorithm.
 
 from typing import Dict, List, Any
 
+import numpy as np
 from pandas import DataFrame
 
-from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
-from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import HMMPreProcessorImpl
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface \
+    import IAlgorithm, StockPosition
+from uwqsc_algorithmic_trading.src.algorithms.position_sizing import (
+    fixed_fraction_size,
+    fixed_fraction_sizes
+)
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import performance_metrics
+from uwqsc_algorithmic_trading.src.common.gaussian_hmm import GaussianHMM
+from uwqsc_algorithmic_trading.src.common.online_hmm_filter import OnlineHMMFilter
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
+from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import (
+    HMMPreProcessorImpl,
+    log_returns
+)
+
+
+def regime_positions(states: np.ndarray, n_states: int) -> np.ndarray:
+    """
+    Map regimes, ordered from most bearish to most bullish, to StockPosition values: SHORT in the
+    most bearish regime, LONG in the most bullish one and HOLD in between.
+
+    :param states: NumPy array of regime indices
+    :param n_states: Integer representing the number of regimes
+
+    :returns: int8 NumPy array of StockPosition values shaped like states
+    """
+
+    positions = np.full(np.shape(states), StockPosition.HOLD.value, dtype=np.int8)
+    positions[states == 0] = StockPosition.SHORT.value
+    positions[states == n_states - 1] = StockPosition.LONG.value
+
+    return positions
+
+
+def regime_signals(positions: np.ndarray) -> np.ndarray:
+    """
+    Turn regime positions into trades: the regime's position on the bar where the regime changes
+    into it, HOLD otherwise. Before the first bar the regime position is taken to be HOLD.
+
+    :param positions: 2-D NumPy array of StockPosition values, shape (bars, tickers)
+
+    :returns: 2-D int8 NumPy array of StockPosition values
+    """
+
+    previous = np.zeros_like(positions)
+    previous[1:] = positions[:-1]
+
+    return np.where(positions != previous, positions, StockPosition.HOLD.value).astype(np.int8)
 
 
 class HiddenMarkovModelImpl(IAlgorithm):
     """
-   Working logic for Hidden Markov Model (HMM) algorithm.
-   """
+    Working logic for Hidden Markov Model (HMM) algorithm.
+    A Gaussian HMM is fitted to the daily log returns of every ticker. The most likely current
+    regime, given the returns seen so far, decides the position: SHORT in the most bearish regime,
+    LONG in the most bullish one, and a trade is placed when the regime changes.
+    Live bars advance the regime probabilities by one filtering step each, and the model is
+    re-estimated in the background every 'refit_interval' bars.
+    Optional parameters: 'n_states' (default 3), 'training_bars' (default 252), the number of
+    returns required before the model is fitted on the live history, and 'refit_interval'
+    (default None, no refits). 'missing_policy', 'max_gap', 'duplicate_policy', 'outlier_method',
+    'outlier_policy' and 'outlier_persistence' configure the cleaning of the prices.
+    Vectorized backtests trade like live bars unless fit was called before: the model is fitted
+    on the first 'training_bars' returns only, and no trade is placed before then.
+    """
 
     def __init__(self,
                  tickers: List[str],
                  parameters: Dict[str, Any] = None):
         name = "Hidden Markov Model"
-        data_processor = HMMPreProcessorImpl()
+        data_processor = HMMPreProcessorImpl(tickers, **{
+            key: value for key, value in (parameters or {}).items()
+            if key in ("missing_policy", "max_gap", "duplicate_policy", "outlier_method",
+                       "outlier_policy", "outlier_persistence")
+        })
+
+        self.__filter__ = OnlineHMMFilter(
+            GaussianHMM(n_states=int((parameters or {}).get("n_states", 3))),
+            data_processor.return_history,
+            (parameters or {}).get("refit_interval")
+        )
+        self.__regimes__ = np.zeros(len(tickers), dtype=np.int8)
+        self.__return_columns__ = ticker_registry().column_names(tickers, "return")
 
         super().__init__(name, tickers, data_processor, parameters)
 
+    def fit(self, prices: np.ndarray) -> None:
+        """
+        Fit the regime model on a price history, e.g. nightly on the full history.
+
+        :param prices: 2-D NumPy array of shape (bars, tickers), columns ordered like self.tickers
+        """
+
+        self.__filter__.model.fit(log_returns(prices))
+        self.__filter__.reset()
+
     def generate_signals(self, current_data: DataFrame):
-        pass
+        self._regime_trades(current_data[self.__return_columns__].to_numpy(dtype=np.float64))
+
+    def generate_bar_signals(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        return self._regime_trades(features["return"][None, :])
+
+    def _regime_trades(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Advance the regime filter over new observations and trade on regime changes.
+
+        :param observations: 2-D NumPy array of new log returns, shape (bars, tickers)
+
+        :returns: 1-D int8 NumPy array of StockPosition values of the latest bar
+        """
+
+        model_filter = self.__filter__
+
+        if not observations.size:
+            # Every row was dropped by the preprocessor, the regimes have not changed
+            signals = np.zeros(len(self.tickers), dtype=np.int8)
+            self.set_positions(signals)
+            return signals
+
+        if model_filter.model.fitted:
+            for observation in observations:
+                probabilities = model_filter.update(observation)
+        else:
+            returns = self.__data_processor__.return_history()
+            if np.sum(~np.isnan(returns).all(axis=1)) < self.parameters.get("training_bars", 252):
+                signals = np.zeros(len(self.tickers), dtype=np.int8)
+                self.set_positions(signals)
+                return signals
+
+            model_filter.model.fit(returns)
+            model_filter.reset(returns)
+            probabilities = model_filter.probabilities
+
+        states = np.argmax(probabilities, axis=1)
+        positions = regime_positions(states, model_filter.model.n_states)
+        signals = np.where(positions != self.__regimes__, positions, StockPosition.HOLD.value)
+        signals = signals.astype(np.int8)
+
+        self.__regimes__ = positions
+        self.set_positions(signals)
+        self.executing = True
+
+        return signals
 
     def calculate_position_size(self, ticker: str, price: float, portfolio_value: float) -> float:
-        pass
+        return fixed_fraction_size(self.__positions__[ticker], price, portfolio_value,
+                                   self.parameters['position_size'])
+
+    def generate_vectorized_signals(self, prices: np.ndarray) -> np.ndarray:
+        returns = log_returns(prices)
+        model = self.__filter__.model
+        start = 0
+
+        if not model.fitted:
+            # Fit a separate model on the leading returns, as _regime_trades does live, so that
+            # no signal depends on returns after it and the algorithm's own model stays unfitted
+            observed = np.cumsum(~np.isnan(returns).all(axis=1))
+            training_bars = self.parameters.get("training_bars", 252)
+            if not observed.size or observed[-1] < training_bars:
+                return np.zeros(returns.shape, dtype=np.int8)
+
+            start = int(np.argmax(observed >= training_bars))
+            model = GaussianHMM(n_states=model.n_states)
+            model.fit(returns[:start + 1])
+
+        positions = regime_positions(np.argmax(model.filter(returns), axis=2), model.n_states)
+        positions[:start] = StockPosition.HOLD.value
+
+        return regime_signals(positions)
+
+    def calculate_vectorized_position_size(self,
+                                           signals: np.ndarray,
+                                           prices: np.ndarray,
+                                           portfolio_value: float) -> np.ndarray:
+        return fixed_fraction_sizes(signals, prices, portfolio_value,
+                                    self.parameters['position_size'])
 
     @DeprecationWarning
     def execute_trades(self, capital: float) -> DataFrame:
@@ -81,10 +236,17 @@ class HiddenMarkovModelImpl(IAlgorithm):
 
         return portfolio
 
-    @DeprecationWarning
     def calculate_metrics(self, portfolio: DataFrame) -> Dict[str, float]:
         """
-        Calculate performance metrics based on Hidden Markov Model.
+        Calculate performance metrics of a portfolio, see performance_metrics, and store them in
+        self.metrics.
+
+        :param portfolio: DataFrame with a 'capital' column, e.g. returned by execute_trades
 
-        This function is now deprecated.
+        :returns: Dictionary mapping metric names to floats
         """
+
+        self.metrics = performance_metrics(portfolio["capital"].to_numpy(dtype=np.float64))
+        self.metrics["trade_count"] = self.__trade_count__
+
+        return self.metrics
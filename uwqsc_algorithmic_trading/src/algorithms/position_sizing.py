@@ -0,0 +1,57 @@
+"""
+Position sizing shared by the algorithms. A position is a fixed fraction of the portfolio value,
+bought when LONG, sold short when SHORT and not traded otherwise.
+"""
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import StockPosition
+
+
+def fixed_fraction_size(position: StockPosition,
+                        price: float,
+                        portfolio_value: float,
+                        fraction: float) -> float:
+    """
+    Number of shares of one ticker to trade.
+
+    :param position: StockPosition of the ticker
+    :param price: Float. Price of the ticker
+    :param portfolio_value: Float. Value of the portfolio
+    :param fraction: Float. Share of the portfolio value traded per position
+
+    :returns: Float. Positive to buy, negative to sell short, zero to hold
+    """
+
+    base_position_size: float = fraction * portfolio_value
+    position_size: float = 0.0
+
+    if position == StockPosition.LONG:
+        position_size = base_position_size / price
+    elif position == StockPosition.SHORT:
+        position_size = -1 * (base_position_size / price)
+
+    return position_size
+
+
+def fixed_fraction_sizes(signals: np.ndarray,
+                         prices: np.ndarray,
+                         portfolio_value: float,
+                         fraction: float) -> np.ndarray:
+    """
+    Vectorized counterpart of fixed_fraction_size.
+
+    :param signals: 2-D NumPy array of StockPosition values, shape (bars, tickers)
+    :param prices: 2-D NumPy array of prices shaped like signals
+    :param portfolio_value: Float. Value of the portfolio
+    :param fraction: Float. Share of the portfolio value traded per position
+
+    :returns: 2-D NumPy array with the number of shares to trade per bar and ticker
+    """
+
+    base_position_size: float = fraction * portfolio_value
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        position_size = signals * (base_position_size / prices)
+
+    return np.where(signals == 0, 0.0, position_size)
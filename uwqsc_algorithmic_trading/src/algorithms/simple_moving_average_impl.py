@@ -3,70 +3,122 @@ Implementation of the Simple Moving Average (SMA) algorithm.
 """
 
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+import numpy as np
 import pandas as pd
 
 from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface \
     import IAlgorithm, StockPosition
+from uwqsc_algorithmic_trading.src.algorithms.position_sizing import (
+    fixed_fraction_size,
+    fixed_fraction_sizes
+)
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
 from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import SMAPreProcessorImpl
 
 
+def crossover_signals(short: np.ndarray, long: np.ndarray) -> np.ndarray:
+    """
+    Turn short and long moving averages into crossover signals: LONG on the bar where the short
+    average crosses above the long one, SHORT where it crosses back below, HOLD otherwise.
+
+    :param short: 2-D NumPy array of short moving averages, shape (bars, tickers)
+    :param long: 2-D NumPy array of long moving averages, shape (bars, tickers)
+
+    :returns: 2-D int8 NumPy array of StockPosition values, HOLD on the first bar
+    """
+
+    above = short > long
+    was_above = np.zeros_like(above)
+    was_above[1:] = above[:-1]
+
+    signals = np.zeros(short.shape, dtype=np.int8)
+    signals[1:][above[1:] & ~was_above[1:]] = StockPosition.LONG.value
+    signals[1:][~above[1:] & was_above[1:]] = StockPosition.SHORT.value
+
+    return signals
+
+
 class SimpleMovingAverageImpl(IAlgorithm):
     """
     Working logic for Simple Moving Average (SMA) algorithm.
+    The optional parameters 'short_window', 'long_window', 'outlier_method', 'outlier_policy',
+    'outlier_persistence', 'missing_policy' and 'max_gap' configure the preprocessor.
     """
 
     def __init__(self,
                  tickers: List[str],
                  parameters: Dict[str, Any] = None):
         name = "Simple Moving Average"
-        data_processor = SMAPreProcessorImpl(tickers)
-
-        self.__current_short__: Dict[str, int] = {}
-        self.__current_long__: Dict[str, int] = {}
-        self.__previous_short__: Dict[str, int] = {}
-        self.__previous_long__: Dict[str, int] = {}
+        settings: Dict[str, Any] = {
+            key: int(value) for key, value in (parameters or {}).items()
+            if key in ("short_window", "long_window", "outlier_persistence")
+        }
+        settings.update({
+            key: value for key, value in (parameters or {}).items()
+            if key in ("outlier_method", "outlier_policy", "missing_policy", "max_gap")
+        })
+        data_processor = SMAPreProcessorImpl(tickers, **settings)
+
+        # Latest and previous moving averages of every ticker, in the order of tickers
+        self.__current_short__ = np.full(len(tickers), np.nan)
+        self.__current_long__ = np.full(len(tickers), np.nan)
+        self.__previous_short__ = np.full(len(tickers), np.nan)
+        self.__previous_long__ = np.full(len(tickers), np.nan)
+        self.__above__: Optional[np.ndarray] = None
+        self.__short_columns__ = ticker_registry().column_names(tickers, "short")
+        self.__long_columns__ = ticker_registry().column_names(tickers, "long")
 
         super().__init__(name, tickers, data_processor, parameters)
 
     def generate_signals(self, current_data: pd.DataFrame):
-        if not self.executing:
-            for ticker in self.tickers:
-                short_col = f"{ticker}_short"
-                long_col = f"{ticker}_long"
-
-                self.__current_short__[ticker] = current_data[short_col].iloc[-1]
-                self.__current_long__[ticker] = current_data[long_col].iloc[-1]
+        self.__previous_short__ = self.__current_short__
+        self.__previous_long__ = self.__current_long__
+        self.__current_short__ = current_data[self.__short_columns__].to_numpy(np.float64)[-1]
+        self.__current_long__ = current_data[self.__long_columns__].to_numpy(np.float64)[-1]
 
-                self.__positions__[ticker] = random.choice(list(StockPosition))
+        if not self.executing:
+            self.set_positions(np.array([
+                random.choice(list(StockPosition)).value for _ in self.tickers
+            ], dtype=np.int8))
             self.executing = True
         else:
-            for ticker in self.tickers:
-                short_col = f"{ticker}_short"
-                long_col = f"{ticker}_long"
-
-                self.__previous_short__[ticker] = self.__current_short__[ticker]
-                self.__previous_long__[ticker] = self.__current_long__[ticker]
-                self.__current_short__[ticker] = current_data[short_col].iloc[-1]
-                self.__current_long__[ticker] = current_data[long_col].iloc[-1]
-
-                if (self.__previous_short__[ticker] <= self.__previous_long__[ticker] and
-                        self.__current_short__[ticker] > self.__current_long__[ticker]):
-                    self.__positions__[ticker] = StockPosition.LONG
-                elif (self.__previous_short__[ticker] > self.__previous_long__[ticker] and
-                        self.__current_short__[ticker] <= self.__current_long__[ticker]):
-                    self.__positions__[ticker] = StockPosition.SHORT
-                else:
-                    self.__positions__[ticker] = StockPosition.HOLD
+            # Comparisons are written out, as missing averages must neither be above nor below
+            previous_short, previous_long = self.__previous_short__, self.__previous_long__
+            short, long = self.__current_short__, self.__current_long__
+
+            signals = np.zeros(len(self.tickers), dtype=np.int8)
+            signals[(previous_short <= previous_long) & (short > long)] = StockPosition.LONG.value
+            signals[(previous_short > previous_long) & (short <= long)] = StockPosition.SHORT.value
+            self.set_positions(signals)
 
     def calculate_position_size(self, ticker: str, price: float, portfolio_value: float) -> float:
-        base_position_size: float = self.parameters['position_size'] * portfolio_value
-        position_size: float = 0.0
+        return fixed_fraction_size(self.__positions__[ticker], price, portfolio_value,
+                                   self.parameters['position_size'])
+
+    def generate_bar_signals(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        above = features["short"] > features["long"]
+        signals = np.zeros(len(above), dtype=np.int8)
+
+        if self.__above__ is not None:
+            signals[above & ~self.__above__] = StockPosition.LONG.value
+            signals[~above & self.__above__] = StockPosition.SHORT.value
+
+        self.__above__ = above
+        self.set_positions(signals)
+        self.executing = True
+
+        return signals
+
+    def generate_vectorized_signals(self, prices: np.ndarray) -> np.ndarray:
+        short, long = self.__data_processor__.generate_vectorized_short_long_window(prices)
 
-        if self.__positions__[ticker] == StockPosition.LONG:
-            position_size = base_position_size / price
-        elif self.__positions__[ticker] == StockPosition.SHORT:
-            position_size = -1 * (base_position_size / price)
+        return crossover_signals(short, long)
 
-        return position_size
+    def calculate_vectorized_position_size(self,
+                                           signals: np.ndarray,
+                                           prices: np.ndarray,
+                                           portfolio_value: float) -> np.ndarray:
+        return fixed_fraction_sizes(signals, prices, portfolio_value,
+                                    self.parameters['position_size'])
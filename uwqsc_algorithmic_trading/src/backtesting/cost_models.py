@@ -0,0 +1,109 @@
+"""
+This file contains the trading cost models of the execution simulator: slippage proportional to
+the price or fixed per share, commissions proportional to the traded value or charged per share,
+and a fixed annual borrow rate on short positions.
+"""
+
+from typing import Sequence, Union
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.interfaces.execution.cost_model_interface import (
+    IBorrowModel,
+    ICommissionModel,
+    ISlippageModel
+)
+
+
+class ProportionalSlippage(ISlippageModel):
+    """
+    Fills buys a fraction above the price and sells the same fraction below it.
+    """
+
+    def __init__(self, rate: float = 0.0):
+        """
+        :param rate: Float. Slippage as a fraction of the price, e.g. 0.0005 for 5 basis points
+        """
+
+        self.rate = rate
+
+    def fill_prices(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        return prices * (1 + self.rate * np.sign(quantities))
+
+
+class FixedSlippage(ISlippageModel):
+    """
+    Fills buys a fixed amount above the price and sells the same amount below it, e.g. half of a
+    quoted spread.
+    """
+
+    def __init__(self, per_share: float):
+        """
+        :param per_share: Float. Slippage per share, in the currency of the prices
+        """
+
+        self.per_share = per_share
+
+    def fill_prices(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        return prices + self.per_share * np.sign(quantities)
+
+
+class ProportionalCommission(ICommissionModel):
+    """
+    Charges a fraction of the traded value, with an optional minimum per fill.
+    """
+
+    def __init__(self, rate: float = 0.0, minimum: float = 0.0):
+        """
+        :param rate: Float. Commission as a fraction of the traded value
+        :param minimum: Float. Smallest commission of a fill
+        """
+
+        self.rate = rate
+        self.minimum = minimum
+
+    def commissions(self, fill_prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        fees = np.maximum(self.rate * np.abs(fill_prices * quantities), self.minimum)
+        return np.where(quantities != 0, fees, 0.0)
+
+
+class PerShareCommission(ICommissionModel):
+    """
+    Charges a fixed amount per share, with an optional minimum per fill and a cap as a fraction
+    of the traded value, like most retail brokers.
+    """
+
+    def __init__(self, per_share: float, minimum: float = 0.0, maximum_rate: float = np.inf):
+        """
+        :param per_share: Float. Commission per share
+        :param minimum: Float. Smallest commission of a fill
+        :param maximum_rate: Float. Largest commission of a fill as a fraction of the traded value
+        """
+
+        self.per_share = per_share
+        self.minimum = minimum
+        self.maximum_rate = maximum_rate
+
+    def commissions(self, fill_prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        shares = np.abs(quantities)
+        fees = np.minimum(np.maximum(self.per_share * shares, self.minimum),
+                          self.maximum_rate * shares * np.abs(fill_prices))
+        return np.where(quantities != 0, fees, 0.0)
+
+
+class FixedRateBorrow(IBorrowModel):
+    """
+    Charges an annual rate on the value of short positions, one rate for every ticker or one per
+    ticker for hard to borrow names.
+    """
+
+    def __init__(self, annual_rate: Union[float, Sequence[float]] = 0.0):
+        """
+        :param annual_rate: Float, or sequence with one rate per ticker. Fee per year as a
+                            fraction of the short value, e.g. 0.003 for general collateral
+        """
+
+        self.annual_rate = np.asarray(annual_rate, dtype=np.float64)
+
+    def borrow_costs(self, short_values: np.ndarray, years: float) -> np.ndarray:
+        return self.annual_rate * short_values * years
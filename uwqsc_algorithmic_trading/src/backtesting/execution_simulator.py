@@ -0,0 +1,406 @@
+"""
+Event-driven execution simulator. IAlgorithm.on_bar only says what an algorithm wants to trade on
+a bar; the simulator turns those costs into orders, fills them on a later bar at that bar's prices
+with slippage and commissions, charges borrow fees on short positions, and books everything on
+array-based cash and holdings.
+
+Events wait in a heap ordered by time, then by kind, then by arrival. At the same timestamp a bar
+is handled before the orders placed on it, so orders always fill on a later bar:
+
+1. Short positions held since the previous bar pay the borrow fees accrued meanwhile
+2. Orders that are due fill at the bar's prices, adjusted by the slippage model, and pay their
+   commissions
+3. The algorithm sees the bar and places orders for the bar latency bars later
+
+Bars with a missing price for a ticker reject the orders of that ticker due on that bar, which are
+counted by the ledger.
+"""
+
+import heapq
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Index
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.interfaces.execution.cost_model_interface import (
+    IBorrowModel,
+    ICommissionModel,
+    ISlippageModel
+)
+from uwqsc_algorithmic_trading.src.backtesting.cost_models import (
+    FixedRateBorrow,
+    ProportionalCommission,
+    ProportionalSlippage
+)
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import (
+    BARS_PER_YEAR,
+    performance_metrics
+)
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import price_matrix
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import (
+    timestamp_key,
+    timestamp_keys
+)
+
+# Kinds of events, in the order they are handled at the same timestamp
+BAR_EVENT = 0
+ORDER_EVENT = 1
+
+NANOSECONDS_PER_YEAR = 365.25 * 24 * 3600 * 1e9
+
+# Per-bar arrays of the ledger and whether they hold one value per ticker
+LEDGER_COLUMNS = {
+    "capital": False,
+    "cash": False,
+    "holdings": True,
+    "fills": True,
+    "fill_prices": True,
+    "commissions": True,
+    "slippage": True,
+    "borrow": True,
+}
+
+
+@dataclass
+class ExecutionCosts:
+    """
+    Cost models of a simulation. The defaults are free of any cost.
+    """
+
+    slippage: ISlippageModel = field(default_factory=ProportionalSlippage)
+    commission: ICommissionModel = field(default_factory=ProportionalCommission)
+    borrow: IBorrowModel = field(default_factory=FixedRateBorrow)
+
+
+@dataclass
+class SimulationResult:
+    """
+    Outcome of a simulation. Two-dimensional arrays have one row per bar and one column per
+    ticker, in the order of the algorithm's tickers. Fills are signed numbers of shares, fill
+    prices are NaN where nothing was filled, and slippage is the cost of filling away from the
+    bar's price.
+    """
+
+    index: Index
+    tickers: List[str]
+    capital: np.ndarray
+    cash: np.ndarray
+    holdings: np.ndarray
+    fills: np.ndarray
+    fill_prices: np.ndarray
+    commissions: np.ndarray
+    slippage: np.ndarray
+    borrow: np.ndarray
+
+    def to_frame(self) -> DataFrame:
+        """
+        Summarise the simulation per bar.
+
+        :returns: DataFrame with capital, cash and the costs of every bar
+        """
+
+        return DataFrame(index=self.index, data={
+            "capital": self.capital,
+            "cash": self.cash,
+            "commissions": self.commissions.sum(axis=1),
+            "slippage": self.slippage.sum(axis=1),
+            "borrow": self.borrow.sum(axis=1),
+        })
+
+    def metrics(self, bars_per_year: int = BARS_PER_YEAR) -> Dict[str, float]:
+        """
+        Performance metrics of the capital curve, see performance_metrics, with the number of
+        fills and the total costs.
+
+        :param bars_per_year: Integer used to annualize volatility, Sharpe and Sortino
+
+        :returns: Dictionary mapping metric names to floats
+        """
+
+        traded = np.abs(np.nan_to_num(self.fill_prices) * self.fills).sum(axis=1)
+        metrics = performance_metrics(self.capital, traded, bars_per_year)
+        metrics["trade_count"] = int(np.count_nonzero(self.fills))
+        metrics["commissions"] = float(self.commissions.sum())
+        metrics["slippage"] = float(self.slippage.sum())
+        metrics["borrow"] = float(self.borrow.sum())
+
+        return metrics
+
+
+class ExecutionLedger:
+    """
+    Cash, holdings and latest prices of an account, with growable per-bar arrays recording every
+    bar. Rows are written in place, so recording a bar does not copy the history.
+    """
+
+    def __init__(self, width: int, cash: float, capacity: int = 1024):
+        """
+        Initialize an account holding only cash.
+
+        :param width: Integer representing the number of tickers
+        :param cash: Float. Initial cash
+        :param capacity: Integer representing the number of bars allocated up front
+        """
+
+        self.cash = float(cash)
+        self.holdings = np.zeros(width)
+        # Latest price of every ticker, 0 until a ticker gets its first price
+        self.marks = np.zeros(width)
+        self.bars = 0
+        self.last_key = 0
+        self.rejected_orders = 0
+        self.timestamps: List[Any] = []
+        self.__columns__ = {
+            name: np.zeros((capacity, width) if per_ticker else capacity)
+            for name, per_ticker in LEDGER_COLUMNS.items()
+        }
+
+    def value(self) -> float:
+        """
+        :returns: Float. Cash plus the holdings marked at the latest prices.
+        """
+
+        return self.cash + float(self.holdings @ self.marks)
+
+    def record(self, key: int, timestamp: Any, **rows: np.ndarray) -> None:
+        """
+        Record the state of the account after a bar, with the fills and costs of the bar.
+
+        :param key: Integer key of the timestamp, see timestamp_key
+        :param timestamp: Timestamp of the bar
+        :param rows: Arrays of the bar for the per-ticker columns of LEDGER_COLUMNS. Missing ones
+                     are recorded as zeros
+        """
+
+        columns = self.__columns__
+        row = self.bars
+
+        if row == len(columns["cash"]):
+            for name, values in columns.items():
+                grown = np.zeros((2 * len(values),) + values.shape[1:])
+                grown[:row] = values
+                columns[name] = grown
+
+        columns["cash"][row] = self.cash
+        columns["capital"][row] = self.value()
+        columns["holdings"][row] = self.holdings
+        for name, values in rows.items():
+            columns[name][row] = values
+
+        self.timestamps.append(timestamp)
+        self.last_key = key
+        self.bars += 1
+
+    def result(self, tickers: List[str]) -> SimulationResult:
+        """
+        :param tickers: List of ticker symbols, one per column
+
+        :returns: SimulationResult with copies of the recorded bars.
+        """
+
+        timestamps = self.timestamps
+        if timestamps and isinstance(timestamps[0], (int, np.integer)):
+            index = Index(timestamps)
+        else:
+            index = DatetimeIndex(timestamps)
+
+        columns = {name: values[:self.bars].copy() for name, values in self.__columns__.items()}
+        fill_prices = columns.pop("fill_prices")
+        fill_prices[columns["fills"] == 0] = np.nan
+
+        return SimulationResult(index=index, tickers=list(tickers), fill_prices=fill_prices,
+                                **columns)
+
+
+class ExecutionSimulator:
+    """
+    Runs one IAlgorithm through an event loop, filling its orders with costs. Bars can be given
+    all at once with run, or streamed with schedule_bar and process_events.
+    """
+
+    def __init__(self,
+                 algorithm: IAlgorithm,
+                 capital: float,
+                 costs: Optional[ExecutionCosts] = None,
+                 latency: int = 1,
+                 bars_per_year: int = BARS_PER_YEAR):
+        """
+        Initialize the simulator.
+
+        :param algorithm: IAlgorithm placing the orders
+        :param capital: Float. Initial cash, also the capital the algorithm sizes its orders with
+        :param costs: Optional ExecutionCosts. Defaults to no costs
+        :param latency: Integer representing the number of bars between an order and its fill
+        :param bars_per_year: Integer used to accrue borrow fees when bars are numbered instead of
+                              dated, and to annualize the metrics
+        """
+
+        if latency < 1:
+            raise ValueError(f"Orders fill at the earliest on the next bar, got latency {latency}")
+
+        self.algorithm = algorithm
+        self.capital = capital
+        self.costs = costs or ExecutionCosts()
+        self.latency = latency
+        self.bars_per_year = bars_per_year
+        self.ledger = ExecutionLedger(len(algorithm.tickers), capital)
+        self.events = 0
+        self.__queue__: List[Tuple] = []
+        self.__sequence__ = itertools.count()
+        self.__pending__: Deque[Tuple[int, np.ndarray]] = deque()
+
+    def schedule_bar(self, timestamp: Any, prices: np.ndarray) -> None:
+        """
+        Add a bar to the event queue.
+
+        :param timestamp: Timestamp of the bar, a date or an integer bar number
+        :param prices: 1-D NumPy array with one price per ticker, in the order of the algorithm's
+                       tickers
+        """
+
+        heapq.heappush(self.__queue__, (timestamp_key(timestamp), BAR_EVENT,
+                                        next(self.__sequence__), timestamp,
+                                        np.asarray(prices, dtype=np.float64)))
+
+    def submit_order(self, timestamp: Any, quantities: np.ndarray) -> None:
+        """
+        Add an order from outside the algorithm, e.g. a manual rebalance. It is placed after the
+        bar with the same timestamp and fills latency bars later.
+
+        :param timestamp: Timestamp the order is placed at
+        :param quantities: 1-D NumPy array with the signed number of shares of every ticker
+        """
+
+        heapq.heappush(self.__queue__, (timestamp_key(timestamp), ORDER_EVENT,
+                                        next(self.__sequence__), timestamp,
+                                        np.asarray(quantities, dtype=np.float64)))
+
+    def process_events(self) -> int:
+        """
+        Handle every event in the queue, in order.
+
+        :returns: Integer representing the number of events handled
+        """
+
+        queue = self.__queue__
+        handled = 0
+
+        while queue:
+            key, kind, _, timestamp, values = heapq.heappop(queue)
+            if kind == BAR_EVENT:
+                self._on_bar(key, timestamp, values)
+            else:
+                self._on_order(values)
+            handled += 1
+
+        self.events += handled
+
+        return handled
+
+    def run(self, prices: Union[DataFrame, PricePanel, np.ndarray]) -> SimulationResult:
+        """
+        Simulate a full price panel. The metrics of the run are stored in algorithm.metrics.
+
+        :param prices: DataFrame with a "{ticker}_price" column per ticker, a PricePanel, or a 2-D
+                       NumPy array whose columns are ordered like the algorithm's tickers
+
+        :returns: SimulationResult of every bar simulated so far
+        """
+
+        values, index = price_matrix(prices, self.algorithm.tickers)
+        timestamps = index.to_numpy()
+        keys = timestamp_keys(index)
+        sequence = self.__sequence__
+
+        self.__queue__.extend(
+            (key, BAR_EVENT, next(sequence), timestamp, row)
+            for key, timestamp, row in zip(keys.tolist(), timestamps, values)
+        )
+        heapq.heapify(self.__queue__)
+        self.process_events()
+
+        result = self.ledger.result(self.algorithm.tickers)
+        self.algorithm.metrics = result.metrics(self.bars_per_year)
+
+        return result
+
+    def _on_bar(self, key: int, timestamp: Any, prices: np.ndarray) -> None:
+        """
+        Accrue borrow fees, fill the orders due on a bar, then let the algorithm trade.
+        """
+
+        ledger = self.ledger
+        tradable = np.isfinite(prices) & (prices > 0)
+        all_tradable = tradable.all()
+        ledger.marks = prices if all_tradable else np.where(tradable, prices, ledger.marks)
+        rows: Dict[str, np.ndarray] = {}
+
+        if ledger.bars and ledger.holdings.min() < 0:
+            elapsed = key - ledger.last_key
+            years = (elapsed / self.bars_per_year if isinstance(timestamp, (int, np.integer))
+                     else elapsed / NANOSECONDS_PER_YEAR)
+            borrow = self.costs.borrow.borrow_costs(
+                np.maximum(-ledger.holdings, 0.0) * ledger.marks, years
+            )
+            ledger.cash -= borrow.sum()
+            rows["borrow"] = borrow
+
+        pending = self.__pending__
+        if pending and pending[0][0] <= ledger.bars:
+            quantities = pending.popleft()[1]
+            while pending and pending[0][0] <= ledger.bars:
+                quantities = quantities + pending.popleft()[1]
+            rows.update(self._fill(quantities, prices, tradable))
+
+        costs = self.algorithm.on_bar(self.capital, prices, timestamp)
+        ledger.record(key, timestamp, **rows)
+
+        if costs.any():
+            if all_tradable:
+                orders = costs / prices
+                orders[~np.isfinite(orders)] = 0.0
+            else:
+                orders = np.divide(costs, prices, out=np.zeros(len(prices)),
+                                   where=tradable & np.isfinite(costs))
+            heapq.heappush(self.__queue__, (key, ORDER_EVENT, next(self.__sequence__),
+                                            timestamp, orders))
+
+    def _on_order(self, quantities: np.ndarray) -> None:
+        """
+        Queue an order to fill latency bars after the latest bar.
+        """
+
+        self.__pending__.append((self.ledger.bars - 1 + self.latency, quantities))
+
+    def _fill(self,
+              quantities: np.ndarray,
+              prices: np.ndarray,
+              tradable: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Fill orders at the prices of a bar and book them, rejecting tickers without a price.
+        """
+
+        ledger = self.ledger
+        rejected = (quantities != 0) & ~tradable
+        if rejected.any():
+            ledger.rejected_orders += int(np.count_nonzero(rejected))
+            quantities = np.where(rejected, 0.0, quantities)
+
+        prices = np.where(tradable, prices, 0.0)
+        fill_prices = self.costs.slippage.fill_prices(prices, quantities)
+        commissions = self.costs.commission.commissions(fill_prices, quantities)
+
+        ledger.cash -= quantities @ fill_prices + commissions.sum()
+        ledger.holdings += quantities
+
+        return {
+            "fills": quantities,
+            "fill_prices": fill_prices,
+            "commissions": commissions,
+            "slippage": (fill_prices - prices) * quantities,
+        }
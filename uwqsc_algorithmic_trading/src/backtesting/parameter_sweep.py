@@ -0,0 +1,195 @@
+"""
+Parallel parameter sweep for the Simple Moving Average algorithm. A grid of short_window,
+long_window and position_size values is fanned out over a process pool. Workers memory-map one
+shared PricePanel instead of receiving pickled prices, and every worker keeps the moving averages
+it computes in its indicator cache. The grid points are sorted by short window and split into a
+few tasks per worker, so that every worker stays busy while a short window paired with many long
+windows is averaged by as few workers as possible.
+"""
+
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl,
+    crossover_signals
+)
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import VectorizedBacktest
+from uwqsc_algorithmic_trading.src.common.indicator_cache import shared_indicator_cache
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import trailing_mean
+
+# State of a sweep worker process, set once by the pool initializer.
+_WORKER_STATE: Dict[str, Any] = {}
+
+# Number of tasks handed to every worker, so that uneven tasks still balance out.
+TASKS_PER_WORKER = 4
+
+# Parameters every grid needs.
+REQUIRED_PARAMETERS = ("short_window", "long_window", "position_size")
+
+
+def _initialize_worker(panel_path: str, tickers: List[str], settings: Dict[str, float]) -> None:
+    """
+    Open the shared price panel in a worker process.
+    """
+
+    panel = PricePanel.open(panel_path)
+
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(panel=panel, prices=panel.select(tickers), tickers=tickers, **settings)
+
+
+def _moving_average(window: int) -> np.ndarray:
+    """
+    Trailing mean of the worker's prices, looked up in the indicator cache under the panel version.
+    """
+
+    tickers = _WORKER_STATE["tickers"]
+
+    return shared_indicator_cache().columns(
+        _WORKER_STATE["prices"],
+        tickers,
+        "sma",
+        (window,),
+        partial(trailing_mean, window=window),
+        [_WORKER_STATE["panel"].version] * len(tickers)
+    )
+
+
+def _evaluate(grid_points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Backtest a group of grid points in a worker process.
+    """
+
+    rows = []
+
+    for point in grid_points:
+        signals = crossover_signals(
+            _moving_average(point["short_window"]),
+            _moving_average(point["long_window"])
+        )
+        algorithm = SimpleMovingAverageImpl(_WORKER_STATE["tickers"], point)
+        backtest = VectorizedBacktest(
+            algorithm,
+            _WORKER_STATE["commission_rate"],
+            _WORKER_STATE["slippage_rate"]
+        )
+        backtest.run_signals(
+            _WORKER_STATE["prices"],
+            signals,
+            _WORKER_STATE["capital"]
+        )
+
+        rows.append({**point, **algorithm.metrics})
+
+    return rows
+
+
+def parameter_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand a grid into its combinations, leaving out short windows that are not shorter than the
+    long window.
+
+    :param grid: Dictionary mapping parameter names to the values to try
+
+    :returns: List of parameter dictionaries
+    """
+
+    names = list(grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+    return [
+        point for point in points
+        if point.get("short_window", 0) < point.get("long_window", np.inf)
+    ]
+
+
+def split_by_short_window(points: List[Dict[str, Any]],
+                          tasks: int) -> List[List[Dict[str, Any]]]:
+    """
+    Split grid points sorted by short window into at most 'tasks' tasks of nearly equal size, so
+    that the points of a short window end up in as few tasks as possible.
+
+    :param points: List of parameter dictionaries, see parameter_grid
+    :param tasks: Integer representing the number of tasks wanted
+
+    :returns: List of tasks, each a list of parameter dictionaries
+    """
+
+    points = sorted(points, key=lambda point: point["short_window"])
+    tasks = max(1, min(tasks, len(points)))
+    bounds = [len(points) * task // tasks for task in range(tasks + 1)]
+
+    return [points[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+class ParameterSweep:
+    """
+    Evaluates a grid of SimpleMovingAverageImpl parameters over a price panel in parallel.
+    """
+
+    def __init__(self,
+                 prices: Union[PricePanel, DataFrame],
+                 capital: float,
+                 commission_rate: float = 0.0,
+                 slippage_rate: float = 0.0,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the sweep.
+
+        :param prices: PricePanel, or a DataFrame with "{ticker}_price" columns which is written
+                       to a temporary panel so that workers can share it
+        :param capital: Float. Cash allocated to every run
+        :param commission_rate: Float. Commission charged as a fraction of traded value
+        :param slippage_rate: Float. Slippage charged as a fraction of traded value
+        :param max_workers: Optional integer representing the number of worker processes
+        """
+
+        self.prices = prices
+        self.max_workers = max_workers
+        self.__settings__ = {
+            "capital": capital,
+            "commission_rate": commission_rate,
+            "slippage_rate": slippage_rate,
+        }
+
+    def run(self, grid: Dict[str, Sequence[Any]]) -> DataFrame:
+        """
+        Backtest every combination of the grid.
+
+        :param grid: Dictionary with 'short_window', 'long_window' and 'position_size' values
+
+        :returns: DataFrame with one row per combination, ordered by short window, holding its
+                  parameters and metrics
+        """
+
+        missing = [name for name in REQUIRED_PARAMETERS if name not in grid]
+        if missing:
+            raise ValueError(f"The grid is missing the parameters {missing}")
+
+        points = parameter_grid(grid)
+
+        with tempfile.TemporaryDirectory() as directory:
+            panel = self.prices
+            if not isinstance(panel, PricePanel):
+                panel = PricePanel.from_frame(directory, panel)
+
+            with ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_initialize_worker,
+                    initargs=(panel.path, panel.tickers, self.__settings__)
+            ) as executor:
+                tasks = split_by_short_window(
+                    points, (self.max_workers or os.cpu_count() or 1) * TASKS_PER_WORKER
+                )
+                rows = list(itertools.chain.from_iterable(executor.map(_evaluate, tasks)))
+
+        return DataFrame(rows)
@@ -0,0 +1,274 @@
+"""
+Performance metrics of capital curves. Everything is computed from arrays in one vectorized pass:
+a curve of shape (bars,) gives floats, and curves of shape (bars, runs), e.g. every result of a
+parameter sweep stacked side by side, give one value per run.
+
+Metrics:
+
+- total_return: final capital over initial capital, minus one
+- volatility: annualized standard deviation of the returns of each bar
+- sharpe: annualized mean return over volatility
+- sortino: annualized mean return over the downside deviation, the root mean square of the
+  negative returns
+- max_drawdown: largest fall from a running peak, as a fraction of the peak
+- turnover: traded value per bar, as a fraction of the capital of the previous bar
+- hit_rate: share of the bars with a non-zero return whose return is positive
+
+Ratios with a zero denominator are 0. rolling_metrics computes the same metrics over a trailing
+window, and IncrementalMetrics updates them in constant time per bar for live runs.
+"""
+
+from typing import Dict, Optional, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BARS_PER_YEAR = 252
+
+Metric = Union[float, np.ndarray]
+
+
+def simple_returns(capital: np.ndarray) -> np.ndarray:
+    """
+    Return of every bar but the first.
+
+    :param capital: NumPy array of capital, shape (bars,) or (bars, runs)
+
+    :returns: NumPy array of shape (bars - 1,) or (bars - 1, runs)
+    """
+
+    capital = np.asarray(capital, dtype=np.float64)
+
+    return np.divide(np.diff(capital, axis=0), capital[:-1],
+                     out=np.zeros_like(capital[1:]), where=capital[:-1] != 0)
+
+
+def max_drawdown(capital: np.ndarray) -> Metric:
+    """
+    Largest fall from a running peak.
+
+    :param capital: NumPy array of capital, shape (bars,) or (bars, runs)
+
+    :returns: Float, or one value per run
+    """
+
+    capital = np.asarray(capital, dtype=np.float64)
+    peaks = np.maximum.accumulate(capital, axis=0)
+    drawdowns = np.divide(peaks - capital, peaks, out=np.zeros_like(capital), where=peaks > 0)
+
+    return _scalar(drawdowns.max(axis=0, initial=0.0))
+
+
+def performance_metrics(capital: np.ndarray,
+                        traded: Optional[np.ndarray] = None,
+                        bars_per_year: int = BARS_PER_YEAR) -> Dict[str, Metric]:
+    """
+    Every metric of one or many capital curves.
+
+    :param capital: NumPy array of capital, shape (bars,) or (bars, runs)
+    :param traded: Optional NumPy array with the absolute value traded on every bar, shaped like
+                   capital. Turnover is 0 without it
+    :param bars_per_year: Integer used to annualize volatility, Sharpe and Sortino
+
+    :returns: Dictionary mapping metric names to floats, or to one value per run
+    """
+
+    capital = np.asarray(capital, dtype=np.float64)
+    if len(capital) == 0:
+        raise ValueError("A capital curve needs at least one bar")
+
+    returns = simple_returns(capital)
+    bars = max(len(returns), 1)
+
+    total = returns.sum(axis=0)
+    squares = np.square(returns).sum(axis=0)
+    downside = np.square(np.minimum(returns, 0.0)).sum(axis=0)
+    wins = np.count_nonzero(returns > 0, axis=0)
+    moves = np.count_nonzero(returns, axis=0)
+
+    metrics = _ratios(total, squares, downside, bars, bars_per_year)
+    metrics["total_return"] = _scalar(np.divide(capital[-1], capital[0],
+                                                out=np.ones_like(capital[0]),
+                                                where=capital[0] != 0) - 1)
+    metrics["max_drawdown"] = max_drawdown(capital)
+    metrics["turnover"] = _scalar(_turnover(capital, traded).sum(axis=0) / bars
+                                  if traded is not None else np.zeros(capital.shape[1:]))
+    metrics["hit_rate"] = _scalar(np.divide(wins, moves, out=np.zeros(np.shape(wins)),
+                                            where=moves > 0))
+
+    return metrics
+
+
+def rolling_metrics(capital: np.ndarray,
+                    window: int,
+                    traded: Optional[np.ndarray] = None,
+                    bars_per_year: int = BARS_PER_YEAR) -> Dict[str, np.ndarray]:
+    """
+    Metrics over a trailing window of returns, for every bar. Sums are taken from cumulative
+    sums, so the cost does not grow with the window, except for the drawdown.
+
+    :param capital: NumPy array of capital, shape (bars,) or (bars, runs)
+    :param window: Integer representing the number of returns in the window
+    :param traded: Optional NumPy array with the absolute value traded on every bar
+    :param bars_per_year: Integer used to annualize volatility, Sharpe and Sortino
+
+    :returns: Dictionary mapping metric names to arrays shaped like capital. Bars without a full
+              window are NaN
+    """
+
+    if window < 1:
+        raise ValueError(f"The window must be positive, got {window}")
+
+    capital = np.asarray(capital, dtype=np.float64)
+    returns = simple_returns(capital)
+
+    def trailing(values: np.ndarray) -> np.ndarray:
+        sums = np.cumsum(values, axis=0)
+        sums[window:] = sums[window:] - sums[:-window]
+        return sums[window - 1:]
+
+    metrics = _ratios(trailing(returns), trailing(np.square(returns)),
+                      trailing(np.square(np.minimum(returns, 0.0))), window, bars_per_year)
+    metrics["total_return"] = capital[window:] / capital[:-window] - 1 if window < len(capital) \
+        else np.empty((0,) + capital.shape[1:])
+    moves = trailing(returns != 0)
+    metrics["hit_rate"] = np.divide(trailing(returns > 0), moves,
+                                    out=np.zeros(moves.shape), where=moves > 0)
+    metrics["turnover"] = (trailing(_turnover(capital, traded)) / window if traded is not None
+                           else np.zeros(moves.shape))
+
+    if window < len(capital):
+        windows = sliding_window_view(capital, window + 1, axis=0)
+        peaks = np.maximum.accumulate(windows, axis=-1)
+        drawdowns = np.divide(peaks - windows, peaks, out=np.zeros_like(windows),
+                              where=peaks > 0)
+        metrics["max_drawdown"] = drawdowns.max(axis=-1)
+    else:
+        metrics["max_drawdown"] = np.empty((0,) + capital.shape[1:])
+
+    padding = np.full((min(window, len(capital)),) + capital.shape[1:], np.nan)
+
+    return {name: np.concatenate([padding, values]) for name, values in metrics.items()}
+
+
+class IncrementalMetrics:
+    """
+    Metrics of a capital curve that grows one bar at a time, e.g. in a live dashboard. Every
+    update takes constant time, since only running sums, the peak and the drawdown are kept.
+    """
+
+    def __init__(self, bars_per_year: int = BARS_PER_YEAR):
+        """
+        Initialize metrics that have not seen any bar.
+
+        :param bars_per_year: Integer used to annualize volatility, Sharpe and Sortino
+        """
+
+        self.bars_per_year = bars_per_year
+        self.bars = 0
+        self.__first__ = 0.0
+        self.__previous__ = 0.0
+        self.__peak__ = 0.0
+        self.__drawdown__ = 0.0
+        # Sums of the returns, of their squares, of the squared losses and of the turnover,
+        # followed by the number of positive and of non-zero returns
+        self.__sums__ = [0.0, 0.0, 0.0, 0.0, 0, 0]
+
+    def update(self, capital: float, traded: float = 0.0) -> None:
+        """
+        Add one bar.
+
+        :param capital: Float. Capital at the end of the bar
+        :param traded: Float. Absolute value traded on the bar
+        """
+
+        self.bars += 1
+        sums = self.__sums__
+
+        if self.bars == 1:
+            self.__first__ = self.__peak__ = capital
+        else:
+            previous = self.__previous__
+            change = (capital - previous) / previous if previous else 0.0
+            sums[0] += change
+            sums[1] += change * change
+            if change < 0:
+                sums[2] += change * change
+            elif change > 0:
+                sums[4] += 1
+            if change:
+                sums[5] += 1
+            if previous:
+                sums[3] += traded / abs(previous)
+
+            if capital > self.__peak__:
+                self.__peak__ = capital
+            elif self.__peak__ > 0:
+                self.__drawdown__ = max(self.__drawdown__, 1 - capital / self.__peak__)
+
+        self.__previous__ = capital
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        :returns: Dictionary with every metric of the bars seen so far, as performance_metrics.
+        """
+
+        sums = self.__sums__
+        bars = max(self.bars - 1, 1)
+        metrics = _ratios(sums[0], sums[1], sums[2], bars, self.bars_per_year)
+
+        metrics["total_return"] = (self.__previous__ / self.__first__ - 1
+                                   if self.__first__ else 0.0)
+        metrics["max_drawdown"] = self.__drawdown__
+        metrics["turnover"] = sums[3] / bars
+        metrics["hit_rate"] = sums[4] / sums[5] if sums[5] else 0.0
+
+        return {name: float(value) for name, value in metrics.items()}
+
+
+def _ratios(total: Metric,
+            squares: Metric,
+            downside: Metric,
+            bars: int,
+            bars_per_year: int) -> Dict[str, Metric]:
+    """
+    Volatility, Sharpe and Sortino from the sums of the returns, of their squares and of the
+    squared losses over a number of bars.
+    """
+
+    mean = np.divide(total, bars)
+    variance = np.divide(squares, bars) - np.square(mean)
+    # Constant returns leave rounding noise instead of a zero variance
+    variance = np.where(variance > 1e-12 * np.divide(squares, bars), variance, 0.0)
+    deviation = np.sqrt(variance)
+    downside_deviation = np.sqrt(np.divide(downside, bars))
+    annualization = np.sqrt(bars_per_year)
+
+    return {
+        "volatility": _scalar(annualization * deviation),
+        "sharpe": _scalar(annualization * np.divide(mean, deviation,
+                                                    out=np.zeros(np.shape(mean)),
+                                                    where=deviation > 0)),
+        "sortino": _scalar(annualization * np.divide(mean, downside_deviation,
+                                                     out=np.zeros(np.shape(mean)),
+                                                     where=downside_deviation > 0)),
+    }
+
+
+def _turnover(capital: np.ndarray, traded: np.ndarray) -> np.ndarray:
+    """
+    Traded value of every bar but the first, over the capital of the previous bar.
+    """
+
+    traded = np.abs(np.asarray(traded, dtype=np.float64))[1:]
+    previous = np.abs(capital[:-1])
+
+    return np.divide(traded, previous, out=np.zeros_like(traded), where=previous > 0)
+
+
+def _scalar(value: Metric) -> Metric:
+    """
+    Unwrap zero-dimensional arrays, so that single curves give plain floats.
+    """
+
+    return float(value) if np.ndim(value) == 0 else value
@@ -0,0 +1,190 @@
+"""
+Multi-strategy portfolio runner. Capital is allocated across many IAlgorithm instances, and every
+bar is cleaned once by a SharedPreProcessorImpl covering the union of their tickers before being
+dispatched to the algorithms. The algorithms then skip the de-duplication and missing value
+handling of their own preprocessors. Only those steps are shared: every algorithm still keeps the
+prices of its tickers in its own history, next to the features it derives from them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import IncrementalMetrics
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import price_matrix
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+from uwqsc_algorithmic_trading.src.preprocessing.shared_preprocessor_impl \
+    import SharedPreProcessorImpl
+
+
+class PortfolioRunner:
+    """
+    Runs several algorithms side by side on one stream of bars. Each algorithm trades its own
+    share of the capital and keeps its own cash and holdings. With max_workers above one, the
+    algorithms handle a bar concurrently in a thread pool; every algorithm still sees the bars
+    in order, as the runner waits for all of them before moving on to the next bar. The
+    performance metrics of every algorithm are updated on every bar, in constant time.
+    """
+
+    def __init__(self,
+                 algorithms: List[IAlgorithm],
+                 capital: float,
+                 weights: Optional[Sequence[float]] = None,
+                 max_workers: Optional[int] = None,
+                 max_history: Optional[int] = None):
+        """
+        Initialize the runner.
+
+        :param algorithms: List of IAlgorithm instances to run
+        :param capital: Float. Cash allocated to the whole portfolio
+        :param weights: Optional sequence with the share of the capital of every algorithm. Weights
+                        are normalized to sum to one. Defaults to equal weights
+        :param max_workers: Optional integer representing the number of threads dispatching a bar
+                            to the algorithms. None or 1 runs them one after the other
+        :param max_history: Optional integer representing the maximum number of rows of shared
+                            price history to keep
+        """
+
+        if not algorithms:
+            raise ValueError("A portfolio needs at least one algorithm")
+
+        weights = np.ones(len(algorithms)) if weights is None else np.asarray(weights, float)
+        if weights.shape != (len(algorithms),) or np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError(
+                f"Expected {len(algorithms)} non-negative weights with a positive sum, "
+                f"got {weights}"
+            )
+
+        self.algorithms = algorithms
+        self.tickers = list(dict.fromkeys(
+            ticker for algorithm in algorithms for ticker in algorithm.tickers
+        ))
+        self.data_processor = SharedPreProcessorImpl(self.tickers, max_history)
+        self.allocations = capital * weights / weights.sum()
+        self.cash = self.allocations.copy()
+        self.holdings = [np.zeros(len(algorithm.tickers)) for algorithm in algorithms]
+        self.__metrics__ = [IncrementalMetrics() for _ in algorithms]
+
+        positions = {ticker: column for column, ticker in enumerate(self.tickers)}
+        self.__columns__ = [
+            np.array([positions[ticker] for ticker in algorithm.tickers])
+            for algorithm in algorithms
+        ]
+        self.__prices__ = np.full(len(self.tickers), np.nan)
+        self.__executor__: Optional[ThreadPoolExecutor] = None
+        if max_workers is not None and max_workers > 1:
+            self.__executor__ = ThreadPoolExecutor(max_workers, thread_name_prefix="portfolio")
+
+    def on_bar(self, prices: np.ndarray, timestamp: Any = None) -> Optional[List[np.ndarray]]:
+        """
+        Clean one bar of the universe and hand it to every algorithm.
+
+        :param prices: 1-D NumPy array with one price per ticker, in the order of self.tickers
+        :param timestamp: Timestamp of the bar, preferably a numpy.datetime64
+
+        :returns: List with the cost per ticker of every algorithm, or None when the bar was
+                  dropped as a repeated timestamp
+        """
+
+        features = self.data_processor.process_bar(timestamp, np.asarray(prices, np.float64))
+        if not features:
+            return None
+
+        prices = features["price"]
+        self.__prices__ = prices
+
+        def trade(position: int) -> np.ndarray:
+            return self.algorithms[position].on_bar(
+                self.allocations[position],
+                prices[self.__columns__[position]],
+                timestamp,
+                cleaned=True
+            )
+
+        if self.__executor__ is None:
+            costs = [trade(position) for position in range(len(self.algorithms))]
+        else:
+            costs = list(self.__executor__.map(trade, range(len(self.algorithms))))
+
+        for position, cost in enumerate(costs):
+            self._account(position, cost, prices[self.__columns__[position]])
+
+        for tracker, value, cost in zip(self.__metrics__, self.values(), costs):
+            tracker.update(value, float(np.nansum(np.abs(cost))))
+
+        return costs
+
+    def run(self, prices: Union[DataFrame, PricePanel, np.ndarray]) -> DataFrame:
+        """
+        Stream a full price panel through the portfolio, bar by bar.
+
+        :param prices: DataFrame with a "{ticker}_price" column per ticker, a PricePanel, or a 2-D
+                       NumPy array whose columns are ordered like self.tickers
+
+        :returns: DataFrame with the value of every algorithm and of the portfolio on every bar
+        """
+
+        values, index = price_matrix(prices, self.tickers)
+        timestamps = index.to_numpy()
+        capital = np.full((len(values), len(self.algorithms)), np.nan)
+
+        for row, timestamp in enumerate(timestamps):
+            if self.on_bar(values[row], timestamp) is not None:
+                capital[row] = self.values()
+
+        frame = DataFrame(capital, index=index,
+                          columns=[algorithm.name for algorithm in self.algorithms])
+        frame["capital"] = capital.sum(axis=1)
+        self.metrics()
+
+        return frame
+
+    def values(self) -> np.ndarray:
+        """
+        :returns: 1-D NumPy array with the cash plus marked holdings of every algorithm, using the
+                  latest cleaned prices.
+        """
+
+        marks = np.nan_to_num(self.__prices__)
+
+        return np.array([
+            cash + holdings @ marks[columns]
+            for cash, holdings, columns in zip(self.cash, self.holdings, self.__columns__)
+        ])
+
+    def metrics(self) -> DataFrame:
+        """
+        Store the current performance metrics of every algorithm in its metrics attribute.
+
+        :returns: DataFrame with one row of metrics per algorithm
+        """
+
+        for algorithm, tracker in zip(self.algorithms, self.__metrics__):
+            algorithm.metrics = tracker.snapshot()
+
+        return DataFrame([algorithm.metrics for algorithm in self.algorithms],
+                         index=[algorithm.name for algorithm in self.algorithms])
+
+    def close(self) -> None:
+        """
+        Stop the dispatch threads.
+        """
+
+        if self.__executor__ is not None:
+            self.__executor__.shutdown()
+            self.__executor__ = None
+
+    def _account(self, position: int, costs: np.ndarray, prices: np.ndarray) -> None:
+        """
+        Book the trades of one algorithm against its cash and holdings.
+        """
+
+        tradable = np.isfinite(prices) & (prices != 0) & np.isfinite(costs)
+        costs = np.where(tradable, costs, 0.0)
+
+        self.holdings[position] += np.divide(costs, prices, out=np.zeros_like(costs),
+                                             where=tradable)
+        self.cash[position] -= costs.sum()
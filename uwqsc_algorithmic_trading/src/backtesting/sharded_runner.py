@@ -0,0 +1,491 @@
+"""
+Sharded execution of one algorithm over a ticker universe too large for one core. The universe is
+cut into groups of tickers, every group is run by its own IAlgorithm instance, and the groups are
+spread across shard processes. Every bar is routed to the shards by ticker, the shards run their
+groups in parallel, and the costs they send back are gathered into one portfolio view.
+
+Shards talk to the runner over a ShardBus, a local message bus built on
+multiprocessing.connection. Shards started by the runner connect over a local socket; shards on
+other hosts connect by running serve_shard with the runner's address and authentication key.
+Messages are pickled, so the bus must only be reachable by trusted hosts.
+
+Shards report the time spent on every group, and every rebalance_interval bars the runner moves
+groups from the busiest shards to the idlest ones. A group moves with its state: it is captured
+on the old shard with capture_state, sent over the bus and restored on the new shard, so it keeps
+trading as if it had never moved.
+"""
+
+import multiprocessing
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import IncrementalMetrics
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import price_matrix
+from uwqsc_algorithmic_trading.src.common.checkpoint import capture_state, restore_state
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+
+# State of a shard process: the algorithm class, its parameters and the algorithm of every group.
+_SHARD_STATE: Dict[str, Any] = {}
+
+
+def _handle(message: Tuple[Any, ...]) -> Any:
+    """
+    Handle one message from the runner in a shard process.
+    """
+
+    kind = message[0]
+    algorithms = _SHARD_STATE.get("algorithms", {})
+    reply = None
+
+    if kind == "setup":
+        _, algorithm, parameters = message
+        _SHARD_STATE.clear()
+        _SHARD_STATE.update(algorithm=algorithm, parameters=parameters, algorithms={})
+    elif kind == "import":
+        _, group, tickers, state = message
+        algorithm = _SHARD_STATE["algorithm"](tickers, _SHARD_STATE["parameters"])
+        if state is not None:
+            restore_state(algorithm, *state)
+        algorithms[group] = algorithm
+    elif kind == "export":
+        reply = capture_state(algorithms.pop(message[1]))
+    elif kind == "bars":
+        _, timestamps, capital, blocks = message
+        reply = {}
+        for group, prices in blocks.items():
+            started = time.perf_counter()
+            costs = np.array([
+                algorithms[group].on_bar(capital, row, timestamp)
+                for timestamp, row in zip(timestamps, prices)
+            ]).reshape(prices.shape)
+            reply[group] = (costs, time.perf_counter() - started)
+    else:
+        raise ValueError(f"Unknown shard message {kind!r}")
+
+    return reply
+
+
+def serve_shard(address: Union[str, Tuple[str, int]], authkey: bytes) -> None:
+    """
+    Run a shard: connect to a ShardedRunner and handle its messages until it closes the shard.
+    Started in a new process by the runner for local shards, or by hand on other hosts.
+
+    :param address: Address of the runner's ShardBus, see ShardBus.address
+    :param authkey: Bytes. Authentication key of the runner's ShardBus
+    """
+
+    with Client(address, authkey=authkey) as connection:
+        while True:
+            message = connection.recv()
+            if message[0] == "close":
+                break
+            try:
+                reply = ("ok", _handle(message))
+            except Exception:  # pylint: disable=broad-except
+                reply = ("error", traceback.format_exc())
+            connection.send(reply)
+
+
+class ShardBus:
+    """
+    Message bus between a runner and its shards. Every shard holds one connection, and answers
+    every message with one reply, in order.
+    """
+
+    def __init__(self,
+                 shards: int,
+                 local_shards: Optional[int] = None,
+                 address: Tuple[str, int] = ("127.0.0.1", 0),
+                 authkey: Optional[bytes] = None):
+        """
+        Listen on the address, start the local shards and wait for all shards to connect.
+
+        :param shards: Integer representing the number of shards
+        :param local_shards: Optional integer representing the number of shards started as local
+                             processes. The others are expected to connect from other hosts.
+                             Defaults to all of them
+        :param address: Tuple of the host and port to listen on. Port 0 picks a free port
+        :param authkey: Optional bytes. Key shards authenticate with. Defaults to a random key
+        """
+
+        local_shards = shards if local_shards is None else local_shards
+        if shards < 1 or not 0 <= local_shards <= shards:
+            raise ValueError(f"Cannot start {local_shards} local shards out of {shards}")
+
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.__listener__ = Listener(address, authkey=self.authkey)
+        self.__processes__ = [
+            multiprocessing.Process(target=serve_shard, args=(self.address, self.authkey),
+                                    name=f"shard-{shard}", daemon=True)
+            for shard in range(local_shards)
+        ]
+        for process in self.__processes__:
+            process.start()
+
+        self.__connections__: List[Connection] = [
+            self.__listener__.accept() for _ in range(shards)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.__connections__)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """
+        :returns: Address the bus listens on, to be passed to serve_shard.
+        """
+
+        return self.__listener__.address
+
+    def send(self, shard: int, *message: Any) -> None:
+        """
+        Send a message to a shard without waiting for its reply.
+
+        :param shard: Integer representing the shard
+        :param message: Kind of the message followed by its arguments
+        """
+
+        self.__connections__[shard].send(message)
+
+    def receive(self, shard: int) -> Any:
+        """
+        Wait for the reply of a shard to its oldest unanswered message.
+
+        :param shard: Integer representing the shard
+
+        :returns: Value of the reply
+        """
+
+        status, value = self.__connections__[shard].recv()
+        if status == "error":
+            raise RuntimeError(f"Shard {shard} failed:\n{value}")
+
+        return value
+
+    def request(self, shard: int, *message: Any) -> Any:
+        """
+        Send a message to a shard and wait for its reply.
+
+        :param shard: Integer representing the shard
+        :param message: Kind of the message followed by its arguments
+
+        :returns: Value of the reply
+        """
+
+        self.send(shard, *message)
+        return self.receive(shard)
+
+    def close(self) -> None:
+        """
+        Stop the shards and the listener.
+        """
+
+        for connection in self.__connections__:
+            try:
+                connection.send(("close",))
+            except OSError:
+                pass
+            connection.close()
+        self.__connections__ = []
+
+        for process in self.__processes__:
+            process.join()
+        self.__processes__ = []
+        self.__listener__.close()
+
+
+@dataclass
+class ShardStats:
+    """
+    Counters of a sharded run. load holds the seconds every group spent on the bars since the last
+    rebalance, and load_bars the number of those bars.
+    """
+
+    bars: int = 0
+    batches: int = 0
+    rebalances: int = 0
+    migrations: int = 0
+    load: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    load_bars: int = 0
+
+
+class ShardedRunner:
+    """
+    Runs one algorithm over a ticker universe split across shard processes. The costs of a bar are
+    those of a single algorithm over the whole universe, as long as the algorithm treats its
+    tickers independently, e.g. SimpleMovingAverageImpl or HiddenMarkovModelImpl; every group
+    cleans its own bars with its own preprocessor.
+
+    The runner can stand in for a PortfolioRunner in an IngestionPipeline. It must be closed, or
+    used as a context manager, to stop its shards.
+    """
+
+    def __init__(self,
+                 algorithm: Type[IAlgorithm],
+                 tickers: List[str],
+                 parameters: Dict[str, Any],
+                 capital: float,
+                 shards: int = 2,
+                 groups_per_shard: int = 4,
+                 rebalance_interval: Optional[int] = 256,
+                 tolerance: float = 0.1,
+                 bus: Optional[ShardBus] = None):
+        """
+        Initialize the runner and start its shards.
+
+        :param algorithm: IAlgorithm class built as algorithm(tickers, parameters) for every group
+        :param tickers: List of ticker symbols of the universe
+        :param parameters: Dictionary of the algorithm's parameters
+        :param capital: Float. Cash allocated to the portfolio, given to every group as the
+                        capital its positions are sized from
+        :param shards: Integer representing the number of shard processes
+        :param groups_per_shard: Integer representing the number of ticker groups per shard. More
+                                 groups balance the load more finely, at the cost of more messages
+        :param rebalance_interval: Optional integer representing the number of bars between
+                                   rebalances. None never rebalances on its own
+        :param tolerance: Float. Load gap between the busiest and the idlest shard, as a fraction of
+                          the mean shard load, below which groups are not moved
+        :param bus: Optional ShardBus connected to the shards, e.g. with shards on other hosts.
+                    Defaults to a bus with shards local processes. Its size overrides shards
+        """
+
+        shards = shards if bus is None else len(bus)
+        if shards < 1 or len(tickers) < shards:
+            raise ValueError(f"Cannot split {len(tickers)} tickers across {shards} shards")
+
+        self.tickers = list(tickers)
+        self.groups = np.array_split(np.arange(len(tickers)),
+                                     min(len(tickers), shards * max(groups_per_shard, 1)))
+        self.assignment = np.arange(len(self.groups)) % shards
+        self.cash = float(capital)
+        self.holdings = np.zeros(len(tickers))
+        self.stats = ShardStats(load=np.zeros(len(self.groups)))
+        self.__settings__ = {
+            "capital": float(capital),
+            "rebalance_interval": rebalance_interval,
+            "tolerance": tolerance,
+        }
+        self.__metrics__ = IncrementalMetrics()
+        self.__marks__ = np.zeros(len(tickers))
+        self.__bus__ = ShardBus(shards) if bus is None else bus
+
+        try:
+            for shard in range(len(self.__bus__)):
+                self.__bus__.request(shard, "setup", algorithm, parameters)
+            for group, shard in enumerate(self.assignment.tolist()):
+                self.__bus__.request(shard, "import", group, self._group_tickers(group), None)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "ShardedRunner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def on_bar(self, prices: np.ndarray, timestamp: Any = None) -> np.ndarray:
+        """
+        Route one bar of the universe to the shards.
+
+        :param prices: 1-D NumPy array with one price per ticker, in the order of self.tickers
+        :param timestamp: Timestamp of the bar, preferably a numpy.datetime64
+
+        :returns: 1-D NumPy array with the cost of the trade per ticker
+        """
+
+        return self.on_bars(np.array([timestamp]), np.asarray(prices, np.float64)[None, :])[0]
+
+    def on_bars(self, timestamps: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """
+        Route a block of bars to the shards in one message per shard, then rebalance the shards
+        when rebalance_interval bars have passed since the last rebalance.
+
+        :param timestamps: 1-D array of timestamps, one per bar
+        :param prices: 2-D NumPy array of shape (bars, tickers), columns ordered like self.tickers
+
+        :returns: 2-D NumPy array with the cost of the trade per bar and ticker
+        """
+
+        return self._dispatch(timestamps, prices)[0]
+
+    def run(self,
+            prices: Union[DataFrame, PricePanel, np.ndarray],
+            batch_bars: int = 64) -> DataFrame:
+        """
+        Stream a full price panel through the shards, batch_bars bars per message.
+
+        :param prices: DataFrame with a "{ticker}_price" column per ticker, a PricePanel, or a 2-D
+                       NumPy array whose columns are ordered like self.tickers
+        :param batch_bars: Integer representing the number of bars sent to the shards at once
+
+        :returns: DataFrame with the value of the portfolio on every bar
+        """
+
+        values, index = price_matrix(prices, self.tickers)
+        timestamps = index.to_numpy()
+
+        capital = [
+            self._dispatch(timestamps[start:start + batch_bars],
+                           values[start:start + batch_bars])[1]
+            for start in range(0, len(values), batch_bars)
+        ]
+
+        return DataFrame({"capital": np.concatenate(capital) if capital else []}, index=index)
+
+    def _dispatch(self,
+                  timestamps: np.ndarray,
+                  prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run a block of bars on the shards and book their trades.
+
+        :returns: Tuple of the costs per bar and ticker and the portfolio value after every bar
+        """
+
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.shape != (len(timestamps), len(self.tickers)):
+            raise ValueError(f"Expected prices of shape ({len(timestamps)}, {len(self.tickers)}), "
+                             f"got {prices.shape}")
+
+        shards = [np.flatnonzero(self.assignment == shard) for shard in range(len(self.__bus__))]
+        for shard, groups in enumerate(shards):
+            if groups.size:
+                self.__bus__.send(shard, "bars", timestamps, self.__settings__["capital"],
+                                  {group: prices[:, self.groups[group]] for group in groups})
+
+        # Every shard is waited for before raising, so no reply is left behind on the bus
+        costs = np.zeros(prices.shape)
+        errors = []
+        for shard, groups in enumerate(shards):
+            if not groups.size:
+                continue
+            try:
+                replies = self.__bus__.receive(shard)
+            except RuntimeError as error:
+                errors.append(error)
+                continue
+            for group, (group_costs, seconds) in replies.items():
+                costs[:, self.groups[group]] = group_costs
+                self.stats.load[group] += seconds
+
+        if errors:
+            raise errors[0]
+
+        capital = np.array([
+            self._account(row_prices, row_costs) for row_prices, row_costs in zip(prices, costs)
+        ])
+
+        self.stats.bars += len(prices)
+        self.stats.batches += 1
+        self.stats.load_bars += len(prices)
+
+        interval = self.__settings__["rebalance_interval"]
+        if interval is not None and self.stats.load_bars >= interval:
+            self.rebalance()
+
+        return costs, capital
+
+    def rebalance(self, load: Optional[np.ndarray] = None) -> int:
+        """
+        Move groups from the busiest shards to the idlest ones, with their state, until the load
+        gap between them is within tolerance or no move narrows it.
+
+        :param load: Optional 1-D NumPy array with the load of every group. Defaults to the
+                     seconds per bar observed since the last rebalance
+
+        :returns: Integer representing the number of groups moved
+        """
+
+        if load is None:
+            load = self.stats.load / max(self.stats.load_bars, 1)
+        load = np.asarray(load, dtype=np.float64)
+
+        shards = len(self.__bus__)
+        assignment = self.assignment.copy()
+        shard_load = np.bincount(assignment, weights=load, minlength=shards)
+
+        for _ in range(len(self.groups)):
+            busiest, idlest = int(np.argmax(shard_load)), int(np.argmin(shard_load))
+            gap = shard_load[busiest] - shard_load[idlest]
+            candidates = np.flatnonzero(assignment == busiest)
+            candidates = candidates[load[candidates] < gap]
+            if gap <= self.__settings__["tolerance"] * shard_load.mean() or not candidates.size:
+                break
+
+            # The group closest to half the gap evens the two shards out the most
+            group = candidates[np.argmin(np.abs(load[candidates] - gap / 2))]
+            assignment[group] = idlest
+            shard_load[busiest] -= load[group]
+            shard_load[idlest] += load[group]
+
+        moved = np.flatnonzero(assignment != self.assignment).tolist()
+        for group in moved:
+            self.__bus__.send(int(self.assignment[group]), "export", group)
+        states = [self.__bus__.receive(int(self.assignment[group])) for group in moved]
+        for group, state in zip(moved, states):
+            self.__bus__.request(int(assignment[group]), "import", group,
+                                 self._group_tickers(group), state)
+
+        self.assignment = assignment
+        self.stats.rebalances += 1
+        self.stats.migrations += len(moved)
+        self.stats.load = np.zeros(len(self.groups))
+        self.stats.load_bars = 0
+
+        return len(moved)
+
+    def values(self) -> float:
+        """
+        :returns: Float. Cash plus holdings marked at the latest known price of every ticker.
+        """
+
+        return self.cash + float(self.holdings @ self.__marks__)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        :returns: Dictionary with the performance metrics of the portfolio so far.
+        """
+
+        return self.__metrics__.snapshot()
+
+    def close(self) -> None:
+        """
+        Stop the shards.
+        """
+
+        if self.__bus__ is not None:
+            bus, self.__bus__ = self.__bus__, None
+            bus.close()
+
+    def _group_tickers(self, group: int) -> List[str]:
+        """
+        Ticker symbols of a group.
+        """
+
+        return [self.tickers[column] for column in self.groups[group].tolist()]
+
+    def _account(self, prices: np.ndarray, costs: np.ndarray) -> float:
+        """
+        Book the trades of one bar against the cash and holdings, and update the metrics.
+
+        :returns: Float. Value of the portfolio after the bar
+        """
+
+        tradable = np.isfinite(prices) & (prices != 0) & np.isfinite(costs)
+        costs = np.where(tradable, costs, 0.0)
+
+        self.holdings += np.divide(costs, prices, out=np.zeros_like(costs), where=tradable)
+        self.cash -= costs.sum()
+        self.__marks__ = np.where(np.isfinite(prices), prices, self.__marks__)
+        value = self.values()
+        self.__metrics__.update(value, float(np.abs(costs).sum()))
+
+        return value
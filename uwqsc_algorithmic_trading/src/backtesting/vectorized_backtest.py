@@ -0,0 +1,248 @@
+"""
+Vectorized backtest engine. Instead of calling IAlgorithm.execute_trade once per bar, the complete
+price history is handed to the algorithm at once, and signals, position sizes, costs and the capital
+curve are computed as NumPy array operations across all bars and tickers.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Index, RangeIndex
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import (
+    BARS_PER_YEAR,
+    performance_metrics
+)
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+
+
+@dataclass
+class BacktestResult:
+    """
+    Outcome of a backtest. Two-dimensional arrays have one row per bar and one column per ticker,
+    in the order of the algorithm's tickers.
+    """
+
+    index: Index
+    tickers: List[str]
+    capital: np.ndarray
+    cash: np.ndarray
+    holdings: np.ndarray
+    trades: np.ndarray
+    fees: np.ndarray
+    trade_count: int
+
+    def to_frame(self) -> DataFrame:
+        """
+        Summarise the backtest in the same shape as the old per-bar portfolio DataFrame.
+
+        :returns: DataFrame with capital, cash and fees per bar
+        """
+
+        return DataFrame(index=self.index, data={
+            "capital": self.capital,
+            "cash": self.cash,
+            "fees": self.fees.sum(axis=1),
+        })
+
+    def metrics(self, bars_per_year: int = BARS_PER_YEAR) -> Dict[str, float]:
+        """
+        Performance metrics of the capital curve, see performance_metrics.
+
+        :param bars_per_year: Integer used to annualize volatility, Sharpe and Sortino
+
+        :returns: Dictionary mapping metric names to floats, with the trade count
+        """
+
+        metrics = performance_metrics(self.capital, np.abs(self.trades).sum(axis=1),
+                                      bars_per_year)
+        metrics["trade_count"] = self.trade_count
+
+        return metrics
+
+
+def price_matrix(prices: Union[DataFrame, PricePanel, np.ndarray],
+                 tickers: List[str]) -> Tuple[np.ndarray, Index]:
+    """
+    Convert a price panel into a dense (bars, tickers) float64 matrix.
+
+    :param prices: DataFrame with a "{ticker}_price" column per ticker, a memory-mapped PricePanel,
+                   or a 2-D NumPy array whose columns are already ordered like tickers
+    :param tickers: List of ticker symbols
+
+    :returns: Tuple of the price matrix and the bar index
+    """
+
+    if isinstance(prices, PricePanel):
+        return prices.select(tickers), DatetimeIndex(prices.timestamps)
+
+    if isinstance(prices, DataFrame):
+        columns = [f"{ticker}_price" for ticker in tickers]
+        return prices[columns].to_numpy(dtype=np.float64), prices.index
+
+    values = np.asarray(prices, dtype=np.float64)
+
+    if values.ndim != 2 or values.shape[1] != len(tickers):
+        raise ValueError(
+            f"Expected a price matrix of shape (bars, {len(tickers)}), got {values.shape}"
+        )
+
+    return values, RangeIndex(len(values))
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Forward fill NaN values down each column of a 2-D array. Leading NaN values are kept.
+
+    :param values: 2-D NumPy array of shape (bars, tickers)
+
+    :returns: Forward filled copy of values
+    """
+
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+
+    return values[rows, np.arange(values.shape[1])]
+
+
+class VectorizedBacktest:
+    """
+    Runs an IAlgorithm over a full price panel. Algorithms that implement the vectorized signal
+    hooks are evaluated in a handful of array operations; other algorithms fall back to calling
+    execute_trade once per bar, with the accounting still done on arrays.
+    """
+
+    def __init__(self,
+                 algorithm: IAlgorithm,
+                 commission_rate: float = 0.0,
+                 slippage_rate: float = 0.0):
+        """
+        Initialize the backtest engine.
+
+        :param algorithm: IAlgorithm. Algorithm to backtest
+        :param commission_rate: Float. Commission charged as a fraction of traded value
+        :param slippage_rate: Float. Slippage charged as a fraction of traded value
+        """
+
+        self.algorithm = algorithm
+        self.commission_rate = commission_rate
+        self.slippage_rate = slippage_rate
+
+    def run(self,
+            prices: Union[DataFrame, PricePanel, np.ndarray],
+            capital: float) -> BacktestResult:
+        """
+        Backtest the algorithm. Like execute_trade, positions are sized against the capital that
+        was allocated to the algorithm. The metrics of the run are stored in algorithm.metrics.
+
+        :param prices: Price panel, see price_matrix
+        :param capital: Float. Cash allocated to the algorithm
+
+        :returns: BacktestResult with the capital curve, holdings, trades and fees
+        """
+
+        values, index = price_matrix(prices, self.algorithm.tickers)
+
+        if self.algorithm.supports_vectorized_signals():
+            shares, trades = self._vectorized_trades(values, capital)
+        else:
+            shares, trades = self._per_bar_trades(values, index, capital)
+
+        result = self._account(index, values, shares, trades, capital)
+        self.algorithm.metrics = result.metrics()
+
+        return result
+
+    def run_signals(self,
+                    prices: Union[DataFrame, PricePanel, np.ndarray],
+                    signals: np.ndarray,
+                    capital: float) -> BacktestResult:
+        """
+        Backtest precomputed signals, sized by the algorithm's vectorized position sizing. Used
+        when signals are built from indicators shared between many runs. The metrics of the run
+        are stored in algorithm.metrics.
+
+        :param prices: Price panel, see price_matrix
+        :param signals: 2-D NumPy array of StockPosition values, shape (bars, tickers)
+        :param capital: Float. Cash allocated to the algorithm
+
+        :returns: BacktestResult with the capital curve, holdings, trades and fees
+        """
+
+        values, index = price_matrix(prices, self.algorithm.tickers)
+        shares, trades = self._vectorized_trades(values, capital, signals)
+
+        result = self._account(index, values, shares, trades, capital)
+        self.algorithm.metrics = result.metrics()
+
+        return result
+
+    def _vectorized_trades(self,
+                           values: np.ndarray,
+                           capital: float,
+                           signals: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the shares and value traded on every bar using the algorithm's vectorized hooks.
+        """
+
+        if signals is None:
+            signals = self.algorithm.generate_vectorized_signals(values)
+
+        shares = self.algorithm.calculate_vectorized_position_size(signals, values, capital)
+        shares = np.where(np.isfinite(shares), shares, 0.0)
+        trades = shares * np.nan_to_num(values)
+
+        trade_count = int(np.count_nonzero(trades))
+        self.algorithm.__trade_count__ += trade_count
+
+        return shares, trades
+
+    def _per_bar_trades(self,
+                        values: np.ndarray,
+                        index: Index,
+                        capital: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the shares and value traded on every bar by replaying execute_trade.
+        """
+
+        tickers = self.algorithm.tickers
+        frame = DataFrame(values, index=index, columns=[f"{ticker}_price" for ticker in tickers])
+        trades = np.zeros(values.shape, dtype=np.float64)
+
+        for row in range(len(frame)):
+            cost_per_ticker = self.algorithm.execute_trade(capital, frame.iloc[row:row + 1])
+            trades[row] = [cost_per_ticker[ticker] for ticker in tickers]
+
+        tradable = np.isfinite(values) & (values != 0)
+        trades = np.where(tradable & np.isfinite(trades), trades, 0.0)
+        shares = np.divide(trades, values, out=np.zeros_like(trades), where=tradable)
+
+        return shares, trades
+
+    def _account(self,
+                 index: Index,
+                 values: np.ndarray,
+                 shares: np.ndarray,
+                 trades: np.ndarray,
+                 capital: float) -> BacktestResult:
+        """
+        Turn per-bar trades into holdings, fees and a capital curve.
+        """
+
+        fees = np.abs(trades) * (self.commission_rate + self.slippage_rate)
+        holdings = np.cumsum(shares, axis=0)
+        cash = capital - np.cumsum(trades.sum(axis=1) + fees.sum(axis=1))
+        marks = np.nan_to_num(forward_fill(values))
+
+        return BacktestResult(
+            index=index,
+            tickers=list(self.algorithm.tickers),
+            capital=cash + (holdings * marks).sum(axis=1),
+            cash=cash,
+            holdings=holdings,
+            trades=trades,
+            fees=fees,
+            trade_count=int(np.count_nonzero(trades)),
+        )
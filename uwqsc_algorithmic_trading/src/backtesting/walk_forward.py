@@ -0,0 +1,291 @@
+"""
+Walk-forward optimization. The price history is cut into consecutive folds, each made of a fit
+window followed by a test window. Parameters are chosen on the fit window, either by sweeping a
+grid or, for algorithms with a fit method such as HiddenMarkovModelImpl, by fitting the model for
+every grid point, and the chosen parameters are then traded on the unseen test window. The test
+windows follow each other without overlapping, so their capital curves chain into one
+out-of-sample curve.
+
+Fit windows either roll, keeping a fixed length, or are anchored at the first bar and grow with
+every fold. Folds are evaluated in parallel over a process pool. As in ParameterSweep, workers
+memory-map one shared PricePanel, and moving averages are computed over the whole panel and kept
+in the worker's indicator cache, so overlapping folds slice the same arrays instead of averaging
+the same prices again.
+"""
+
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl,
+    crossover_signals
+)
+from uwqsc_algorithmic_trading.src.backtesting.parameter_sweep import parameter_grid
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import performance_metrics
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import VectorizedBacktest
+from uwqsc_algorithmic_trading.src.common.indicator_cache import shared_indicator_cache
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import trailing_mean
+
+# State of a walk-forward worker process, set once by the pool initializer.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+@dataclass(frozen=True)
+class Fold:
+    """
+    Rows of one fold: prices[fit_start:fit_stop] are fitted on and prices[fit_stop:test_stop]
+    are traded out of sample.
+    """
+
+    fit_start: int
+    fit_stop: int
+    test_stop: int
+
+
+@dataclass
+class WalkForwardResult:
+    """
+    Outcome of a walk-forward optimization.
+    """
+
+    folds: DataFrame
+    index: DatetimeIndex
+    capital: np.ndarray
+    metrics: Dict[str, float]
+
+
+def walk_forward_folds(bars: int,
+                       fit_bars: int,
+                       test_bars: int,
+                       anchored: bool = False) -> List[Fold]:
+    """
+    Consecutive folds over a history. Test windows follow each other, and the last one is cut
+    short at the end of the history.
+
+    :param bars: Integer representing the length of the history
+    :param fit_bars: Integer representing the length of the fit window, or of the first fit
+                     window when anchored
+    :param test_bars: Integer representing the length of every test window
+    :param anchored: Boolean. When True, every fit window starts at the first bar
+
+    :returns: List of Fold, empty when the history is shorter than one fit window and one bar
+    """
+
+    if fit_bars < 1 or test_bars < 1:
+        raise ValueError(f"Fit and test windows must be positive, got {fit_bars} and {test_bars}")
+
+    return [
+        Fold(0 if anchored else test_start - fit_bars, test_start,
+             min(test_start + test_bars, bars))
+        for test_start in range(fit_bars, bars, test_bars)
+    ]
+
+
+def _initialize_worker(panel_path: str,
+                       tickers: List[str],
+                       algorithm: Type[IAlgorithm],
+                       settings: Dict[str, Any]) -> None:
+    """
+    Open the shared price panel in a worker process.
+    """
+
+    panel = PricePanel.open(panel_path)
+
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(panel=panel, prices=panel.select(tickers), tickers=tickers,
+                         algorithm=algorithm, **settings)
+
+
+def _signals(algorithm: IAlgorithm, start: int, stop: int) -> np.ndarray:
+    """
+    Signals of prices[start:stop]. Moving averages come from the indicator cache, computed over
+    the whole panel, which is safe since they only look back; other algorithms compute their
+    signals from the rows of the fold, starting at the fold's first fit bar.
+    """
+
+    prices = _WORKER_STATE["prices"]
+    fold_start = _WORKER_STATE["fold"].fit_start
+
+    if isinstance(algorithm, SimpleMovingAverageImpl):
+        tickers = _WORKER_STATE["tickers"]
+        versions = [_WORKER_STATE["panel"].version] * len(tickers)
+        short, long = (
+            shared_indicator_cache().columns(prices, tickers, "sma", (window,),
+                                             partial(trailing_mean, window=window), versions)
+            for window in (algorithm.__data_processor__.short_window,
+                           algorithm.__data_processor__.long_window)
+        )
+        return crossover_signals(short[start:stop], long[start:stop])
+
+    return algorithm.generate_vectorized_signals(prices[fold_start:stop])[start - fold_start:]
+
+
+def _backtest(point: Dict[str, Any], start: int, stop: int):
+    """
+    Build the algorithm of a grid point, fitted on the fold's fit window when it can be, and
+    backtest it on prices[start:stop].
+    """
+
+    fold = _WORKER_STATE["fold"]
+    algorithm = _WORKER_STATE["algorithm"](_WORKER_STATE["tickers"], point)
+
+    if hasattr(algorithm, "fit"):
+        algorithm.fit(_WORKER_STATE["prices"][fold.fit_start:fold.fit_stop])
+
+    backtest = VectorizedBacktest(algorithm, _WORKER_STATE["commission_rate"],
+                                  _WORKER_STATE["slippage_rate"])
+    result = backtest.run_signals(_WORKER_STATE["prices"][start:stop],
+                                  _signals(algorithm, start, stop), _WORKER_STATE["capital"])
+
+    return algorithm, result
+
+
+def _evaluate_fold(fold: Fold, points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Sweep the grid on the fit window of a fold in a worker process, and trade the best point on
+    its test window.
+    """
+
+    _WORKER_STATE["fold"] = fold
+    objective = _WORKER_STATE["objective"]
+
+    scores = [
+        _backtest(point, fold.fit_start, fold.fit_stop)[0].metrics[objective]
+        for point in points
+    ]
+    best = int(np.argmax(scores))
+    algorithm, result = _backtest(points[best], fold.fit_stop, fold.test_stop)
+
+    return {
+        "parameters": points[best],
+        "in_sample": scores[best],
+        "metrics": algorithm.metrics,
+        "capital": np.asarray(result.capital),
+        "traded": np.abs(result.trades).sum(axis=1),
+    }
+
+
+class WalkForwardOptimizer:
+    """
+    Walk-forward optimization of an algorithm's parameters over a price panel, with the folds
+    evaluated in parallel.
+    """
+
+    def __init__(self,
+                 prices: Union[PricePanel, DataFrame],
+                 capital: float,
+                 algorithm: Type[IAlgorithm] = SimpleMovingAverageImpl,
+                 commission_rate: float = 0.0,
+                 slippage_rate: float = 0.0,
+                 objective: str = "sharpe",
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the optimizer.
+
+        :param prices: PricePanel, or a DataFrame with "{ticker}_price" columns which is written
+                       to a temporary panel so that workers can share it
+        :param capital: Float. Cash allocated to every fold
+        :param algorithm: IAlgorithm class built as algorithm(tickers, parameters) for every grid
+                          point. It must implement the vectorized signal hooks
+        :param commission_rate: Float. Commission charged as a fraction of traded value
+        :param slippage_rate: Float. Slippage charged as a fraction of traded value
+        :param objective: String representing the metric maximized on the fit windows, see
+                          performance_metrics
+        :param max_workers: Optional integer representing the number of worker processes
+        """
+
+        self.prices = prices
+        self.algorithm = algorithm
+        self.max_workers = max_workers
+        self.__settings__ = {
+            "capital": capital,
+            "commission_rate": commission_rate,
+            "slippage_rate": slippage_rate,
+            "objective": objective,
+        }
+
+    def run(self,
+            grid: Dict[str, Sequence[Any]],
+            fit_bars: int,
+            test_bars: int,
+            anchored: bool = False) -> WalkForwardResult:
+        """
+        Choose parameters on the fit window of every fold and trade them on its test window.
+
+        :param grid: Dictionary mapping parameter names to the values to try, see parameter_grid
+        :param fit_bars: Integer representing the length of the fit windows
+        :param test_bars: Integer representing the length of the test windows
+        :param anchored: Boolean. When True, fit windows start at the first bar and grow
+
+        :returns: WalkForwardResult with one row per fold, holding its dates, the chosen
+                  parameters, the in-sample objective and the out-of-sample metrics, and the
+                  chained out-of-sample capital curve and its metrics
+        """
+
+        points = parameter_grid(grid)
+        if not points:
+            raise ValueError("The grid has no valid parameter combination")
+
+        with tempfile.TemporaryDirectory() as directory:
+            panel = self.prices
+            if not isinstance(panel, PricePanel):
+                panel = PricePanel.from_frame(directory, panel)
+
+            folds = walk_forward_folds(len(panel), fit_bars, test_bars, anchored)
+            if not folds:
+                raise ValueError(f"{len(panel)} bars do not fit a window of {fit_bars} bars "
+                                 f"and a test bar")
+
+            with ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_initialize_worker,
+                    initargs=(panel.path, panel.tickers, self.algorithm, self.__settings__)
+            ) as executor:
+                outcomes = list(executor.map(partial(_evaluate_fold, points=points), folds))
+
+            timestamps = DatetimeIndex(panel.timestamps)
+
+        return self._combine(folds, outcomes, timestamps)
+
+    def _combine(self,
+                 folds: List[Fold],
+                 outcomes: List[Dict[str, Any]],
+                 timestamps: DatetimeIndex) -> WalkForwardResult:
+        """
+        Chain the test windows into one capital curve, each window scaled to start from the
+        capital the previous one ended with.
+        """
+
+        capital = self.__settings__["capital"]
+        curves, traded, rows = [], [], []
+
+        for fold, outcome in zip(folds, outcomes):
+            scale = curves[-1][-1] / capital if curves else 1.0
+            curves.append(outcome["capital"] * scale)
+            traded.append(outcome["traded"] * scale)
+            rows.append({
+                "fit_start": timestamps[fold.fit_start],
+                "test_start": timestamps[fold.fit_stop],
+                "test_end": timestamps[fold.test_stop - 1],
+                **outcome["parameters"],
+                f"in_sample_{self.__settings__['objective']}": outcome["in_sample"],
+                **outcome["metrics"],
+            })
+
+        curve = np.concatenate(curves)
+        metrics = performance_metrics(curve, np.concatenate(traded))
+
+        return WalkForwardResult(
+            folds=DataFrame(rows),
+            index=timestamps[folds[0].fit_stop:folds[-1].test_stop],
+            capital=curve,
+            metrics=metrics,
+        )
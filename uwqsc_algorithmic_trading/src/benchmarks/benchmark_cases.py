@@ -0,0 +1,162 @@
+"""
+Benchmark cases of the hot paths: the preprocessors, bar by bar trading through execute_trade and
+on_bar, and the Hidden Markov Model. Every case builds fresh objects in prepare, so that the timed
+steps start from an empty history like a new live session.
+"""
+
+from typing import Any, Callable, List
+
+from pandas import DataFrame
+
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl
+)
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.benchmarks.benchmark_harness import BenchmarkCase
+from uwqsc_algorithmic_trading.src.common.gaussian_hmm import GaussianHMM
+from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import (
+    HMMPreProcessorImpl,
+    log_returns
+)
+from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import SMAPreProcessorImpl
+
+CAPITAL = 1_000_000.0
+PARAMETERS = {"position_size": 0.01}
+
+
+def _tickers(prices: DataFrame) -> List[str]:
+    """
+    Ticker symbols of the "{ticker}_price" columns.
+    """
+
+    return [column[:-len("_price")] for column in prices.columns]
+
+
+def _rows(prices: DataFrame) -> List[DataFrame]:
+    """
+    One-row DataFrames, sliced before timing starts.
+    """
+
+    return [prices.iloc[row:row + 1] for row in range(len(prices))]
+
+
+def _sma_process_data(prices: DataFrame) -> Callable[[int], Any]:
+    preprocessor = SMAPreProcessorImpl(_tickers(prices))
+    rows = _rows(prices)
+
+    return lambda row: preprocessor.process_data(rows[row])
+
+
+def _sma_remove_outliers(prices: DataFrame) -> Callable[[int], Any]:
+    preprocessor = SMAPreProcessorImpl(_tickers(prices))
+
+    def step(_: int) -> None:
+        preprocessor.__processed_data__ = prices
+        preprocessor.remove_outliers()
+
+    return step
+
+
+def _sma_generate_short_long_window(prices: DataFrame) -> Callable[[int], Any]:
+    preprocessor = SMAPreProcessorImpl(_tickers(prices))
+
+    def step(_: int) -> None:
+        preprocessor.__processed_data__ = prices
+        preprocessor.generate_short_long_window()
+
+    return step
+
+
+def _sma_execute_trade(prices: DataFrame) -> Callable[[int], Any]:
+    algorithm = SimpleMovingAverageImpl(_tickers(prices), PARAMETERS)
+    rows = _rows(prices)
+
+    return lambda row: algorithm.execute_trade(CAPITAL, rows[row])
+
+
+def _sma_on_bar(prices: DataFrame) -> Callable[[int], Any]:
+    algorithm = SimpleMovingAverageImpl(_tickers(prices), PARAMETERS)
+    values = prices.to_numpy()
+    timestamps = prices.index.to_numpy()
+
+    return lambda row: algorithm.on_bar(CAPITAL, values[row], timestamps[row])
+
+
+def _hmm_process_data(prices: DataFrame) -> Callable[[int], Any]:
+    preprocessor = HMMPreProcessorImpl(_tickers(prices))
+    rows = _rows(prices)
+
+    return lambda row: preprocessor.process_data(rows[row])
+
+
+def _hmm_fit(prices: DataFrame) -> Callable[[int], Any]:
+    returns = log_returns(prices.to_numpy())
+
+    return lambda _: GaussianHMM().fit(returns)
+
+
+def _fitted_hmm(prices: DataFrame) -> HiddenMarkovModelImpl:
+    """
+    Hidden Markov Model algorithm fitted on the benchmark prices, so that every bar is filtered.
+    """
+
+    algorithm = HiddenMarkovModelImpl(_tickers(prices), PARAMETERS)
+    algorithm.fit(prices.to_numpy())
+
+    return algorithm
+
+
+def _hmm_execute_trade(prices: DataFrame) -> Callable[[int], Any]:
+    algorithm = _fitted_hmm(prices)
+    rows = _rows(prices)
+
+    return lambda row: algorithm.execute_trade(CAPITAL, rows[row])
+
+
+def _hmm_on_bar(prices: DataFrame) -> Callable[[int], Any]:
+    algorithm = _fitted_hmm(prices)
+    values = prices.to_numpy()
+    timestamps = prices.index.to_numpy()
+
+    return lambda row: algorithm.on_bar(CAPITAL, values[row], timestamps[row])
+
+
+def benchmark_cases() -> List[BenchmarkCase]:
+    """
+    :returns: List of every BenchmarkCase of the suite. Batch cases process the whole panel in a
+              single step.
+    """
+
+    return [
+        BenchmarkCase("sma.process_data", _sma_process_data),
+        BenchmarkCase("sma.remove_outliers", _sma_remove_outliers, steps=1),
+        BenchmarkCase("sma.generate_short_long_window", _sma_generate_short_long_window, steps=1),
+        BenchmarkCase("sma.execute_trade", _sma_execute_trade),
+        BenchmarkCase("sma.on_bar", _sma_on_bar),
+        BenchmarkCase("hmm.process_data", _hmm_process_data),
+        BenchmarkCase("hmm.fit", _hmm_fit, steps=1),
+        BenchmarkCase("hmm.execute_trade", _hmm_execute_trade),
+        BenchmarkCase("hmm.on_bar", _hmm_on_bar),
+    ]
+
+
+def select_cases(names: List[str]) -> List[BenchmarkCase]:
+    """
+    Cases whose name starts with one of the given prefixes, e.g. "sma." or "hmm.fit".
+
+    :param names: List of case names or prefixes. An empty list selects every case
+
+    :returns: List of BenchmarkCase
+    """
+
+    cases = benchmark_cases()
+    if not names:
+        return cases
+
+    selected = [case for case in cases if any(case.name.startswith(name) for name in names)]
+    if not selected:
+        raise ValueError(f"No benchmark case matches {names}")
+
+    return selected
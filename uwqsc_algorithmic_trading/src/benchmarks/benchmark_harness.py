@@ -0,0 +1,205 @@
+"""
+Benchmark harness. A benchmark case prepares its objects on a price panel and returns a step
+function, which is timed call by call to report throughput and latency percentiles. A second,
+separate pass runs under tracemalloc to report the peak memory, so that tracing does not slow down
+the timed pass. Results are stored as JSON and compared against a stored baseline.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    A piece of code to benchmark. prepare receives the price panel and returns the step function,
+    which is called with the step number, once per bar unless steps is given.
+    """
+
+    name: str
+    prepare: Callable[[DataFrame], Callable[[int], Any]]
+    steps: Optional[int] = None
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurements of one benchmark case. Latencies are per step, in microseconds, keyed by
+    percentile ("p50", "p90", "p99") and "max".
+    """
+
+    name: str
+    n_tickers: int
+    n_bars: int
+    steps: int
+    seconds: float
+    bars_per_second: float
+    ticker_bars_per_second: float
+    latency_us: Dict[str, float]
+    peak_memory_bytes: int
+
+
+def run_case(case: BenchmarkCase,
+             prices: DataFrame,
+             measure_memory: bool = True) -> BenchmarkResult:
+    """
+    Time a benchmark case step by step, then measure its peak memory in a second pass.
+
+    :param case: BenchmarkCase to run
+    :param prices: DataFrame with "{ticker}_price" columns, e.g. from synthetic_prices
+    :param measure_memory: Boolean. False skips the memory pass and reports a peak of 0
+
+    :returns: BenchmarkResult
+    """
+
+    step = case.prepare(prices)
+    steps = case.steps or len(prices)
+    latencies = np.empty(steps)
+
+    for number in range(steps):
+        start = time.perf_counter_ns()
+        step(number)
+        latencies[number] = time.perf_counter_ns() - start
+
+    peak_memory = _peak_memory(case, prices, steps) if measure_memory else 0
+    seconds = latencies.sum() / 1e9
+    bars = len(prices)
+    percentiles = np.percentile(latencies, [50, 90, 99]) / 1e3
+
+    return BenchmarkResult(
+        name=case.name,
+        n_tickers=prices.shape[1],
+        n_bars=bars,
+        steps=steps,
+        seconds=seconds,
+        bars_per_second=bars / seconds,
+        ticker_bars_per_second=bars * prices.shape[1] / seconds,
+        latency_us={
+            "p50": float(percentiles[0]),
+            "p90": float(percentiles[1]),
+            "p99": float(percentiles[2]),
+            "max": float(latencies.max() / 1e3),
+        },
+        peak_memory_bytes=peak_memory,
+    )
+
+
+def _peak_memory(case: BenchmarkCase, prices: DataFrame, steps: int) -> int:
+    """
+    Peak number of bytes allocated while preparing and running a case.
+    """
+
+    tracemalloc.start()
+    try:
+        step = case.prepare(prices)
+        for number in range(steps):
+            step(number)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def save_results(path: str, results: List[BenchmarkResult]) -> None:
+    """
+    Store benchmark results as JSON, together with the machine they were measured on.
+
+    :param path: String path of the JSON file
+    :param results: List of BenchmarkResult
+    """
+
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load stored benchmark results.
+
+    :param path: String path of a JSON file written by save_results
+
+    :returns: Dictionary mapping case names to their measurements
+    """
+
+    with open(path, "r", encoding="utf-8") as file:
+        document = json.load(file)
+
+    return {result["name"]: result for result in document["results"]}
+
+
+def find_regressions(results: List[BenchmarkResult],
+                     baseline: Dict[str, Dict[str, Any]],
+                     threshold: float = 0.2) -> List[str]:
+    """
+    Compare results with a baseline of the same problem size. A case regresses when its throughput
+    drops, or its median latency or peak memory grow, by more than the threshold.
+
+    :param results: List of BenchmarkResult of the current run
+    :param baseline: Dictionary returned by load_results
+    :param threshold: Float. Tolerated relative change, e.g. 0.2 for 20%
+
+    :returns: List of human readable regressions, empty when there are none
+    """
+
+    regressions = []
+
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None or (reference["n_tickers"], reference["n_bars"]) != (
+                result.n_tickers, result.n_bars):
+            continue
+
+        checks = [
+            ("throughput", reference["bars_per_second"] / result.bars_per_second),
+            ("median latency", result.latency_us["p50"] / reference["latency_us"]["p50"]),
+        ]
+        if result.peak_memory_bytes and reference["peak_memory_bytes"]:
+            checks.append(
+                ("peak memory", result.peak_memory_bytes / reference["peak_memory_bytes"])
+            )
+
+        for measure, ratio in checks:
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{result.name}: {measure} is {ratio - 1:.0%} worse than the baseline"
+                )
+
+    return regressions
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """
+    Results as a plain text table.
+
+    :param results: List of BenchmarkResult
+
+    :returns: String with one line per case
+    """
+
+    lines = [f"{'case':<32}{'bars/s':>12}{'p50 us':>12}{'p90 us':>12}{'p99 us':>12}"
+             f"{'peak MiB':>10}"]
+
+    for result in results:
+        lines.append(
+            f"{result.name:<32}{result.bars_per_second:>12.1f}"
+            + "".join(f"{result.latency_us[key]:>12.1f}" for key in ("p50", "p90", "p99"))
+            + f"{result.peak_memory_bytes / 2 ** 20:>10.1f}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""
+Command line entry point of the benchmark suite.
+
+    python -m uwqsc_algorithmic_trading.src.benchmarks.run_benchmarks --tickers 50 --bars 1000
+
+Results are written as JSON. When a baseline is given, the run fails with exit status 1 if any case
+regressed beyond the threshold. Baselines are machine specific: store one with --save-baseline on
+the machine that compares against it.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from typing import List, Optional
+
+from uwqsc_algorithmic_trading.src.benchmarks.benchmark_cases import select_cases
+from uwqsc_algorithmic_trading.src.benchmarks.benchmark_harness import (
+    find_regressions,
+    format_results,
+    load_results,
+    run_case,
+    save_results
+)
+from uwqsc_algorithmic_trading.src.benchmarks.synthetic_prices import synthetic_prices
+from uwqsc_algorithmic_trading.src.common.config import BENCHMARK_DIR
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the benchmark suite.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark the preprocessors and algorithms.")
+    parser.add_argument("--tickers", type=int, default=20, help="Number of synthetic tickers")
+    parser.add_argument("--bars", type=int, default=500, help="Number of synthetic bars")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic prices")
+    parser.add_argument("--cases", nargs="*", default=[],
+                        help="Names or prefixes of the cases to run, e.g. sma. hmm.fit")
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "latest.json"),
+                        help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARK_DIR, "baseline.json"),
+                        help="JSON file of the baseline to compare against, if it exists")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Tolerated relative regression, e.g. 0.2 for 20%%")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--skip-memory", action="store_true",
+                        help="Skip the peak memory pass")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmark suite.
+
+    :returns: Exit status, 1 when a case regressed against the baseline
+    """
+
+    arguments = parse_arguments(argv)
+    prices = synthetic_prices(arguments.tickers, arguments.bars, arguments.seed)
+
+    results = []
+    for case in select_cases(arguments.cases):
+        results.append(run_case(case, prices, not arguments.skip_memory))
+        print(format_results(results[-1:]).splitlines()[-1], flush=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(arguments.output)), exist_ok=True)
+    save_results(arguments.output, results)
+    print(f"\n{format_results(results)}\n\nResults written to {arguments.output}")
+
+    if arguments.save_baseline:
+        shutil.copyfile(arguments.output, arguments.baseline)
+        print(f"Baseline stored in {arguments.baseline}")
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        return 0
+
+    regressions = find_regressions(results, load_results(arguments.baseline),
+                                   arguments.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
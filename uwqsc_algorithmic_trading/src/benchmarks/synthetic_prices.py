@@ -0,0 +1,52 @@
+"""
+Synthetic market data for benchmarks. Prices follow a geometric random walk, so every preprocessing
+and signal step sees realistic looking data of any size without downloading anything.
+"""
+
+from typing import List
+
+import numpy as np
+from pandas import DataFrame, bdate_range
+
+
+def synthetic_tickers(n_tickers: int) -> List[str]:
+    """
+    Ticker symbols of a synthetic universe.
+
+    :param n_tickers: Integer representing the number of tickers
+
+    :returns: List of ticker symbols, e.g. ["T0000", "T0001"]
+    """
+
+    return [f"T{number:04d}" for number in range(n_tickers)]
+
+
+def synthetic_prices(n_tickers: int,
+                     n_bars: int,
+                     seed: int = 0,
+                     volatility: float = 0.01,
+                     outlier_rate: float = 0.0) -> DataFrame:
+    """
+    Daily prices of a synthetic universe, in the "{ticker}_price" layout used by the preprocessors.
+
+    :param n_tickers: Integer representing the number of tickers
+    :param n_bars: Integer representing the number of business days
+    :param seed: Integer seed of the random generator
+    :param volatility: Float. Standard deviation of the daily log returns
+    :param outlier_rate: Float. Fraction of prices replaced by a spike of ten times the price
+
+    :returns: DataFrame indexed by business day with one price column per ticker
+    """
+
+    rng = np.random.default_rng(seed)
+    returns = volatility * rng.standard_normal((n_bars, n_tickers))
+    start = rng.uniform(10, 1000, size=n_tickers)
+    prices = start * np.exp(np.cumsum(returns, axis=0))
+
+    if outlier_rate:
+        spikes = rng.random(prices.shape) < outlier_rate
+        prices[spikes] *= 10
+
+    return DataFrame(prices,
+                     index=bdate_range(start="2000-01-03", periods=n_bars),
+                     columns=[f"{ticker}_price" for ticker in synthetic_tickers(n_tickers)])
@@ -0,0 +1,269 @@
+"""
+Command line entry point of the repository.
+
+    python main.py ingest AAPL MSFT --start 2020-01-01
+    python main.py backtest AAPL MSFT --algorithm sma --param short_window=20
+    python main.py sweep AAPL MSFT --short-windows 5 10 20 --long-windows 50 100
+    python main.py live AAPL MSFT --port 9000
+
+Starting the command line must stay cheap, since short jobs are started by cron many times a day.
+This module therefore only imports the standard library, and every subcommand imports the modules
+it needs, NumPy and pandas included, when it runs. The import time of this module is held to
+IMPORT_BUDGET_SECONDS by the tests.
+"""
+
+import argparse
+import importlib
+import sys
+from typing import Any, Dict, List, Optional
+
+from uwqsc_algorithmic_trading.src.common.config import MARKET_DATA_DIR
+
+IMPORT_BUDGET_SECONDS = 0.1
+
+# Algorithms selectable on the command line, as module path and class name, imported on use
+ALGORITHMS = {
+    "sma": ("uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl",
+            "SimpleMovingAverageImpl"),
+    "hmm": ("uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl",
+            "HiddenMarkovModelImpl"),
+}
+
+
+def parse_parameters(assignments: List[str]) -> Dict[str, Any]:
+    """
+    Parse algorithm parameters given as name=value. Values are read as integers or floats when
+    possible, and kept as strings otherwise.
+
+    :param assignments: List of strings, e.g. ["short_window=20", "missing_policy=linear"]
+
+    :returns: Dictionary of parameters
+    """
+
+    parameters: Dict[str, Any] = {}
+
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator or not name:
+            raise ValueError(f"Expected a parameter as name=value, got {assignment!r}")
+
+        parameters[name] = value
+        for kind in (float, int):
+            try:
+                parameters[name] = kind(value)
+            except ValueError:
+                break
+
+    return parameters
+
+
+def load_algorithm(name: str, tickers: List[str], parameters: Dict[str, Any]):
+    """
+    Import and build an algorithm of ALGORITHMS.
+
+    :param name: String, a key of ALGORITHMS
+    :param tickers: List of ticker symbols
+    :param parameters: Dictionary of algorithm parameters
+
+    :returns: IAlgorithm
+    """
+
+    module, cls = ALGORITHMS[name]
+    return getattr(importlib.import_module(module), cls)(tickers, parameters)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Command line parser with one subparser per subcommand.
+    """
+
+    parser = argparse.ArgumentParser(description="UWQSC algorithmic trading.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("tickers", nargs="+", help="Ticker symbols")
+    common.add_argument("--data-dir", default=MARKET_DATA_DIR,
+                        help="Directory of the market data store")
+
+    history = argparse.ArgumentParser(add_help=False)
+    history.add_argument("--start", help="First date, e.g. 2020-01-01")
+    history.add_argument("--end", help="Last date, inclusive. Defaults to today")
+    history.add_argument("--field", default="Close", help="Bar column used as price")
+    history.add_argument("--capital", type=float, default=100000.0, help="Cash to allocate")
+    history.add_argument("--commission", type=float, default=0.0,
+                         help="Commission as a fraction of traded value")
+    history.add_argument("--slippage", type=float, default=0.0,
+                         help="Slippage as a fraction of traded value")
+
+    algorithm = argparse.ArgumentParser(add_help=False)
+    algorithm.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="sma",
+                           help="Algorithm to run")
+    algorithm.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                           help="Algorithm parameter, can be repeated")
+
+    ingest = subcommands.add_parser("ingest", parents=[common],
+                                    help="Download bars into the market data store")
+    ingest.add_argument("--start", help="First date. Defaults to the last stored date")
+    ingest.add_argument("--end", help="Last date, inclusive. Defaults to today")
+    ingest.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    ingest.set_defaults(handler=run_ingest)
+
+    backtest = subcommands.add_parser("backtest", parents=[common, history, algorithm],
+                                      help="Backtest an algorithm on stored bars")
+    backtest.set_defaults(handler=run_backtest)
+
+    sweep = subcommands.add_parser("sweep", parents=[common, history],
+                                   help="Backtest a grid of moving average parameters")
+    sweep.add_argument("--short-windows", type=int, nargs="+", default=[5, 10, 20])
+    sweep.add_argument("--long-windows", type=int, nargs="+", default=[50, 100, 200])
+    sweep.add_argument("--position-sizes", type=float, nargs="+", default=[0.1])
+    sweep.add_argument("--workers", type=int, help="Worker processes. Defaults to the CPUs")
+    sweep.add_argument("--top", type=int, default=10, help="Number of results printed")
+    sweep.set_defaults(handler=run_sweep)
+
+    live = subcommands.add_parser("live", parents=[common, algorithm],
+                                  help="Run an algorithm on a live TCP feed of bars")
+    live.add_argument("--host", default="127.0.0.1", help="Address of the feed")
+    live.add_argument("--port", type=int, required=True, help="Port of the feed")
+    live.add_argument("--capital", type=float, default=100000.0, help="Cash to allocate")
+    live.set_defaults(handler=run_live)
+
+    return parser
+
+
+def run_ingest(arguments: argparse.Namespace) -> int:
+    """
+    Download the missing bars of the tickers.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from uwqsc_algorithmic_trading.src.common.data_collection import ConcurrentDownloader
+    from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore
+
+    downloader = ConcurrentDownloader(MarketDataStore(arguments.data_dir),
+                                      max_workers=arguments.workers)
+    summary = downloader.download(arguments.tickers, arguments.start, arguments.end)
+
+    for ticker in arguments.tickers:
+        if ticker in summary.errors:
+            print(f"{ticker}: failed, {summary.errors[ticker]}")
+        else:
+            print(f"{ticker}: {summary.bars.get(ticker, 0)} bars")
+    print(f"{summary.requests} requests, {summary.cache_hits} answered from the cache")
+
+    return 1 if summary.errors else 0
+
+
+def run_backtest(arguments: argparse.Namespace) -> int:
+    """
+    Backtest an algorithm on the stored bars of the tickers.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import VectorizedBacktest
+
+    prices = _load_prices(arguments)
+    algorithm = load_algorithm(arguments.algorithm, arguments.tickers, arguments.parameters)
+    result = VectorizedBacktest(algorithm, arguments.commission, arguments.slippage).run(
+        prices, arguments.capital
+    )
+
+    print(f"{algorithm.name} on {len(prices)} bars of {', '.join(arguments.tickers)}")
+    print(f"Final capital: {result.capital[-1]:.2f}")
+    for name, value in algorithm.metrics.items():
+        print(f"{name}: {value:.4g}")
+
+    return 0
+
+
+def run_sweep(arguments: argparse.Namespace) -> int:
+    """
+    Backtest a grid of moving average parameters and print the best combinations.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from uwqsc_algorithmic_trading.src.backtesting.parameter_sweep import ParameterSweep
+
+    sweep = ParameterSweep(_load_prices(arguments), arguments.capital, arguments.commission,
+                           arguments.slippage, arguments.workers)
+    results = sweep.run({
+        "short_window": arguments.short_windows,
+        "long_window": arguments.long_windows,
+        "position_size": arguments.position_sizes,
+    })
+
+    if results.empty:
+        print("No combination has a short window below its long window")
+        return 1
+
+    print(results.sort_values("sharpe", ascending=False).head(arguments.top).to_string(index=False))
+
+    return 0
+
+
+def run_live(arguments: argparse.Namespace) -> int:
+    """
+    Run an algorithm on the bars of a TCP feed until the feed ends.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from uwqsc_algorithmic_trading.src.backtesting.portfolio_runner import PortfolioRunner
+    from uwqsc_algorithmic_trading.src.ingestion.ingestion_pipeline import run_ingestion
+    from uwqsc_algorithmic_trading.src.ingestion.tcp_bar_source import TcpBarSource
+
+    algorithm = load_algorithm(arguments.algorithm, arguments.tickers, arguments.parameters)
+    runner = PortfolioRunner([algorithm], arguments.capital)
+
+    try:
+        stats = run_ingestion(TcpBarSource(arguments.host, arguments.port), runner)
+        print(f"{stats.bars} bars in {stats.batches} batches, "
+              f"{stats.bars_per_second:.0f} bars per second")
+        print(f"Portfolio value: {runner.values().sum():.2f}")
+        print(runner.metrics().to_string())
+    finally:
+        runner.close()
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a subcommand.
+
+    :param argv: Optional list of arguments. Defaults to sys.argv
+
+    :returns: Exit status of the subcommand
+    """
+
+    parser = build_parser()
+    arguments = parser.parse_args(argv)
+
+    try:
+        arguments.parameters = parse_parameters(getattr(arguments, "param", []))
+    except ValueError as error:
+        parser.error(str(error))
+
+    return arguments.handler(arguments)
+
+
+def _load_prices(arguments: argparse.Namespace):
+    """
+    Stored price panel of the tickers, failing when a ticker has no bars.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore
+
+    prices = MarketDataStore(arguments.data_dir).load_panel(
+        arguments.tickers, arguments.start, arguments.end, arguments.field
+    )
+    empty = [ticker for ticker in arguments.tickers
+             if f"{ticker}_price" not in prices or prices[f"{ticker}_price"].isna().all()]
+    if empty:
+        raise SystemExit(f"No stored bars for {empty}, run the ingest subcommand first")
+
+    return prices
+
+
+if __name__ == '__main__':
+    sys.exit(main())
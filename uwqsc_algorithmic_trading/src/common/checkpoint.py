@@ -0,0 +1,342 @@
+"""
+This file contains the checkpoints of algorithm and preprocessor state, so that a live process can
+resume after a restart without replaying the day to warm up its indicators.
+
+The state of an object is the state of its attributes: NumPy arrays, plain values, lists, tuples,
+dictionaries, enumerations and the objects of this package they hold, such as HistoryBuffer,
+RollingWindow or GaussianHMM, followed recursively. Arrays are stored as they are in one .npz
+file, and everything else is described by a JSON manifest stored in the same file, together with
+CHECKPOINT_SCHEMA_VERSION and the class of the checkpointed object. Restoring writes the saved
+attributes back into an object built with the same constructor arguments, in place, so references
+between the objects it holds stay valid.
+
+Attributes that are not state, e.g. caches, thread pools or the DataFrame of the latest batch, are
+listed by their class in a TRANSIENT_STATE tuple. They are not saved and keep the value of the
+object that is restored into. Any other value that cannot be saved raises a TypeError instead of
+being silently dropped.
+
+Capturing the state copies the arrays and is the only work done on the caller's thread; the
+CheckpointWriter serializes and writes the copies on a background thread.
+"""
+
+import importlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+CHECKPOINT_SCHEMA_VERSION = 1
+MANIFEST_KEY = "manifest"
+
+# Top level package whose objects are followed into
+_PACKAGE = __name__.split(".", maxsplit=1)[0]
+
+Arrays = Dict[str, np.ndarray]
+
+
+def transient_state(cls: type) -> Tuple[str, ...]:
+    """
+    Attributes that are not part of the state of a class or of its base classes.
+
+    :param cls: Class of the checkpointed object
+
+    :returns: Tuple of attribute names
+    """
+
+    return tuple(name for base in cls.__mro__ for name in vars(base).get("TRANSIENT_STATE", ()))
+
+
+def capture_state(obj: Any) -> Tuple[Arrays, Dict[str, Any]]:
+    """
+    Copy the state of an object.
+
+    :param obj: Object of this package, e.g. an IAlgorithm or an IPreProcessData
+
+    :returns: Tuple of the copied arrays by key, and the JSON manifest referring to them
+    """
+
+    arrays: Arrays = {}
+    # Arrays held by several attributes are stored once, and shared again when restored
+    keys: Dict[int, str] = {}
+
+    def encode(value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float, str)):
+            encoded = value
+        elif isinstance(value, np.generic):
+            encoded = value.item()
+        elif isinstance(value, np.ndarray) and value.dtype.kind == "O":
+            encoded = {"objects": [encode(item) for item in value.tolist()]}
+        elif isinstance(value, np.ndarray):
+            if id(value) not in keys:
+                keys[id(value)] = f"a{len(arrays)}"
+                arrays[keys[id(value)]] = np.array(value, copy=True)
+            encoded = {"array": keys[id(value)]}
+        elif isinstance(value, Enum):
+            encoded = {"enum": _class_path(type(value)), "value": encode(value.value)}
+        elif isinstance(value, list):
+            encoded = [encode(item) for item in value]
+        elif isinstance(value, tuple):
+            encoded = {"tuple": [encode(item) for item in value]}
+        elif isinstance(value, dict):
+            encoded = {"dict": [[encode(key), encode(item)] for key, item in value.items()]}
+        elif type(value).__module__.split(".", maxsplit=1)[0] == _PACKAGE:
+            encoded = {"object": _class_path(type(value)), "state": attributes(value)}
+        else:
+            raise TypeError(f"Cannot checkpoint a {type(value).__name__}. Mark the attribute "
+                            f"holding it in TRANSIENT_STATE if it is not state")
+
+        return encoded
+
+    def attributes(value: Any) -> Dict[str, Any]:
+        transient = transient_state(type(value))
+        state = {}
+
+        for name, item in vars(value).items():
+            if name in transient:
+                continue
+            try:
+                state[name] = encode(item)
+            except TypeError as error:
+                raise TypeError(f"{type(value).__name__}.{name}: {error}") from error
+
+        return state
+
+    manifest = {
+        "schema": CHECKPOINT_SCHEMA_VERSION,
+        "class": _class_path(type(obj)),
+        "state": attributes(obj),
+    }
+
+    return arrays, manifest
+
+
+def restore_state(obj: Any, arrays: Arrays, manifest: Dict[str, Any]) -> None:
+    """
+    Write a captured state back into an object, in place.
+
+    :param obj: Object of the class the state was captured from, built with the same constructor
+                arguments
+    :param arrays: Dictionary of arrays by key, see capture_state
+    :param manifest: JSON manifest, see capture_state
+    """
+
+    if manifest.get("schema") != CHECKPOINT_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported checkpoint schema {manifest.get('schema')}, "
+                         f"expected {CHECKPOINT_SCHEMA_VERSION}")
+    if manifest["class"] != _class_path(type(obj)):
+        raise ValueError(f"Checkpoint of a {manifest['class']} cannot be restored into a "
+                         f"{_class_path(type(obj))}")
+
+    def decode(value: Any, current: Any = None) -> Any:
+        if not isinstance(value, (list, dict)):
+            decoded = value
+        elif isinstance(value, list):
+            decoded = [decode(item) for item in value]
+        elif "array" in value:
+            decoded = arrays[value["array"]]
+        elif "objects" in value:
+            decoded = np.empty(len(value["objects"]), dtype=object)
+            decoded[:] = [decode(item) for item in value["objects"]]
+        elif "enum" in value:
+            decoded = _import_class(value["enum"])(decode(value["value"]))
+        elif "tuple" in value:
+            decoded = tuple(decode(item) for item in value["tuple"])
+        elif "dict" in value:
+            decoded = {decode(key): decode(item) for key, item in value["dict"]}
+        else:
+            decoded = current
+            cls = _import_class(value["object"])
+            if not isinstance(decoded, cls):
+                # Objects built lazily, e.g. rolling windows, do not exist yet after a restart
+                decoded = cls.__new__(cls)
+                for name in transient_state(cls):
+                    setattr(decoded, name, None)
+            attributes(decoded, value["state"])
+
+        return decoded
+
+    def attributes(target: Any, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(target, name, decode(value, vars(target).get(name)))
+
+    attributes(obj, manifest["state"])
+
+
+def save_checkpoint(path: str, arrays: Arrays, manifest: Dict[str, Any]) -> None:
+    """
+    Write a captured state to an uncompressed .npz file, replacing the file atomically. Arrays of
+    the same data type are packed into one array of the file, since reading an array from an .npz
+    file has a fixed cost that would otherwise dominate restores of many small arrays.
+
+    :param path: String representing the checkpoint file
+    :param arrays: Dictionary of arrays by key, see capture_state
+    :param manifest: JSON manifest, see capture_state
+    """
+
+    # Packed name and flattened arrays by data type, and the position of every array
+    groups: Dict[str, Tuple[str, List[np.ndarray]]] = {}
+    sizes: Dict[str, int] = {}
+    layout: Dict[str, Tuple[str, int, Tuple[int, ...]]] = {}
+
+    for key, value in arrays.items():
+        name, parts = groups.setdefault(value.dtype.str, (f"p{len(groups)}", []))
+        layout[key] = (name, sizes.get(name, 0), value.shape)
+        sizes[name] = layout[key][1] + value.size
+        parts.append(value.ravel())
+
+    packed = {name: np.concatenate(parts) for name, parts in groups.values()}
+    encoded = np.frombuffer(json.dumps(dict(manifest, layout=layout)).encode("utf-8"),
+                            dtype=np.uint8)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as handle:
+        np.savez(handle, **packed, **{MANIFEST_KEY: encoded})
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str) -> Tuple[Arrays, Dict[str, Any]]:
+    """
+    Read a checkpoint file.
+
+    :param path: String representing the checkpoint file
+
+    :returns: Tuple of the arrays by key and the JSON manifest, see capture_state
+    """
+
+    with np.load(path, allow_pickle=False) as data:
+        packed = {key: data[key] for key in data.files}
+
+    manifest = json.loads(packed.pop(MANIFEST_KEY).tobytes().decode("utf-8"))
+    arrays = {
+        key: packed[name][offset:offset + int(np.prod(shape, dtype=np.int64))].reshape(shape)
+        for key, (name, offset, shape) in manifest.pop("layout", {}).items()
+    }
+
+    return arrays, manifest
+
+
+def checkpoint(obj: Any, path: str) -> None:
+    """
+    Save the state of an object on the calling thread.
+
+    :param obj: Object of this package, e.g. an IAlgorithm
+    :param path: String representing the checkpoint file
+    """
+
+    save_checkpoint(path, *capture_state(obj))
+
+
+def restore(obj: Any, path: str) -> None:
+    """
+    Restore the state of an object from a checkpoint file.
+
+    :param obj: Object of the checkpointed class, built with the same constructor arguments
+    :param path: String representing the checkpoint file
+    """
+
+    restore_state(obj, *load_checkpoint(path))
+
+
+class CheckpointWriter:
+    """
+    Saves the state of an object every few bars without blocking the caller on disk. The state is
+    captured on the caller's thread and written by a single background thread. When the previous
+    checkpoint is still being written, the new one is skipped; the file always holds a complete
+    checkpoint.
+    """
+
+    def __init__(self, obj: Any, path: str, interval: int = 1):
+        """
+        Initialize the writer.
+
+        :param obj: Object of this package to checkpoint, e.g. an IAlgorithm
+        :param path: String representing the checkpoint file
+        :param interval: Integer representing the number of bars between checkpoints
+        """
+
+        if interval < 1:
+            raise ValueError(f"Checkpoint interval must be positive, got {interval}")
+
+        self.obj = obj
+        self.path = path
+        self.interval = interval
+        self.submitted = 0
+        self.skipped = 0
+        self.__bars__ = 0
+        self.__executor__: Optional[ThreadPoolExecutor] = None
+        self.__write__: Optional[Future] = None
+
+    def on_bar(self) -> None:
+        """
+        Count a processed bar, checkpointing every interval bars.
+        """
+
+        self.__bars__ += 1
+        if self.__bars__ % self.interval == 0:
+            self.save()
+
+    def save(self) -> bool:
+        """
+        Capture the state now and write it in the background.
+
+        :returns: True if the checkpoint was submitted, False if it was skipped because the
+                  previous one is still being written
+        """
+
+        if self.__write__ is not None:
+            if not self.__write__.done():
+                self.skipped += 1
+                return False
+            self.__write__.result()
+
+        if self.__executor__ is None:
+            self.__executor__ = ThreadPoolExecutor(max_workers=1,
+                                                   thread_name_prefix="checkpoint")
+
+        arrays, manifest = capture_state(self.obj)
+        self.__write__ = self.__executor__.submit(save_checkpoint, self.path, arrays, manifest)
+        self.submitted += 1
+
+        return True
+
+    def close(self) -> None:
+        """
+        Wait for the checkpoint being written and stop the background thread. Errors raised while
+        writing are raised here.
+        """
+
+        if self.__executor__ is not None:
+            self.__executor__.shutdown()
+            self.__executor__ = None
+        if self.__write__ is not None:
+            write, self.__write__ = self.__write__, None
+            write.result()
+
+
+def _class_path(cls: type) -> str:
+    """
+    Importable name of a class, as module:qualified name.
+    """
+
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_class(path: str) -> type:
+    """
+    Class of an importable name built by _class_path.
+    """
+
+    module, _, qualname = path.partition(":")
+    if module.split(".", maxsplit=1)[0] != _PACKAGE:
+        raise ValueError(f"Checkpoints only hold classes of {_PACKAGE}, got {path}")
+
+    value: Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        value = getattr(value, name)
+
+    return value
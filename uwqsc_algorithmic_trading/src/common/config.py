@@ -9,6 +9,16 @@ COMMON_DIR = os.path.dirname(os.path.abspath(__file__))
 SRC_DIR = os.path.dirname(COMMON_DIR)
 PROJECT_DIR = os.path.dirname(SRC_DIR)
 DATA_DIR = os.path.join(PROJECT_DIR, "data")
+MARKET_DATA_DIR = os.path.join(DATA_DIR, "market_data")
+BENCHMARK_DIR = os.path.join(DATA_DIR, "benchmarks")
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+
+# Column names of long format bars, with one row per ticker and date
+DATE_COLUMN = "Date"
+TICKER_COLUMN = "Ticker"
+
+# Memory budget of the indicator cache shared by the preprocessors, in bytes
+INDICATOR_CACHE_BYTES = 256 * 1024 * 1024
 
 # Errors
 INTERFACE_NOT_IMPLEMENTED_ERROR = RuntimeError("Method Not Implemented")
@@ -1,13 +1,542 @@
 """
 This file will collect the data required to run the algorithm. It takes use of the API selected
 by the team, and adds that in the data folder.
+
+Many tickers are downloaded concurrently by the ConcurrentDownloader: worker threads share a rate
+limit, keep their HTTP connections open between requests, retry transient failures and write
+every ticker straight into the market data store. Only the date ranges missing from the store are
+requested, and raw responses are cached on disk with their ETag, so reruns either skip the request
+or revalidate it cheaply.
 """
 
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timedelta, Timestamp, to_datetime
+
+from uwqsc_algorithmic_trading.src.common.config import DATE_COLUMN, HTTP_CACHE_DIR
+from uwqsc_algorithmic_trading.src.common.market_data_store import (
+    DateLike,
+    Fetcher,
+    MarketDataStore
+)
+
+YAHOO_CHART_URL = ("https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+                   "?period1={start}&period2={end}&interval=1d&includeAdjustedClose=true")
+
+# Status codes worth another attempt: rate limited, or a temporary server problem
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-def setup_data():
+ONE_DAY = Timedelta(days=1)
+
+
+def setup_data(tickers: Optional[List[str]] = None,
+               start: DateLike = None,
+               end: DateLike = None,
+               fetcher: Optional[Fetcher] = None,
+               store: Optional[MarketDataStore] = None):
     """
     Uses the API/datasource discovered by the team and stores that locally for the user to use.
 
+    :param tickers: Optional list of ticker symbols to download. Nothing is downloaded without it
+    :param start: Optional first date to download
+    :param end: Optional last date to download
+    :param fetcher: Optional callable taking (ticker, start, end) and returning a DataFrame of
+                    bars, e.g. fetch_yfinance or a local stub. Defaults to a ConcurrentDownloader,
+                    which only downloads the dates missing from the store
+    :param store: Optional MarketDataStore. Defaults to the store under DATA_DIR
+
     :sideeffect: Creates a local storage of the stock data
     :return: None
     """
+
+    if not tickers:
+        return
+
+    store = store or MarketDataStore()
+
+    if fetcher is None:
+        ConcurrentDownloader(store).download(tickers, start, end).raise_for_errors()
+    else:
+        store.ingest(tickers, fetcher, start, end)
+
+
+def parse_yahoo_chart(body: bytes) -> DataFrame:
+    """
+    Daily bars from a response of the Yahoo Finance chart API, with the columns of yfinance.
+
+    :param body: Bytes of the JSON response
+
+    :returns: DataFrame indexed by date, empty when the range holds no bars
+    """
+
+    chart = json.loads(body)["chart"]
+    if chart.get("error"):
+        raise ValueError(f"Chart request failed: {chart['error']}")
+
+    result = chart["result"][0]
+    if not result.get("timestamp"):
+        return DataFrame(index=DatetimeIndex([], name=DATE_COLUMN))
+
+    quote = result["indicators"]["quote"][0]
+    columns = {
+        name.capitalize(): np.array(quote[name], dtype=np.float64)
+        for name in ("open", "high", "low", "close", "volume")
+    }
+    for adjusted in result["indicators"].get("adjclose", []):
+        columns["Adj Close"] = np.array(adjusted["adjclose"], dtype=np.float64)
+
+    index = to_datetime(result["timestamp"], unit="s").normalize().rename(DATE_COLUMN)
+
+    return DataFrame(columns, index=index)
+
+
+def missing_ranges(stored: Optional[Tuple[Timestamp, Timestamp]],
+                   start: DateLike = None,
+                   end: DateLike = None) -> List[Tuple[Timestamp, Timestamp]]:
+    """
+    Date ranges to download so that the store covers [start, end], given what it already holds.
+
+    :param stored: Optional tuple with the first and last stored dates, see
+                   MarketDataStore.date_range
+    :param start: Optional first date wanted. None means from the last stored date, or from the
+                  earliest available date for tickers that are not stored
+    :param end: Optional last date wanted, inclusive. Defaults to today
+
+    :returns: List of (first, last) date pairs, inclusive, empty when nothing is missing
+    """
+
+    start = None if start is None else Timestamp(start).normalize()
+    end = Timestamp.today().normalize() if end is None else Timestamp(end).normalize()
+
+    if stored is None:
+        first = Timestamp(0) if start is None else start
+        return [(first, end)] if first <= end else []
+
+    first, last = (Timestamp(date).normalize() for date in stored)
+    ranges = []
+
+    if start is not None and start < first:
+        ranges.append((start, min(first - ONE_DAY, end)))
+    if end > last:
+        ranges.append((max(last + ONE_DAY, start or last), end))
+
+    return [(low, high) for low, high in ranges if low <= high]
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads. Every acquire takes one token and sleeps until it is available.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize a full bucket.
+
+        :param rate: Float. Tokens added per second
+        :param burst: Optional integer representing the bucket size. Defaults to one second of
+                      tokens
+        """
+
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.__tokens__ = self.capacity
+        self.__updated__ = time.monotonic()
+        self.__lock__ = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Take one token, waiting for it if the bucket is empty.
+        """
+
+        with self.__lock__:
+            self._refill()
+            # The token is reserved now; a negative balance is the queue of waiting threads
+            self.__tokens__ -= 1
+            wait = -self.__tokens__ / self.rate if self.__tokens__ < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """
+        Take one token if one is available, without waiting.
+
+        :returns: True if a token was taken.
+        """
+
+        with self.__lock__:
+            self._refill()
+            if self.__tokens__ < 1:
+                return False
+            self.__tokens__ -= 1
+
+        return True
+
+    def _refill(self) -> None:
+        """
+        Add the tokens earned since the last update. The lock must be held.
+        """
+
+        now = time.monotonic()
+        self.__tokens__ = min(self.capacity,
+                              self.__tokens__ + (now - self.__updated__) * self.rate)
+        self.__updated__ = now
+
+
+class ConnectionPool:
+    """
+    Persistent HTTP connections, one per thread and host, so that the requests of a worker reuse
+    the same socket instead of connecting every time.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        """
+        Initialize an empty pool.
+
+        :param timeout: Float. Socket timeout in seconds
+        """
+
+        self.timeout = timeout
+        self.__local__ = threading.local()
+        self.__lock__ = threading.Lock()
+        self.__connections__: List[http.client.HTTPConnection] = []
+
+    def get(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """
+        :param scheme: String, "http" or "https"
+        :param netloc: String representing the host and optional port
+
+        :returns: Connection of the calling thread to the host, created on first use.
+        """
+
+        connections = self.__local__.__dict__.setdefault("connections", {})
+        connection = connections.get((scheme, netloc))
+
+        if connection is None:
+            kind = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = connections[(scheme, netloc)] = kind(netloc, timeout=self.timeout)
+            with self.__lock__:
+                self.__connections__.append(connection)
+
+        return connection
+
+    def drop(self, scheme: str, netloc: str) -> None:
+        """
+        Close the connection of the calling thread to a host after an error, so that the next
+        request reconnects.
+
+        :param scheme: String, "http" or "https"
+        :param netloc: String representing the host and optional port
+        """
+
+        connection = self.__local__.__dict__.get("connections", {}).pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def close(self) -> None:
+        """
+        Close the connections of every thread. Later requests open new ones.
+        """
+
+        with self.__lock__:
+            connections, self.__connections__ = self.__connections__, []
+            self.__local__ = threading.local()
+
+        for connection in connections:
+            connection.close()
+
+
+class HttpCache:
+    """
+    Raw HTTP responses on disk, keyed by URL, with their ETag and Last-Modified headers.
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR):
+        """
+        Initialize the cache.
+
+        :param directory: String representing the directory holding the cached responses
+        """
+
+        self.directory = directory
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        """
+        :param url: String representing the requested URL
+
+        :returns: Tuple of the stored headers and body, or None when the URL is not cached.
+        """
+
+        path = self._path(url)
+
+        try:
+            with open(f"{path}.json", encoding="utf-8") as handle:
+                headers = json.load(handle)
+            with open(f"{path}.body", "rb") as handle:
+                return headers, handle.read()
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, headers: Dict[str, str], body: bytes) -> None:
+        """
+        Store a response, replacing the files atomically.
+
+        :param url: String representing the requested URL
+        :param headers: Dictionary of the validators to store, e.g. "ETag"
+        :param body: Bytes of the response
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url)
+
+        for suffix, content in ((".body", body),
+                                (".json", json.dumps(dict(headers, url=url)).encode("utf-8"))):
+            temporary = f"{path}{suffix}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as handle:
+                handle.write(content)
+            os.replace(temporary, f"{path}{suffix}")
+
+    def _path(self, url: str) -> str:
+        """
+        Path of the cache files of a URL, without suffix.
+        """
+
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+
+@dataclass
+class DownloadSummary:
+    """
+    Outcome of ConcurrentDownloader.download: the number of bars written per ticker, the error of
+    every ticker that failed, and how many requests were sent or answered from the cache.
+    """
+
+    bars: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    requests: int = 0
+    cache_hits: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def tally(self, counter: str) -> None:
+        """
+        Increment a counter from any worker thread.
+
+        :param counter: String, "requests" or "cache_hits"
+        """
+
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def raise_for_errors(self) -> None:
+        """
+        Raise a RuntimeError naming the tickers that failed, if any.
+        """
+
+        if self.errors:
+            raise RuntimeError(f"Downloading failed for {sorted(self.errors)}: {self.errors}")
+
+
+class ConcurrentDownloader:
+    """
+    Downloads daily bars for many tickers at once into a MarketDataStore. Each worker thread keeps
+    one open connection per host, all threads share one rate limit, and failed requests are
+    retried with exponential backoff. Instances can also be used as a Fetcher.
+    """
+
+    def __init__(self,
+                 store: Optional[MarketDataStore] = None,
+                 url_template: str = YAHOO_CHART_URL,
+                 parser: Callable[[bytes], DataFrame] = parse_yahoo_chart,
+                 max_workers: int = 8,
+                 requests_per_second: float = 5.0,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 timeout: float = 30.0,
+                 cache: Optional[HttpCache] = None):
+        """
+        Initialize the downloader.
+
+        :param store: Optional MarketDataStore written to. Defaults to the store under DATA_DIR
+        :param url_template: String URL with {ticker}, {start} and {end} fields, the dates being
+                             given in seconds since the epoch, end excluded
+        :param parser: Callable turning a response body into a DataFrame of bars
+        :param max_workers: Integer representing the number of tickers downloaded at once
+        :param requests_per_second: Float. Rate limit shared by the workers
+        :param retries: Integer representing the number of retries of a failed request
+        :param backoff: Float. Seconds waited before the first retry, doubling every retry
+        :param timeout: Float. Socket timeout in seconds
+        :param cache: Optional HttpCache. Defaults to a cache under DATA_DIR
+        """
+
+        self.store = store or MarketDataStore()
+        self.url_template = url_template
+        self.parser = parser
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache or HttpCache()
+        self.__limiter__ = RateLimiter(requests_per_second)
+        self.__pool__ = ConnectionPool(timeout)
+        self.__summary__ = DownloadSummary()
+
+    def __call__(self, ticker: str, start: DateLike = None, end: DateLike = None) -> DataFrame:
+        """
+        Fetcher interface: download the bars of one ticker between two dates, inclusive.
+
+        :param ticker: String that represents trading symbol
+        :param start: Optional first date. None downloads from the earliest available date
+        :param end: Optional last date. Defaults to today
+
+        :returns: DataFrame of bars
+        """
+
+        start = Timestamp(0) if start is None else Timestamp(start).normalize()
+        end = Timestamp.today().normalize() if end is None else Timestamp(end).normalize()
+
+        url = self.url_template.format(ticker=ticker,
+                                       start=int(start.timestamp()),
+                                       end=int((end + ONE_DAY).timestamp()))
+
+        # Ranges that ended before today do not change anymore, so a cached copy is used as is
+        return self.parser(self._get(url, revalidate=end >= Timestamp.today().normalize()))
+
+    def download(self,
+                 tickers: List[str],
+                 start: DateLike = None,
+                 end: DateLike = None) -> DownloadSummary:
+        """
+        Bring the store up to date for many tickers, downloading only the missing date ranges.
+        A ticker that fails does not stop the others.
+
+        :param tickers: List of ticker symbols
+        :param start: Optional first date wanted. None continues from the last stored date
+        :param end: Optional last date wanted, inclusive. Defaults to today
+
+        :returns: DownloadSummary
+        """
+
+        self.__summary__ = summary = DownloadSummary()
+
+        def download_ticker(ticker: str) -> None:
+            try:
+                written = 0
+                for low, high in missing_ranges(self.store.date_range(ticker), start, end):
+                    bars = self(ticker, low, high)
+                    self.store.write(ticker, bars)
+                    written += len(bars)
+                summary.bars[ticker] = written
+            except (OSError, ValueError, KeyError, http.client.HTTPException) as error:
+                summary.errors[ticker] = str(error)
+
+        try:
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix="download") as executor:
+                list(executor.map(download_ticker, tickers))
+        finally:
+            self.close()
+
+        return summary
+
+    def close(self) -> None:
+        """
+        Close the pooled connections. Later requests open new ones.
+        """
+
+        self.__pool__.close()
+
+    def _get(self, url: str, revalidate: bool = True) -> bytes:
+        """
+        Body of a URL, from the cache when it is still valid, otherwise requested with retries.
+        """
+
+        cached = self.cache.get(url)
+        if cached is not None and not revalidate:
+            self.__summary__.tally("cache_hits")
+            return cached[1]
+
+        headers = {}
+        if cached is not None:
+            if cached[0].get("ETag"):
+                headers["If-None-Match"] = cached[0]["ETag"]
+            if cached[0].get("Last-Modified"):
+                headers["If-Modified-Since"] = cached[0]["Last-Modified"]
+
+        status, response_headers, body = self._request(url, headers)
+
+        if status == 304 and cached is not None:
+            self.__summary__.tally("cache_hits")
+            return cached[1]
+        if status != 200:
+            raise OSError(f"GET {url} returned HTTP {status}")
+
+        validators = {name: response_headers[name] for name in ("ETag", "Last-Modified")
+                      if response_headers.get(name)}
+        self.cache.put(url, validators, body)
+
+        return body
+
+    def _request(self,
+                 url: str,
+                 headers: Dict[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Send a GET request over the pooled connection of this thread, retrying connection errors
+        and the statuses in RETRY_STATUSES. Response headers are returned as an HTTPMessage, whose
+        lookups ignore the case of header names.
+        """
+
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        for attempt in range(self.retries):
+            delay = self.backoff * 2 ** attempt
+
+            try:
+                status, message, body = self._send(parts.scheme, parts.netloc, target, headers)
+            except (OSError, http.client.HTTPException):
+                pass
+            else:
+                if status not in RETRY_STATUSES:
+                    return status, message, body
+                retry_after = message.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+
+            time.sleep(delay)
+
+        # The last attempt returns whatever status it gets and raises its connection error
+        return self._send(parts.scheme, parts.netloc, target, headers)
+
+    def _send(self,
+              scheme: str,
+              netloc: str,
+              target: str,
+              headers: Dict[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Send a single GET request, dropping the pooled connection when it fails.
+        """
+
+        self.__limiter__.acquire()
+        self.__summary__.tally("requests")
+
+        try:
+            connection = self.__pool__.get(scheme, netloc)
+            connection.request("GET", target, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.__pool__.drop(scheme, netloc)
+            raise
+
+        return response.status, response.msg, body
@@ -0,0 +1,471 @@
+"""
+This file contains a Gaussian Hidden Markov Model fitted for many tickers at once. Every ticker
+gets its own start probabilities, transition matrix and per-state normal emissions over a single
+observed series (usually daily log returns). All recursions run in log space and are vectorized
+across tickers, so a batch of hundreds of tickers costs one pass over the bars per iteration.
+
+Internally arrays are laid out states first and tickers last, e.g. (bars, states, tickers), so
+that every step of a recursion works on contiguous rows of tickers. Tickers whose likelihood has
+converged are dropped from the remaining Baum-Welch iterations.
+
+Missing observations (NaN) are marginalized out: they contribute no evidence, and the hidden
+state simply evolves through the transition matrix.
+"""
+
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+
+LOG_2PI = np.log(2.0 * np.pi)
+
+# (start probabilities, transition matrices, means, variances), states first and tickers last
+Parameters = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _emission_log_likelihood(observations: np.ndarray,
+                             means: np.ndarray,
+                             variances: np.ndarray) -> np.ndarray:
+    """
+    Log density of every observation under every state, zero for missing observations.
+
+    :param observations: 2-D NumPy array of shape (bars, tickers)
+    :param means: 2-D NumPy array of shape (states, tickers)
+    :param variances: 2-D NumPy array of shape (states, tickers)
+
+    :returns: 3-D NumPy array of shape (bars, states, tickers)
+    """
+
+    centred = observations[:, None, :] - means
+    log_density = -0.5 * (LOG_2PI + np.log(variances) + centred * centred / variances)
+
+    missing = np.isnan(observations)
+    if missing.any():
+        log_density[np.broadcast_to(missing[:, None, :], log_density.shape)] = 0.0
+
+    return log_density
+
+
+def _forward(log_emissions: np.ndarray,
+             startprob: np.ndarray,
+             transmat: np.ndarray) -> np.ndarray:
+    """
+    Forward pass: log P(observations up to t, state at t). The recursion carries probabilities
+    normalized at every bar together with the logarithm of the normalizers, which is the log-space
+    recursion without a logsumexp per bar, and cannot underflow however long the history.
+    """
+
+    shift = log_emissions.max(axis=1)
+    emissions = np.exp(log_emissions - shift[:, None, :])
+    alpha = np.empty_like(emissions)
+    log_scale = np.empty_like(shift)
+
+    current = startprob * emissions[0]
+    for row, emission in enumerate(emissions):
+        if row:
+            current = (current[:, None, :] * transmat).sum(axis=0) * emission
+        total = current.sum(axis=0)
+        current = current / total
+        alpha[row] = current
+        log_scale[row] = total
+
+    with np.errstate(divide="ignore"):
+        log_scale = np.cumsum(np.log(log_scale) + shift, axis=0)
+        return np.log(alpha) + log_scale[:, None, :]
+
+
+def _backward(log_emissions: np.ndarray, transmat: np.ndarray) -> np.ndarray:
+    """
+    Backward pass: log P(observations after t | state at t), normalized like _forward.
+    """
+
+    shift = log_emissions.max(axis=1)
+    emissions = np.exp(log_emissions - shift[:, None, :])
+    transposed = np.ascontiguousarray(np.swapaxes(transmat, 0, 1))
+    beta = np.empty_like(emissions)
+    log_scale = np.zeros_like(shift)
+
+    current = np.ones(emissions.shape[1:])
+    beta[-1] = current
+    for row in range(len(emissions) - 2, -1, -1):
+        current = ((emissions[row + 1] * current)[:, None, :] * transposed).sum(axis=0)
+        total = current.sum(axis=0)
+        current = current / total
+        beta[row] = current
+        log_scale[row] = np.log(total) + shift[row + 1]
+
+    with np.errstate(divide="ignore"):
+        log_scale = np.cumsum(log_scale[::-1], axis=0)[::-1]
+        return np.log(beta) + log_scale[:, None, :]
+
+
+def _total(log_alpha: np.ndarray) -> np.ndarray:
+    """
+    Log-likelihood of every ticker from the last forward variables.
+    """
+
+    last = log_alpha[-1]
+    peak = last.max(axis=0)
+
+    return peak + np.log(np.exp(last - peak).sum(axis=0))
+
+
+def _normalize_log(log_values: np.ndarray) -> np.ndarray:
+    """
+    Probabilities over the states axis from unnormalized log probabilities of shape
+    (bars, states, tickers), returned as (bars, tickers, states).
+    """
+
+    values = np.exp(log_values - log_values.max(axis=1, keepdims=True))
+    values /= values.sum(axis=1, keepdims=True)
+
+    return np.swapaxes(values, 1, 2)
+
+
+def _transition_counts(log_emissions: np.ndarray,
+                       log_alpha: np.ndarray,
+                       log_beta: np.ndarray,
+                       transmat: np.ndarray,
+                       log_likelihood: np.ndarray) -> np.ndarray:
+    """
+    Expected number of transitions between every pair of states: the sum over bars of
+    alpha(t-1, i) A(i, j) b(t, j) beta(t, j) divided by the likelihood, with both log factors
+    shifted by their maximum per bar before exponentiating.
+    """
+
+    past = log_alpha[:-1]
+    future = log_emissions[1:] + log_beta[1:]
+    past_peak = past.max(axis=1, keepdims=True)
+    future_peak = future.max(axis=1, keepdims=True)
+    scale = np.exp(past_peak + future_peak - log_likelihood)
+
+    return np.einsum(
+        "tin,tjn->ijn", np.exp(past - past_peak) * scale, np.exp(future - future_peak)
+    ) * transmat
+
+
+def _maximize(observations: np.ndarray,
+              log_emissions: np.ndarray,
+              log_alpha: np.ndarray,
+              log_beta: np.ndarray,
+              parameters: Parameters,
+              min_variance: float) -> Parameters:
+    """
+    Baum-Welch re-estimation of every parameter from the forward and backward variables.
+    """
+
+    startprob, transmat, means, variances = parameters
+    log_likelihood = _total(log_alpha)
+
+    posteriors = np.exp(log_alpha + log_beta - log_likelihood)
+    startprob = posteriors[0] / posteriors[0].sum(axis=0)
+
+    if len(observations) > 1:
+        counts = _transition_counts(log_emissions, log_alpha, log_beta, transmat, log_likelihood)
+        totals = counts.sum(axis=1, keepdims=True)
+        transmat = np.where(totals > 0, counts / np.where(totals > 0, totals, 1.0), transmat)
+
+    valid = ~np.isnan(observations)
+    values = np.where(valid, observations, 0.0)
+    weights = posteriors * valid[:, None, :]
+    totals = weights.sum(axis=0)
+    observed = totals > 0
+    totals = np.where(observed, totals, 1.0)
+
+    new_means = np.einsum("tkn,tn->kn", weights, values) / totals
+    centred = values[:, None, :] - new_means
+    new_variances = np.einsum("tkn,tkn->kn", weights, centred * centred) / totals
+
+    return (
+        startprob,
+        transmat,
+        np.where(observed, new_means, means),
+        np.where(observed, new_variances + min_variance, variances),
+    )
+
+
+class GaussianHMM:
+    """
+    Batched Gaussian Hidden Markov Model with log-space forward-backward, Baum-Welch and Viterbi.
+    Observations are 2-D arrays of shape (bars, tickers); a 1-D series is treated as one ticker.
+
+    Fitted parameters are exposed per ticker: startprob and means/variances of shape
+    (tickers, states) and transmat of shape (tickers, states, states). After fitting, the states
+    of every ticker are ordered by increasing mean, so state 0 is the most bearish regime and the
+    last state the most bullish one.
+    """
+
+    def __init__(self,
+                 n_states: int = 3,
+                 n_iter: int = 50,
+                 tol: float = 1e-2,
+                 min_variance: float = 1e-10,
+                 self_transition: float = 0.9):
+        """
+        Initialize an unfitted model.
+
+        :param n_states: Integer representing the number of hidden states (regimes)
+        :param n_iter: Integer representing the maximum number of Baum-Welch iterations
+        :param tol: Float. A ticker has converged once its log-likelihood improves by less than tol
+        :param min_variance: Float added to every emission variance to keep it positive
+        :param self_transition: Float. Initial probability of staying in the same state
+        """
+
+        if n_states < 2:
+            raise ValueError(f"A hidden Markov model needs at least two states, got {n_states}")
+
+        self.n_states = n_states
+        self.n_iter = n_iter
+        self.tol = tol
+        self.min_variance = min_variance
+        self.self_transition = self_transition
+        self.startprob: Optional[np.ndarray] = None
+        self.transmat: Optional[np.ndarray] = None
+        self.means: Optional[np.ndarray] = None
+        self.variances: Optional[np.ndarray] = None
+        self.log_likelihood: Optional[np.ndarray] = None
+
+    @property
+    def fitted(self) -> bool:
+        """
+        :returns: True once the model parameters are set.
+        """
+
+        return self.means is not None
+
+    def fit(self, observations: np.ndarray, warm_start: bool = False) -> "GaussianHMM":
+        """
+        Estimate the parameters of every ticker with the Baum-Welch algorithm.
+
+        :param observations: NumPy array of shape (bars, tickers) or (bars,)
+        :param warm_start: Boolean. Start from the current parameters instead of the default
+                           initialization, so that a refit on slightly more data converges in a
+                           few iterations
+
+        :returns: The fitted model
+        """
+
+        if warm_start and self.fitted:
+            observations = self._as_matrix(observations)
+            parameters = tuple(parameter.copy() for parameter in self._parameters())
+        else:
+            self.means = None
+            observations = self._as_matrix(observations)
+            parameters = self._initial_parameters(observations)
+
+        active = np.arange(observations.shape[1])
+        previous = np.full(observations.shape[1], -np.inf)
+
+        for _ in range(self.n_iter):
+            current = observations[:, active]
+            subset = tuple(parameter[..., active] for parameter in parameters)
+
+            log_emissions = _emission_log_likelihood(current, subset[2], subset[3])
+            log_alpha = _forward(log_emissions, subset[0], subset[1])
+            log_beta = _backward(log_emissions, subset[1])
+            updated = _maximize(
+                current, log_emissions, log_alpha, log_beta, subset, self.min_variance
+            )
+
+            for parameter, values in zip(parameters, updated):
+                parameter[..., active] = values
+
+            log_likelihood = _total(log_alpha)
+            improvement = log_likelihood - previous[active]
+            previous[active] = log_likelihood
+
+            active = active[~((improvement < self.tol) | np.isnan(improvement))]
+            if active.size == 0:
+                break
+
+        self._set_parameters(parameters)
+        self.log_likelihood = self.score(observations)
+
+        return self
+
+    def score(self, observations: np.ndarray) -> np.ndarray:
+        """
+        :param observations: NumPy array of shape (bars, tickers) or (bars,)
+
+        :returns: 1-D NumPy array with the log-likelihood of every ticker's observations.
+        """
+
+        return _total(self._log_alpha(self._as_matrix(observations)))
+
+    def filter(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Filtered state probabilities P(state at t | observations up to t). Only past observations
+        are used, so the result is safe to trade on.
+
+        :param observations: NumPy array of shape (bars, tickers) or (bars,)
+
+        :returns: 3-D NumPy array of shape (bars, tickers, states)
+        """
+
+        return _normalize_log(self._log_alpha(self._as_matrix(observations)))
+
+    def filter_step(self,
+                    probabilities: Optional[np.ndarray],
+                    observation: np.ndarray) -> np.ndarray:
+        """
+        One step of the forward recursion: the filtered state probabilities after one more bar.
+        Costs O(tickers * states^2) regardless of how many bars came before.
+
+        :param probabilities: Optional 2-D NumPy array of shape (tickers, states) with the filtered
+                              probabilities of the previous bar. None for the first bar
+        :param observation: 1-D NumPy array with one observation per ticker, NaN if missing
+
+        :returns: 2-D NumPy array of shape (tickers, states)
+        """
+
+        startprob, transmat, means, variances = self._parameters()
+        observation = np.asarray(observation, dtype=np.float64).reshape(1, -1)
+        log_emissions = _emission_log_likelihood(observation, means, variances)[0]
+
+        if probabilities is None:
+            prior = startprob
+        else:
+            prior = (probabilities.T[:, None, :] * transmat).sum(axis=0)
+
+        posterior = prior * np.exp(log_emissions - log_emissions.max(axis=0))
+
+        return (posterior / posterior.sum(axis=0)).T
+
+    def smooth(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Smoothed state probabilities P(state at t | all observations).
+
+        :param observations: NumPy array of shape (bars, tickers) or (bars,)
+
+        :returns: 3-D NumPy array of shape (bars, tickers, states)
+        """
+
+        startprob, transmat, means, variances = self._parameters()
+        log_emissions = _emission_log_likelihood(self._as_matrix(observations), means, variances)
+
+        return _normalize_log(
+            _forward(log_emissions, startprob, transmat) + _backward(log_emissions, transmat)
+        )
+
+    def decode(self, observations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Most likely state sequence of every ticker, found with the Viterbi algorithm.
+
+        :param observations: NumPy array of shape (bars, tickers) or (bars,)
+
+        :returns: Tuple of the states, an integer array of shape (bars, tickers), and the log
+                  probability of every ticker's path
+        """
+
+        observations = self._as_matrix(observations)
+        startprob, transmat, means, variances = self._parameters()
+        log_emissions = _emission_log_likelihood(observations, means, variances)
+        bars, tickers = observations.shape
+
+        pointers = np.zeros((bars, self.n_states, tickers), dtype=np.int64)
+        with np.errstate(divide="ignore"):
+            log_transmat = np.log(transmat)
+            delta = np.log(startprob) + log_emissions[0]
+
+        for row in range(1, bars):
+            candidates = delta[:, None, :] + log_transmat
+            pointers[row] = candidates.argmax(axis=0)
+            delta = candidates.max(axis=0) + log_emissions[row]
+
+        states = np.empty((bars, tickers), dtype=np.int64)
+        states[-1] = delta.argmax(axis=0)
+        columns = np.arange(tickers)
+        for row in range(bars - 1, 0, -1):
+            states[row - 1] = pointers[row, states[row], columns]
+
+        return states, delta.max(axis=0)
+
+    def _log_alpha(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Forward variables of observations under the fitted parameters.
+        """
+
+        startprob, transmat, means, variances = self._parameters()
+        log_emissions = _emission_log_likelihood(observations, means, variances)
+
+        return _forward(log_emissions, startprob, transmat)
+
+    def _as_matrix(self, observations: np.ndarray) -> np.ndarray:
+        """
+        Observations as a float64 (bars, tickers) matrix.
+        """
+
+        observations = np.asarray(observations, dtype=np.float64)
+        if observations.ndim == 1:
+            observations = observations[:, None]
+        if observations.ndim != 2 or len(observations) == 0:
+            raise ValueError(
+                f"Observations must be shaped (bars, tickers), got {observations.shape}"
+            )
+        if self.fitted and observations.shape[1] != len(self.means):
+            raise ValueError(
+                f"Observations have {observations.shape[1]} tickers, "
+                f"the model was fitted on {len(self.means)}"
+            )
+
+        return observations
+
+    def _initial_parameters(self, observations: np.ndarray) -> Parameters:
+        """
+        Deterministic starting point: state means at evenly spaced quantiles of every ticker's
+        observations, the overall variance for every state and a sticky transition matrix.
+        """
+
+        tickers = observations.shape[1]
+        states = self.n_states
+        quantiles = (np.arange(states) + 0.5) / states
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            means = np.nanquantile(observations, quantiles, axis=0)
+            variances = np.nanvar(observations, axis=0)
+
+        variances = np.where(np.isfinite(variances) & (variances > 0), variances, 1.0)
+        means = np.where(np.isfinite(means), means, 0.0)
+
+        off_diagonal = (1.0 - self.self_transition) / (states - 1)
+        transmat = np.full((states, states), off_diagonal)
+        np.fill_diagonal(transmat, self.self_transition)
+
+        return (
+            np.full((states, tickers), 1.0 / states),
+            np.repeat(transmat[:, :, None], tickers, axis=2),
+            means,
+            np.repeat(variances[None, :], states, axis=0) + self.min_variance,
+        )
+
+    def _parameters(self) -> Parameters:
+        """
+        Fitted parameters in the internal states-first layout.
+        """
+
+        if not self.fitted:
+            raise ValueError("The hidden Markov model has not been fitted")
+
+        return (
+            self.startprob.T,
+            np.transpose(self.transmat, (1, 2, 0)),
+            self.means.T,
+            self.variances.T,
+        )
+
+    def _set_parameters(self, parameters: Parameters) -> None:
+        """
+        Store parameters given in the internal layout, relabelling the states of every ticker in
+        order of increasing mean.
+        """
+
+        startprob, transmat, means, variances = parameters
+        order = np.argsort(means, axis=0)
+
+        self.startprob = np.take_along_axis(startprob, order, axis=0).T.copy()
+        self.means = np.take_along_axis(means, order, axis=0).T.copy()
+        self.variances = np.take_along_axis(variances, order, axis=0).T.copy()
+        transmat = np.take_along_axis(transmat, order[:, None, :], axis=0)
+        transmat = np.take_along_axis(transmat, order[None, :, :], axis=1)
+        self.transmat = np.transpose(transmat, (2, 0, 1)).copy()
@@ -0,0 +1,351 @@
+"""
+This file contains the array-backed history store used by the preprocessors. Appending a new frame
+writes into preallocated per-column NumPy arrays instead of copying the whole history with
+pandas.concat, and the amount of history kept can be bounded.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame, Index
+
+INITIAL_CAPACITY = 256
+
+
+def _missing_value(dtype: np.dtype):
+    """
+    Value used to fill rows where a column was not provided.
+    """
+
+    if dtype.kind in "mM":
+        return np.datetime64("NaT") if dtype.kind == "M" else np.timedelta64("NaT")
+    if dtype.kind == "O":
+        return None
+
+    return np.nan
+
+
+def _storage_dtype(current: np.dtype, incoming: np.dtype, needs_missing: bool) -> np.dtype:
+    """
+    Data type able to hold both the stored and the incoming values, plus missing values if needed.
+    """
+
+    if current == incoming:
+        merged = current
+    elif current.kind in "biuf" and incoming.kind in "biuf":
+        merged = np.result_type(current, incoming)
+    else:
+        merged = np.dtype(object)
+
+    if needs_missing and merged.kind in "biu":
+        merged = np.dtype(np.float64)
+
+    return merged
+
+
+class HistoryBuffer:
+    """
+    Columnar ring buffer of past data. Every column is stored in its own preallocated NumPy array.
+    When max_rows is set, only the latest max_rows rows are kept and old rows are overwritten in
+    place; otherwise the arrays grow geometrically, so appends cost amortised O(new rows).
+
+    The buffer can be read like a DataFrame: indexing, len() and DataFrame attributes are served
+    from a materialised copy that is cached until the next append. That copy is read-only in
+    spirit, changes to it are not written back to the buffer.
+    """
+
+    # Attributes left out of checkpoints, see src.common.checkpoint
+    TRANSIENT_STATE = ("__frame__",)
+
+    def __init__(self, max_rows: Optional[int] = None):
+        """
+        Initialize an empty history buffer.
+
+        :param max_rows: Optional integer representing the maximum number of rows to keep.
+                         None keeps the whole history
+        """
+
+        if max_rows is not None and max_rows < 1:
+            raise ValueError(f"History buffer must keep at least one row, got {max_rows}")
+
+        self.max_rows = max_rows
+        self.__index__: Optional[np.ndarray] = None
+        self.__index_name__ = None
+        self.__columns__: Dict[str, np.ndarray] = {}
+        self.__capacity__: int = 0
+        self.__start__: int = 0
+        self.__length__: int = 0
+        self.__appended__: int = 0
+        self.__frame__: Optional[DataFrame] = None
+        # Names passed to append_row and their column arrays, while the arrays stay in place
+        self.__row_layout__: Optional[Tuple[List[str], List[np.ndarray]]] = None
+
+    @classmethod
+    def from_frame(cls, frame: DataFrame, max_rows: Optional[int] = None) -> "HistoryBuffer":
+        """
+        Build a history buffer holding the rows of an existing DataFrame.
+
+        :param frame: DataFrame with past data
+        :param max_rows: Optional integer representing the maximum number of rows to keep
+
+        :returns: HistoryBuffer
+        """
+
+        buffer = cls(max_rows)
+        buffer.append(frame)
+
+        return buffer
+
+    def __len__(self) -> int:
+        return self.__length__
+
+    def __getitem__(self, key):
+        return self.to_frame()[key]
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        return getattr(self.to_frame(), name)
+
+    @property
+    def appended_rows(self) -> int:
+        """
+        :returns: Total number of rows ever appended, including rows that were evicted.
+        """
+
+        return self.__appended__
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        :returns: Column names in insertion order.
+        """
+
+        return list(self.__columns__)
+
+    def append(self, frame: DataFrame) -> None:
+        """
+        Append the rows of a DataFrame to the history.
+
+        :param frame: DataFrame with new data, in chronological order
+        """
+
+        if frame is None or len(frame) == 0:
+            return
+
+        self.__appended__ += len(frame)
+
+        if self.max_rows is not None and len(frame) > self.max_rows:
+            frame = frame.iloc[-self.max_rows:]
+
+        if len(set(frame.dtypes)) == 1:
+            matrix = frame.to_numpy()
+            values = {str(column): matrix[:, i] for i, column in enumerate(frame.columns)}
+        else:
+            values = {str(column): frame[column].to_numpy() for column in frame.columns}
+
+        self.__index_name__ = frame.index.name
+        self._append_arrays(frame.index.to_numpy(), values)
+
+    def append_row(self, index: Any, names: List[str], row: np.ndarray) -> None:
+        """
+        Append a single row of floats without building a DataFrame. When the same list of names
+        is passed again and the buffer has room, the values are written straight into place.
+
+        :param index: Index value of the row, usually a timestamp
+        :param names: List of column names, one per value. Pass the same list object every time
+        :param row: 1-D float NumPy array of values
+        """
+
+        self.__appended__ += 1
+        layout = self.__row_layout__
+        position = self._free_slot() if layout is not None and names is layout[0] else None
+
+        if position is None:
+            self._append_arrays(np.array([index]), dict(zip(names, row[:, None])))
+            if len(names) == len(self.__columns__) \
+                    and all(self.__columns__[name].dtype.kind == "f" for name in names):
+                self.__row_layout__ = (names, [self.__columns__[name] for name in names])
+            return
+
+        self.__frame__ = None
+        self.__index__[position] = index
+        for column, value in zip(layout[1], row.tolist()):
+            column[position] = value
+
+    def latest(self, names: List[str]) -> np.ndarray:
+        """
+        Values of several columns in the latest row.
+
+        :param names: List of column names
+
+        :returns: 1-D float NumPy array, NaN for every column if the buffer is empty
+        """
+
+        if self.__length__ == 0:
+            return np.full(len(names), np.nan)
+
+        position = (self.__start__ + self.__length__ - 1) % self.__capacity__
+        columns = self.__columns__
+
+        return np.array([columns[name][position] for name in names], dtype=np.float64)
+
+    def column(self, name: str, rows: Optional[int] = None) -> np.ndarray:
+        """
+        Values of one column in chronological order, without building a DataFrame.
+
+        :param name: String representing the column name
+        :param rows: Optional integer representing the number of latest rows to return
+
+        :returns: NumPy array with the requested values
+        """
+
+        return self.__columns__[name][self._positions(rows)]
+
+    def tail(self, rows: int = 5) -> DataFrame:
+        """
+        Latest rows of the history, materialised as a DataFrame.
+
+        :param rows: Integer representing the number of rows to return
+
+        :returns: DataFrame
+        """
+
+        positions = self._positions(rows)
+
+        return DataFrame(
+            {name: values[positions] for name, values in self.__columns__.items()},
+            index=Index(self.__index__[positions], name=self.__index_name__)
+            if self.__index__ is not None else None
+        )
+
+    def to_frame(self) -> DataFrame:
+        """
+        The whole history as a DataFrame. The result is cached until the next append.
+
+        :returns: DataFrame
+        """
+
+        if self.__frame__ is None:
+            self.__frame__ = self.tail(self.__length__)
+
+        return self.__frame__
+
+    def _free_slot(self) -> Optional[int]:
+        """
+        Physical position for one more row when it fits without growing the arrays, evicting the
+        oldest row of a full bounded buffer. None when the arrays must grow first.
+        """
+
+        if self.__index__ is None:
+            return None
+
+        if self.max_rows is not None and self.__length__ == self.max_rows:
+            position = self.__start__
+            self.__start__ = (self.__start__ + 1) % self.__capacity__
+            return position
+
+        if self.__length__ < self.__capacity__:
+            position = (self.__start__ + self.__length__) % self.__capacity__
+            self.__length__ += 1
+            return position
+
+        return None
+
+    def _positions(self, rows: Optional[int] = None) -> np.ndarray:
+        """
+        Physical positions of the latest rows, in chronological order.
+        """
+
+        if self.__capacity__ == 0:
+            return np.arange(0)
+
+        rows = self.__length__ if rows is None else max(0, min(rows, self.__length__))
+        first = self.__start__ + self.__length__ - rows
+
+        return (first + np.arange(rows)) % self.__capacity__
+
+    def _append_arrays(self, index: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        """
+        Write new rows into the column arrays, growing or wrapping the ring as required.
+        """
+
+        rows = len(index)
+        self.__frame__ = None
+        self.__row_layout__ = None
+        self._reserve(self.__length__ + rows)
+
+        self.__index__ = self._storage(self.__index__, index.dtype, False)
+        names = list(self.__columns__) + [name for name in values if name not in self.__columns__]
+        for name in names:
+            stored = self.__columns__.get(name)
+            if name in values:
+                self.__columns__[name] = self._storage(stored, values[name].dtype, False)
+            else:
+                self.__columns__[name] = self._storage(stored, stored.dtype, True)
+
+        positions = (self.__start__ + self.__length__ + np.arange(rows)) % self.__capacity__
+        self.__index__[positions] = index
+        for name, stored in self.__columns__.items():
+            stored[positions] = values[name] if name in values else _missing_value(stored.dtype)
+
+        self.__length__ += rows
+        if self.max_rows is not None and self.__length__ > self.max_rows:
+            evicted = self.__length__ - self.max_rows
+            self.__start__ = (self.__start__ + evicted) % self.__capacity__
+            self.__length__ = self.max_rows
+
+    def _storage(self,
+                 stored: Optional[np.ndarray],
+                 dtype: np.dtype,
+                 needs_missing: bool) -> np.ndarray:
+        """
+        Storage for a column that can hold values of the given data type. New columns are filled
+        with missing values for the rows that were appended before they appeared.
+        """
+
+        if stored is None:
+            dtype = _storage_dtype(dtype, dtype, self.__length__ > 0)
+            stored = np.empty(self.__capacity__, dtype=dtype)
+            if self.__length__ > 0:
+                stored[:] = _missing_value(dtype)
+            return stored
+
+        dtype = _storage_dtype(stored.dtype, dtype, needs_missing)
+        if dtype != stored.dtype:
+            stored = stored.astype(dtype)
+
+        return stored
+
+    def _reserve(self, rows: int) -> None:
+        """
+        Grow every column array geometrically until it holds `rows` rows, or max_rows if smaller.
+        Growing moves the rows into chronological order starting at position zero.
+        """
+
+        if self.max_rows is not None:
+            rows = min(rows, self.max_rows)
+        if rows <= self.__capacity__:
+            return
+
+        capacity = max(INITIAL_CAPACITY, self.__capacity__)
+        while capacity < rows:
+            capacity *= 2
+        if self.max_rows is not None:
+            capacity = min(capacity, self.max_rows)
+
+        positions = self._positions()
+
+        def grow(stored: np.ndarray) -> np.ndarray:
+            grown = np.empty(capacity, dtype=stored.dtype)
+            if stored.dtype.kind in "fmMO":
+                grown[:] = _missing_value(stored.dtype)
+            grown[:len(positions)] = stored[positions]
+            return grown
+
+        if self.__index__ is not None:
+            self.__index__ = grow(self.__index__)
+        self.__columns__ = {name: grow(stored) for name, stored in self.__columns__.items()}
+        self.__capacity__ = capacity
+        self.__start__ = 0
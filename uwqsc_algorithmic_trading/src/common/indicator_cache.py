@@ -0,0 +1,207 @@
+"""
+This file contains the indicator cache shared by the preprocessors. Strategies running on
+overlapping universes ask for the same indicators of the same tickers over the same prices; the
+cache computes each of them once per process and hands out the stored result afterwards.
+
+Entries are keyed by (ticker, indicator, parameters, data version). The data version fingerprints
+the prices the indicator was computed from, so new or corrected prices never hit a stale entry.
+The least recently used entries are evicted once the cached arrays exceed a memory budget.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.config import INDICATOR_CACHE_BYTES
+
+IndicatorKey = Tuple[str, str, Tuple[Hashable, ...], str]
+
+
+def data_version(values: np.ndarray) -> str:
+    """
+    Fingerprint of an array of prices, used as the data version of cache keys.
+
+    :param values: NumPy array
+    :returns: Hexadecimal string that changes whenever the values, shape or type change
+    """
+
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.data, digest_size=16)
+    digest.update(f"{values.dtype.str}{values.shape}".encode())
+
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache of indicator arrays, bounded by the total number of bytes it holds.
+    Stored arrays are made read-only, as every caller receives the same array.
+    """
+
+    def __init__(self, max_bytes: int = INDICATOR_CACHE_BYTES):
+        """
+        Initialize an empty cache.
+
+        :param max_bytes: Integer representing the memory budget of the cached arrays in bytes
+        """
+
+        if max_bytes < 0:
+            raise ValueError(f"Indicator cache budget must not be negative, got {max_bytes}")
+
+        self.max_bytes = max_bytes
+        self.__entries__: "OrderedDict[IndicatorKey, np.ndarray]" = OrderedDict()
+        self.__nbytes__: int = 0
+        self.__lock__ = threading.Lock()
+        self.__stats__: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self.__entries__)
+
+    def __contains__(self, key: IndicatorKey) -> bool:
+        return key in self.__entries__
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :returns: Number of bytes held by the cached arrays.
+        """
+
+        return self.__nbytes__
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        :returns: Dictionary with the number of hits, misses and evictions so far.
+        """
+
+        return dict(self.__stats__)
+
+    def get(self, key: IndicatorKey) -> Optional[np.ndarray]:
+        """
+        Look up an indicator, marking it as recently used.
+
+        :param key: Tuple of (ticker, indicator, parameters, data version)
+
+        :returns: Cached read-only NumPy array, or None on a miss
+        """
+
+        with self.__lock__:
+            value = self.__entries__.get(key)
+
+            if value is None:
+                self.__stats__["misses"] += 1
+                return None
+
+            self.__entries__.move_to_end(key)
+            self.__stats__["hits"] += 1
+
+            return value
+
+    def put(self, key: IndicatorKey, value: np.ndarray) -> np.ndarray:
+        """
+        Store an indicator, evicting the least recently used entries to stay within the budget.
+        Arrays larger than the whole budget are not stored.
+
+        :param key: Tuple of (ticker, indicator, parameters, data version)
+        :param value: NumPy array with the indicator values
+
+        :returns: The stored read-only array
+        """
+
+        value = np.array(value, copy=True)
+        value.setflags(write=False)
+
+        if value.nbytes > self.max_bytes:
+            return value
+
+        with self.__lock__:
+            previous = self.__entries__.pop(key, None)
+            if previous is not None:
+                self.__nbytes__ -= previous.nbytes
+
+            self.__entries__[key] = value
+            self.__nbytes__ += value.nbytes
+
+            while self.__nbytes__ > self.max_bytes:
+                _, evicted = self.__entries__.popitem(last=False)
+                self.__nbytes__ -= evicted.nbytes
+                self.__stats__["evictions"] += 1
+
+        return value
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the statistics.
+        """
+
+        with self.__lock__:
+            self.__entries__.clear()
+            self.__nbytes__ = 0
+            self.__stats__ = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def columns(self,
+                values: np.ndarray,
+                tickers: Sequence[str],
+                indicator: str,
+                parameters: Tuple[Hashable, ...],
+                compute: Callable[[np.ndarray], np.ndarray],
+                versions: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Column-wise indicator of a (bars, tickers) price matrix. Columns found in the cache are
+        reused, and the remaining columns are computed together in a single call to compute.
+
+        :param values: 2-D NumPy array of shape (bars, tickers)
+        :param tickers: Sequence of ticker symbols, one per column
+        :param indicator: String representing the indicator name
+        :param parameters: Tuple of the indicator parameters, e.g. (window,)
+        :param compute: Callable mapping a 2-D price matrix to an indicator matrix of same shape
+        :param versions: Optional sequence with the data version of every column. Computed with
+                         data_version when not given
+
+        :returns: 2-D NumPy array shaped like values
+        """
+
+        if values.ndim != 2 or values.shape[1] != len(tickers):
+            raise ValueError(
+                f"Prices of shape {values.shape} do not match {len(tickers)} tickers"
+            )
+
+        if versions is None:
+            versions = [data_version(values[:, column]) for column in range(values.shape[1])]
+
+        keys = [
+            (ticker, indicator, tuple(parameters), version)
+            for ticker, version in zip(tickers, versions)
+        ]
+        result = np.empty(values.shape, dtype=np.float64)
+        missing: List[int] = []
+
+        for column, key in enumerate(keys):
+            cached = self.get(key)
+            if cached is None:
+                missing.append(column)
+            else:
+                result[:, column] = cached
+
+        if missing:
+            computed = compute(values[:, missing])
+            result[:, missing] = computed
+
+            for position, column in enumerate(missing):
+                self.put(keys[column], computed[:, position])
+
+        return result
+
+
+_SHARED_CACHE = IndicatorCache()
+
+
+def shared_indicator_cache() -> IndicatorCache:
+    """
+    :returns: The process-wide IndicatorCache used by preprocessors by default.
+    """
+
+    return _SHARED_CACHE
@@ -0,0 +1,155 @@
+"""
+This file contains the instrumentation of the trading pipeline. The algorithms and preprocessors
+time their stages and count what they process through the process-wide Instrumentation, which
+forwards the measurements to the enabled IMetricSink instances.
+
+Instrumentation is disabled by default. While disabled, a timer is a shared object whose enter and
+exit do nothing, and counters return right away, so the hot paths only pay for a method call.
+"""
+
+import threading
+import time
+from typing import List
+
+from uwqsc_algorithmic_trading.interfaces.instrumentation.metric_sink_interface \
+    import IMetricSink
+
+
+class _NullTimer:
+    """
+    Timer used while instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exception) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    """
+    Times one pass through a stage and reports it to the sinks.
+    """
+
+    __slots__ = ("sinks", "name", "component", "start")
+
+    def __init__(self, sinks: List[IMetricSink], name: str, component: str):
+        self.sinks = sinks
+        self.name = name
+        self.component = component
+        self.start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception) -> None:
+        seconds = time.perf_counter() - self.start
+
+        for sink in self.sinks:
+            sink.record_timing(self.name, self.component, seconds)
+
+
+class Instrumentation:
+    """
+    Registry of the enabled metric sinks.
+    """
+
+    def __init__(self):
+        self.__sinks__: List[IMetricSink] = []
+        self.__lock__ = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        :returns: True while at least one sink is enabled.
+        """
+
+        return bool(self.__sinks__)
+
+    @property
+    def sinks(self) -> List[IMetricSink]:
+        """
+        :returns: List of the enabled sinks.
+        """
+
+        return list(self.__sinks__)
+
+    def enable(self, *sinks: IMetricSink) -> None:
+        """
+        Start sending measurements to more sinks.
+
+        :param sinks: IMetricSink instances
+        """
+
+        with self.__lock__:
+            # The list is replaced rather than changed, so running timers keep a consistent list
+            self.__sinks__ = list(dict.fromkeys(self.__sinks__ + list(sinks)))
+
+    def disable(self, *sinks: IMetricSink) -> None:
+        """
+        Stop sending measurements to some sinks, or to every sink when none are given. The removed
+        sinks are flushed.
+
+        :param sinks: IMetricSink instances
+        """
+
+        with self.__lock__:
+            removed = [sink for sink in self.__sinks__ if not sinks or sink in sinks]
+            self.__sinks__ = [sink for sink in self.__sinks__ if sink not in removed]
+
+        for sink in removed:
+            sink.flush()
+
+    def timer(self, name: str, component: str = ""):
+        """
+        Context manager timing a stage.
+
+        :param name: String representing the stage, e.g. "execute_trade.generate_signals"
+        :param component: String representing the algorithm or preprocessor running the stage
+
+        :returns: Context manager reporting the duration of its block to every sink
+        """
+
+        sinks = self.__sinks__
+        if not sinks:
+            return _NULL_TIMER
+
+        return _StageTimer(sinks, name, component)
+
+    def count(self, name: str, value: int = 1, component: str = "") -> None:
+        """
+        Add to a counter in every sink.
+
+        :param name: String representing the counter, e.g. "bars_processed"
+        :param value: Integer added to the counter
+        :param component: String representing the algorithm or preprocessor that counted
+        """
+
+        for sink in self.__sinks__:
+            sink.record_count(name, component, value)
+
+    def flush(self) -> None:
+        """
+        Flush every enabled sink.
+        """
+
+        for sink in self.__sinks__:
+            sink.flush()
+
+
+_INSTRUMENTATION = Instrumentation()
+
+
+def instrumentation() -> Instrumentation:
+    """
+    :returns: The process-wide Instrumentation used by the algorithms and preprocessors.
+    """
+
+    return _INSTRUMENTATION
@@ -0,0 +1,294 @@
+"""
+This file contains the local market data store. Daily bars are kept as Parquet files partitioned by
+ticker and year, so that loading a date range only opens the files for the years it spans, reads
+only the requested columns, and skips row groups outside the range using their statistics.
+
+Layout: <root>/ticker=<TICKER>/year=<YYYY>.parquet
+"""
+
+import os
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import fastparquet
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, MultiIndex, Timestamp, concat, read_csv
+
+from uwqsc_algorithmic_trading.src.common.config import (
+    DATE_COLUMN,
+    MARKET_DATA_DIR,
+    TICKER_COLUMN
+)
+
+ROW_GROUP_SIZE = 4096
+
+DateLike = Union[str, Timestamp, np.datetime64, None]
+Fetcher = Callable[[str, DateLike, DateLike], DataFrame]
+
+
+def normalize_bars(frame: DataFrame, date_column: str = DATE_COLUMN) -> DataFrame:
+    """
+    Bring a frame of bars into the shape the store keeps: a sorted, timezone-naive DatetimeIndex
+    named "Date", flat string column names and no duplicate dates (the last one wins).
+
+    :param frame: DataFrame with a DatetimeIndex or a date column
+    :param date_column: String representing the name of the date column, if not the index
+
+    :returns: Normalized DataFrame
+    """
+
+    if date_column in frame.columns:
+        frame = frame.set_index(date_column)
+    if isinstance(frame.columns, MultiIndex):
+        frame = frame.droplevel(list(range(1, frame.columns.nlevels)), axis=1)
+
+    index = DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+
+    frame = frame.set_axis(index.rename(DATE_COLUMN), axis=0)
+    frame.columns = [str(column) for column in frame.columns]
+    frame = frame[~frame.index.duplicated(keep="last")]
+
+    return frame.sort_index()
+
+
+def _read_partition(path: str,
+                    columns: Optional[List[str]] = None,
+                    filters: Optional[List[Tuple]] = None) -> DataFrame:
+    """
+    Read one Parquet partition, making sure the file handle is closed afterwards.
+    """
+
+    with open(path, "rb") as handle:
+        return fastparquet.ParquetFile(handle).to_pandas(columns=columns, filters=filters)
+
+
+def fetch_yfinance(ticker: str, start: DateLike = None, end: DateLike = None) -> DataFrame:
+    """
+    Default fetcher, downloading daily bars from Yahoo Finance. yfinance is imported lazily so that
+    the store can be used without it.
+
+    :param ticker: String that represents trading symbol
+    :param start: Optional first date to download
+    :param end: Optional last date to download
+
+    :returns: DataFrame of daily bars
+    """
+
+    import yfinance  # pylint: disable=import-outside-toplevel
+
+    return yfinance.download(ticker, start=start, end=end, progress=False, auto_adjust=False)
+
+
+class MarketDataStore:
+    """
+    Ticker and year partitioned Parquet store of daily bars.
+    """
+
+    def __init__(self, root: str = MARKET_DATA_DIR):
+        """
+        Initialize the store.
+
+        :param root: String representing the directory holding the Parquet files
+        """
+
+        self.root = root
+
+    def tickers(self) -> List[str]:
+        """
+        :returns: Sorted list of the tickers held in the store.
+        """
+
+        if not os.path.isdir(self.root):
+            return []
+
+        return sorted(
+            entry[len("ticker="):] for entry in os.listdir(self.root) if entry.startswith("ticker=")
+        )
+
+    def write(self, ticker: str, frame: DataFrame) -> None:
+        """
+        Add bars for a ticker. Bars for dates already in the store replace the stored ones.
+
+        :param ticker: String that represents trading symbol
+        :param frame: DataFrame of bars, see normalize_bars
+        """
+
+        frame = normalize_bars(frame)
+        if frame.empty:
+            return
+
+        os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+
+        for year, bars in frame.groupby(frame.index.year):
+            path = self._partition_path(ticker, year)
+
+            if os.path.exists(path):
+                stored = _read_partition(path)
+                bars = normalize_bars(concat([stored, bars]))
+
+            temporary = f"{path}.tmp"
+            fastparquet.write(temporary, bars, row_group_offsets=ROW_GROUP_SIZE)
+            os.replace(temporary, path)
+
+    def ingest_csv(self,
+                   path: str,
+                   ticker: Optional[str] = None,
+                   date_column: str = DATE_COLUMN) -> None:
+        """
+        Add bars from a CSV file. Without a ticker the file must have a "Ticker" column, and is
+        split per ticker.
+
+        :param path: String representing the CSV file path
+        :param ticker: Optional string that represents trading symbol of every row in the file
+        :param date_column: String representing the name of the date column
+        """
+
+        frame = read_csv(path, parse_dates=[date_column])
+
+        if ticker is not None:
+            self.write(ticker, normalize_bars(frame, date_column))
+            return
+
+        for symbol, bars in frame.groupby(TICKER_COLUMN):
+            self.write(str(symbol), normalize_bars(bars.drop(columns=TICKER_COLUMN), date_column))
+
+    def ingest(self,
+               tickers: Iterable[str],
+               fetcher: Fetcher = fetch_yfinance,
+               start: DateLike = None,
+               end: DateLike = None) -> None:
+        """
+        Download bars with a fetcher and add them to the store.
+
+        :param tickers: Iterable of ticker symbols
+        :param fetcher: Callable taking (ticker, start, end) and returning a DataFrame of bars
+        :param start: Optional first date to download
+        :param end: Optional last date to download
+        """
+
+        for ticker in tickers:
+            self.write(ticker, fetcher(ticker, start, end))
+
+    def read(self,
+             ticker: str,
+             start: DateLike = None,
+             end: DateLike = None,
+             columns: Optional[List[str]] = None) -> DataFrame:
+        """
+        Load bars for a ticker. Only the yearly files overlapping [start, end] are opened, only the
+        requested columns are read, and row groups outside the range are skipped.
+
+        :param ticker: String that represents trading symbol
+        :param start: Optional first date to load, inclusive
+        :param end: Optional last date to load, inclusive
+        :param columns: Optional list of columns to load
+
+        :returns: DataFrame indexed by date, empty if the store has no matching bars
+        """
+
+        start = None if start is None else Timestamp(start)
+        end = None if end is None else Timestamp(end)
+        filters = []
+        if start is not None:
+            filters.append((DATE_COLUMN, ">=", start))
+        if end is not None:
+            filters.append((DATE_COLUMN, "<=", end))
+
+        frames = []
+        for year, path in self._partitions(ticker):
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+
+            frames.append(_read_partition(path, columns, filters or None))
+
+        if not frames:
+            return DataFrame(columns=columns, index=DatetimeIndex([], name=DATE_COLUMN))
+
+        frame = concat(frames)
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= frame.index >= start
+        if end is not None:
+            mask &= frame.index <= end
+
+        return frame[mask]
+
+    def date_range(self, ticker: str) -> Optional[Tuple[Timestamp, Timestamp]]:
+        """
+        First and last stored dates for a ticker, read from the Parquet statistics.
+
+        :param ticker: String that represents trading symbol
+
+        :returns: Tuple of first and last date, or None if the ticker is not stored
+        """
+
+        partitions = self._partitions(ticker)
+        if not partitions:
+            return None
+
+        with open(partitions[0][1], "rb") as handle:
+            first = min(fastparquet.ParquetFile(handle).statistics["min"][DATE_COLUMN])
+        with open(partitions[-1][1], "rb") as handle:
+            last = max(fastparquet.ParquetFile(handle).statistics["max"][DATE_COLUMN])
+
+        return Timestamp(first), Timestamp(last)
+
+    def load_panel(self,
+                   tickers: List[str],
+                   start: DateLike = None,
+                   end: DateLike = None,
+                   field: str = "Close") -> DataFrame:
+        """
+        Load one field for many tickers as a wide "{ticker}_price" panel, the format consumed by
+        the algorithms and the backtest engine.
+
+        :param tickers: List of ticker symbols
+        :param start: Optional first date to load, inclusive
+        :param end: Optional last date to load, inclusive
+        :param field: String representing the bar column used as price
+
+        :returns: DataFrame indexed by date with one price column per ticker
+        """
+
+        columns = [
+            self.read(ticker, start, end, [field])[field].rename(f"{ticker}_price")
+            for ticker in tickers
+        ]
+
+        if not columns:
+            return DataFrame(index=DatetimeIndex([], name=DATE_COLUMN))
+
+        return concat(columns, axis=1).sort_index()
+
+    def _ticker_dir(self, ticker: str) -> str:
+        """
+        Directory holding the partitions of a ticker.
+        """
+
+        if not ticker or os.sep in ticker:
+            raise ValueError(f"Invalid ticker symbol: {ticker!r}")
+
+        return os.path.join(self.root, f"ticker={ticker}")
+
+    def _partition_path(self, ticker: str, year: int) -> str:
+        """
+        Path of the Parquet file holding one year of a ticker.
+        """
+
+        return os.path.join(self._ticker_dir(ticker), f"year={year}.parquet")
+
+    def _partitions(self, ticker: str) -> List[Tuple[int, str]]:
+        """
+        Sorted (year, path) pairs of the stored partitions of a ticker.
+        """
+
+        directory = self._ticker_dir(ticker)
+        if not os.path.isdir(directory):
+            return []
+
+        return sorted(
+            (int(entry[len("year="):-len(".parquet")]), os.path.join(directory, entry))
+            for entry in os.listdir(directory)
+            if entry.startswith("year=") and entry.endswith(".parquet")
+        )
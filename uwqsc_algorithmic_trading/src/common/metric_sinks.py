@@ -0,0 +1,261 @@
+"""
+This file contains the metric sinks of the instrumentation: an in-memory histogram, a JSON lines
+file and a Prometheus text exporter.
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from uwqsc_algorithmic_trading.interfaces.instrumentation.metric_sink_interface \
+    import IMetricSink
+
+# Upper bounds of the histogram buckets in seconds, doubling from 1 microsecond to about 17 seconds
+TIMING_BUCKETS: List[float] = [1e-6 * 2 ** power for power in range(25)]
+
+MetricKey = Tuple[str, str]
+
+
+class HistogramSink(IMetricSink):
+    """
+    Aggregates timings into fixed histogram buckets and sums counters, in memory. Percentiles are
+    estimated from the buckets, so they are exact up to a factor of two.
+    """
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        """
+        Initialize an empty histogram.
+
+        :param buckets: Optional sorted list of bucket upper bounds in seconds. Defaults to
+                        TIMING_BUCKETS
+        """
+
+        self.buckets = list(buckets or TIMING_BUCKETS)
+        self.__histograms__: Dict[MetricKey, List[int]] = {}
+        self.__sums__: Dict[MetricKey, float] = {}
+        self.__maxima__: Dict[MetricKey, float] = {}
+        self.__counters__: Dict[MetricKey, int] = {}
+        self.__lock__ = threading.Lock()
+
+    def record_timing(self, name: str, component: str, seconds: float) -> None:
+        key = (name, component)
+        bucket = bisect.bisect_left(self.buckets, seconds)
+
+        with self.__lock__:
+            histogram = self.__histograms__.get(key)
+            if histogram is None:
+                # One more bucket than bounds, for durations above the last bound
+                histogram = self.__histograms__[key] = [0] * (len(self.buckets) + 1)
+                self.__sums__[key] = 0.0
+                self.__maxima__[key] = 0.0
+
+            histogram[bucket] += 1
+            self.__sums__[key] += seconds
+            self.__maxima__[key] = max(self.__maxima__[key], seconds)
+
+    def record_count(self, name: str, component: str, value: int) -> None:
+        key = (name, component)
+
+        with self.__lock__:
+            self.__counters__[key] = self.__counters__.get(key, 0) + value
+
+    def counter(self, name: str, component: str = "") -> int:
+        """
+        :param name: String representing the counter
+        :param component: String representing the component that counted
+
+        :returns: Total of the counter, 0 if it was never recorded.
+        """
+
+        return self.__counters__.get((name, component), 0)
+
+    def timing_count(self, name: str, component: str = "") -> int:
+        """
+        :param name: String representing the stage
+        :param component: String representing the component that ran the stage
+
+        :returns: Number of timings recorded for the stage.
+        """
+
+        return sum(self.__histograms__.get((name, component), []))
+
+    def percentile(self, name: str, quantile: float, component: str = "") -> float:
+        """
+        Estimate a percentile of the timings of a stage, as the upper bound of the bucket holding
+        it. Timings above the last bucket are reported as the largest timing seen.
+
+        :param name: String representing the stage
+        :param quantile: Float between 0 and 1, e.g. 0.99
+        :param component: String representing the component that ran the stage
+
+        :returns: Float. Duration in seconds, NaN when nothing was recorded
+        """
+
+        key = (name, component)
+
+        with self.__lock__:
+            histogram = list(self.__histograms__.get(key, []))
+            maximum = self.__maxima__.get(key, 0.0)
+
+        total = sum(histogram)
+        if total == 0:
+            return float("nan")
+
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if seen >= quantile * total:
+                return min(self.buckets[bucket], maximum) if bucket < len(self.buckets) \
+                    else maximum
+
+        return maximum
+
+    def snapshot(self) -> Dict[str, Dict[MetricKey, object]]:
+        """
+        Copy of everything recorded so far.
+
+        :returns: Dictionary with "histograms" (bucket counts), "sums" (total seconds) and
+                  "counters", each keyed by (name, component)
+        """
+
+        with self.__lock__:
+            return {
+                "histograms": {key: list(value) for key, value in self.__histograms__.items()},
+                "sums": dict(self.__sums__),
+                "counters": dict(self.__counters__),
+            }
+
+    def reset(self) -> None:
+        """
+        Forget everything recorded so far.
+        """
+
+        with self.__lock__:
+            self.__histograms__.clear()
+            self.__sums__.clear()
+            self.__maxima__.clear()
+            self.__counters__.clear()
+
+
+class JsonLinesSink(IMetricSink):
+    """
+    Appends every measurement as one JSON object per line to a file. Lines are buffered in memory
+    and written every buffer_size measurements and on flush.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1024):
+        """
+        Initialize the sink.
+
+        :param path: String path of the file to append to
+        :param buffer_size: Integer representing the number of lines kept before writing
+        """
+
+        self.path = path
+        self.buffer_size = buffer_size
+        self.__lines__: List[str] = []
+        self.__lock__ = threading.Lock()
+
+    def record_timing(self, name: str, component: str, seconds: float) -> None:
+        self._append({"time": time.time(), "kind": "timing", "name": name,
+                      "component": component, "value": seconds})
+
+    def record_count(self, name: str, component: str, value: int) -> None:
+        self._append({"time": time.time(), "kind": "count", "name": name,
+                      "component": component, "value": value})
+
+    def flush(self) -> None:
+        with self.__lock__:
+            lines, self.__lines__ = self.__lines__, []
+
+            if lines:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write("".join(lines))
+
+    def _append(self, record: Dict[str, object]) -> None:
+        """
+        Buffer one measurement, writing the buffer once it is full.
+        """
+
+        with self.__lock__:
+            self.__lines__.append(json.dumps(record) + "\n")
+            full = len(self.__lines__) >= self.buffer_size
+
+        if full:
+            self.flush()
+
+
+class PrometheusTextSink(HistogramSink):
+    """
+    Histogram sink that renders its measurements in the Prometheus text exposition format, e.g. for
+    the textfile collector of the node exporter. Stage timings become one histogram metric with
+    "stage" and "component" labels; every counter becomes a counter metric.
+    """
+
+    def __init__(self, prefix: str = "uwqsc", buckets: Optional[List[float]] = None):
+        """
+        Initialize the exporter.
+
+        :param prefix: String prepended to every metric name
+        :param buckets: Optional sorted list of bucket upper bounds in seconds
+        """
+
+        super().__init__(buckets)
+        self.prefix = prefix
+
+    def render(self) -> str:
+        """
+        :returns: String with every metric in the Prometheus text exposition format.
+        """
+
+        snapshot = self.snapshot()
+        timing = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {timing} Duration of pipeline stages.", f"# TYPE {timing} histogram"]
+
+        for (name, component), histogram in sorted(snapshot["histograms"].items()):
+            labels = f'stage="{_escape(name)}",component="{_escape(component)}"'
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + [float("inf")], histogram):
+                cumulative += count
+                edge = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{timing}_bucket{{{labels},le="{edge}"}} {cumulative}')
+
+            lines.append(f"{timing}_sum{{{labels}}} {snapshot['sums'][(name, component)]!r}")
+            lines.append(f"{timing}_count{{{labels}}} {cumulative}")
+
+        previous = None
+        for (name, component), value in sorted(snapshot["counters"].items()):
+            metric = f"{self.prefix}_{re.sub('[^a-zA-Z0-9_]', '_', name)}_total"
+            if metric != previous:
+                lines.append(f"# TYPE {metric} counter")
+                previous = metric
+            lines.append(f'{metric}{{component="{_escape(component)}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write the rendered metrics to a file, replacing it atomically so that scrapers never read
+        a partial file.
+
+        :param path: String path of the .prom file
+        """
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.render())
+
+        os.replace(temporary, path)
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+    """
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
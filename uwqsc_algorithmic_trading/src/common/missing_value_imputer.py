@@ -0,0 +1,218 @@
+"""
+This file contains the missing value stage shared by the preprocessors. The imputer works on the
+whole ticker panel as a 2-D array and carries the last valid value of every ticker from one call to
+the next, so blocks of bars and single streaming bars are filled the same way without looking back
+at the history. Missing values are filled following a policy:
+
+- "ffill": the last valid value
+- "linear": interpolated between the last valid value and the next valid value of the same block.
+  Gaps still open at the end of a block have no next value yet and are forward filled, so streaming
+  bars one at a time behaves like "ffill"
+- "median": the last valid value moved along with the cross-sectional median return of the other
+  tickers since then
+- "drop": forward filled, but bars where every ticker has been missing for more than max_gap bars
+  are dropped
+
+Values missing for more than max_gap bars are left missing, so a single halted ticker never holds
+back the bars of the other tickers.
+"""
+
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+
+IMPUTATION_POLICIES = ("ffill", "linear", "median", "drop")
+
+
+class MissingValueImputer:
+    """
+    Vectorized, incremental imputation of the missing (NaN) values of a price panel.
+    """
+
+    def __init__(self, width: int, policy: str = "ffill", max_gap: Optional[int] = None):
+        """
+        Initialize an imputer that has not seen any bar.
+
+        :param width: Integer representing the number of columns (usually tickers)
+        :param policy: String, "ffill", "linear", "median" or "drop"
+        :param max_gap: Optional integer representing the number of consecutive missing bars
+                        that are filled. None fills every gap. Required by "drop"
+        """
+
+        if policy not in IMPUTATION_POLICIES:
+            raise ValueError(f"Unknown imputation policy {policy!r}, "
+                             f"expected one of {IMPUTATION_POLICIES}")
+        if policy == "drop" and max_gap is None:
+            raise ValueError("The drop policy needs a max_gap to tell when a ticker is stale")
+        if max_gap is not None and max_gap < 0:
+            raise ValueError("max_gap must not be negative")
+
+        self.policy = policy
+        self.max_gap = max_gap
+        self.imputed_cells = 0
+        self.dropped_rows = 0
+        self.__rows_seen__ = 0
+        self.__last_valid__ = np.full(width, np.nan)
+        self.__gap__ = np.zeros(width, dtype=np.int64)
+        self.__growth__ = np.zeros(width)
+        self.__previous__ = np.full(width, np.nan)
+
+    @property
+    def width(self) -> int:
+        """
+        :returns: Number of columns.
+        """
+
+        return len(self.__last_valid__)
+
+    @property
+    def rows_seen(self) -> int:
+        """
+        :returns: Number of bars imputed or seeded so far.
+        """
+
+        return self.__rows_seen__
+
+    def seed(self, history: np.ndarray) -> None:
+        """
+        Carry the last valid values of a history without counting anything as imputed.
+
+        :param history: 2-D NumPy array of shape (bars, columns) in chronological order
+        """
+
+        self._advance(np.asarray(history, dtype=np.float64))
+
+    def impute(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Fill the missing values of one bar.
+
+        :param values: 1-D NumPy array with one value per column
+
+        :returns: Tuple of the filled values, a boolean array flagging the imputed values and
+                  whether the bar is kept
+        """
+
+        missing = np.isnan(values)
+
+        if not missing.any():
+            # Complete bars only move the state along
+            self.__last_valid__ = values.copy()
+            self.__previous__ = self.__last_valid__
+            self.__gap__[:] = 0
+            self.__growth__[:] = 0.0
+            self.__rows_seen__ += 1
+            return values, missing, True
+
+        filled, imputed, keep = self.impute_rows(values[None, :])
+
+        return filled[0], imputed[0], bool(keep[0])
+
+    def impute_rows(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fill the missing values of a block of new bars, continuing from the previous block.
+
+        :param values: 2-D NumPy array of shape (bars, columns)
+
+        :returns: Tuple of the filled values, a boolean array flagging the imputed values, both
+                  shaped like values, and a boolean array with one entry per bar that is False
+                  for the bars to drop
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        filled, imputed, keep = self._advance(values)
+
+        self.imputed_cells += int(np.count_nonzero(imputed))
+        self.dropped_rows += int(np.count_nonzero(~keep))
+
+        return filled, imputed, keep
+
+    def _advance(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Impute a block and move the carried state to its last bar.
+        """
+
+        keep = np.ones(len(values), dtype=bool)
+        if len(values) == 0:
+            return values.copy(), np.zeros(values.shape, dtype=bool), keep
+
+        # Row 0 holds the carried last valid values, so that gaps continue across blocks
+        extended = np.vstack([self.__last_valid__, values])
+        positions = np.arange(len(extended))[:, None]
+        rows, origin = self._last_valid_rows(extended, positions)
+        previous = extended[rows, np.arange(extended.shape[1])]
+        gap = positions - origin
+
+        estimate = previous
+        growth = None
+        if self.policy == "linear":
+            estimate = self._interpolate(extended, positions, previous, origin)
+        elif self.policy == "median":
+            growth = self._median_growth(values)
+            base = np.where(rows == 0, -self.__growth__, growth[rows])
+            estimate = previous * np.exp(growth[:, None] - base)
+
+        missing = np.isnan(values)
+        fillable = missing & ~np.isnan(estimate[1:])
+        if self.max_gap is not None:
+            within = gap[1:] <= self.max_gap
+            fillable &= within
+            if self.policy == "drop":
+                keep = ~(missing & ~fillable).all(axis=1)
+
+        self.__last_valid__ = previous[-1]
+        self.__gap__ = gap[-1]
+        self.__previous__ = values[-1].copy()
+        if growth is not None:
+            self.__growth__ = growth[-1] - base[-1]
+        self.__rows_seen__ += len(values)
+
+        return np.where(fillable, estimate[1:], values), fillable, keep
+
+    def _last_valid_rows(self,
+                         extended: np.ndarray,
+                         positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row of the last valid value at or before every cell of the extended block, and its
+        position, which lies before row 0 for gaps carried from the previous block.
+        """
+
+        rows = np.where(np.isnan(extended), 0, positions)
+        np.maximum.accumulate(rows, axis=0, out=rows)
+
+        return rows, np.where(rows == 0, -self.__gap__, rows)
+
+    @staticmethod
+    def _interpolate(extended: np.ndarray,
+                     positions: np.ndarray,
+                     previous: np.ndarray,
+                     origin: np.ndarray) -> np.ndarray:
+        """
+        Linear interpolation between the last and the next valid value, forward filling the gaps
+        without a next value.
+        """
+
+        end = len(extended)
+        following = np.where(np.isnan(extended), end, positions)
+        following = np.minimum.accumulate(following[::-1], axis=0)[::-1]
+        has_next = following < end
+        following_values = extended[np.minimum(following, end - 1), np.arange(extended.shape[1])]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = (positions - origin) / (following - origin)
+            interpolated = previous + (following_values - previous) * weight
+
+        return np.where(has_next, interpolated, previous)
+
+    def _median_growth(self, values: np.ndarray) -> np.ndarray:
+        """
+        Cumulative log growth of the cross-sectional median return, starting at 0 for the carried
+        bar. Bars where no ticker has a return do not move.
+        """
+
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ratios = np.vstack([self.__previous__, values])
+            steps = np.log(np.nanmedian(ratios[1:] / ratios[:-1], axis=1))
+
+        return np.concatenate([[0.0], np.cumsum(np.nan_to_num(steps, nan=0.0))])
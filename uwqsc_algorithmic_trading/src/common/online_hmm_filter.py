@@ -0,0 +1,155 @@
+"""
+This file contains the live regime filter used by the Hidden Markov Model algorithm. Instead of
+re-running the forward pass over the whole history for every new bar, the filter keeps the current
+state probabilities of every ticker and advances them by one step per bar.
+
+Parameters are re-estimated in a background thread every `refit_interval` bars. The refit works on
+a copy of the model and a snapshot of the history, so the live model is never modified while it is
+in use. Once the refit is done, the bars that arrived in the meantime are replayed through the new
+model and the model and probabilities are swapped together, between two bars.
+"""
+
+import copy
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.gaussian_hmm import GaussianHMM
+
+
+def _refit(model: GaussianHMM, observations: np.ndarray) -> Tuple[GaussianHMM, np.ndarray]:
+    """
+    Re-estimate a copy of a model and filter the observations it was fitted on.
+    """
+
+    model = copy.deepcopy(model)
+    model.fit(observations, warm_start=True)
+
+    return model, model.filter(observations)[-1]
+
+
+class OnlineHMMFilter:
+    """
+    Incremental forward filtering of a GaussianHMM with periodic background re-estimation.
+    """
+
+    # Attributes left out of checkpoints, see src.common.checkpoint. A refit running at the time
+    # of a checkpoint is not resumed
+    TRANSIENT_STATE = ("history", "__executor__", "__refit__")
+
+    def __init__(self,
+                 model: GaussianHMM,
+                 history: Optional[Callable[[], np.ndarray]] = None,
+                 refit_interval: Optional[int] = None):
+        """
+        Initialize the filter.
+
+        :param model: GaussianHMM, fitted now or later
+        :param history: Optional callable returning the (bars, tickers) observations to refit on,
+                        including the latest bar
+        :param refit_interval: Optional integer representing the number of bars between background
+                               refits. None disables refits
+        """
+
+        self.model = model
+        self.history = history
+        self.refit_interval = refit_interval
+        self.__probabilities__: Optional[np.ndarray] = None
+        self.__bars_since_refit__: int = 0
+        self.__executor__: Optional[ThreadPoolExecutor] = None
+        self.__refit__: Optional[Future] = None
+        self.__pending__: List[np.ndarray] = []
+
+    @property
+    def probabilities(self) -> Optional[np.ndarray]:
+        """
+        :returns: Filtered state probabilities of the latest bar, shaped (tickers, states), or None
+                  before the first bar.
+        """
+
+        return self.__probabilities__
+
+    def reset(self, observations: Optional[np.ndarray] = None) -> None:
+        """
+        Restart filtering, optionally from the probabilities after a history of observations.
+
+        :param observations: Optional (bars, tickers) observations already seen
+        """
+
+        self.__probabilities__ = None
+        if observations is not None and len(observations):
+            self.__probabilities__ = self.model.filter(observations)[-1]
+        self.__bars_since_refit__ = 0
+
+    def update(self, observation: np.ndarray) -> np.ndarray:
+        """
+        Advance the filter by one bar.
+
+        :param observation: 1-D NumPy array with one observation per ticker
+
+        :returns: Filtered state probabilities, shaped (tickers, states)
+        """
+
+        self._swap_refit()
+
+        self.__probabilities__ = self.model.filter_step(self.__probabilities__, observation)
+
+        if self.__refit__ is not None:
+            self.__pending__.append(np.array(observation, dtype=np.float64))
+
+        self.__bars_since_refit__ += 1
+        if (self.refit_interval and self.history is not None and self.__refit__ is None
+                and self.__bars_since_refit__ >= self.refit_interval):
+            self._start_refit()
+
+        return self.__probabilities__
+
+    def wait(self) -> None:
+        """
+        Block until a running refit is done and swap it in.
+        """
+
+        if self.__refit__ is not None:
+            self.__refit__.result()
+            self._swap_refit()
+
+    def close(self) -> None:
+        """
+        Wait for a running refit and stop the background thread.
+        """
+
+        self.wait()
+        if self.__executor__ is not None:
+            self.__executor__.shutdown()
+            self.__executor__ = None
+
+    def _start_refit(self) -> None:
+        """
+        Submit a refit on a snapshot of the history.
+        """
+
+        if self.__executor__ is None:
+            self.__executor__ = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hmm-refit")
+
+        observations = np.array(self.history(), dtype=np.float64)
+        self.__pending__ = []
+        self.__bars_since_refit__ = 0
+        self.__refit__ = self.__executor__.submit(_refit, self.model, observations)
+
+    def _swap_refit(self) -> None:
+        """
+        Swap in a finished refit after replaying the bars it has not seen.
+        """
+
+        if self.__refit__ is None or not self.__refit__.done():
+            return
+
+        refit, self.__refit__ = self.__refit__, None
+        model, probabilities = refit.result()
+
+        for observation in self.__pending__:
+            probabilities = model.filter_step(probabilities, observation)
+        self.__pending__ = []
+
+        self.model, self.__probabilities__ = model, probabilities
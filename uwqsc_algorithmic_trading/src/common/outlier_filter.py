@@ -0,0 +1,208 @@
+"""
+This file contains the streaming outlier stage shared by the preprocessors. Every new bar is scored
+for all tickers at once against rolling statistics of the values accepted so far, so the cost per
+bar does not depend on the length of the history. Only new rows are scored; the history is never
+revisited.
+
+Two scores are available: the z-score against the rolling mean and standard deviation, and a
+robust score against the rolling median and the scaled median absolute deviation (MAD), which is
+not dragged along by the outliers it is meant to catch. Flagged values are handled by a policy:
+
+- "ignore": keep the value, only report the flag
+- "drop": replace the value by NaN
+- "clip": winsorize the value to the edge of the accepted band
+- "ffill": replace the value by the latest accepted value
+
+A value flagged for `persistence` bars in a row is not a spike but a new level, e.g. after a
+split or a gap on news. The statistics of that column are then rebuilt from the values flagged
+in a row and the latest value is accepted, so a lasting shift cannot lock a column out forever.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.rolling_window import RollingWindow
+
+OUTLIER_WINDOW = 20
+OUTLIER_Z_SCORE = 3.0
+OUTLIER_PERSISTENCE = 5
+OUTLIER_METHODS = ("zscore", "mad")
+OUTLIER_POLICIES = ("ignore", "drop", "clip", "ffill")
+
+# Scales the median absolute deviation to the standard deviation of normally distributed values
+MAD_SCALE = 1.4826
+
+
+class OutlierFilter:
+    """
+    Rolling outlier detection over the columns of a price panel. Flagged values are kept out of the
+    rolling statistics, so a spike does not widen the band that judges the next bars, until a
+    column has been flagged for persistence bars in a row.
+    """
+
+    def __init__(self,
+                 width: int,
+                 window: int = OUTLIER_WINDOW,
+                 threshold: float = OUTLIER_Z_SCORE,
+                 method: str = "zscore",
+                 policy: str = "ignore",
+                 persistence: int = OUTLIER_PERSISTENCE):
+        """
+        Initialize an empty outlier filter.
+
+        :param width: Integer representing the number of columns (usually tickers)
+        :param window: Integer representing the number of accepted values the statistics use
+        :param threshold: Float. Score above which a value is an outlier
+        :param method: String, "zscore" or "mad"
+        :param policy: String, "ignore", "drop", "clip" or "ffill"
+        :param persistence: Integer representing the number of bars in a row a column is flagged
+                            before its statistics are rebuilt at the new level
+        """
+
+        if method not in OUTLIER_METHODS:
+            raise ValueError(f"Unknown outlier method {method!r}, "
+                             f"expected one of {OUTLIER_METHODS}")
+        if policy not in OUTLIER_POLICIES:
+            raise ValueError(f"Unknown outlier policy {policy!r}, "
+                             f"expected one of {OUTLIER_POLICIES}")
+        if persistence < 1:
+            raise ValueError(f"Outlier persistence must be positive, got {persistence}")
+
+        self.threshold = threshold
+        self.method = method
+        self.policy = policy
+        self.__window__ = RollingWindow(width, window)
+        # Values flagged in a row for every column, the oldest first
+        self.__streaks__ = np.zeros(width, dtype=np.int64)
+        self.__flagged__ = np.full((persistence, width), np.nan)
+
+    @property
+    def window(self) -> int:
+        """
+        :returns: Number of accepted values the statistics use.
+        """
+
+        return self.__window__.window
+
+    def empty(self) -> bool:
+        """
+        :returns: True while no value has entered the statistics.
+        """
+
+        return not self.__window__.counts.any()
+
+    def reset(self, window: Optional[int] = None) -> None:
+        """
+        Forget every value, optionally changing the window length.
+
+        :param window: Optional integer representing the new window length
+        """
+
+        self.__window__ = RollingWindow(self.__window__.width, window or self.window)
+        self.__streaks__.fill(0)
+
+    def seed(self, history: np.ndarray) -> None:
+        """
+        Fill the statistics from the tail of a history, taken as accepted values.
+
+        :param history: 2-D NumPy array of shape (bars, columns) in chronological order
+        """
+
+        self.__window__.seed(history)
+        self.__streaks__.fill(0)
+
+    def filter(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score one bar, apply the policy to its outliers and add the other values to the statistics.
+
+        :param values: 1-D NumPy array with one value per column
+
+        :returns: Tuple of the cleaned values and a boolean array flagging the outliers
+        """
+
+        window = self.__window__
+
+        if self.method == "mad":
+            center = window.median()
+            scale = MAD_SCALE * window.median_absolute_deviation()
+        else:
+            center = window.mean()
+            scale = window.std()
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.abs(values - center) / scale
+
+        flags = (scores > self.threshold) & (scale > 0) & (window.counts == window.window)
+        flags &= ~self._shift_levels(values, flags)
+        cleaned = self._apply_policy(values, flags, center, scale)
+        window.push(values, ~flags)
+
+        return cleaned, flags
+
+    def filter_rows(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a block of new bars in order, each against the statistics left by the bars before.
+
+        :param values: 2-D NumPy array of shape (bars, columns)
+
+        :returns: Tuple of the cleaned values and the outlier flags, both shaped like values
+        """
+
+        cleaned = np.empty(values.shape)
+        flags = np.zeros(values.shape, dtype=bool)
+
+        for row, row_values in enumerate(values):
+            cleaned[row], flags[row] = self.filter(row_values)
+
+        return cleaned, flags
+
+    def _shift_levels(self, values: np.ndarray, flags: np.ndarray) -> np.ndarray:
+        """
+        Count the bars every column has been flagged in a row, and rebuild the statistics of the
+        columns flagged for persistence bars from the values flagged before this bar.
+
+        :returns: Boolean array, True for the columns whose statistics were rebuilt
+        """
+
+        persistence = len(self.__flagged__)
+        streaks = np.where(flags, self.__streaks__ + 1, 0)
+        shifted = streaks >= persistence
+
+        if shifted.any():
+            columns = np.flatnonzero(shifted)
+            self.__window__.clear(columns)
+            accept = np.zeros(len(values), dtype=bool)
+            accept[columns] = True
+            for row in range(persistence - 1):
+                self.__window__.push(self.__flagged__[row], accept)
+            streaks[columns] = 0
+
+        # Only the values of an unbroken streak are kept, the latest one last
+        streaking = np.flatnonzero(streaks)
+        self.__flagged__[streaks[streaking] - 1, streaking] = values[streaking]
+        self.__streaks__ = streaks
+
+        return shifted
+
+    def _apply_policy(self,
+                      values: np.ndarray,
+                      flags: np.ndarray,
+                      center: np.ndarray,
+                      scale: np.ndarray) -> np.ndarray:
+        """
+        Replacement of the flagged values of one bar, following the policy.
+        """
+
+        if self.policy == "ignore" or not flags.any():
+            return values
+
+        if self.policy == "drop":
+            replacement = np.nan
+        elif self.policy == "clip":
+            band = self.threshold * scale
+            replacement = np.clip(values, center - band, center + band)
+        else:
+            replacement = self.__window__.latest()
+
+        return np.where(flags, replacement, values)
@@ -0,0 +1,226 @@
+"""
+This file contains the binary price panel format. A panel is a dense float64 matrix of prices with
+one row per timestamp and one column per ticker, written once (usually from the market data store)
+and then opened with numpy.memmap. Every process that opens the same panel shares one physical
+copy of the prices through the operating system's page cache.
+
+Layout of a panel directory:
+    prices.npy      float64 array of shape (timestamps, tickers)
+    timestamps.npy  datetime64[ns] array of shape (timestamps,)
+    meta.json       schema version, tickers and a fingerprint of the prices
+
+Rewriting a panel replaces its files instead of writing into them, so processes that mapped the
+panel before keep reading the old prices. meta.json is replaced last, bumping the version.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex
+
+from uwqsc_algorithmic_trading.src.common.market_data_store import DateLike, MarketDataStore
+
+PANEL_SCHEMA_VERSION = 1
+PRICES_FILE = "prices.npy"
+TIMESTAMPS_FILE = "timestamps.npy"
+META_FILE = "meta.json"
+
+
+def _replace_file(path: str, mode: str, write: Callable[[Any], None]) -> None:
+    """
+    Write a file next to its destination and move it into place, so that readers see either the
+    old or the new file, and memory maps of the old file stay valid.
+    """
+
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    encoding = None if "b" in mode else "utf-8"
+    with open(temporary, mode, encoding=encoding) as handle:
+        write(handle)
+    os.replace(temporary, path)
+
+
+class PricePanel:
+    """
+    Read-only, memory-mapped (timestamps, tickers) price matrix with its ticker and timestamp index.
+    """
+
+    def __init__(self,
+                 prices: np.ndarray,
+                 timestamps: np.ndarray,
+                 tickers: List[str],
+                 version: str,
+                 path: Optional[str] = None):
+        """
+        Initialize a panel over existing arrays. Use PricePanel.open or PricePanel.write instead.
+
+        :param prices: 2-D NumPy array of shape (timestamps, tickers)
+        :param timestamps: 1-D NumPy datetime64 array
+        :param tickers: List of ticker symbols, one per column
+        :param version: String fingerprint of the prices
+        :param path: Optional string representing the panel directory the arrays are mapped from
+        """
+
+        self.path = path
+        self.prices = prices
+        self.timestamps = timestamps
+        self.tickers = tickers
+        self.version = version
+        self.__columns__ = {ticker: column for column, ticker in enumerate(tickers)}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def open(cls, path: str) -> "PricePanel":
+        """
+        Memory-map an existing panel. Nothing is read until the prices are accessed.
+
+        :param path: String representing the panel directory
+
+        :returns: PricePanel backed by read-only memory maps
+        """
+
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as handle:
+            meta = json.load(handle)
+
+        if meta["schema"] != PANEL_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported price panel schema {meta['schema']} in {path}")
+
+        return cls(
+            np.load(os.path.join(path, PRICES_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, TIMESTAMPS_FILE), mmap_mode="r"),
+            meta["tickers"],
+            meta["version"],
+            path,
+        )
+
+    @classmethod
+    def write(cls,
+              path: str,
+              prices: np.ndarray,
+              timestamps: np.ndarray,
+              tickers: List[str]) -> "PricePanel":
+        """
+        Write a panel to disk and open it.
+
+        :param path: String representing the panel directory, created if needed
+        :param prices: 2-D array-like of shape (timestamps, tickers)
+        :param timestamps: 1-D array-like of timestamps
+        :param tickers: List of ticker symbols, one per column
+
+        :returns: PricePanel backed by read-only memory maps
+        """
+
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+
+        if prices.shape != (len(timestamps), len(tickers)):
+            raise ValueError(
+                f"Prices of shape {prices.shape} do not match "
+                f"{len(timestamps)} timestamps and {len(tickers)} tickers"
+            )
+
+        os.makedirs(path, exist_ok=True)
+
+        _replace_file(os.path.join(path, PRICES_FILE), "wb",
+                      lambda handle: np.save(handle, prices))
+        _replace_file(os.path.join(path, TIMESTAMPS_FILE), "wb",
+                      lambda handle: np.save(handle, timestamps))
+
+        meta = {
+            "schema": PANEL_SCHEMA_VERSION,
+            "tickers": list(tickers),
+            "version": hashlib.blake2b(np.ascontiguousarray(prices).data, digest_size=16)
+            .hexdigest(),
+        }
+        _replace_file(os.path.join(path, META_FILE), "w",
+                      lambda handle: json.dump(meta, handle))
+
+        return cls.open(path)
+
+    @classmethod
+    def from_frame(cls, path: str, frame: DataFrame) -> "PricePanel":
+        """
+        Write a panel from a DataFrame with "{ticker}_price" columns.
+
+        :param path: String representing the panel directory
+        :param frame: DataFrame indexed by timestamp
+
+        :returns: PricePanel backed by read-only memory maps
+        """
+
+        columns = [column for column in frame.columns if str(column).endswith("_price")]
+        tickers = [str(column)[:-len("_price")] for column in columns]
+
+        return cls.write(path, frame[columns].to_numpy(dtype=np.float64), frame.index, tickers)
+
+    @classmethod
+    def from_store(cls,
+                   path: str,
+                   store: MarketDataStore,
+                   tickers: List[str],
+                   start: DateLike = None,
+                   end: DateLike = None,
+                   field: str = "Close") -> "PricePanel":
+        """
+        Write a panel from the market data store.
+
+        :param path: String representing the panel directory
+        :param store: MarketDataStore to read from
+        :param tickers: List of ticker symbols
+        :param start: Optional first date, inclusive
+        :param end: Optional last date, inclusive
+        :param field: String representing the bar column used as price
+
+        :returns: PricePanel backed by read-only memory maps
+        """
+
+        return cls.from_frame(path, store.load_panel(tickers, start, end, field))
+
+    def column(self, ticker: str) -> np.ndarray:
+        """
+        Prices of one ticker, as a view into the memory map.
+
+        :param ticker: String that represents trading symbol
+
+        :returns: 1-D NumPy array
+        """
+
+        return self.prices[:, self.__columns__[ticker]]
+
+    def select(self, tickers: List[str]) -> np.ndarray:
+        """
+        Price matrix for a list of tickers. Returns a view without copying when the tickers are the
+        panel's own tickers in order.
+
+        :param tickers: List of ticker symbols
+
+        :returns: 2-D NumPy array of shape (timestamps, len(tickers))
+        """
+
+        if list(tickers) == self.tickers:
+            return self.prices
+
+        return self.prices[:, [self.__columns__[ticker] for ticker in tickers]]
+
+    def frame(self, start: Optional[int] = None, stop: Optional[int] = None) -> DataFrame:
+        """
+        Rows of the panel as a DataFrame in the "{ticker}_price" format, sharing memory with the
+        memory map instead of copying it.
+
+        :param start: Optional integer representing the first row
+        :param stop: Optional integer representing the row after the last one
+
+        :returns: DataFrame indexed by timestamp
+        """
+
+        return DataFrame(
+            self.prices[start:stop],
+            index=DatetimeIndex(self.timestamps[start:stop]),
+            columns=[f"{ticker}_price" for ticker in self.tickers],
+            copy=False,
+        )
@@ -0,0 +1,186 @@
+"""
+This file contains a streaming rolling window that keeps running statistics for every column of a
+price panel, so that moving averages and standard deviations can be updated in constant time per
+new bar instead of being recomputed over the full history.
+"""
+
+import warnings
+from typing import Optional
+
+import numpy as np
+
+# Running sums are recomputed from the stored window after this many updates to bound the
+# floating point drift of the add/subtract updates.
+RESYNC_INTERVAL = 1024
+
+
+class RollingWindow:
+    """
+    Fixed-length rolling window kept independently for every column. Each column owns a ring
+    buffer of its last `window` accepted values together with running sums and sums of squares.
+    Sums are kept relative to a per-column reference value, which keeps the variance numerically
+    stable for prices that are large compared to their spread.
+    """
+
+    def __init__(self, width: int, window: int):
+        """
+        Initialize an empty rolling window.
+
+        :param width: Integer representing the number of columns (usually tickers)
+        :param window: Integer representing the number of values kept per column
+        """
+
+        if window < 1:
+            raise ValueError(f"Rolling window must hold at least one value, got {window}")
+
+        self.width = width
+        self.window = window
+        self.__values__ = np.full((window, width), np.nan)
+        self.__cursor__ = np.zeros(width, dtype=np.int64)
+        self.__counts__ = np.zeros(width, dtype=np.int64)
+        self.__reference__ = np.full(width, np.nan)
+        self.__sums__ = np.zeros(width)
+        self.__squares__ = np.zeros(width)
+        self.__updates__ = 0
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        :returns: Number of values currently held for every column.
+        """
+
+        return self.__counts__
+
+    def push(self, values: np.ndarray, accept: Optional[np.ndarray] = None) -> None:
+        """
+        Add one bar of values. NaN values and values not accepted are skipped, leaving that
+        column's window unchanged.
+
+        :param values: 1-D NumPy array with one value per column
+        :param accept: Optional 1-D boolean NumPy array, False for values that must be skipped
+        """
+
+        accepted = ~np.isnan(values)
+        if accept is not None:
+            accepted &= accept
+
+        columns = np.flatnonzero(accepted)
+        if columns.size == 0:
+            return
+
+        new_values = values[columns]
+        reference = self.__reference__[columns]
+        unset = np.isnan(reference)
+        reference[unset] = new_values[unset]
+        self.__reference__[columns] = reference
+
+        slots = self.__cursor__[columns]
+        full = self.__counts__[columns] == self.window
+        evicted = np.where(full, self.__values__[slots, columns] - reference, 0.0)
+        centred = new_values - reference
+
+        self.__sums__[columns] += centred - evicted
+        self.__squares__[columns] += centred * centred - evicted * evicted
+        self.__values__[slots, columns] = new_values
+        self.__cursor__[columns] = (slots + 1) % self.window
+        self.__counts__[columns] = np.minimum(self.__counts__[columns] + 1, self.window)
+
+        self.__updates__ += 1
+        if self.__updates__ % RESYNC_INTERVAL == 0:
+            self.resync()
+
+    def seed(self, history: np.ndarray) -> None:
+        """
+        Reset the window and fill it from the tail of a history.
+
+        :param history: 2-D NumPy array of shape (bars, columns) in chronological order
+        """
+
+        self.clear()
+
+        for values in history[-self.window:]:
+            self.push(values)
+
+    def clear(self, columns: Optional[np.ndarray] = None) -> None:
+        """
+        Forget the values held for some columns.
+
+        :param columns: Optional 1-D NumPy array of column positions. None clears every column
+        """
+
+        columns = slice(None) if columns is None else columns
+
+        self.__values__[:, columns] = np.nan
+        self.__cursor__[columns] = 0
+        self.__counts__[columns] = 0
+        self.__reference__[columns] = np.nan
+        self.__sums__[columns] = 0.0
+        self.__squares__[columns] = 0.0
+
+    def resync(self) -> None:
+        """
+        Recompute the running sums from the stored values, re-centring them on the current mean.
+        """
+
+        self.__reference__ = np.where(self.__counts__ > 0, self.mean(), np.nan)
+        centred = self.__values__ - self.__reference__
+
+        self.__sums__ = np.nansum(centred, axis=0)
+        self.__squares__ = np.nansum(centred * centred, axis=0)
+
+    def mean(self) -> np.ndarray:
+        """
+        :returns: Mean of the values held for every column, NaN for empty columns.
+        """
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.__reference__ + self.__sums__ / self.__counts__
+
+    def std(self) -> np.ndarray:
+        """
+        :returns: Sample standard deviation of the values held for every column, NaN for columns
+                  with less than two values.
+        """
+
+        counts = self.__counts__
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = (self.__squares__ - self.__sums__ * self.__sums__ / counts) / (counts - 1)
+
+        return np.sqrt(np.where(counts > 1, np.maximum(variance, 0.0), np.nan))
+
+    def latest(self) -> np.ndarray:
+        """
+        :returns: Latest value held for every column, NaN for empty columns.
+        """
+
+        slots = (self.__cursor__ - 1) % self.window
+
+        return self.__values__[slots, np.arange(self.width)]
+
+    def median(self) -> np.ndarray:
+        """
+        :returns: Median of the values held for every column, NaN for empty columns.
+        """
+
+        return self._median(self.__values__)
+
+    def median_absolute_deviation(self) -> np.ndarray:
+        """
+        :returns: Median absolute deviation from the median of the values held for every column,
+                  NaN for empty columns.
+        """
+
+        return self._median(np.abs(self.__values__ - self.median()))
+
+    def _median(self, values: np.ndarray) -> np.ndarray:
+        """
+        Column medians of the stored window, skipping the empty slots of columns that are not full.
+        """
+
+        if np.all(self.__counts__ == self.window):
+            return np.median(values, axis=0)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmedian(values, axis=0)
@@ -0,0 +1,111 @@
+"""
+This file contains the ticker registry shared by the algorithms and preprocessors. Every ticker
+symbol is interned once and given a dense integer id, so that per-ticker state can be held in NumPy
+arrays indexed by id or by position instead of dictionaries keyed by strings. Column names such as
+"{ticker}_price" are built once per ticker and suffix and reused afterwards, instead of being
+formatted again on every bar.
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class TickerRegistry:
+    """
+    Thread-safe mapping between ticker symbols and dense integer ids, in order of first use. Ids
+    are never reused or removed.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+
+        self.__ids__: Dict[str, int] = {}
+        self.__symbols__: List[str] = []
+        self.__columns__: Dict[str, List[str]] = {}
+        self.__lock__ = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__symbols__)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.__ids__
+
+    def intern(self, ticker: str) -> int:
+        """
+        Id of a ticker, registering it on first use.
+
+        :param ticker: String that represents trading symbol
+
+        :returns: Integer id
+        """
+
+        ticker_id = self.__ids__.get(ticker)
+        if ticker_id is not None:
+            return ticker_id
+
+        with self.__lock__:
+            ticker_id = self.__ids__.get(ticker)
+            if ticker_id is None:
+                ticker_id = len(self.__symbols__)
+                self.__symbols__.append(ticker)
+                self.__ids__[ticker] = ticker_id
+
+        return ticker_id
+
+    def ids(self, tickers: Iterable[str]) -> np.ndarray:
+        """
+        Ids of several tickers, registering the new ones.
+
+        :param tickers: Iterable of ticker symbols
+
+        :returns: 1-D int64 NumPy array of ids, in the order of tickers
+        """
+
+        return np.array([self.intern(ticker) for ticker in tickers], dtype=np.int64)
+
+    def symbols(self, ids: Iterable[int]) -> List[str]:
+        """
+        Ticker symbols of several ids.
+
+        :param ids: Iterable of ticker ids
+
+        :returns: List of ticker symbols
+        """
+
+        symbols = self.__symbols__
+        return [symbols[ticker_id] for ticker_id in np.asarray(ids).tolist()]
+
+    def column_names(self, tickers: Iterable[str], suffix: str) -> List[str]:
+        """
+        Column names "{ticker}_{suffix}" of several tickers, formatted once per ticker and suffix.
+
+        :param tickers: Iterable of ticker symbols
+        :param suffix: String, e.g. "price" or "short"
+
+        :returns: List of column names, in the order of tickers
+        """
+
+        ids = self.ids(tickers).tolist()
+        names = self.__columns__.get(suffix)
+
+        if names is None or len(names) < len(self.__symbols__):
+            with self.__lock__:
+                names = self.__columns__.setdefault(suffix, [])
+                names.extend(f"{ticker}_{suffix}" for ticker in self.__symbols__[len(names):])
+
+        return [names[ticker_id] for ticker_id in ids]
+
+
+_SHARED_REGISTRY = TickerRegistry()
+
+
+def ticker_registry() -> TickerRegistry:
+    """
+    :returns: The process-wide TickerRegistry.
+    """
+
+    return _SHARED_REGISTRY
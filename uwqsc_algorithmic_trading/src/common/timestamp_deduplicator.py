@@ -0,0 +1,307 @@
+"""
+This file contains the duplicate timestamp stage shared by the preprocessors. Replayed feeds often
+resend overlapping windows, so a bar can be a duplicate of a bar from an earlier batch, not only of
+a bar in the same batch. The deduplicator remembers every timestamp it accepted in a sorted array,
+per ticker for long format data, and checks new bars against it with binary searches instead of
+scanning the history. Bars newer than every accepted one, the usual case, are appended without any
+search.
+
+Duplicates are handled by a policy:
+
+- "reject": the first bar with a timestamp is kept, later ones are dropped
+- "merge": duplicates within a batch are merged into one bar, the latest non-missing value of
+  every column winning. Duplicates of bars accepted in earlier batches are still dropped, since
+  those bars have already been passed on
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timestamp, factorize, to_datetime
+
+from uwqsc_algorithmic_trading.src.common.config import DATE_COLUMN, TICKER_COLUMN
+
+DEDUPLICATION_POLICIES = ("reject", "merge")
+
+_NANOSECONDS = np.dtype("datetime64[ns]")
+
+
+def timestamp_keys(timestamps: Any) -> np.ndarray:
+    """
+    Timestamps as int64 keys: nanoseconds since the epoch for dates, the values for integers.
+
+    :param timestamps: DatetimeIndex, Series or array of dates, date strings or integers
+
+    :returns: 1-D int64 NumPy array
+    """
+
+    if isinstance(timestamps, DatetimeIndex):
+        return timestamps.asi8
+
+    values = np.asarray(timestamps)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[ns]").view(np.int64)
+
+    return DatetimeIndex(to_datetime(values)).asi8
+
+
+def timestamp_key(timestamp: Any) -> int:
+    """
+    Single timestamp as an int64 key, see timestamp_keys.
+
+    :param timestamp: numpy.datetime64, Timestamp, date string or integer
+
+    :returns: Integer key
+    """
+
+    if isinstance(timestamp, np.datetime64):
+        if timestamp.dtype != _NANOSECONDS:
+            timestamp = timestamp.astype(_NANOSECONDS)
+        return int(timestamp.view(np.int64))
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+
+    return Timestamp(timestamp).value
+
+
+class SortedKeys:
+    """
+    Growable sorted array of unique int64 keys.
+    """
+
+    def __init__(self):
+        self.__keys__ = np.empty(16, dtype=np.int64)
+        self.__size__ = 0
+
+    def __len__(self) -> int:
+        return self.__size__
+
+    @property
+    def latest(self) -> Optional[int]:
+        """
+        :returns: Largest key, None when empty.
+        """
+
+        return int(self.__keys__[self.__size__ - 1]) if self.__size__ else None
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """
+        :param keys: 1-D int64 NumPy array
+
+        :returns: Boolean array flagging the keys that are stored.
+        """
+
+        stored = self.__keys__[:self.__size__]
+        positions = np.searchsorted(stored, keys)
+        found = positions < self.__size__
+        found[found] = stored[positions[found]] == keys[found]
+
+        return found
+
+    def add(self, keys: np.ndarray) -> None:
+        """
+        Store new keys, which must not be stored yet.
+
+        :param keys: 1-D int64 NumPy array of unique keys
+        """
+
+        if len(keys) == 0:
+            return
+
+        keys = np.sort(keys)
+        size = self.__size__
+
+        if size and keys[0] < self.__keys__[size - 1]:
+            # Late keys land inside the array, which is rebuilt. Replays rarely reach this path
+            merged = np.concatenate([self.__keys__[:size], keys])
+            merged.sort(kind="mergesort")
+            self.__keys__ = merged
+            self.__size__ = len(merged)
+            return
+
+        if size + len(keys) > len(self.__keys__):
+            grown = np.empty(max(2 * len(self.__keys__), size + len(keys)), dtype=np.int64)
+            grown[:size] = self.__keys__[:size]
+            self.__keys__ = grown
+
+        self.__keys__[size:size + len(keys)] = keys
+        self.__size__ = size + len(keys)
+
+    def add_latest(self, key: int) -> None:
+        """
+        Append a single key larger than every stored key.
+
+        :param key: Integer key
+        """
+
+        if self.__size__ == len(self.__keys__):
+            self.__keys__ = np.concatenate([self.__keys__, np.empty_like(self.__keys__)])
+
+        self.__keys__[self.__size__] = key
+        self.__size__ += 1
+
+
+class TimestampDeduplicator:
+    """
+    Incremental removal of duplicate timestamps across batches. Wide data (one row per timestamp,
+    timestamps in the index) shares one set of timestamps; long format data (a "Date" and a
+    "Ticker" column) has one per ticker.
+    """
+
+    def __init__(self, policy: str = "reject", reject_late: bool = False):
+        """
+        Initialize a deduplicator that has not seen any timestamp.
+
+        :param policy: String, "reject" or "merge"
+        :param reject_late: Boolean. True also drops bars older than the latest accepted one, for
+                            pipelines that need their bars in chronological order
+        """
+
+        if policy not in DEDUPLICATION_POLICIES:
+            raise ValueError(f"Unknown deduplication policy {policy!r}, "
+                             f"expected one of {DEDUPLICATION_POLICIES}")
+
+        self.policy = policy
+        self.reject_late = reject_late
+        self.rejected_rows = 0
+        self.merged_rows = 0
+        self.__seen__: Dict[Any, SortedKeys] = {}
+
+    def seen(self, ticker: Any = None) -> int:
+        """
+        :param ticker: Optional ticker symbol, for long format data
+
+        :returns: Number of timestamps accepted so far.
+        """
+
+        keys = self.__seen__.get(ticker)
+        return 0 if keys is None else len(keys)
+
+    def seed(self, timestamps: Any, ticker: Any = None) -> None:
+        """
+        Remember timestamps that were accepted elsewhere, e.g. those of an existing history.
+
+        :param timestamps: DatetimeIndex, Series or array of timestamps
+        :param ticker: Optional ticker symbol, for long format data
+        """
+
+        keys = np.unique(timestamp_keys(timestamps))
+        index = self.__seen__.setdefault(ticker, SortedKeys())
+        index.add(keys[~index.contains(keys)])
+
+    def accept(self, timestamp: Any, ticker: Any = None) -> bool:
+        """
+        Check a single streaming bar, remembering its timestamp when it is new.
+
+        :param timestamp: Timestamp of the bar. None is always accepted
+        :param ticker: Optional ticker symbol, for long format data
+
+        :returns: True if the bar is new and is kept.
+        """
+
+        if timestamp is None:
+            return True
+
+        key = timestamp_key(timestamp)
+        index = self.__seen__.get(ticker)
+        if index is None:
+            index = self.__seen__[ticker] = SortedKeys()
+
+        latest = index.latest
+        if latest is None or key > latest:
+            index.add_latest(key)
+            return True
+
+        if self.reject_late or index.contains(np.array([key]))[0]:
+            self.rejected_rows += 1
+            return False
+
+        index.add(np.array([key]))
+        return True
+
+    def keep(self, timestamps: Any, tickers: Any = None) -> np.ndarray:
+        """
+        Check a batch of bars, remembering the new timestamps. Only the first of several bars with
+        the same new timestamp is kept.
+
+        :param timestamps: DatetimeIndex, Series or array with the timestamp of every bar
+        :param tickers: Optional Series or array with the ticker of every bar, for long format data
+
+        :returns: Boolean array that is True for the bars to keep
+        """
+
+        keys = timestamp_keys(timestamps)
+
+        if tickers is None:
+            keep = self._keep_keys(keys, None)
+        else:
+            keep = np.zeros(len(keys), dtype=bool)
+            codes, symbols = factorize(np.asarray(tickers))
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(symbols) + 1))
+
+            for code, symbol in enumerate(symbols):
+                rows = order[bounds[code]:bounds[code + 1]]
+                keep[rows] = self._keep_keys(keys[rows], symbol)
+
+        self.rejected_rows += len(keep) - int(np.count_nonzero(keep))
+
+        return keep
+
+    def deduplicate(self, data: DataFrame) -> DataFrame:
+        """
+        Drop the duplicate bars of a batch, merging them first under the "merge" policy. Long
+        format is recognized by its "Date" column, wide data uses the index.
+
+        :param data: DataFrame of new bars
+
+        :returns: DataFrame with the bars to keep
+        """
+
+        long_format = DATE_COLUMN in data.columns
+        keys = [column for column in (TICKER_COLUMN, DATE_COLUMN) if column in data.columns]
+
+        if self.policy == "merge":
+            duplicated = (data.duplicated(subset=keys).any() if long_format
+                          else data.index.has_duplicates)
+            if duplicated:
+                length = len(data)
+                if long_format:
+                    data = data.groupby(keys, sort=False, as_index=False).last()
+                else:
+                    data = data.groupby(level=0, sort=False).last()
+                self.merged_rows += length - len(data)
+
+        if not long_format:
+            return data[self.keep(data.index)]
+
+        tickers = data[TICKER_COLUMN] if TICKER_COLUMN in data.columns else None
+        return data[self.keep(data[DATE_COLUMN], tickers)]
+
+    def _keep_keys(self, keys: np.ndarray, ticker: Any) -> np.ndarray:
+        """
+        Keep mask of the keys of one ticker, adding the new ones to its index.
+        """
+
+        index = self.__seen__.get(ticker)
+        if index is None:
+            index = self.__seen__[ticker] = SortedKeys()
+
+        latest = index.latest
+        if len(keys) and (latest is None or keys[0] > latest) and np.all(keys[1:] > keys[:-1]):
+            # Strictly increasing bars after every accepted one, nothing to search
+            index.add(keys)
+            return np.ones(len(keys), dtype=bool)
+
+        unique, first = np.unique(keys, return_index=True)
+        new = ~index.contains(unique)
+        if self.reject_late and latest is not None:
+            new &= unique > latest
+
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[first[new]] = True
+        index.add(unique[new])
+
+        return keep
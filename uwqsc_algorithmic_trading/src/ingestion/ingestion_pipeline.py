@@ -0,0 +1,215 @@
+"""
+Asynchronous ingestion of live bars. A reader task pulls blocks of bars from an IBarSource into a
+bounded queue, and a dispatcher task gathers them into batches and hands each batch to a
+PortfolioRunner in a worker thread, so that the event loop keeps reading while the algorithms run.
+
+A batch is dispatched once it holds max_batch_bars bars, or max_latency seconds after its first
+bar arrived. When the algorithms fall behind, batches grow up to max_batch_bars right away, and once
+max_pending blocks are waiting, the reader stops reading, which pushes back on the source through
+its socket instead of buffering without bounds.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.interfaces.ingestion.bar_source_interface import IBarSource
+from uwqsc_algorithmic_trading.src.backtesting.portfolio_runner import PortfolioRunner
+from uwqsc_algorithmic_trading.src.common.instrumentation import instrumentation
+
+Block = Tuple[np.ndarray, np.ndarray]
+
+
+@dataclass
+class IngestionStats:
+    """
+    Counters of one ingestion run. Backpressure waits count the blocks the reader had to hold
+    because max_pending blocks were already waiting.
+    """
+
+    bars: int = 0
+    dropped_bars: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+    backpressure_waits: int = 0
+    seconds: float = 0.0
+
+    @property
+    def bars_per_second(self) -> float:
+        """
+        :returns: Float. Bars handed to the algorithms per second of the run.
+        """
+
+        return self.bars / self.seconds if self.seconds else 0.0
+
+
+class IngestionPipeline:
+    """
+    Feeds the bars of a source to the algorithms of a PortfolioRunner, in order.
+    """
+
+    def __init__(self,
+                 source: IBarSource,
+                 runner: PortfolioRunner,
+                 max_batch_bars: int = 1024,
+                 max_latency: float = 0.005,
+                 max_pending: int = 64,
+                 executor: Optional[Executor] = None):
+        """
+        Initialize the pipeline.
+
+        :param source: IBarSource providing the bars. Its tickers must include the runner's
+        :param runner: PortfolioRunner running the algorithms
+        :param max_batch_bars: Integer representing the number of bars after which a batch is
+                               dispatched without waiting for more
+        :param max_latency: Float. Seconds a bar may wait for more bars to join its batch
+        :param max_pending: Integer representing the number of blocks read ahead of the
+                            algorithms before the source is paused
+        :param executor: Optional thread pool running the batches. The algorithms keep state
+                         between bars, so process pools cannot be used. Defaults to a single
+                         thread owned by the pipeline
+        """
+
+        if max_batch_bars < 1 or max_pending < 1 or max_latency < 0:
+            raise ValueError("max_batch_bars and max_pending must be positive and max_latency "
+                             "must not be negative")
+
+        self.source = source
+        self.runner = runner
+        self.max_batch_bars = max_batch_bars
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.executor = executor
+        self.stats = IngestionStats()
+
+    async def run(self) -> IngestionStats:
+        """
+        Ingest the source until it is exhausted.
+
+        :returns: IngestionStats of the run
+        """
+
+        self.stats = IngestionStats()
+        started = time.perf_counter()
+        executor = self.executor or ThreadPoolExecutor(1, thread_name_prefix="ingestion")
+
+        await self.source.open()
+        queue: asyncio.Queue = asyncio.Queue(self.max_pending)
+        reader = asyncio.ensure_future(self._read(queue))
+
+        try:
+            await self._dispatch(queue, self._columns(), executor)
+            await reader
+        finally:
+            reader.cancel()
+            await self.source.close()
+            if executor is not self.executor:
+                executor.shutdown()
+
+        self.stats.seconds = time.perf_counter() - started
+
+        return self.stats
+
+    async def _read(self, queue: asyncio.Queue) -> None:
+        """
+        Move blocks from the source to the queue, then put None to mark the end.
+        """
+
+        try:
+            while True:
+                block = await self.source.read()
+                if block is None:
+                    break
+                if queue.full():
+                    self.stats.backpressure_waits += 1
+                await queue.put(block)
+        except Exception:
+            await queue.put(None)
+            raise
+
+        await queue.put(None)
+
+    async def _dispatch(self,
+                        queue: asyncio.Queue,
+                        columns: np.ndarray,
+                        executor: Executor) -> None:
+        """
+        Gather blocks into batches and run every batch in the executor, one after the other.
+        """
+
+        loop = asyncio.get_running_loop()
+        finished = False
+
+        while not finished:
+            block = await queue.get()
+            if block is None:
+                return
+
+            blocks = [block]
+            size = len(block[0])
+            deadline = loop.time() + self.max_latency
+
+            while size < self.max_batch_bars:
+                try:
+                    remaining = deadline - loop.time()
+                    block = (queue.get_nowait() if remaining <= 0
+                             else await asyncio.wait_for(queue.get(), remaining))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if block is None:
+                    finished = True
+                    break
+                blocks.append(block)
+                size += len(block[0])
+
+            timestamps = np.concatenate([timestamps for timestamps, _ in blocks])
+            prices = np.concatenate([prices[:, columns] for _, prices in blocks])
+            await loop.run_in_executor(executor, self._process, timestamps, prices)
+
+    def _process(self, timestamps: np.ndarray, prices: np.ndarray) -> None:
+        """
+        Hand a batch to the runner bar by bar. Runs in the executor.
+        """
+
+        with instrumentation().timer("ingest.batch", type(self).__name__):
+            dropped = 0
+            for timestamp, row in zip(timestamps, prices):
+                if self.runner.on_bar(row, timestamp) is None:
+                    dropped += 1
+
+        stats = self.stats
+        stats.bars += len(timestamps)
+        stats.dropped_bars += dropped
+        stats.batches += 1
+        stats.largest_batch = max(stats.largest_batch, len(timestamps))
+        instrumentation().count("bars_ingested", len(timestamps), type(self).__name__)
+
+    def _columns(self) -> np.ndarray:
+        """
+        Columns of the source prices in the order of the runner's tickers.
+        """
+
+        positions = {ticker: column for column, ticker in enumerate(self.source.tickers)}
+        missing = [ticker for ticker in self.runner.tickers if ticker not in positions]
+        if missing:
+            raise ValueError(f"The source does not provide {missing}")
+
+        return np.array([positions[ticker] for ticker in self.runner.tickers], dtype=np.intp)
+
+
+def run_ingestion(source: IBarSource, runner: PortfolioRunner, **options) -> IngestionStats:
+    """
+    Ingest a source from synchronous code, in a new event loop.
+
+    :param source: IBarSource providing the bars
+    :param runner: PortfolioRunner running the algorithms
+    :param options: Keyword arguments of IngestionPipeline
+
+    :returns: IngestionStats of the run
+    """
+
+    return asyncio.run(IngestionPipeline(source, runner, **options).run())
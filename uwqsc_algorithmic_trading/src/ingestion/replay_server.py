@@ -0,0 +1,168 @@
+"""
+This file contains a local replay server standing in for a live market data feed. It serves a
+price panel, e.g. one loaded from the market data store, over TCP to every client that connects.
+
+Wire format: a JSON header line {"tickers": [...], "bars": n}, followed by fixed size binary frames,
+one per bar, holding the little-endian int64 timestamp in nanoseconds and one little-endian float64
+price per ticker. Frames can be decoded in blocks with numpy.frombuffer, so neither side handles
+bars one by one.
+"""
+
+import asyncio
+import json
+from typing import List, Optional
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.market_data_store import DateLike, MarketDataStore
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+
+
+def frame_dtype(width: int) -> np.dtype:
+    """
+    NumPy dtype of one bar on the wire.
+
+    :param width: Integer representing the number of tickers
+
+    :returns: Structured dtype with a "timestamp" and a "prices" field
+    """
+
+    return np.dtype([("timestamp", "<i8"), ("prices", "<f8", (width,))])
+
+
+class ReplayServer:
+    """
+    TCP server replaying a price panel from the start to every client. Writes wait for the client
+    to drain its socket, so a slow client slows the replay down instead of filling memory.
+    """
+
+    def __init__(self,
+                 prices: np.ndarray,
+                 timestamps: np.ndarray,
+                 tickers: List[str],
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 chunk_bars: int = 256,
+                 bars_per_second: Optional[float] = None):
+        """
+        Initialize the server. Nothing listens until start is called.
+
+        :param prices: 2-D NumPy array of shape (bars, tickers)
+        :param timestamps: 1-D array-like of timestamps, one per bar
+        :param tickers: List of ticker symbols, one per column
+        :param host: String representing the address to listen on
+        :param port: Integer representing the port to listen on. 0 picks a free port
+        :param chunk_bars: Integer representing the number of bars written at once
+        :param bars_per_second: Optional float pacing the replay. None sends as fast as the client
+                                reads
+        """
+
+        if np.shape(prices) != (len(timestamps), len(tickers)):
+            raise ValueError(
+                f"Prices of shape {np.shape(prices)} do not match "
+                f"{len(timestamps)} timestamps and {len(tickers)} tickers"
+            )
+
+        self.prices = prices
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        self.tickers = list(tickers)
+        self.host = host
+        self.port = port
+        self.chunk_bars = chunk_bars
+        self.bars_per_second = bars_per_second
+        self.__server__: Optional[asyncio.AbstractServer] = None
+
+    @classmethod
+    def from_panel(cls, panel: PricePanel, **options) -> "ReplayServer":
+        """
+        Serve a price panel.
+
+        :param panel: PricePanel to replay
+        :param options: Keyword arguments of ReplayServer
+
+        :returns: ReplayServer
+        """
+
+        return cls(panel.prices, panel.timestamps, panel.tickers, **options)
+
+    @classmethod
+    def from_store(cls,
+                   store: MarketDataStore,
+                   tickers: List[str],
+                   start: DateLike = None,
+                   end: DateLike = None,
+                   field: str = "Close",
+                   **options) -> "ReplayServer":
+        """
+        Serve bars from the market data store.
+
+        :param store: MarketDataStore to read from
+        :param tickers: List of ticker symbols
+        :param start: Optional first date, inclusive
+        :param end: Optional last date, inclusive
+        :param field: String representing the bar column used as price
+        :param options: Keyword arguments of ReplayServer
+
+        :returns: ReplayServer
+        """
+
+        frame = store.load_panel(tickers, start, end, field)
+        columns = [f"{ticker}_price" for ticker in tickers]
+
+        return cls(frame[columns].to_numpy(dtype=np.float64), frame.index, tickers, **options)
+
+    async def start(self) -> None:
+        """
+        Start listening. The port picked by the system is stored in self.port.
+        """
+
+        self.__server__ = await asyncio.start_server(self._replay, self.host, self.port)
+        self.port = self.__server__.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """
+        Stop listening.
+        """
+
+        if self.__server__ is not None:
+            self.__server__.close()
+            await self.__server__.wait_closed()
+            self.__server__ = None
+
+    async def __aenter__(self) -> "ReplayServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exception) -> None:
+        await self.close()
+
+    async def _replay(self, _: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Send the header and every bar to one client.
+        """
+
+        header = {"tickers": self.tickers, "bars": len(self.timestamps)}
+        dtype = frame_dtype(len(self.tickers))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        try:
+            writer.write(json.dumps(header).encode("utf-8") + b"\n")
+
+            for start in range(0, len(self.timestamps), self.chunk_bars):
+                stop = min(start + self.chunk_bars, len(self.timestamps))
+                frames = np.empty(stop - start, dtype=dtype)
+                frames["timestamp"] = self.timestamps[start:stop].view(np.int64)
+                frames["prices"] = self.prices[start:stop]
+
+                writer.write(frames.tobytes())
+                await writer.drain()
+
+                if self.bars_per_second:
+                    delay = started + stop / self.bars_per_second - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,77 @@
+"""
+This file contains the bar source reading the binary feed of a ReplayServer, or of any server
+speaking the same wire format, over TCP.
+"""
+
+import asyncio
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.interfaces.ingestion.bar_source_interface import IBarSource
+from uwqsc_algorithmic_trading.src.ingestion.replay_server import frame_dtype
+
+
+class TcpBarSource(IBarSource):
+    """
+    Reads bars from a TCP feed, decoding every read in one block. A read returns the bars that
+    arrived since the previous one, up to max_bars; bytes of a bar cut in half wait for the next
+    read.
+    """
+
+    def __init__(self, host: str, port: int, max_bars: int = 1024):
+        """
+        Initialize the source. Nothing is connected until open is called.
+
+        :param host: String representing the address of the server
+        :param port: Integer representing the port of the server
+        :param max_bars: Integer representing the largest number of bars returned by one read
+        """
+
+        self.host = host
+        self.port = port
+        self.max_bars = max_bars
+        self.__tickers__: List[str] = []
+        self.__dtype__: Optional[np.dtype] = None
+        self.__buffer__ = bytearray()
+        self.__reader__: Optional[asyncio.StreamReader] = None
+        self.__writer__: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def tickers(self) -> List[str]:
+        return self.__tickers__
+
+    async def open(self) -> None:
+        self.__reader__, self.__writer__ = await asyncio.open_connection(self.host, self.port)
+
+        header = json.loads(await self.__reader__.readline())
+        self.__tickers__ = list(header["tickers"])
+        self.__dtype__ = frame_dtype(len(self.__tickers__))
+
+    async def read(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        size = self.__dtype__.itemsize
+        buffer = self.__buffer__
+
+        while len(buffer) < size:
+            data = await self.__reader__.read(size * self.max_bars - len(buffer))
+            if not data:
+                if buffer:
+                    raise ConnectionError("The feed ended in the middle of a bar")
+                return None
+            buffer += data
+
+        complete = len(buffer) // size * size
+        frames = np.frombuffer(buffer[:complete], dtype=self.__dtype__)
+        del buffer[:complete]
+
+        return frames["timestamp"].view("datetime64[ns]"), frames["prices"]
+
+    async def close(self) -> None:
+        if self.__writer__ is not None:
+            self.__writer__.close()
+            try:
+                await self.__writer__.wait_closed()
+            except ConnectionError:
+                pass
+            self.__writer__ = None
@@ -3,8 +3,43 @@ Before running the Hidden Markov Model Algorithm, we must prepare the data for i
 This file contains the logic behind preprocessing data specifically for Hidden Markov Model.
 """
 
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame, concat
+
 from uwqsc_algorithmic_trading.interfaces.preprocessing.preprocessor_interface \
     import IPreProcessData
+from uwqsc_algorithmic_trading.src.common.history_buffer import HistoryBuffer
+from uwqsc_algorithmic_trading.src.common.missing_value_imputer import MissingValueImputer
+from uwqsc_algorithmic_trading.src.common.outlier_filter import (
+    OUTLIER_PERSISTENCE,
+    OutlierFilter
+)
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import TimestampDeduplicator
+
+
+def log_returns(prices: np.ndarray, previous: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Logarithmic returns of every column of a price matrix.
+
+    :param prices: 2-D NumPy array of shape (bars, tickers)
+    :param previous: Optional 1-D NumPy array with the prices of the bar before the first one.
+                     Without it, the first row of returns is NaN
+
+    :returns: 2-D NumPy array shaped like prices
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    if previous is None:
+        previous = np.full(prices.shape[1], np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        logs = np.log(np.vstack([previous, prices]))
+
+    return np.diff(logs, axis=0)
 
 
 class HMMPreProcessorImpl(IPreProcessData):
@@ -12,6 +47,46 @@ class HMMPreProcessorImpl(IPreProcessData):
     Data preprocessor for the Hidden Markov Model algorithm.
     """
 
+    def __init__(self,
+                 tickers: List[str],
+                 max_history: Optional[int] = None,
+                 missing_policy: str = "ffill",
+                 max_gap: Optional[int] = None,
+                 duplicate_policy: str = "reject",
+                 outlier_method: str = "zscore",
+                 outlier_policy: str = "ignore",
+                 outlier_persistence: int = OUTLIER_PERSISTENCE):
+        """
+        Initialize the HMM preprocessor.
+
+        :param tickers: List of ticker symbols
+        :param max_history: Optional integer representing the maximum number of rows of history to
+                            keep. None keeps the whole history
+        :param missing_policy: String. How missing prices are imputed, see MissingValueImputer
+        :param max_gap: Optional integer representing the number of consecutive missing prices
+                        that are imputed. None imputes every gap
+        :param duplicate_policy: String. How repeated timestamps are handled, "reject" or "merge",
+                                 see TimestampDeduplicator
+        :param outlier_method: String. "zscore" or "mad", see OutlierFilter
+        :param outlier_policy: String. What happens to price spikes before returns are computed:
+                               "ignore" only counts them, "drop" replaces them by NaN and drops
+                               rows without any price left, "clip" winsorizes them and "ffill"
+                               replaces them by the latest accepted price. The default keeps live
+                               returns equal to those of vectorized backtests, which observe raw
+                               prices
+        :param outlier_persistence: Integer representing the number of bars in a row a price is
+                                    flagged before it is taken as a new level, see OutlierFilter
+        """
+
+        self.tickers = tickers
+        self.__outlier_state__ = OutlierFilter(len(tickers),
+                                               method=outlier_method,
+                                               policy=outlier_policy,
+                                               persistence=outlier_persistence)
+        super().__init__(max_history,
+                         MissingValueImputer(len(tickers), missing_policy, max_gap),
+                         TimestampDeduplicator(duplicate_policy))
+
     @DeprecationWarning
     def load_data(self):
         """
@@ -19,7 +94,7 @@ class HMMPreProcessorImpl(IPreProcessData):
         """
 
     def missing_values(self):
-        pass
+        self._impute_missing_values(self.price_columns)
 
     def remove_duplicate_timestamps(self):
         data = self.__processed_data__
@@ -31,9 +106,129 @@ class HMMPreProcessorImpl(IPreProcessData):
                 Please ensure load_data() is called before removing duplicate timestamps."""
             )
 
-        # Remove duplicates based on the 'timestamp' column
-        clean_data = data.drop_duplicates(subset=['Date'])
-        self.__processed_data__ = clean_data
+        # Remove duplicates based on the 'Date' column (per 'Ticker' if any), or the index for
+        # price panels, across every batch seen so far
+        self._remove_duplicate_timestamps()
 
     def remove_outliers(self):
-        pass
+        self._seed_outlier_filter()
+
+        columns = self.price_columns
+        prices = self.__processed_data__[columns].to_numpy(dtype=np.float64)
+        cleaned, flags = self.__outlier_state__.filter_rows(prices)
+        self._count_outliers(flags)
+
+        if self.__outlier_state__.policy != "ignore" and flags.any():
+            keep = ~np.isnan(cleaned).all(axis=1) | np.isnan(prices).all(axis=1)
+            self.__processed_data__ = self.__processed_data__.assign(
+                **dict(zip(columns, cleaned.T))
+            )[keep]
+
+    def generate_features(self):
+        self.generate_log_returns()
+
+    def generate_log_returns(self) -> None:
+        """
+        The Hidden Markov Model observes the logarithmic returns of every stock. We add them here as
+        "{ticker}_return" columns, using the last price in the history for the first new row.
+        """
+
+        prices = self.__processed_data__[self.price_columns].to_numpy(dtype=np.float64)
+        previous = self._previous_prices()
+
+        returns = self.return_columns
+        self.__processed_data__ = concat([
+            self.__processed_data__.drop(columns=returns, errors="ignore"),
+            DataFrame(log_returns(prices, previous),
+                      index=self.__processed_data__.index,
+                      columns=returns)
+        ], axis=1)
+
+    def process_bar(self,
+                    timestamp: Any,
+                    prices: np.ndarray,
+                    cleaned: bool = False) -> Dict[str, np.ndarray]:
+        prices = self._clean_bar(timestamp, prices, cleaned, self.price_columns)
+        if prices is None:
+            return {}
+
+        self._seed_outlier_filter()
+        prices, flags = self.__outlier_state__.filter(prices)
+        self._count_outliers(flags)
+
+        returns = log_returns(prices[None, :], self._previous_prices())[0]
+
+        width = len(self.tickers)
+        row = np.empty(2 * width)
+        row[:width] = prices
+        row[width:] = returns
+        self.append_history_row(timestamp, self.history_columns, row)
+
+        return {"price": prices, "return": returns}
+
+    @cached_property
+    def price_columns(self) -> List[str]:
+        """
+        Price columns of the tickers, in ticker order.
+        """
+
+        return ticker_registry().column_names(self.tickers, "price")
+
+    @cached_property
+    def return_columns(self) -> List[str]:
+        """
+        Logarithmic return columns of the tickers, in ticker order.
+        """
+
+        return ticker_registry().column_names(self.tickers, "return")
+
+    @cached_property
+    def history_columns(self) -> List[str]:
+        """
+        Columns of a bar appended to the history by process_bar, in the order of process_data.
+        """
+
+        return self.price_columns + self.return_columns
+
+    def _seed_outlier_filter(self) -> None:
+        """
+        Hand the tail of an existing history to an outlier filter that has not seen any price yet.
+        """
+
+        history = self.__data_history__
+        if self.__outlier_state__.empty() and history is not None and len(history):
+            tail = history.tail(self.__outlier_state__.window)
+            self.__outlier_state__.seed(tail[self.price_columns].to_numpy(dtype=np.float64))
+
+    def _previous_prices(self) -> Optional[np.ndarray]:
+        """
+        Prices of the latest bar in the history, or None without history.
+        """
+
+        columns = self.price_columns
+        history = self.__data_history__
+
+        if isinstance(history, HistoryBuffer) and len(history):
+            return history.latest(columns)
+        if isinstance(history, DataFrame) and len(history):
+            return history[columns].iloc[-1].to_numpy(dtype=np.float64)
+
+        return None
+
+    def return_history(self) -> np.ndarray:
+        """
+        Logarithmic returns of every ticker over the whole history, read from the history arrays.
+
+        :returns: 2-D NumPy array of shape (bars, tickers)
+        """
+
+        history = self.__data_history__
+        if history is None or len(history) == 0:
+            return np.empty((0, len(self.tickers)))
+
+        columns = self.return_columns
+        if isinstance(history, HistoryBuffer):
+            returns = np.column_stack([history.column(column) for column in columns])
+            return returns.astype(np.float64)
+
+        return history[columns].to_numpy(dtype=np.float64)
@@ -0,0 +1,102 @@
+"""
+When several algorithms trade the same tickers, the cleaning steps that do not depend on the
+algorithm only need to run once per bar. This file contains the preprocessor shared by the
+algorithms of a PortfolioRunner: it drops repeated timestamps and fills missing prices. It keeps
+the cleaned prices of the whole universe in its own history, to seed those steps; the algorithms
+still record the prices of their tickers in their own histories.
+"""
+
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from uwqsc_algorithmic_trading.interfaces.preprocessing.preprocessor_interface \
+    import IPreProcessData
+from uwqsc_algorithmic_trading.src.common.missing_value_imputer import MissingValueImputer
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import TimestampDeduplicator
+
+
+class SharedPreProcessorImpl(IPreProcessData):
+    """
+    Algorithm-independent preprocessor for a universe of tickers. Bars whose timestamp is not
+    newer than the latest processed one are dropped and missing prices are imputed, by default
+    forward filled from the latest known price. Outliers are left to the algorithms, which flag
+    them differently.
+    """
+
+    def __init__(self,
+                 tickers: List[str],
+                 max_history: Optional[int] = None,
+                 missing_policy: str = "ffill",
+                 max_gap: Optional[int] = None,
+                 duplicate_policy: str = "reject"):
+        """
+        Initialize the shared preprocessor.
+
+        :param tickers: List of ticker symbols of the whole universe
+        :param max_history: Optional integer representing the maximum number of rows of history to
+                            keep. None keeps the whole history
+        :param missing_policy: String. How missing prices are imputed, see MissingValueImputer
+        :param max_gap: Optional integer representing the number of consecutive missing prices
+                        that are imputed. None imputes every gap
+        :param duplicate_policy: String. How repeated timestamps are handled, "reject" or "merge",
+                                 see TimestampDeduplicator
+        """
+
+        self.tickers = tickers
+        super().__init__(max_history,
+                         MissingValueImputer(len(tickers), missing_policy, max_gap),
+                         TimestampDeduplicator(duplicate_policy, reject_late=True))
+
+    @cached_property
+    def history_columns(self) -> List[str]:
+        """
+        Price columns of the universe, in ticker order.
+        """
+
+        return ticker_registry().column_names(self.tickers, "price")
+
+    def missing_values(self):
+        self._impute_missing_values(self.history_columns)
+
+    def remove_duplicate_timestamps(self):
+        self._remove_duplicate_timestamps()
+
+    def remove_outliers(self):
+        pass
+
+    def process_data(self, current_data: DataFrame, cleaned: bool = False) -> DataFrame:
+        self.__processed_data__ = current_data[self.history_columns]
+
+        # Repeated bars are dropped before they can fill the gaps of the bars that are kept
+        self.remove_duplicate_timestamps()
+        self.missing_values()
+        self.update_history()
+
+        return self.__processed_data__
+
+    def process_bar(self,
+                    timestamp: Any,
+                    prices: np.ndarray,
+                    cleaned: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Clean a single bar.
+
+        :param timestamp: Timestamp of the bar, preferably a numpy.datetime64
+        :param prices: 1-D NumPy array with one price per ticker, in ticker order
+        :param cleaned: Boolean. True when the bar was already cleaned, which only records it
+
+        :returns: Dictionary with the cleaned "price" array, or an empty dictionary when the
+                  timestamp was already processed or every ticker is stale and the bar is dropped
+        """
+
+        prices = self._clean_bar(timestamp, prices, cleaned, self.history_columns)
+        if prices is None:
+            return {}
+
+        self.append_history_row(timestamp, self.history_columns, prices)
+
+        return {"price": prices}
@@ -3,12 +3,52 @@ Before running the Simple Moving Average Algorithm, we must prepare the data for
 This file contains the logic behind preprocessing data specifically for Simple Moving Average.
 """
 
-from typing import List
+from functools import cached_property, partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-import pandas as pd
+import numpy as np
+from pandas import DataFrame, concat
 
 from uwqsc_algorithmic_trading.interfaces.preprocessing.preprocessor_interface \
     import IPreProcessData
+from uwqsc_algorithmic_trading.src.common.history_buffer import HistoryBuffer
+from uwqsc_algorithmic_trading.src.common.indicator_cache import (
+    IndicatorCache,
+    data_version,
+    shared_indicator_cache
+)
+from uwqsc_algorithmic_trading.src.common.missing_value_imputer import MissingValueImputer
+from uwqsc_algorithmic_trading.src.common.outlier_filter import (
+    OUTLIER_PERSISTENCE,
+    OutlierFilter
+)
+from uwqsc_algorithmic_trading.src.common.rolling_window import RollingWindow
+from uwqsc_algorithmic_trading.src.common.ticker_registry import ticker_registry
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import TimestampDeduplicator
+
+
+def trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the last `window` valid values at every row of a 2-D array, computed for all columns
+    at once with cumulative sums. Rows before the window fills use every value seen so far, and NaN
+    values are skipped.
+
+    :param values: 2-D NumPy array of shape (bars, tickers)
+    :param window: Integer representing the window length in bars
+
+    :returns: 2-D NumPy array of the same shape with the trailing means
+    """
+
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+
+    if window < len(values):
+        sums[window:] -= sums[:-window].copy()
+        counts[window:] -= counts[:-window].copy()
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
 
 
 class SMAPreProcessorImpl(IPreProcessData):
@@ -16,74 +56,244 @@ class SMAPreProcessorImpl(IPreProcessData):
     Data preprocessor for the Simple Moving Average algorithm.
     """
 
+    # The indicator cache is shared by every preprocessor of the process
+    TRANSIENT_STATE = ("indicator_cache",)
+
     def __init__(self,
                  tickers: List[str],
                  short_window: int = 50,
-                 long_window: int = 200):
+                 long_window: int = 200,
+                 max_history: Optional[int] = None,
+                 indicator_cache: Optional[IndicatorCache] = None,
+                 outlier_method: str = "zscore",
+                 outlier_policy: str = "ignore",
+                 outlier_persistence: int = OUTLIER_PERSISTENCE,
+                 missing_policy: str = "ffill",
+                 max_gap: Optional[int] = None):
         """
         Initialize the SMA preprocessor.
 
         :param tickers: List of ticker symbols
         :param short_window: Integer representing a Short-term moving average window in days
         :param long_window: Integer representing a Long-term moving average window in days
+        :param max_history: Optional integer representing the maximum number of rows of history to
+                            keep. None keeps the whole history
+        :param indicator_cache: Optional IndicatorCache consulted before computing moving averages.
+                                Defaults to the process-wide shared cache
+        :param outlier_method: String. "zscore" scores prices against the rolling mean and standard
+                               deviation, "mad" against the rolling median and median absolute
+                               deviation
+        :param outlier_policy: String. What happens to outliers: "ignore" keeps them in the data
+                               but out of the averages, "drop" replaces them by NaN and drops rows
+                               without any price left, "clip" winsorizes them and "ffill" replaces
+                               them by the latest accepted price
+        :param outlier_persistence: Integer representing the number of bars in a row a price is
+                                    flagged before it is taken as a new level and enters the
+                                    averages again, see OutlierFilter
+        :param missing_policy: String. How missing prices are imputed, see MissingValueImputer
+        :param max_gap: Optional integer representing the number of consecutive missing prices
+                        that are imputed. None imputes every gap
         """
 
         self.tickers = tickers
+        self.indicator_cache = (
+            shared_indicator_cache() if indicator_cache is None else indicator_cache
+        )
         self.short_window = short_window
         self.long_window = long_window
-        super().__init__()
+        self.__outlier_state__ = OutlierFilter(len(tickers),
+                                               method=outlier_method,
+                                               policy=outlier_policy,
+                                               persistence=outlier_persistence)
+        self.__short_state__: Optional[RollingWindow] = None
+        self.__long_state__: Optional[RollingWindow] = None
+        self.__outlier_flags__: Optional[np.ndarray] = None
+        self.__rolling_rows__: int = 0
+        super().__init__(max_history,
+                         MissingValueImputer(len(tickers), missing_policy, max_gap),
+                         TimestampDeduplicator())
 
-    def missing_values(self):
-        pass
+    def _price_columns(self) -> List[str]:
+        """
+        Names of the price columns of the tickers.
+        """
 
-    def remove_duplicate_timestamps(self):
-        pass
+        return ticker_registry().column_names(self.tickers, "price")
 
-    def remove_outliers(self, rolling_window=20):
-        length_of_history: int = 0
+    @cached_property
+    def average_columns(self) -> List[str]:
+        """
+        Short and long moving average columns, alternating for every ticker.
+        """
 
-        if self.__data_history__ is not None:
-            length_of_history = len(self.__data_history__)
+        registry = ticker_registry()
+        columns = zip(registry.column_names(self.tickers, "short"),
+                      registry.column_names(self.tickers, "long"))
 
-        rolling_window = min(rolling_window, length_of_history)
+        return [column for pair in columns for column in pair]
 
-        if self.__data_history__ is not None and self.__processed_data__ is not None:
-            for ticker in self.tickers:
-                price_col = f"{ticker}_price"
+    def missing_values(self):
+        self._impute_missing_values(self._price_columns())
 
-                rolling_mean = self.__data_history__[price_col].rolling(rolling_window).mean()
-                rolling_std = self.__data_history__[price_col].rolling(rolling_window).std()
+    def remove_duplicate_timestamps(self):
+        self._remove_duplicate_timestamps()
 
-                z_scores = (self.__data_history__[price_col] - rolling_mean) / rolling_std
-                mask = abs(z_scores) > 3
+    def remove_outliers(self, rolling_window=20):
+        self.sync_rolling_state(rolling_window)
 
-                self.__data_history__ = self.__data_history__[~mask]
+        columns = self._price_columns()
+        prices = self.__processed_data__[columns].to_numpy(dtype=np.float64)
+        cleaned, flags = self.__outlier_state__.filter_rows(prices)
+        self._count_outliers(flags)
+
+        if self.__outlier_state__.policy == "ignore":
+            self.__outlier_flags__ = flags
+        elif flags.any():
+            keep = ~np.isnan(cleaned).all(axis=1) | np.isnan(prices).all(axis=1)
+            self.__processed_data__ = self.__processed_data__.assign(
+                **dict(zip(columns, cleaned.T))
+            )[keep]
 
         self.generate_short_long_window()
 
     def generate_short_long_window(self) -> None:
         """
         Simple Moving Average uses short and long-term average windows for calculation.
-        We calculate them here for each stock.
+        We calculate them here for each stock, updating the rolling windows with every new bar.
+        Values flagged by remove_outliers are kept out of the averages.
         """
 
-        length_of_history: int = 0
+        self.sync_rolling_state()
 
-        if self.__data_history__ is not None:
-            length_of_history = len(self.__data_history__)
+        prices = self.__processed_data__[self._price_columns()].to_numpy(dtype=np.float64)
+        flags = self.__outlier_flags__
+        short = np.empty(prices.shape)
+        long = np.empty(prices.shape)
 
-        current_short_window = min(self.short_window, length_of_history)
-        current_long_window = min(self.long_window, length_of_history)
+        for row, values in enumerate(prices):
+            accept = None if flags is None else ~flags[row]
+            short[row], long[row] = self._push_windows(values, accept)
 
-        for ticker in self.tickers:
-            price_col = f"{ticker}_price"
+        self.__outlier_flags__ = None
+        self.__rolling_rows__ += len(prices)
 
-            history = pd.concat([self.__data_history__, self.__processed_data__])
+        averages = np.empty((len(prices), 2 * len(self.tickers)))
+        averages[:, 0::2] = short
+        averages[:, 1::2] = long
+        columns = self.average_columns
 
-            self.__processed_data__[f"{ticker}_short"] = (
-                history[price_col].iloc[-current_short_window:].mean()
-            )
+        self.__processed_data__ = concat([
+            self.__processed_data__.drop(columns=columns, errors="ignore"),
+            DataFrame(averages, index=self.__processed_data__.index, columns=columns)
+        ], axis=1)
+
+    def process_bar(self,
+                    timestamp: Any,
+                    prices: np.ndarray,
+                    cleaned: bool = False) -> Dict[str, np.ndarray]:
+        prices = self._clean_bar(timestamp, prices, cleaned, self._price_columns())
+        if prices is None:
+            return {}
+
+        self.sync_rolling_state()
+
+        prices, flags = self.__outlier_state__.filter(prices)
+        self._count_outliers(flags)
+        accept = ~flags if self.__outlier_state__.policy == "ignore" else None
+        short, long = self._push_windows(prices, accept)
+        self.__rolling_rows__ += 1
+
+        width = len(self.tickers)
+        row = np.empty(3 * width)
+        row[:width] = prices
+        row[width::2] = short
+        row[width + 1::2] = long
+        self.append_history_row(timestamp, self.history_columns, row)
+
+        return {"price": prices, "short": short, "long": long}
+
+    @cached_property
+    def history_columns(self) -> List[str]:
+        """
+        Columns of a bar appended to the history by process_bar, in the order of process_data.
+        """
+
+        return self._price_columns() + self.average_columns
+
+    def _push_windows(self,
+                      values: np.ndarray,
+                      accept: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Push one bar into the short and long windows and return their means.
+        """
+
+        self.__short_state__.push(values, accept)
+        self.__long_state__.push(values, accept)
+
+        return self.__short_state__.mean(), self.__long_state__.mean()
+
+    def sync_rolling_state(self, rolling_window: Optional[int] = None) -> None:
+        """
+        Make sure the rolling windows describe the current history. The windows are rebuilt from
+        the tail of the history when they do not exist yet, when the history was replaced or
+        changed outside process_data, or when a different outlier window is requested.
+
+        :param rolling_window: Optional integer representing the outlier window
+        """
+
+        history = self.__data_history__
+        length_of_history = 0 if history is None else len(history)
+        if isinstance(history, HistoryBuffer):
+            length_of_history = history.appended_rows
+        outlier_window = rolling_window or self.__outlier_state__.window
+
+        if (self.__short_state__ is not None
+                and length_of_history == self.__rolling_rows__
+                and outlier_window == self.__outlier_state__.window):
+            return
+
+        width = len(self.tickers)
+        self.__outlier_state__.reset(outlier_window)
+        self.__short_state__ = RollingWindow(width, self.short_window)
+        self.__long_state__ = RollingWindow(width, self.long_window)
+        self.__rolling_rows__ = length_of_history
+
+        if length_of_history:
+            tail = max(outlier_window, self.short_window, self.long_window)
+            prices = history.tail(tail)[self._price_columns()].to_numpy(dtype=np.float64)
+
+            for state in (self.__outlier_state__, self.__short_state__, self.__long_state__):
+                state.seed(prices)
+
+    def generate_vectorized_short_long_window(
+            self,
+            prices: np.ndarray,
+            versions: Optional[Sequence[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized counterpart of generate_short_long_window, used by backtests that process a full
+        price history at once. Averages are looked up in the indicator cache first, so strategies
+        sharing tickers and windows compute them only once.
+
+        :param prices: 2-D NumPy array of shape (bars, tickers), one column per ticker
+        :param versions: Optional sequence with the data version of every column, e.g. the
+                         version of the PricePanel the prices come from. Computed from the prices
+                         when not given
+
+        :returns: Tuple with the short and long moving averages, each shaped like prices.
+        """
+
+        if versions is None:
+            versions = [data_version(prices[:, column]) for column in range(prices.shape[1])]
 
-            self.__processed_data__[f"{ticker}_long"] = (
-                history[price_col].iloc[-current_long_window:].mean()
+        return tuple(
+            self.indicator_cache.columns(
+                prices,
+                self.tickers,
+                "sma",
+                (window,),
+                partial(trailing_mean, window=window),
+                versions
             )
+            for window in (self.short_window, self.long_window)
+        )
@@ -5,8 +5,15 @@ Testing the Hidden Markov Model Algorithm
 import unittest
 from unittest.mock import MagicMock
 
+import numpy as np
+import pandas as pd
+
 from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import StockPosition
-from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import HiddenMarkovModelImpl
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl,
+    regime_positions,
+    regime_signals
+)
 from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import HMMPreProcessorImpl
 
 
@@ -28,3 +35,156 @@ class HiddenMarkovModelImplTest(unittest.TestCase):
         # Initialize positions to HOLD
         self.algorithm.__positions__ = {ticker: StockPosition.HOLD for ticker in self.tickers}
         self.algorithm.__trade_count__ = 0
+
+        rng = np.random.default_rng(5)
+        drift = np.repeat([0.004, -0.004, 0.004], 100)
+        returns = drift[:, None] + 0.004 * rng.standard_normal((300, 2))
+        self.prices = 100 * np.exp(np.cumsum(returns, axis=0))
+
+    def test_regime_positions_and_signals(self):
+        """
+        Testing that regimes map to positions and that trades happen on regime changes only
+        """
+
+        positions = regime_positions(np.array([[0], [1], [2], [2], [0]]), 3)
+        signals = regime_signals(positions)
+
+        self.assertEqual(positions[:, 0].tolist(), [-1, 0, 1, 1, -1])
+        self.assertEqual(signals[:, 0].tolist(), [-1, 0, 1, 0, -1])
+
+    def test_generate_vectorized_signals_follow_regimes(self):
+        """
+        Testing that the vectorized signals hold long in rising regimes and short in falling ones
+        """
+
+        algorithm = HiddenMarkovModelImpl(self.tickers, {"position_size": 0.1, "n_states": 2})
+        algorithm.fit(self.prices)
+        signals = algorithm.generate_vectorized_signals(self.prices)
+
+        positions = pd.DataFrame(signals).replace(0, np.nan).ffill().to_numpy()
+
+        self.assertGreater(np.mean(positions[:100] == StockPosition.LONG.value), 0.8)
+        self.assertGreater(np.mean(positions[100:200] == StockPosition.SHORT.value), 0.8)
+        self.assertGreater(np.mean(positions[200:] == StockPosition.LONG.value), 0.8)
+
+    def test_unfitted_vectorized_signals_do_not_look_ahead(self):
+        """
+        Testing that without fit, the vectorized signals hold over the training bars and then
+        trade like live bars, without fitting the algorithm's model on the backtested prices
+        """
+
+        parameters = {"position_size": 0.1, "n_states": 2, "training_bars": 150}
+        signals = HiddenMarkovModelImpl(self.tickers, parameters) \
+            .generate_vectorized_signals(self.prices)
+        live = HiddenMarkovModelImpl(self.tickers, parameters)
+        timestamps = pd.date_range(start='2024-01-01', periods=len(self.prices), freq='D')
+        costs = np.array([
+            live.on_bar(10000, self.prices[row], timestamp)
+            for row, timestamp in enumerate(timestamps.to_numpy())
+        ])
+
+        self.assertFalse(signals[:150].any())
+        self.assertTrue(signals[150:].any())
+        np.testing.assert_allclose(costs, 1000 * signals)
+
+        algorithm = HiddenMarkovModelImpl(self.tickers, parameters)
+        self.assertFalse(algorithm.generate_vectorized_signals(self.prices[:100]).any())
+        algorithm.generate_vectorized_signals(self.prices)
+        self.assertFalse(algorithm.__filter__.model.fitted)
+
+    def test_generate_signals_match_vectorized_signals(self):
+        """
+        Testing that the bar by bar signals equal the vectorized signals of a fitted model
+        """
+
+        self.algorithm.fit(self.prices)
+        expected = self.algorithm.generate_vectorized_signals(self.prices)
+        index = pd.date_range(start='2024-01-01', periods=len(self.prices), freq='D')
+        frame = pd.DataFrame(self.prices, index=index,
+                             columns=[f"{ticker}_price" for ticker in self.tickers])
+
+        for row in range(0, len(frame), 37):
+            for step in range(row, min(row + 37, len(frame))):
+                current = self.algorithm.prepare_data(frame.iloc[step:step + 1])
+                self.algorithm.generate_signals(current)
+                actual = [self.algorithm.__positions__[ticker].value for ticker in self.tickers]
+                self.assertEqual(actual, expected[step].tolist())
+
+    def test_calculate_position_size(self):
+        """
+        Testing that the position size follows the position of the ticker
+        """
+
+        self.algorithm.__positions__["AAPL"] = StockPosition.SHORT
+        self.algorithm.__positions__["GOOGL"] = StockPosition.HOLD
+
+        self.assertEqual(self.algorithm.calculate_position_size("AAPL", 100, 10000), -10)
+        self.assertEqual(self.algorithm.calculate_position_size("GOOGL", 100, 10000), 0)
+
+    def test_on_bar_matches_vectorized_signals(self):
+        """
+        Testing that streaming bars through on_bar trades like the vectorized signals of a
+        fitted model
+        """
+
+        self.algorithm.fit(self.prices)
+        expected = self.algorithm.generate_vectorized_signals(self.prices)
+        timestamps = pd.date_range(start='2024-01-01', periods=len(self.prices), freq='D')
+
+        for row, timestamp in enumerate(timestamps.to_numpy()):
+            costs = self.algorithm.on_bar(10000, self.prices[row], timestamp)
+
+            self.assertTrue(np.allclose(costs, 1000 * expected[row]))
+
+        returns = self.algorithm.__data_processor__.return_history()
+        self.assertEqual(returns.shape, self.prices.shape)
+        self.assertTrue(np.allclose(returns[1:], np.diff(np.log(self.prices), axis=0)))
+
+    def test_execute_trade_replaying_a_batch(self):
+        """
+        Testing that replaying a batch already processed places no trade
+        """
+
+        self.algorithm.fit(self.prices)
+        index = pd.date_range(start='2024-01-01', periods=len(self.prices), freq='D')
+        frame = pd.DataFrame(self.prices, index=index,
+                             columns=[f"{ticker}_price" for ticker in self.tickers])
+        self.algorithm.execute_trade(10000, frame)
+        trades = self.algorithm.__trade_count__
+
+        portfolio = self.algorithm.execute_trade(10000, frame.iloc[-1:])
+
+        self.assertEqual(portfolio, {ticker: 0.0 for ticker in self.tickers})
+        self.assertEqual(self.algorithm.__trade_count__, trades)
+
+    def test_generate_signals_without_observations(self):
+        """
+        Testing that a fitted model holds every ticker and keeps its regimes when every row was
+        dropped
+        """
+
+        self.algorithm.fit(self.prices)
+        self.algorithm.__regimes__ = np.array([1, -1], dtype=np.int8)
+        columns = [f"{ticker}_return" for ticker in self.tickers]
+
+        self.algorithm.generate_signals(pd.DataFrame(columns=columns, dtype=np.float64))
+
+        self.assertEqual(self.algorithm.__regimes__.tolist(), [1, -1])
+        for ticker in self.tickers:
+            self.assertEqual(self.algorithm.__positions__[ticker], StockPosition.HOLD)
+
+    def test_vectorized_position_size_matches_position_size(self):
+        """
+        Testing that the vectorized position sizes equal the position sizes of every position
+        """
+
+        prices = np.array([150.0, 1700.0])
+        for position in StockPosition:
+            self.algorithm.set_positions(np.full(len(self.tickers), position.value, dtype=np.int8))
+            expected = [self.algorithm.calculate_position_size(ticker, price, 10000)
+                        for ticker, price in zip(self.tickers, prices)]
+            actual = self.algorithm.calculate_vectorized_position_size(
+                np.full((1, len(self.tickers)), position.value), prices[None, :], 10000
+            )[0]
+
+            self.assertEqual(actual.tolist(), expected)
@@ -0,0 +1,35 @@
+"""
+Testing the Position Sizing
+"""
+
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import StockPosition
+from uwqsc_algorithmic_trading.src.algorithms.position_sizing import (
+    fixed_fraction_size,
+    fixed_fraction_sizes
+)
+
+
+class PositionSizingTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Position Sizing
+    """
+
+    def test_vectorized_sizes_match_single_sizes(self):
+        """
+        Testing that positions are a fraction of the portfolio value, signed by the position, and
+        that the vectorized sizes match the sizes of single tickers, missing prices included
+        """
+
+        positions = [StockPosition.LONG, StockPosition.SHORT, StockPosition.HOLD,
+                     StockPosition.HOLD]
+        prices = np.array([50.0, 200.0, 100.0, np.nan])
+        sizes = fixed_fraction_sizes(np.array([[position.value for position in positions]]),
+                                     prices[None, :], 10000, 0.1)[0]
+
+        self.assertEqual(sizes.tolist(), [20.0, -5.0, 0.0, 0.0])
+        for position, price, size in zip(positions[:3], prices[:3], sizes[:3]):
+            self.assertEqual(fixed_fraction_size(position, price, 10000, 0.1), size)
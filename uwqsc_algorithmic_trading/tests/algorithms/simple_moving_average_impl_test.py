@@ -10,7 +10,8 @@ import pandas as pd
 
 from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import StockPosition
 from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
-    SimpleMovingAverageImpl
+    SimpleMovingAverageImpl,
+    crossover_signals
 )
 
 
@@ -67,6 +68,23 @@ class SimpleMovingAverageImplTest(unittest.TestCase):
         self.assertEqual(self.algorithm.__positions__["AAPL"], StockPosition.LONG)
         self.assertEqual(self.algorithm.__positions__["GOOGL"], StockPosition.SHORT)
 
+    def test_positions_are_an_array_viewed_by_ticker(self):
+        """
+        Testing that positions are kept in an int8 array which reads and writes like a dictionary
+        of StockPosition by ticker
+        """
+
+        self.algorithm.set_positions(np.array([1, -1], dtype=np.int8))
+        self.assertEqual(dict(self.algorithm.__positions__),
+                         {"AAPL": StockPosition.LONG, "GOOGL": StockPosition.SHORT})
+
+        self.algorithm.__positions__["GOOGL"] = StockPosition.HOLD
+        np.testing.assert_array_equal(self.algorithm.__positions__.array, [1, 0])
+        self.assertEqual(self.algorithm.__positions__.array.dtype, np.int8)
+
+        with self.assertRaises(KeyError):
+            self.algorithm.__positions__["TSLA"] = StockPosition.LONG
+
     def test_calculate_position_size_with_hold(self):
         """
         Testing that the position size is calculated correctly.
@@ -174,3 +192,79 @@ class SimpleMovingAverageImplTest(unittest.TestCase):
 
         self.assertTrue(ticker in portfolio for ticker in self.tickers)
         self.assertTrue(isinstance(portfolio[ticker], int) for ticker in self.tickers)
+
+    def test_on_bar_matches_process_data(self):
+        """
+        Testing that streaming bars through on_bar keeps the same history as processing one-row
+        DataFrames, and trades on the crossovers of its moving averages
+        """
+
+        capital = 10000
+        rng = np.random.default_rng(3)
+        prices = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal((200, 2)), axis=0))
+        index = pd.date_range(start='2024-01-01', periods=len(prices), freq='D')
+        frame = pd.DataFrame(prices, index=index,
+                             columns=[f"{ticker}_price" for ticker in self.tickers])
+        reference = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        costs = np.empty(prices.shape)
+
+        for row, timestamp in enumerate(index.to_numpy()):
+            costs[row] = self.algorithm.on_bar(capital, prices[row], timestamp)
+            reference.prepare_data(frame.iloc[row:row + 1])
+
+        history = self.algorithm.__data_processor__.__data_history__.to_frame()
+        expected = reference.__data_processor__.__data_history__.to_frame()
+        pd.testing.assert_frame_equal(history, expected[history.columns],
+                                      check_freq=False, check_names=False)
+
+        signals = crossover_signals(history[["AAPL_short", "GOOGL_short"]].to_numpy(),
+                                    history[["AAPL_long", "GOOGL_long"]].to_numpy())
+        self.assertTrue(np.allclose(costs, signals * self.parameters["position_size"] * capital))
+        self.assertEqual(self.algorithm.__trade_count__, np.count_nonzero(signals))
+
+    def test_on_bar_falls_back_to_execute_trade(self):
+        """
+        Testing that on_bar feeds one-row DataFrames to execute_trade without the streaming hooks
+        """
+
+        self.algorithm.__data_processor__.supports_bars = lambda: False
+        timestamp = np.datetime64('2024-01-01')
+
+        costs = self.algorithm.on_bar(10000, np.array([150.0, 1700.0]), timestamp)
+
+        history = self.algorithm.__data_processor__.__data_history__
+        self.assertEqual(costs.shape, (2,))
+        self.assertEqual(list(history.to_frame().index), [pd.Timestamp(timestamp)])
+
+    def test_execute_trade_replaying_a_batch(self):
+        """
+        Testing that replaying a batch already processed places no trade
+        """
+
+        index = pd.date_range(start='2024-01-01', periods=3, freq='D')
+        current_data = pd.DataFrame(index=index, data={
+            "AAPL_price": [150.0, 151.0, 152.0], "GOOGL_price": [1700.0, 1701.0, 1702.0]
+        })
+        self.algorithm.execute_trade(10000, current_data)
+        trades = self.algorithm.__trade_count__
+
+        portfolio = self.algorithm.execute_trade(10000, current_data.iloc[-1:])
+
+        self.assertEqual(portfolio, {ticker: 0.0 for ticker in self.tickers})
+        self.assertEqual(self.algorithm.__trade_count__, trades)
+
+    def test_vectorized_position_size_matches_position_size(self):
+        """
+        Testing that the vectorized position sizes equal the position sizes of every position
+        """
+
+        prices = np.array([150.0, 1700.0])
+        for position in StockPosition:
+            self.algorithm.set_positions(np.full(len(self.tickers), position.value, dtype=np.int8))
+            expected = [self.algorithm.calculate_position_size(ticker, price, 10000)
+                        for ticker, price in zip(self.tickers, prices)]
+            actual = self.algorithm.calculate_vectorized_position_size(
+                np.full((1, len(self.tickers)), position.value), prices[None, :], 10000
+            )[0]
+
+            self.assertEqual(actual.tolist(), expected)
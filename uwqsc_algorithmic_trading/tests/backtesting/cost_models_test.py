@@ -0,0 +1,65 @@
+"""
+Testing the Cost Models
+"""
+
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.backtesting.cost_models import (
+    FixedRateBorrow,
+    FixedSlippage,
+    PerShareCommission,
+    ProportionalCommission,
+    ProportionalSlippage
+)
+
+
+class CostModelsTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Cost Models
+    """
+
+    def setUp(self):
+        self.prices = np.array([100.0, 50.0, 20.0])
+        self.quantities = np.array([10.0, -4.0, 0.0])
+
+    def test_slippage_moves_fills_against_the_order(self):
+        """
+        Testing that buys fill above the price, sells below it and missing orders at the price
+        """
+
+        np.testing.assert_allclose(
+            ProportionalSlippage(0.01).fill_prices(self.prices, self.quantities),
+            [101.0, 49.5, 20.0]
+        )
+        np.testing.assert_allclose(
+            FixedSlippage(0.05).fill_prices(self.prices, self.quantities),
+            [100.05, 49.95, 20.0]
+        )
+
+    def test_commissions_respect_minimum_and_cap(self):
+        """
+        Testing that commissions are only charged on fills, with their minimum and their cap
+        """
+
+        np.testing.assert_allclose(
+            ProportionalCommission(0.001, minimum=0.5).commissions(self.prices, self.quantities),
+            [1.0, 0.5, 0.0]
+        )
+        np.testing.assert_allclose(
+            PerShareCommission(0.5, minimum=1.0, maximum_rate=0.004).commissions(
+                self.prices, self.quantities
+            ),
+            [4.0, 0.8, 0.0]
+        )
+
+    def test_borrow_accrues_per_ticker_rates(self):
+        """
+        Testing that borrow fees scale with the short value, the period and the ticker's rate
+        """
+
+        borrow = FixedRateBorrow([0.01, 0.2, 0.01])
+
+        np.testing.assert_allclose(borrow.borrow_costs(np.array([0.0, 200.0, 0.0]), 0.5),
+                                   [0.0, 20.0, 0.0])
@@ -0,0 +1,152 @@
+"""
+Testing the Execution Simulator
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface import IAlgorithm
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.cost_models import (
+    FixedRateBorrow,
+    ProportionalCommission,
+    ProportionalSlippage
+)
+from uwqsc_algorithmic_trading.src.backtesting.execution_simulator import (
+    NANOSECONDS_PER_YEAR,
+    ExecutionCosts,
+    ExecutionSimulator
+)
+from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import HMMPreProcessorImpl
+
+
+class IdleAlgorithm(IAlgorithm):
+    """
+    Minimal algorithm that never trades, leaving the orders to submit_order.
+    """
+
+    def __init__(self, tickers):
+        super().__init__("Idle", tickers, HMMPreProcessorImpl(tickers))
+
+    def generate_signals(self, current_data: pd.DataFrame):
+        pass
+
+    def calculate_position_size(self, ticker: str, price: float, portfolio_value: float) -> float:
+        return 0.0
+
+
+class ExecutionSimulatorTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Execution Simulator
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL"]
+        self.parameters = {"position_size": 0.1, "short_window": 5, "long_window": 20}
+        rng = np.random.default_rng(4)
+        returns = 0.01 * rng.standard_normal((200, 2))
+        index = pd.date_range(start='2024-01-01', periods=200, freq='D')
+        self.data = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                                 columns=["AAPL_price", "GOOGL_price"])
+
+    def _simulate(self, costs=None, latency=1):
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        return ExecutionSimulator(algorithm, 10000, costs, latency).run(self.data), algorithm
+
+    def test_orders_fill_on_a_later_bar(self):
+        """
+        Testing that the orders of every bar fill latency bars later at that bar's prices
+        """
+
+        reference = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        prices = self.data.to_numpy()
+        orders = np.array([
+            reference.on_bar(10000, row, timestamp) / row
+            for timestamp, row in zip(self.data.index.to_numpy(), prices)
+        ])
+
+        for latency in (1, 3):
+            result, _ = self._simulate(latency=latency)
+            fills = np.zeros_like(orders)
+            fills[latency:] = orders[:-latency]
+
+            np.testing.assert_allclose(result.fills, fills)
+            np.testing.assert_allclose(result.holdings, np.cumsum(fills, axis=0))
+            np.testing.assert_allclose(
+                result.capital,
+                10000 - np.cumsum((fills * prices).sum(axis=1))
+                + (np.cumsum(fills, axis=0) * prices).sum(axis=1)
+            )
+            self.assertTrue(result.index.equals(self.data.index))
+
+    def test_costs_are_charged_on_top_of_the_same_orders(self):
+        """
+        Testing that slippage, commissions and borrow fees lower the capital by exactly their sum
+        """
+
+        free, _ = self._simulate()
+        costs = ExecutionCosts(ProportionalSlippage(0.001), ProportionalCommission(0.002),
+                               FixedRateBorrow(0.05))
+        charged, algorithm = self._simulate(costs)
+
+        np.testing.assert_allclose(charged.fills, free.fills)
+        total = (charged.slippage + charged.commissions + charged.borrow).sum(axis=1)
+        np.testing.assert_allclose(free.capital - charged.capital, np.cumsum(total))
+
+        filled = charged.fills != 0
+        np.testing.assert_allclose(charged.commissions[filled],
+                                   0.002 * np.abs(charged.fills * charged.fill_prices)[filled])
+        self.assertTrue(np.all(charged.slippage[filled] > 0))
+        self.assertEqual(algorithm.metrics["trade_count"], int(np.count_nonzero(filled)))
+        self.assertAlmostEqual(algorithm.metrics["commissions"], charged.commissions.sum())
+
+    def test_short_positions_pay_borrow_fees(self):
+        """
+        Testing that a short position pays its annual rate for the days it is held
+        """
+
+        simulator = ExecutionSimulator(IdleAlgorithm(self.tickers), 10000,
+                                       ExecutionCosts(borrow=FixedRateBorrow(0.1)))
+        simulator.submit_order(self.data.index[0], [-10.0, 0.0])
+        result = simulator.run(self.data.iloc[:10])
+
+        prices = self.data["AAPL_price"].to_numpy()
+        day = 86400e9 / NANOSECONDS_PER_YEAR
+        np.testing.assert_allclose(result.borrow[2:, 0], 0.1 * 10 * prices[2:10] * day)
+        self.assertTrue(np.all(result.borrow[:2] == 0))
+        self.assertEqual(result.holdings[-1].tolist(), [-10.0, 0.0])
+
+    def test_orders_without_a_price_are_rejected(self):
+        """
+        Testing that an order due on a bar without a price for its ticker is rejected
+        """
+
+        data = self.data.iloc[:5].copy()
+        data.iloc[1, 0] = np.nan
+        simulator = ExecutionSimulator(IdleAlgorithm(self.tickers), 10000)
+        simulator.submit_order(data.index[0], [5.0, 2.0])
+        result = simulator.run(data)
+
+        self.assertEqual(simulator.ledger.rejected_orders, 1)
+        self.assertEqual(result.fills[1].tolist(), [0.0, 2.0])
+        self.assertTrue(np.isnan(result.fill_prices[1, 0]))
+
+    def test_streamed_bars_are_handled_in_time_order(self):
+        """
+        Testing that bars scheduled out of order are handled by timestamp
+        """
+
+        simulator = ExecutionSimulator(IdleAlgorithm(self.tickers), 10000)
+        for timestamp, row in reversed(list(zip(self.data.index[:5], self.data.to_numpy()))):
+            simulator.schedule_bar(timestamp, row)
+
+        self.assertEqual(simulator.process_events(), 5)
+        result = simulator.ledger.result(self.tickers)
+        self.assertTrue(result.index.equals(self.data.index[:5]))
+
+        with self.assertRaises(ValueError):
+            ExecutionSimulator(IdleAlgorithm(self.tickers), 10000, latency=0)
@@ -0,0 +1,98 @@
+"""
+Testing the parallel Parameter Sweep
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.parameter_sweep import (
+    ParameterSweep,
+    parameter_grid,
+    split_by_short_window
+)
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import VectorizedBacktest
+
+
+class ParameterSweepTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Parameter Sweep
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL"]
+        self.capital = 10000
+
+        index = pd.date_range(start='2023-01-01', periods=300, freq='D')
+        cycle = np.sin(np.linspace(0, 12 * np.pi, 300))
+        noise = np.random.default_rng(11).normal(0, 1, size=(300, 2))
+        self.prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 150 + 20 * cycle + noise[:, 0],
+            "GOOGL_price": 1750 - 100 * cycle + noise[:, 1]
+        })
+        self.grid = {
+            "short_window": [5, 10, 40],
+            "long_window": [20, 40],
+            "position_size": [0.1, 0.2]
+        }
+
+    def test_parameter_grid_skips_invalid_windows(self):
+        """
+        Testing that the grid is expanded without short windows at least as long as long windows
+        """
+
+        points = parameter_grid(self.grid)
+
+        self.assertEqual(len(points), 8)
+        self.assertTrue(all(point["short_window"] < point["long_window"] for point in points))
+
+    def test_sweep_matches_individual_backtests(self):
+        """
+        Testing that every row of the sweep matches a backtest of the same parameters
+        """
+
+        results = ParameterSweep(self.prices, self.capital, max_workers=2).run(self.grid)
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue({"total_return", "sharpe", "sortino", "max_drawdown", "turnover",
+                         "hit_rate", "trade_count"} <= set(results.columns))
+
+        for _, row in results.iterrows():
+            parameters = {
+                "short_window": int(row["short_window"]),
+                "long_window": int(row["long_window"]),
+                "position_size": row["position_size"]
+            }
+            algorithm = SimpleMovingAverageImpl(self.tickers, parameters)
+            expected = VectorizedBacktest(algorithm).run(self.prices, self.capital)
+
+            self.assertAlmostEqual(
+                row["total_return"],
+                expected.capital[-1] / expected.capital[0] - 1
+            )
+            self.assertEqual(row["trade_count"], expected.trade_count)
+
+    def test_points_are_spread_over_the_workers(self):
+        """
+        Testing that a grid with a single short window is split into several tasks sorted by short
+        window, and that grids without windows are rejected before any work is started
+        """
+
+        grid = {"short_window": [5], "long_window": range(10, 50), "position_size": [0.1, 0.2]}
+        tasks = split_by_short_window(parameter_grid(grid), 8)
+
+        self.assertEqual(len(tasks), 8)
+        self.assertEqual(sum(len(task) for task in tasks), 80)
+        self.assertTrue(all(len(task) == 10 for task in tasks))
+
+        mixed = split_by_short_window(parameter_grid(self.grid)[::-1], 3)
+        windows = [point["short_window"] for task in mixed for point in task]
+        self.assertEqual(windows, sorted(windows))
+
+        with self.assertRaises(ValueError):
+            ParameterSweep(self.prices, self.capital).run({"short_window": [5],
+                                                           "position_size": [0.1]})
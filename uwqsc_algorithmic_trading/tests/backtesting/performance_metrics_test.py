@@ -0,0 +1,112 @@
+"""
+Testing the Performance Metrics
+"""
+
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import (
+    BARS_PER_YEAR,
+    IncrementalMetrics,
+    max_drawdown,
+    performance_metrics,
+    rolling_metrics
+)
+
+
+class PerformanceMetricsTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Performance Metrics
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        self.capital = 10000 * np.exp(np.cumsum(0.01 * rng.standard_normal((400, 3)), axis=0))
+        self.traded = np.abs(rng.normal(0, 500, size=(400, 3)))
+
+    def _reference(self, capital, traded):
+        """
+        Metrics of one curve computed with plain loops.
+        """
+
+        returns = [(capital[row] - capital[row - 1]) / capital[row - 1]
+                   for row in range(1, len(capital))]
+        losses = [min(change, 0.0) for change in returns]
+        peak, drawdown = capital[0], 0.0
+        for value in capital:
+            peak = max(peak, value)
+            drawdown = max(drawdown, 1 - value / peak)
+
+        return {
+            "total_return": capital[-1] / capital[0] - 1,
+            "volatility": np.sqrt(BARS_PER_YEAR) * np.std(returns),
+            "sharpe": np.sqrt(BARS_PER_YEAR) * np.mean(returns) / np.std(returns),
+            "sortino": np.sqrt(BARS_PER_YEAR) * np.mean(returns) / np.sqrt(np.mean(
+                np.square(losses))),
+            "max_drawdown": drawdown,
+            "turnover": np.mean([traded[row] / capital[row - 1]
+                                 for row in range(1, len(capital))]),
+            "hit_rate": np.mean([change > 0 for change in returns]),
+        }
+
+    def test_metrics_match_a_loop(self):
+        """
+        Testing that the vectorized metrics of many curves match a per-row loop over each curve
+        """
+
+        metrics = performance_metrics(self.capital, self.traded)
+
+        for run in range(3):
+            expected = self._reference(self.capital[:, run], self.traded[:, run])
+            for name, value in expected.items():
+                self.assertAlmostEqual(metrics[name][run], value, msg=name)
+
+        single = performance_metrics(self.capital[:, 0], self.traded[:, 0])
+        self.assertIsInstance(single["sharpe"], float)
+        self.assertAlmostEqual(single["sharpe"], metrics["sharpe"][0])
+
+    def test_degenerate_curves(self):
+        """
+        Testing that flat and single row curves give zero ratios instead of failing
+        """
+
+        for capital in (np.full(10, 100.0), np.array([100.0]), np.array([100.0, 101.0, 102.01])):
+            metrics = performance_metrics(capital)
+            self.assertEqual(metrics["sharpe"], 0.0)
+            self.assertEqual(metrics["max_drawdown"], 0.0)
+
+        self.assertAlmostEqual(max_drawdown(np.array([100.0, 50.0, 200.0, 150.0])), 0.5)
+        with self.assertRaises(ValueError):
+            performance_metrics(np.array([]))
+
+    def test_rolling_metrics_match_windows(self):
+        """
+        Testing that every rolling value equals the metrics of its window
+        """
+
+        window = 30
+        rolling = rolling_metrics(self.capital, window, self.traded)
+
+        self.assertEqual(rolling["sharpe"].shape, self.capital.shape)
+        self.assertTrue(np.isnan(rolling["sharpe"][:window]).all())
+
+        for row in (window, 120, len(self.capital) - 1):
+            expected = performance_metrics(self.capital[row - window:row + 1],
+                                           self.traded[row - window:row + 1])
+            for name, values in expected.items():
+                np.testing.assert_allclose(rolling[name][row], values, err_msg=name)
+
+    def test_incremental_metrics_match_batch(self):
+        """
+        Testing that updating row by row ends with the metrics of the whole curve
+        """
+
+        tracker = IncrementalMetrics()
+        for capital, traded in zip(self.capital[:, 1], self.traded[:, 1]):
+            tracker.update(capital, traded)
+
+        expected = performance_metrics(self.capital[:, 1], self.traded[:, 1])
+        for name, value in tracker.snapshot().items():
+            self.assertAlmostEqual(value, expected[name], msg=name)
+        self.assertEqual(tracker.bars, len(self.capital))
@@ -0,0 +1,162 @@
+"""
+Testing the Portfolio Runner
+"""
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface \
+    import IAlgorithm, StockPosition
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl
+)
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.performance_metrics import performance_metrics
+from uwqsc_algorithmic_trading.src.backtesting.portfolio_runner import PortfolioRunner
+from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import HMMPreProcessorImpl
+
+
+class AlwaysLongAlgorithm(IAlgorithm):
+    """
+    Minimal algorithm without streaming hooks, buying one share of every ticker on every bar.
+    """
+
+    def __init__(self, tickers):
+        super().__init__("Always Long", tickers, HMMPreProcessorImpl(tickers))
+
+    def generate_signals(self, current_data: pd.DataFrame):
+        for ticker in self.tickers:
+            self.__positions__[ticker] = StockPosition.LONG
+
+    def calculate_position_size(self, ticker: str, price: float, portfolio_value: float) -> float:
+        return 1.0
+
+
+class PortfolioRunnerTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Portfolio Runner
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        returns = 0.01 * rng.standard_normal((120, 3))
+        index = pd.date_range(start='2024-01-01', periods=120, freq='D')
+        self.data = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                                 columns=["AAPL_price", "GOOGL_price", "MSFT_price"])
+
+    def _algorithms(self):
+        return [
+            SimpleMovingAverageImpl(["AAPL", "GOOGL"], {"position_size": 0.1, "short_window": 5,
+                                                        "long_window": 20}),
+            HiddenMarkovModelImpl(["GOOGL", "MSFT"], {"position_size": 0.1, "n_states": 2,
+                                                      "training_bars": 60}),
+            AlwaysLongAlgorithm(["MSFT"]),
+        ]
+
+    def test_portfolio_trades_like_separate_algorithms(self):
+        """
+        Testing that every algorithm trades as if it were run on its own with its allocation
+        """
+
+        runner = PortfolioRunner(self._algorithms(), 30000, weights=[2, 1, 0])
+        alone = self._algorithms()
+        allocations = [20000, 10000, 0]
+
+        for timestamp, row in zip(self.data.index.to_numpy(), self.data.to_numpy()):
+            costs = runner.on_bar(row, timestamp)
+
+            for algorithm, allocation, cost in zip(alone, allocations, costs):
+                columns = [f"{ticker}_price" for ticker in algorithm.tickers]
+                bar = self.data.loc[timestamp, columns].to_numpy()
+                expected = algorithm.on_bar(allocation, bar, timestamp)
+                self.assertTrue(np.allclose(cost, expected))
+
+        self.assertEqual(runner.tickers, ["AAPL", "GOOGL", "MSFT"])
+        self.assertEqual(len(runner.data_processor.__data_history__), len(self.data))
+        self.assertEqual(runner.holdings[2].tolist(), [len(self.data)])
+
+    def test_run_fills_algorithm_metrics(self):
+        """
+        Testing that the metrics updated bar by bar match those of the final capital curves
+        """
+
+        algorithms = self._algorithms()
+        runner = PortfolioRunner(algorithms, 30000)
+        frame = runner.run(self.data)
+        table = runner.metrics()
+
+        for algorithm in algorithms:
+            expected = performance_metrics(frame[algorithm.name].to_numpy())
+            for name in ("total_return", "sharpe", "sortino", "max_drawdown", "hit_rate"):
+                self.assertAlmostEqual(algorithm.metrics[name], expected[name], msg=name)
+            self.assertEqual(table.loc[algorithm.name, "sharpe"], algorithm.metrics["sharpe"])
+
+    def test_concurrent_dispatch_matches_sequential_dispatch(self):
+        """
+        Testing that dispatching bars to a thread pool gives the same portfolio
+        """
+
+        sequential = PortfolioRunner(self._algorithms(), 30000).run(self.data)
+        runner = PortfolioRunner(self._algorithms(), 30000, max_workers=3)
+        concurrent = runner.run(self.data)
+        runner.close()
+
+        pd.testing.assert_frame_equal(sequential, concurrent)
+        self.assertEqual(list(concurrent.columns),
+                         ["Simple Moving Average", "Hidden Markov Model", "Always Long", "capital"])
+        self.assertAlmostEqual(concurrent["capital"].iloc[0], 30000)
+        self.assertAlmostEqual(concurrent["Always Long"].iloc[-1] - 10000,
+                               (self.data["MSFT_price"].iloc[-1] - self.data["MSFT_price"]).sum())
+
+    def test_bars_are_cleaned_once(self):
+        """
+        Testing that repeated timestamps are dropped and missing prices are filled before the
+        algorithms see the bar
+        """
+
+        algorithm = AlwaysLongAlgorithm(["AAPL"])
+        runner = PortfolioRunner([algorithm], 1000)
+        timestamps = self.data.index.to_numpy()
+
+        runner.on_bar(np.array([10.0]), timestamps[0])
+        self.assertIsNone(runner.on_bar(np.array([11.0]), timestamps[0]))
+        costs = runner.on_bar(np.array([np.nan]), timestamps[1])
+
+        self.assertEqual(costs[0].tolist(), [10.0])
+        self.assertEqual(algorithm.__data_processor__.__data_history__["AAPL_price"].tolist(),
+                         [10.0, 10.0])
+
+    def test_streaming_algorithms_skip_the_shared_cleaning_steps(self):
+        """
+        Testing that algorithms with streaming hooks neither de-duplicate nor impute the bars the
+        shared preprocessor already cleaned
+        """
+
+        algorithms = self._algorithms()[:2]
+        runner = PortfolioRunner(algorithms, 20000)
+        processors = [algorithm.__data_processor__ for algorithm in algorithms]
+
+        with patch.object(processors[0], "_accept_bar") as accept_sma, \
+                patch.object(processors[0], "_impute_bar") as impute_sma, \
+                patch.object(processors[1], "_accept_bar") as accept_hmm, \
+                patch.object(processors[1], "_impute_bar") as impute_hmm:
+            runner.run(self.data.iloc[:30])
+
+        for step in (accept_sma, impute_sma, accept_hmm, impute_hmm):
+            step.assert_not_called()
+        for processor in processors:
+            self.assertEqual(len(processor.__data_history__), 30)
+
+    def test_invalid_weights_are_rejected(self):
+        """
+        Testing that weights must be non-negative, one per algorithm and not all zero
+        """
+
+        for weights in ([1], [1, -1, 1], [0, 0, 0]):
+            with self.assertRaises(ValueError):
+                PortfolioRunner(self._algorithms(), 1000, weights=weights)
@@ -0,0 +1,96 @@
+"""
+Testing the Sharded Runner
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl
+)
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.sharded_runner import ShardedRunner
+
+
+class ShardedRunnerTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Sharded Runner
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL", "MSFT", "AMZN", "NVDA", "META", "TSLA"]
+        self.parameters = {"position_size": 0.1, "short_window": 5, "long_window": 20,
+                           "n_states": 2, "training_bars": 60}
+
+        rng = np.random.default_rng(17)
+        returns = 0.01 * rng.standard_normal((150, len(self.tickers)))
+        index = pd.date_range(start='2024-01-01', periods=150, freq='D')
+        self.data = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                                 columns=[f"{ticker}_price" for ticker in self.tickers])
+
+    def _single(self, algorithm_type, start, stop, algorithm=None):
+        algorithm = algorithm or algorithm_type(self.tickers, self.parameters)
+        costs = np.array([
+            algorithm.on_bar(10000, self.data.to_numpy()[row], self.data.index[row].to_datetime64())
+            for row in range(start, stop)
+        ])
+        return algorithm, costs
+
+    def test_shards_trade_like_one_algorithm(self):
+        """
+        Testing that the costs gathered from the shards are those of one algorithm running the
+        whole universe, and that the portfolio view books them
+        """
+
+        for algorithm_type in (SimpleMovingAverageImpl, HiddenMarkovModelImpl):
+            _, expected = self._single(algorithm_type, 0, len(self.data))
+
+            with ShardedRunner(algorithm_type, self.tickers, self.parameters, 10000, shards=2,
+                               groups_per_shard=2, rebalance_interval=None) as runner:
+                self.assertEqual(sorted(runner.assignment.tolist()), [0, 0, 1, 1])
+                head = np.array([
+                    runner.on_bar(self.data.to_numpy()[row], self.data.index[row].to_datetime64())
+                    for row in range(10)
+                ])
+                frame = runner.run(self.data.iloc[10:], batch_bars=32)
+
+                np.testing.assert_allclose(head, expected[:10])
+                self.assertEqual(runner.stats.bars, len(self.data))
+                self.assertEqual(runner.stats.batches, 15)
+                self.assertEqual(len(frame), len(self.data) - 10)
+                self.assertAlmostEqual(frame["capital"].iloc[-1], runner.values())
+                self.assertAlmostEqual(runner.cash,
+                                       10000 - np.nansum(expected), places=6)
+
+    def test_rebalance_moves_groups_with_their_state(self):
+        """
+        Testing that rebalancing moves groups off the busiest shard, and that moved groups keep
+        trading as if they had never moved
+        """
+
+        algorithm, _ = self._single(SimpleMovingAverageImpl, 0, 80)
+        _, expected = self._single(SimpleMovingAverageImpl, 80, len(self.data), algorithm)
+
+        with ShardedRunner(SimpleMovingAverageImpl, self.tickers, self.parameters, 10000,
+                           shards=3, groups_per_shard=2, rebalance_interval=None) as runner:
+            runner.run(self.data.iloc[:80])
+
+            before = runner.assignment.copy()
+            load = np.where(before == 0, 1.0, 0.01)
+            self.assertGreater(runner.rebalance(load), 0)
+
+            shard_load = np.bincount(runner.assignment, weights=load, minlength=3)
+            self.assertLess(shard_load.max(), np.bincount(before, weights=load).max())
+            self.assertEqual(runner.stats.migrations, np.count_nonzero(runner.assignment != before))
+
+            costs = runner.on_bars(self.data.index[80:].to_numpy(), self.data.to_numpy()[80:])
+            np.testing.assert_allclose(costs, expected)
+
+            # Groups of equal load are spread evenly, after which they stay where they are
+            runner.rebalance(np.ones(len(runner.groups)))
+            self.assertEqual(np.bincount(runner.assignment).tolist(), [2, 2, 2])
+            self.assertEqual(runner.rebalance(np.ones(len(runner.groups))), 0)
@@ -0,0 +1,188 @@
+"""
+Testing the Vectorized Backtest engine
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.interfaces.algorithms.algorithm_interface \
+    import IAlgorithm, StockPosition
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import (
+    VectorizedBacktest,
+    forward_fill,
+    price_matrix
+)
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import SMAPreProcessorImpl
+
+
+class AlwaysLongAlgorithm(IAlgorithm):
+    """
+    Minimal algorithm without vectorized hooks, buying one share of every ticker on every bar.
+    """
+
+    def __init__(self, tickers):
+        super().__init__("Always Long", tickers, SMAPreProcessorImpl(tickers))
+
+    def generate_signals(self, current_data: pd.DataFrame):
+        for ticker in self.tickers:
+            self.__positions__[ticker] = StockPosition.LONG
+
+    def calculate_position_size(self, ticker: str, price: float, portfolio_value: float) -> float:
+        return 1.0
+
+
+class VectorizedBacktestTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Vectorized Backtest engine
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL"]
+        self.parameters = {"position_size": 0.1}
+        self.capital = 10000
+
+        index = pd.date_range(start='2023-01-01', periods=300, freq='D')
+        cycle = np.sin(np.linspace(0, 12 * np.pi, 300))
+        noise = np.random.default_rng(7).normal(0, 1, size=(300, 2))
+        self.prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 150 + 20 * cycle + noise[:, 0],
+            "GOOGL_price": 1750 - 100 * cycle + noise[:, 1]
+        })
+
+    def test_price_matrix_orders_columns_like_tickers(self):
+        """
+        Testing that the price panel is converted into a matrix ordered like the tickers
+        """
+
+        values, index = price_matrix(self.prices[["GOOGL_price", "AAPL_price"]], self.tickers)
+
+        self.assertEqual(values.shape, (300, 2))
+        self.assertTrue(np.array_equal(values[:, 0], self.prices["AAPL_price"].to_numpy()))
+        self.assertTrue(index.equals(self.prices.index))
+
+        with self.assertRaises(ValueError):
+            price_matrix(np.zeros((10, 3)), self.tickers)
+
+    def test_forward_fill(self):
+        """
+        Testing that NaN values are forward filled and leading NaN values are kept
+        """
+
+        values = np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, np.nan], [4.0, 5.0]])
+        filled = forward_fill(values)
+
+        self.assertTrue(np.isnan(filled[0, 0]))
+        self.assertEqual(filled[:, 0].tolist()[1:], [2.0, 2.0, 4.0])
+        self.assertEqual(filled[:, 1].tolist(), [1.0, 1.0, 1.0, 5.0])
+
+    def test_sma_uses_vectorized_signals(self):
+        """
+        Testing that the SMA algorithm is backtested through its vectorized hooks, and that the
+        accounting identities hold
+        """
+
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        self.assertTrue(algorithm.supports_vectorized_signals())
+
+        result = VectorizedBacktest(algorithm, commission_rate=0.001).run(self.prices, self.capital)
+        values = self.prices[["AAPL_price", "GOOGL_price"]].to_numpy()
+
+        expected_cash = self.capital - np.cumsum(
+            result.trades.sum(axis=1) + result.fees.sum(axis=1)
+        )
+        expected_capital = expected_cash + (result.holdings * values).sum(axis=1)
+
+        self.assertTrue(np.allclose(result.cash, expected_cash))
+        self.assertTrue(np.allclose(result.capital, expected_capital))
+        self.assertTrue(np.allclose(result.fees, np.abs(result.trades) * 0.001))
+        self.assertEqual(result.trade_count, algorithm.__trade_count__)
+        self.assertGreater(result.trade_count, 0)
+
+        for trade in np.abs(result.trades[result.trades != 0]):
+            self.assertAlmostEqual(trade, self.parameters["position_size"] * self.capital)
+
+    def test_sma_vectorized_signals_match_per_bar_crossovers(self):
+        """
+        Testing that the vectorized SMA signals follow the same crossover rules as generate_signals
+        """
+
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        values = self.prices[["AAPL_price", "GOOGL_price"]].to_numpy()
+        signals = algorithm.generate_vectorized_signals(values)
+        short, long = algorithm.__data_processor__.generate_vectorized_short_long_window(values)
+
+        self.assertTrue(np.all(signals[0] == StockPosition.HOLD.value))
+
+        for row in range(1, len(values)):
+            for column in range(len(self.tickers)):
+                was_above = short[row - 1, column] > long[row - 1, column]
+                is_above = short[row, column] > long[row, column]
+
+                expected = StockPosition.HOLD.value
+                if not was_above and is_above:
+                    expected = StockPosition.LONG.value
+                elif was_above and not is_above:
+                    expected = StockPosition.SHORT.value
+
+                self.assertEqual(signals[row, column], expected)
+
+    def test_per_bar_fallback(self):
+        """
+        Testing that algorithms without vectorized hooks are replayed through execute_trade
+        """
+
+        algorithm = AlwaysLongAlgorithm(self.tickers)
+        self.assertFalse(algorithm.supports_vectorized_signals())
+
+        prices = self.prices.iloc[:20]
+        result = VectorizedBacktest(algorithm).run(prices, self.capital)
+        values = prices[["AAPL_price", "GOOGL_price"]].to_numpy()
+
+        self.assertTrue(np.allclose(result.holdings[-1], [20, 20]))
+        self.assertTrue(np.allclose(result.trades, values))
+        self.assertEqual(result.trade_count, 40)
+        self.assertEqual(algorithm.__trade_count__, 40)
+        self.assertTrue(np.allclose(
+            result.capital[-1],
+            self.capital - values.sum() + 20 * values[-1].sum()
+        ))
+        self.assertEqual(list(result.to_frame().columns), ["capital", "cash", "fees"])
+
+    def test_backtest_over_price_panel(self):
+        """
+        Testing that a memory-mapped price panel gives the same backtest as a DataFrame
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            panel = PricePanel.from_frame(directory, self.prices)
+
+            from_panel = VectorizedBacktest(
+                SimpleMovingAverageImpl(self.tickers, self.parameters)
+            ).run(panel, self.capital)
+            from_frame = VectorizedBacktest(
+                SimpleMovingAverageImpl(self.tickers, self.parameters)
+            ).run(self.prices, self.capital)
+
+            self.assertTrue(np.allclose(from_panel.capital, from_frame.capital))
+            self.assertTrue(from_panel.index.equals(self.prices.index))
+
+    def test_backtest_fills_algorithm_metrics(self):
+        """
+        Testing that a backtest stores the metrics of its capital curve in the algorithm
+        """
+
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        result = VectorizedBacktest(algorithm).run(self.prices, self.capital)
+
+        self.assertEqual(algorithm.metrics, result.metrics())
+        self.assertEqual(algorithm.metrics["trade_count"], result.trade_count)
+        self.assertAlmostEqual(algorithm.metrics["total_return"],
+                               result.capital[-1] / result.capital[0] - 1)
+        self.assertGreater(algorithm.metrics["turnover"], 0.0)
@@ -0,0 +1,130 @@
+"""
+Testing the Walk-Forward Optimizer
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl
+)
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.parameter_sweep import parameter_grid
+from uwqsc_algorithmic_trading.src.backtesting.vectorized_backtest import VectorizedBacktest
+from uwqsc_algorithmic_trading.src.backtesting.walk_forward import (
+    Fold,
+    WalkForwardOptimizer,
+    walk_forward_folds
+)
+
+
+class WalkForwardTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Walk-Forward Optimizer
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL"]
+        self.capital = 10000
+
+        index = pd.date_range(start='2023-01-01', periods=400, freq='D')
+        cycle = np.sin(np.linspace(0, 16 * np.pi, 400))
+        noise = np.random.default_rng(13).normal(0, 1, size=(400, 2))
+        self.prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 150 + 20 * cycle + noise[:, 0],
+            "GOOGL_price": 1750 - 100 * cycle + noise[:, 1]
+        })
+        self.grid = {
+            "short_window": [5, 10],
+            "long_window": [20, 40],
+            "position_size": [0.1]
+        }
+
+    def test_folds_roll_or_stay_anchored(self):
+        """
+        Testing that test windows follow each other, and that fit windows either keep their
+        length or start at the first bar
+        """
+
+        self.assertEqual(walk_forward_folds(10, 4, 3),
+                         [Fold(0, 4, 7), Fold(3, 7, 10)])
+        self.assertEqual(walk_forward_folds(11, 4, 3, anchored=True),
+                         [Fold(0, 4, 7), Fold(0, 7, 10), Fold(0, 10, 11)])
+        self.assertEqual(walk_forward_folds(4, 4, 3), [])
+
+        with self.assertRaises(ValueError):
+            walk_forward_folds(10, 0, 3)
+
+    def test_folds_trade_the_best_in_sample_parameters(self):
+        """
+        Testing that every fold trades the parameters with the best in-sample Sharpe ratio, and
+        that its out-of-sample metrics match a backtest of its test window
+        """
+
+        result = WalkForwardOptimizer(self.prices, self.capital, max_workers=2).run(
+            self.grid, fit_bars=150, test_bars=100
+        )
+        values = self.prices.to_numpy()
+
+        self.assertEqual(len(result.folds), 3)
+        self.assertEqual(len(result.capital), 250)
+        self.assertEqual(result.index[0], self.prices.index[150])
+
+        for fold, (_, row) in zip(walk_forward_folds(400, 150, 100), result.folds.iterrows()):
+            scores = []
+            for point in parameter_grid(self.grid):
+                algorithm = SimpleMovingAverageImpl(self.tickers, point)
+                signals = algorithm.generate_vectorized_signals(values)
+                VectorizedBacktest(algorithm).run_signals(
+                    values[fold.fit_start:fold.fit_stop],
+                    signals[fold.fit_start:fold.fit_stop], self.capital
+                )
+                scores.append((algorithm.metrics["sharpe"], point, signals))
+
+            sharpe, point, signals = max(scores, key=lambda score: score[0])
+            algorithm = SimpleMovingAverageImpl(self.tickers, point)
+            expected = VectorizedBacktest(algorithm).run_signals(
+                values[fold.fit_stop:fold.test_stop],
+                signals[fold.fit_stop:fold.test_stop], self.capital
+            )
+
+            self.assertEqual(row["short_window"], point["short_window"])
+            self.assertEqual(row["long_window"], point["long_window"])
+            self.assertAlmostEqual(row["in_sample_sharpe"], sharpe)
+            self.assertAlmostEqual(row["total_return"],
+                                   expected.capital[-1] / expected.capital[0] - 1)
+
+        returns = result.folds["total_return"].to_numpy()
+        self.assertAlmostEqual(result.metrics["total_return"], np.prod(1 + returns) - 1)
+
+    def test_models_are_fitted_on_every_fold(self):
+        """
+        Testing that algorithms with a fit method are fitted on each anchored fit window and
+        traded on the following test window
+        """
+
+        result = WalkForwardOptimizer(self.prices, self.capital, HiddenMarkovModelImpl,
+                                      max_workers=2).run(
+            {"n_states": [2, 3], "position_size": [0.1]}, fit_bars=200, test_bars=100,
+            anchored=True
+        )
+
+        self.assertEqual(len(result.folds), 2)
+        self.assertEqual(len(result.capital), 200)
+        self.assertTrue(set(result.folds["n_states"]) <= {2, 3})
+        self.assertTrue(np.isfinite(result.capital).all())
+        self.assertEqual(list(result.folds["fit_start"]), [self.prices.index[0]] * 2)
+
+    def test_empty_grids_are_rejected(self):
+        """
+        Testing that a grid without a valid combination is rejected before starting workers
+        """
+
+        with self.assertRaises(ValueError):
+            WalkForwardOptimizer(self.prices, self.capital).run(
+                {"short_window": [40], "long_window": [20]}, fit_bars=150, test_bars=100
+            )
@@ -0,0 +1,103 @@
+"""
+Testing the Benchmark Harness
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from dataclasses import replace
+
+from uwqsc_algorithmic_trading.src.benchmarks.benchmark_cases import select_cases
+from uwqsc_algorithmic_trading.src.benchmarks.benchmark_harness import (
+    BenchmarkCase,
+    find_regressions,
+    load_results,
+    run_case,
+    save_results
+)
+from uwqsc_algorithmic_trading.src.benchmarks.run_benchmarks import main
+from uwqsc_algorithmic_trading.src.benchmarks.synthetic_prices import synthetic_prices
+
+
+class BenchmarkHarnessTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Benchmark Harness
+    """
+
+    def setUp(self):
+        self.prices = synthetic_prices(3, 40, outlier_rate=0.05)
+
+    def test_synthetic_prices(self):
+        """
+        Testing that synthetic prices have one positive column per ticker and are reproducible
+        """
+
+        self.assertEqual(self.prices.shape, (40, 3))
+        self.assertEqual(list(self.prices.columns), ["T0000_price", "T0001_price", "T0002_price"])
+        self.assertTrue((self.prices.to_numpy() > 0).all())
+        self.assertTrue(self.prices.equals(synthetic_prices(3, 40, outlier_rate=0.05)))
+
+    def test_run_case_times_every_step(self):
+        """
+        Testing that a case runs once per bar and reports its measurements
+        """
+
+        calls = []
+        case = BenchmarkCase("append", lambda prices: calls.append)
+        result = run_case(case, self.prices)
+
+        self.assertEqual(calls, list(range(40)) * 2)
+        self.assertEqual((result.steps, result.n_tickers, result.n_bars), (40, 3, 40))
+        self.assertGreater(result.bars_per_second, 0)
+        self.assertLessEqual(result.latency_us["p50"], result.latency_us["p99"])
+        self.assertGreater(result.peak_memory_bytes, 0)
+
+    def test_every_case_runs(self):
+        """
+        Testing that every case of the suite runs on a small panel
+        """
+
+        for case in select_cases([]):
+            result = run_case(case, self.prices, measure_memory=False)
+            self.assertEqual(result.name, case.name)
+
+        self.assertEqual([case.name for case in select_cases(["hmm.fit"])], ["hmm.fit"])
+        with self.assertRaises(ValueError):
+            select_cases(["unknown"])
+
+    def test_regressions_against_baseline(self):
+        """
+        Testing that results are stored as JSON and that regressions beyond the threshold fail
+        """
+
+        result = run_case(BenchmarkCase("noop", lambda prices: lambda row: None), self.prices)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_results(path, [result])
+            baseline = load_results(path)
+
+        slower = replace(result, bars_per_second=result.bars_per_second / 2)
+        larger = replace(result, n_bars=80, bars_per_second=result.bars_per_second / 2)
+
+        self.assertEqual(find_regressions([result], baseline), [])
+        self.assertEqual(len(find_regressions([slower], baseline)), 1)
+        self.assertEqual(find_regressions([slower], baseline, threshold=1.5), [])
+        self.assertEqual(find_regressions([larger], baseline), [])
+
+    def test_command_line_fails_on_regression(self):
+        """
+        Testing that the command line stores a baseline and fails when a run regresses
+        """
+
+        with tempfile.TemporaryDirectory() as directory, redirect_stdout(io.StringIO()):
+            arguments = ["--tickers", "2", "--bars", "30", "--cases", "sma.on_bar",
+                         "--output", os.path.join(directory, "latest.json"),
+                         "--baseline", os.path.join(directory, "baseline.json"),
+                         "--skip-memory"]
+
+            self.assertEqual(main(arguments + ["--save-baseline"]), 0)
+            self.assertEqual(main(arguments + ["--threshold", "1000"]), 0)
+            self.assertEqual(main(arguments + ["--threshold", "-1"]), 1)
@@ -0,0 +1,130 @@
+"""
+Testing the command line entry point
+"""
+
+import asyncio
+import contextlib
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.cli import IMPORT_BUDGET_SECONDS, main, parse_parameters
+from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore
+from uwqsc_algorithmic_trading.src.ingestion.replay_server import ReplayServer
+
+TICKERS = ["AAPL", "MSFT"]
+
+
+def run_command(argv):
+    """
+    Run the command line, returning its exit status and output.
+    """
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        status = main(argv)
+
+    return status, output.getvalue()
+
+
+class CommandLineTest(unittest.TestCase):
+    """
+    This class is used to test each component of the command line entry point
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        returns = 0.01 * rng.standard_normal((250, len(TICKERS)))
+        self.prices = 100 * np.exp(np.cumsum(returns, axis=0))
+        self.index = pd.date_range(start="2024-01-01", periods=250, freq="D", name="Date")
+
+        self.directory = tempfile.mkdtemp()
+        store = MarketDataStore(self.directory)
+        for column, ticker in enumerate(TICKERS):
+            store.write(ticker, pd.DataFrame({"Close": self.prices[:, column]}, index=self.index))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_import_stays_within_budget(self):
+        """
+        Testing that importing the command line neither loads NumPy nor pandas, and takes less
+        than IMPORT_BUDGET_SECONDS
+        """
+
+        code = ("import sys, uwqsc_algorithmic_trading.src.cli; "
+                "print(sorted({'numpy', 'pandas'} & set(sys.modules)))")
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                   capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.strip(), "[]")
+
+        cumulative = [
+            int(line.split("|")[1]) for line in completed.stderr.splitlines()
+            if line.rstrip().endswith(" uwqsc_algorithmic_trading.src.cli")
+        ]
+        self.assertEqual(len(cumulative), 1)
+        self.assertLess(cumulative[0] / 1e6, IMPORT_BUDGET_SECONDS)
+
+    def test_backtest_reads_the_store(self):
+        """
+        Testing that the backtest subcommand runs an algorithm over the stored bars
+        """
+
+        status, output = run_command(["backtest", *TICKERS, "--data-dir", self.directory,
+                                      "--param", "short_window=5", "--param", "long_window=20",
+                                      "--param", "position_size=0.1"])
+
+        self.assertEqual(status, 0)
+        self.assertIn("Simple Moving Average on 250 bars", output)
+        self.assertIn("Final capital", output)
+
+        with self.assertRaises(SystemExit):
+            run_command(["backtest", "TSLA", "--data-dir", self.directory])
+
+    def test_sweep_prints_the_best_combinations(self):
+        """
+        Testing that the sweep subcommand backtests every valid combination
+        """
+
+        status, output = run_command(["sweep", *TICKERS, "--data-dir", self.directory,
+                                      "--short-windows", "5", "10", "--long-windows", "8", "20",
+                                      "--workers", "1"])
+
+        self.assertEqual(status, 0)
+        self.assertIn("sharpe", output)
+        self.assertEqual(len(output.strip().splitlines()), 4)
+
+    def test_live_runs_a_feed(self):
+        """
+        Testing that the live subcommand trades every bar of a TCP feed
+        """
+
+        async def replay():
+            async with ReplayServer(self.prices, self.index, TICKERS) as server:
+                return await asyncio.get_running_loop().run_in_executor(None, run_command, [
+                    "live", *TICKERS, "--port", str(server.port), "--param", "position_size=0.1"
+                ])
+
+        status, output = asyncio.run(replay())
+
+        self.assertEqual(status, 0)
+        self.assertIn("250 bars", output)
+
+    def test_parameters_are_typed(self):
+        """
+        Testing that parameters are read as numbers when possible, and that malformed ones fail
+        """
+
+        self.assertEqual(parse_parameters(["short_window=5", "position_size=0.1", "max_gap=x"]),
+                         {"short_window": 5, "position_size": 0.1, "max_gap": "x"})
+
+        with self.assertRaises(ValueError):
+            parse_parameters(["short_window"])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["backtest", "AAPL", "--param", "=5"])
@@ -0,0 +1,140 @@
+"""
+Testing the Checkpoints
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.hidden_markov_model_impl import (
+    HiddenMarkovModelImpl
+)
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.common.checkpoint import (
+    CheckpointWriter,
+    capture_state,
+    checkpoint,
+    load_checkpoint,
+    restore,
+    restore_state
+)
+from uwqsc_algorithmic_trading.src.common.rolling_window import RollingWindow
+
+
+class CheckpointTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Checkpoints
+    """
+
+    def setUp(self):
+        self.tickers = ["AAPL", "GOOGL", "MSFT"]
+        self.parameters = {"short_window": 5, "long_window": 20, "position_size": 0.1,
+                           "training_bars": 100}
+
+        rng = np.random.default_rng(3)
+        drift = np.repeat([0.01, -0.01, 0.01], 100)
+        self.prices = 100 * np.exp(np.cumsum(drift[:, None] + 0.005 * rng.standard_normal(
+            (300, 3)), axis=0))
+        self.timestamps = pd.date_range(start='2024-01-01', periods=300, freq='D').to_numpy()
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "algorithm.npz")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _stream(self, algorithm, start, stop):
+        return np.array([
+            algorithm.on_bar(10000, self.prices[row], self.timestamps[row])
+            for row in range(start, stop)
+        ])
+
+    def test_restored_algorithms_continue_where_they_stopped(self):
+        """
+        Testing that algorithms restored from a checkpoint place the trades of the algorithm they
+        were saved from, without replaying the bars before the checkpoint
+        """
+
+        for algorithm_type in (SimpleMovingAverageImpl, HiddenMarkovModelImpl):
+            algorithm = algorithm_type(self.tickers, self.parameters)
+            self._stream(algorithm, 0, 150)
+            checkpoint(algorithm, self.path)
+
+            restored = algorithm_type(self.tickers, self.parameters)
+            restore(restored, self.path)
+
+            np.testing.assert_allclose(self._stream(restored, 150, 300),
+                                       self._stream(algorithm, 150, 300))
+            self.assertEqual(restored.__positions__, algorithm.__positions__)
+            self.assertEqual(len(restored.__data_processor__.__data_history__),
+                             len(algorithm.__data_processor__.__data_history__))
+
+    def test_batch_state_is_restored(self):
+        """
+        Testing that the moving averages and positions kept between calls of execute_trade are
+        restored
+        """
+
+        frame = pd.DataFrame(self.prices, index=self.timestamps,
+                             columns=[f"{ticker}_price" for ticker in self.tickers])
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        for row in range(30):
+            algorithm.execute_trade(10000, frame.iloc[row:row + 1])
+        checkpoint(algorithm, self.path)
+
+        restored = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        restore(restored, self.path)
+
+        self.assertTrue(restored.executing)
+        np.testing.assert_array_equal(restored.__current_short__, algorithm.__current_short__)
+        for row in range(30, 60):
+            self.assertEqual(restored.execute_trade(10000, frame.iloc[row:row + 1]),
+                             algorithm.execute_trade(10000, frame.iloc[row:row + 1]))
+
+    def test_mismatched_checkpoints_are_rejected(self):
+        """
+        Testing that checkpoints of another class or schema are rejected, and that state which
+        cannot be saved raises instead of being dropped
+        """
+
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        arrays, manifest = capture_state(algorithm)
+
+        with self.assertRaises(ValueError):
+            restore_state(HiddenMarkovModelImpl(self.tickers, self.parameters), arrays, manifest)
+        with self.assertRaises(ValueError):
+            restore_state(algorithm, arrays, dict(manifest, schema=0))
+
+        window = RollingWindow(3, 5)
+        window.lock = threading.Lock()
+        with self.assertRaises(TypeError):
+            capture_state(window)
+
+    def test_writer_saves_in_the_background(self):
+        """
+        Testing that the writer checkpoints every interval bars and that the file holds the state
+        of the last checkpoint once closed
+        """
+
+        algorithm = SimpleMovingAverageImpl(self.tickers, self.parameters)
+        writer = CheckpointWriter(algorithm, self.path, interval=25)
+
+        for row in range(100):
+            algorithm.on_bar(10000, self.prices[row], self.timestamps[row])
+            writer.on_bar()
+        writer.close()
+
+        self.assertEqual(writer.submitted + writer.skipped, 4)
+        self.assertGreater(writer.submitted, 0)
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith(".tmp")])
+
+        arrays, manifest = load_checkpoint(self.path)
+        self.assertEqual(manifest["schema"], 1)
+        self.assertTrue(all(isinstance(value, np.ndarray) for value in arrays.values()))
@@ -2,10 +2,26 @@
 This python file tests the data collection module and the constants.
 """
 
-import unittest
+import json
 import os.path
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
 
-from uwqsc_algorithmic_trading.src.common.data_collection import setup_data
+from uwqsc_algorithmic_trading.src.common.data_collection import (
+    ConcurrentDownloader,
+    HttpCache,
+    missing_ranges,
+    parse_yahoo_chart,
+    setup_data
+)
+from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore
 from uwqsc_algorithmic_trading.src.common.config import SRC_DIR, COMMON_DIR, DATA_DIR, PROJECT_DIR
 
 
@@ -22,6 +38,23 @@ class DataCollectionTests(unittest.TestCase):
         setup_data()
         self.assertEqual(setup_data(), None)
 
+    def test_data_setup_uses_fetcher(self):
+        """
+        Testing that setup_data stores the bars returned by a pluggable fetcher
+        """
+
+        def fetcher(ticker, start, end):
+            index = pd.date_range(start=start, end=end, freq='D', name='Date')
+            return pd.DataFrame(index=index, data={"Close": float(len(ticker))})
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = MarketDataStore(directory)
+            setup_data(["AAPL", "GOOGL"], "2025-01-01", "2025-01-10", fetcher, store)
+
+            self.assertEqual(store.tickers(), ["AAPL", "GOOGL"])
+            self.assertEqual(len(store.read("GOOGL")), 10)
+            self.assertEqual(store.read("GOOGL")["Close"].iloc[0], 5.0)
+
     def test_config_global_constants(self):
         """
         Testing that the global constants store the right value
@@ -43,3 +76,251 @@ class DataCollectionTests(unittest.TestCase):
         self.assertEqual(common_dir, test_common_dir)
         self.assertEqual(data_dir, test_data_dir)
         self.assertEqual(project_dir, test_project_dir)
+
+
+class StubChartServer(ThreadingHTTPServer):
+    """
+    Local HTTP server answering like the Yahoo Finance chart API, with one bar per day whose
+    close is the number of days since the epoch.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, failures: int = 0):
+        super().__init__(("127.0.0.1", 0), StubChartHandler)
+        self.failures = failures
+        self.requests = []
+        self.connections = 0
+        self.not_modified = 0
+        self.etag_header = "ETag"
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/chart/{{ticker}}" \
+                   "?period1={start}&period2={end}"
+
+
+class StubChartHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of StubChartServer.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Answer a chart request, failing with 503 while the server has failures left.
+        """
+
+        query = parse_qs(urlsplit(self.path).query)
+        query = {name: int(values[0]) for name, values in query.items()}
+        etag = f'"{query["period1"]}-{query["period2"]}"'
+
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            failing = self.server.failures > 0
+            self.server.failures -= failing
+            not_modified = self.headers.get("If-None-Match") == etag
+            self.server.not_modified += not_modified
+
+        if failing:
+            self._answer(503, b"busy", {"Retry-After": "0"})
+        elif not_modified:
+            self._answer(304, b"", {self.server.etag_header: etag})
+        else:
+            days = list(range(-(-query["period1"] // 86400), -(-query["period2"] // 86400)))
+            closes = [float(day) for day in days]
+            body = {"chart": {"error": None, "result": [{
+                "timestamp": [day * 86400 + 14 * 3600 for day in days],
+                "indicators": {
+                    "quote": [{"open": closes, "high": closes, "low": closes, "close": closes,
+                               "volume": [1000] * len(days)}],
+                    "adjclose": [{"adjclose": closes}]
+                }
+            }]}}
+            self._answer(200, json.dumps(body).encode("utf-8"), {self.server.etag_header: etag})
+
+    def log_message(self, *_):
+        pass
+
+    def _answer(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ConcurrentDownloaderTests(unittest.TestCase):
+    """
+    This class is used to test each component of the ConcurrentDownloader, against a local stub
+    of the chart API.
+    """
+
+    def setUp(self):
+        self.server = StubChartServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.directory = tempfile.mkdtemp()
+        self.store = MarketDataStore(os.path.join(self.directory, "store"))
+        self.cache = HttpCache(os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def downloader(self, **options):
+        """
+        Downloader reading from the stub server into the temporary store.
+        """
+
+        options = {"max_workers": 4, "requests_per_second": 1000.0, "backoff": 0.0, **options}
+        return ConcurrentDownloader(self.store, self.server.url, cache=self.cache, **options)
+
+    def test_download_writes_every_ticker(self):
+        """
+        Testing that the bars of every ticker are downloaded concurrently into the store
+        """
+
+        tickers = [f"T{number}" for number in range(12)]
+        summary = self.downloader().download(tickers, "2024-01-01", "2024-01-31")
+
+        self.assertEqual(summary.errors, {})
+        self.assertEqual(summary.bars, {ticker: 31 for ticker in tickers})
+        self.assertEqual(self.store.tickers(), sorted(tickers))
+
+        bars = self.store.read("T7")
+        self.assertEqual(bars.index[0], pd.Timestamp("2024-01-01"))
+        self.assertEqual(bars["Close"].iloc[-1], pd.Timestamp("2024-01-31").value // 86400e9)
+
+    def test_connections_are_reused(self):
+        """
+        Testing that each worker keeps its connection open between requests
+        """
+
+        tickers = [f"T{number}" for number in range(20)]
+        self.downloader(max_workers=2).download(tickers, "2024-01-01", "2024-01-05")
+
+        self.assertEqual(len(self.server.requests), 20)
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_failed_requests_are_retried(self):
+        """
+        Testing that 503 answers are retried, and that a ticker failing every retry is reported
+        without stopping the others
+        """
+
+        self.server.failures = 2
+        summary = self.downloader(max_workers=1).download(["AAPL"], "2024-01-01", "2024-01-05")
+        self.assertEqual(summary.bars, {"AAPL": 5})
+        self.assertEqual(summary.requests, 3)
+
+        self.server.failures = 3
+        summary = self.downloader(max_workers=1, retries=2).download(["MSFT", "GOOGL"],
+                                                                     "2024-01-01", "2024-01-05")
+        self.assertIn("MSFT", summary.errors)
+        self.assertEqual(summary.bars, {"GOOGL": 5})
+        with self.assertRaises(RuntimeError):
+            summary.raise_for_errors()
+
+    def test_connection_errors_raise_after_the_last_retry(self):
+        """
+        Testing that a connection failing on every attempt is retried, then reported with the
+        error of the last attempt
+        """
+
+        with socket.socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            url = f"http://127.0.0.1:{closed.getsockname()[1]}/chart/{{ticker}}" \
+                  "?period1={start}&period2={end}"
+
+        downloader = ConcurrentDownloader(self.store, url, max_workers=1, retries=2, backoff=0.0)
+        summary = downloader.download(["AAPL"], "2024-01-01", "2024-01-05")
+
+        self.assertEqual(summary.requests, 3)
+        self.assertIn("AAPL", summary.errors)
+        self.assertEqual(summary.bars, {})
+
+    def test_rerun_only_fetches_missing_ranges(self):
+        """
+        Testing that a rerun downloads nothing already stored, and only the dates missing at
+        either end of the stored range
+        """
+
+        downloader = self.downloader()
+        downloader.download(["AAPL"], "2024-02-01", "2024-02-10")
+        self.assertEqual(downloader.download(["AAPL"], "2024-02-01", "2024-02-10").requests, 0)
+
+        summary = downloader.download(["AAPL"], "2024-01-25", "2024-02-15")
+        self.assertEqual(summary.bars, {"AAPL": 12})
+        self.assertEqual(summary.requests, 2)
+
+        bars = self.store.read("AAPL")
+        self.assertEqual(len(bars), 22)
+        self.assertTrue(bars.index.is_monotonic_increasing)
+
+    def test_cached_responses_are_reused(self):
+        """
+        Testing that past ranges are served from the cache, and that ranges reaching today are
+        revalidated with their ETag
+        """
+
+        self.downloader().download(["AAPL"], "2024-01-01", "2024-01-05")
+        self.store = MarketDataStore(os.path.join(self.directory, "other"))
+
+        summary = self.downloader().download(["AAPL"], "2024-01-01", "2024-01-05")
+        self.assertEqual((summary.requests, summary.cache_hits), (0, 1))
+        self.assertEqual(len(self.store.read("AAPL")), 5)
+
+        today = pd.Timestamp.today().normalize()
+        downloader = self.downloader()
+        downloader("MSFT", today - pd.Timedelta(days=3), today)
+        bars = downloader("MSFT", today - pd.Timedelta(days=3), today)
+        downloader.close()
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertEqual(len(bars), 4)
+
+    def test_validators_are_read_whatever_their_case(self):
+        """
+        Testing that responses are revalidated when the server sends its ETag header in lowercase
+        """
+
+        self.server.etag_header = "etag"
+        today = pd.Timestamp.today().normalize()
+        downloader = self.downloader()
+        downloader("MSFT", today - pd.Timedelta(days=3), today)
+        downloader("MSFT", today - pd.Timedelta(days=3), today)
+        downloader.close()
+
+        self.assertEqual(self.server.not_modified, 1)
+
+    def test_missing_ranges(self):
+        """
+        Testing that the missing ranges cover both ends of the stored range
+        """
+
+        stored = (pd.Timestamp("2024-01-10"), pd.Timestamp("2024-01-20"))
+
+        self.assertEqual(missing_ranges(stored, "2024-01-12", "2024-01-18"), [])
+        self.assertEqual(missing_ranges(stored, "2024-01-01", "2024-01-25"),
+                         [(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-09")),
+                          (pd.Timestamp("2024-01-21"), pd.Timestamp("2024-01-25"))])
+        self.assertEqual(missing_ranges(stored, None, "2024-01-22"),
+                         [(pd.Timestamp("2024-01-21"), pd.Timestamp("2024-01-22"))])
+        self.assertEqual(missing_ranges(None, None, "1970-01-02"),
+                         [(pd.Timestamp(0), pd.Timestamp("1970-01-02"))])
+
+    def test_chart_errors_raise(self):
+        """
+        Testing that an error returned by the chart API raises a ValueError
+        """
+
+        with self.assertRaises(ValueError):
+            parse_yahoo_chart(b'{"chart": {"error": {"code": "Not Found"}, "result": null}}')
+
+        empty = parse_yahoo_chart(b'{"chart": {"error": null, "result": [{"indicators": {}}]}}')
+        self.assertTrue(empty.empty)
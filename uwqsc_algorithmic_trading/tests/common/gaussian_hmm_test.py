@@ -0,0 +1,115 @@
+"""
+Testing the Gaussian Hidden Markov Model
+"""
+
+import itertools
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.gaussian_hmm import GaussianHMM
+
+
+class GaussianHMMTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Gaussian Hidden Markov Model
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        bars, tickers = 1500, 3
+        transitions = np.array([[0.98, 0.02], [0.03, 0.97]])
+        means = np.array([-0.002, 0.0015])
+        deviations = np.array([0.025, 0.008])
+
+        self.states = np.zeros((bars, tickers), dtype=np.int64)
+        for row in range(1, bars):
+            stay = transitions[self.states[row - 1], self.states[row - 1]]
+            switch = rng.random(tickers) >= stay
+            self.states[row] = np.where(switch, 1 - self.states[row - 1], self.states[row - 1])
+
+        self.returns = means[self.states] + deviations[self.states] * rng.standard_normal(
+            (bars, tickers)
+        )
+        self.model = GaussianHMM(n_states=2).fit(self.returns)
+
+    def test_fit_recovers_regimes(self):
+        """
+        Testing that the fitted parameters are close to the generating ones for every ticker
+        """
+
+        np.testing.assert_allclose(np.sqrt(self.model.variances), [[0.025, 0.008]] * 3, rtol=0.15)
+        np.testing.assert_allclose(self.model.transmat[:, 0, 0], 0.98, atol=0.02)
+        self.assertTrue(np.all(self.model.means[:, 0] < self.model.means[:, 1]))
+
+    def test_decode_and_filter_track_regimes(self):
+        """
+        Testing that Viterbi and the filtered probabilities find the hidden regimes
+        """
+
+        states, _ = self.model.decode(self.returns)
+        filtered = self.model.filter(self.returns)
+
+        self.assertGreater(np.mean(states == self.states), 0.9)
+        self.assertGreater(np.mean(filtered.argmax(axis=2) == self.states), 0.85)
+        np.testing.assert_allclose(filtered.sum(axis=2), 1.0)
+
+    def test_filter_step_matches_filter(self):
+        """
+        Testing that stepping the forward recursion bar by bar gives the filtered probabilities
+        """
+
+        filtered = self.model.filter(self.returns[:100])
+
+        probabilities = None
+        for row, observation in enumerate(self.returns[:100]):
+            probabilities = self.model.filter_step(probabilities, observation)
+            np.testing.assert_allclose(probabilities, filtered[row])
+
+    def test_score_matches_enumeration(self):
+        """
+        Testing that the log-likelihood equals the sum over every possible state path
+        """
+
+        observations = self.returns[:6, 0]
+        startprob = self.model.startprob[0]
+        transmat = self.model.transmat[0]
+        means = self.model.means[0]
+        variances = self.model.variances[0]
+
+        total = 0.0
+        for path in itertools.product(range(2), repeat=len(observations)):
+            probability = startprob[path[0]]
+            for row, state in enumerate(path):
+                if row:
+                    probability *= transmat[path[row - 1], state]
+                probability *= np.exp(
+                    -(observations[row] - means[state]) ** 2 / (2 * variances[state])
+                ) / np.sqrt(2 * np.pi * variances[state])
+            total += probability
+
+        scores = self.model.score(self.returns[:6])
+        self.assertAlmostEqual(scores[0], np.log(total))
+
+    def test_missing_observations_are_skipped(self):
+        """
+        Testing that NaN observations contribute no evidence
+        """
+
+        observations = self.returns[:50].copy()
+        observations[10] = np.nan
+
+        probabilities = self.model.smooth(observations)
+
+        self.assertFalse(np.isnan(probabilities).any())
+        self.assertFalse(np.isnan(self.model.score(observations)).any())
+
+    def test_warm_start_refit(self):
+        """
+        Testing that a warm started refit keeps the fitted regimes
+        """
+
+        means = self.model.means.copy()
+        self.model.fit(self.returns, warm_start=True)
+
+        np.testing.assert_allclose(self.model.means, means, atol=1e-3)
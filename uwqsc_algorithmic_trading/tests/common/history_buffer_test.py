@@ -0,0 +1,126 @@
+"""
+Testing the History Buffer
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.history_buffer import HistoryBuffer, INITIAL_CAPACITY
+
+
+class HistoryBufferTest(unittest.TestCase):
+    """
+    This class is used to test each component of the History Buffer
+    """
+
+    def setUp(self):
+        index = pd.date_range(start='2025-01-01', periods=1000, freq='D')
+        self.data = pd.DataFrame(index=index, data={
+            "AAPL_price": np.random.uniform(100, 200, size=1000),
+            "GOOGL_price": np.random.uniform(1500, 2000, size=1000)
+        })
+
+    def test_unbounded_history_matches_concat(self):
+        """
+        Testing that appending frames keeps the same rows as concatenating them
+        """
+
+        buffer = HistoryBuffer()
+
+        for row in range(0, len(self.data), 7):
+            buffer.append(self.data.iloc[row:row + 7])
+
+        self.assertEqual(len(buffer), len(self.data))
+        self.assertEqual(buffer.appended_rows, len(self.data))
+        pd.testing.assert_frame_equal(buffer.to_frame(), self.data, check_freq=False)
+
+    def test_bounded_history_keeps_latest_rows(self):
+        """
+        Testing that a bounded history wraps around and keeps only the latest rows
+        """
+
+        buffer = HistoryBuffer(max_rows=300)
+
+        for row in range(len(self.data)):
+            buffer.append(self.data.iloc[row:row + 1])
+
+        self.assertEqual(len(buffer), 300)
+        self.assertEqual(buffer.appended_rows, 1000)
+        pd.testing.assert_frame_equal(buffer.to_frame(), self.data.iloc[-300:], check_freq=False)
+        self.assertTrue(np.array_equal(
+            buffer.column("AAPL_price", 10),
+            self.data["AAPL_price"].to_numpy()[-10:]
+        ))
+
+    def test_large_frame_is_truncated_to_max_rows(self):
+        """
+        Testing that a frame larger than the bound only keeps its latest rows
+        """
+
+        buffer = HistoryBuffer.from_frame(self.data, max_rows=INITIAL_CAPACITY + 1)
+
+        pd.testing.assert_frame_equal(
+            buffer.tail(len(buffer)),
+            self.data.iloc[-(INITIAL_CAPACITY + 1):],
+            check_freq=False
+        )
+
+    def test_dataframe_compatible_reads(self):
+        """
+        Testing that the buffer can be read like a DataFrame
+        """
+
+        buffer = HistoryBuffer.from_frame(self.data.iloc[:10])
+
+        self.assertTrue(np.array_equal(buffer["AAPL_price"], self.data["AAPL_price"].iloc[:10]))
+        self.assertEqual(buffer.iloc[-1]["GOOGL_price"], self.data["GOOGL_price"].iloc[9])
+        self.assertEqual(buffer.shape, (10, 2))
+        self.assertEqual(buffer.columns, ["AAPL_price", "GOOGL_price"])
+
+    def test_columns_can_appear_and_disappear(self):
+        """
+        Testing that missing columns are filled with missing values and data types are widened
+        """
+
+        buffer = HistoryBuffer()
+        buffer.append(pd.DataFrame({"Date": ["2025-03-13"], "Volume": [10]}))
+        buffer.append(pd.DataFrame({"Date": ["2025-03-14"], "Price": [1.5]}))
+
+        frame = buffer.to_frame()
+
+        self.assertEqual(list(frame.columns), ["Date", "Volume", "Price"])
+        self.assertEqual(list(frame["Date"]), ["2025-03-13", "2025-03-14"])
+        self.assertEqual(frame["Volume"].iloc[0], 10)
+        self.assertTrue(np.isnan(frame["Volume"].iloc[1]))
+        self.assertTrue(np.isnan(frame["Price"].iloc[0]))
+
+    def test_invalid_bound_is_rejected(self):
+        """
+        Testing that the history must keep at least one row
+        """
+
+        with self.assertRaises(ValueError):
+            HistoryBuffer(max_rows=0)
+
+    def test_appended_rows_match_appended_frames(self):
+        """
+        Testing that appending single rows keeps the same rows as appending frames, also after
+        wrapping around a bounded history
+        """
+
+        buffer = HistoryBuffer(max_rows=300)
+        names = list(self.data.columns)
+        values = self.data.to_numpy()
+
+        for row, index in enumerate(self.data.index):
+            buffer.append_row(index.to_datetime64(), names, values[row])
+
+        self.assertEqual(len(buffer), 300)
+        self.assertEqual(buffer.appended_rows, 1000)
+        pd.testing.assert_frame_equal(
+            buffer.to_frame(), self.data.iloc[-300:], check_freq=False, check_names=False
+        )
+        self.assertTrue(np.array_equal(buffer.latest(names[::-1]), values[-1][::-1]))
+        self.assertTrue(np.isnan(HistoryBuffer().latest(names)).all())
@@ -0,0 +1,84 @@
+"""
+Testing the Indicator Cache
+"""
+
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.indicator_cache import IndicatorCache, data_version
+
+
+class IndicatorCacheTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Indicator Cache
+    """
+
+    def setUp(self):
+        self.values = np.arange(100, dtype=np.float64)
+        self.cache = IndicatorCache(max_bytes=2 * self.values.nbytes)
+
+    def test_get_and_put(self):
+        """
+        Testing that stored indicators are returned read-only and counted as hits
+        """
+
+        key = ("AAPL", "sma", (20,), "v1")
+
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, self.values)
+        cached = self.cache.get(key)
+
+        np.testing.assert_array_equal(cached, self.values)
+        self.assertFalse(cached.flags.writeable)
+        self.assertEqual(self.cache.stats, {"hits": 1, "misses": 1, "evictions": 0})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """
+        Testing that the least recently used entry is evicted once the memory budget is exceeded
+        """
+
+        first = ("AAPL", "sma", (20,), "v1")
+        second = ("GOOGL", "sma", (20,), "v1")
+        third = ("MSFT", "sma", (20,), "v1")
+
+        self.cache.put(first, self.values)
+        self.cache.put(second, self.values)
+        self.cache.get(first)
+        self.cache.put(third, self.values)
+
+        self.assertIn(first, self.cache)
+        self.assertNotIn(second, self.cache)
+        self.assertIn(third, self.cache)
+        self.assertEqual(self.cache.nbytes, 2 * self.values.nbytes)
+        self.assertEqual(self.cache.stats["evictions"], 1)
+
+    def test_columns_compute_only_missing_tickers(self):
+        """
+        Testing that only the columns missing from the cache are computed
+        """
+
+        prices = np.column_stack([self.values, self.values * 2])
+        computed = []
+
+        def double(values):
+            computed.append(values.shape[1])
+            return values * 2
+
+        cache = IndicatorCache()
+        cache.columns(prices[:, :1], ["AAPL"], "double", (), double)
+        result = cache.columns(prices, ["AAPL", "GOOGL"], "double", (), double)
+
+        self.assertEqual(computed, [1, 1])
+        np.testing.assert_array_equal(result, prices * 2)
+
+    def test_data_version_tracks_values(self):
+        """
+        Testing that the data version changes with the values
+        """
+
+        changed = self.values.copy()
+        changed[-1] += 1
+
+        self.assertEqual(data_version(self.values), data_version(self.values.copy()))
+        self.assertNotEqual(data_version(self.values), data_version(changed))
@@ -0,0 +1,91 @@
+"""
+Testing the Instrumentation of the trading pipeline
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.common.instrumentation import Instrumentation, instrumentation
+from uwqsc_algorithmic_trading.src.common.metric_sinks import HistogramSink
+
+
+class InstrumentationTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Instrumentation
+    """
+
+    def setUp(self):
+        self.sink = HistogramSink()
+        instrumentation().enable(self.sink)
+
+    def tearDown(self):
+        instrumentation().disable()
+
+    def test_disabled_instrumentation_records_nothing(self):
+        """
+        Testing that timers and counters do nothing without sinks
+        """
+
+        metrics = Instrumentation()
+
+        with metrics.timer("stage") as first, metrics.timer("other stage") as second:
+            metrics.count("bars_processed")
+
+        self.assertFalse(metrics.enabled)
+        self.assertIs(first, second)
+
+    def test_timers_and_counters_reach_every_sink(self):
+        """
+        Testing that enabled sinks receive timings and counters, and stop receiving once disabled
+        """
+
+        other = HistogramSink()
+        metrics = Instrumentation()
+        metrics.enable(self.sink, other, self.sink)
+
+        with metrics.timer("stage", "component"):
+            metrics.count("bars_processed", 3, "component")
+        metrics.disable(other)
+        metrics.count("bars_processed", 2, "component")
+
+        self.assertEqual(metrics.sinks, [self.sink])
+        self.assertEqual(self.sink.timing_count("stage", "component"), 1)
+        self.assertEqual(self.sink.counter("bars_processed", "component"), 5)
+        self.assertEqual(other.counter("bars_processed", "component"), 3)
+
+    def test_execute_trade_and_on_bar_are_instrumented(self):
+        """
+        Testing that every stage of execute_trade, on_bar and process_data is timed, and that
+        bars, trades and outliers are counted
+        """
+
+        algorithm = SimpleMovingAverageImpl(["AAPL", "GOOGL"], {"position_size": 0.1,
+                                                                 "short_window": 2,
+                                                                 "long_window": 5})
+        index = pd.date_range(start='2025-01-01', periods=40, freq='D')
+        prices = np.column_stack([np.linspace(100, 120, 40), np.linspace(120, 100, 40)])
+        prices[30, 0] = 1000
+        frame = pd.DataFrame(prices, index=index, columns=["AAPL_price", "GOOGL_price"])
+
+        for row in range(20):
+            algorithm.execute_trade(10000, frame.iloc[row:row + 1])
+        for row in range(20, 40):
+            algorithm.on_bar(10000, prices[row], index[row].to_datetime64())
+
+        name = algorithm.name
+        for stage in ("prepare_data", "generate_signals", "position_size"):
+            self.assertEqual(self.sink.timing_count(f"execute_trade.{stage}", name), 20)
+        for stage in ("process_bar", "generate_bar_signals", "position_size"):
+            self.assertEqual(self.sink.timing_count(f"on_bar.{stage}", name), 20)
+        self.assertEqual(self.sink.timing_count("process_data.remove_outliers",
+                                                "SMAPreProcessorImpl"), 20)
+        self.assertEqual(self.sink.counter("bars_processed", name), 40)
+        self.assertEqual(self.sink.counter("trades", name), algorithm.__trade_count__)
+        self.assertEqual(self.sink.counter("outliers", "SMAPreProcessorImpl"), 1)
+        self.assertLessEqual(self.sink.percentile("on_bar", 0.5, name),
+                             self.sink.percentile("on_bar", 1.0, name))
@@ -0,0 +1,138 @@
+"""
+Testing the Parquet backed Market Data Store
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore, normalize_bars
+
+
+class MarketDataStoreTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Market Data Store
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MarketDataStore(self.directory.name)
+
+        index = pd.date_range(start='2019-06-01', periods=800, freq='D', name='Date')
+        self.bars = pd.DataFrame(index=index, data={
+            "Open": np.random.uniform(100, 200, size=800),
+            "Close": np.random.uniform(100, 200, size=800),
+            "Volume": np.random.randint(1000, 2000, size=800)
+        })
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_partitions_by_ticker_and_year(self):
+        """
+        Testing that bars are written into one Parquet file per ticker and year
+        """
+
+        self.store.write("AAPL", self.bars)
+
+        self.assertEqual(self.store.tickers(), ["AAPL"])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.directory.name, "ticker=AAPL"))),
+            ["year=2019.parquet", "year=2020.parquet", "year=2021.parquet"]
+        )
+        pd.testing.assert_frame_equal(self.store.read("AAPL"), self.bars, check_freq=False)
+
+    def test_read_prunes_columns_and_dates(self):
+        """
+        Testing that reads return only the requested columns and date range
+        """
+
+        self.store.write("AAPL", self.bars)
+        frame = self.store.read("AAPL", "2020-02-10", "2020-03-05", ["Close"])
+
+        self.assertEqual(list(frame.columns), ["Close"])
+        pd.testing.assert_frame_equal(
+            frame,
+            self.bars.loc["2020-02-10":"2020-03-05", ["Close"]],
+            check_freq=False
+        )
+        self.assertTrue(self.store.read("MSFT").empty)
+
+    def test_overlapping_writes_replace_stored_bars(self):
+        """
+        Testing that writing overlapping bars keeps one bar per date, preferring the newest
+        """
+
+        self.store.write("AAPL", self.bars.iloc[:500])
+        updated = self.bars.iloc[400:].copy()
+        updated["Close"] = 1.0
+        self.store.write("AAPL", updated)
+
+        frame = self.store.read("AAPL")
+
+        self.assertEqual(len(frame), len(self.bars))
+        self.assertTrue((frame["Close"].iloc[400:] == 1.0).all())
+        self.assertEqual(
+            self.store.date_range("AAPL"),
+            (self.bars.index[0], self.bars.index[-1])
+        )
+
+    def test_ingest_csv_splits_by_ticker(self):
+        """
+        Testing that a CSV file with a ticker column is ingested per ticker
+        """
+
+        path = os.path.join(self.directory.name, "bars.csv")
+        csv = pd.concat([
+            self.bars.iloc[:10].assign(Ticker="AAPL"),
+            self.bars.iloc[:5].assign(Ticker="GOOGL")
+        ]).reset_index()
+        csv.to_csv(path, index=False)
+
+        self.store.ingest_csv(path)
+
+        self.assertEqual(self.store.tickers(), ["AAPL", "GOOGL"])
+        self.assertEqual(len(self.store.read("GOOGL")), 5)
+
+    def test_load_panel(self):
+        """
+        Testing that a panel of prices is loaded in the algorithms' column format
+        """
+
+        self.store.write("AAPL", self.bars)
+        self.store.write("GOOGL", self.bars.iloc[100:])
+        panel = self.store.load_panel(["AAPL", "GOOGL"], end="2019-12-31")
+
+        self.assertEqual(list(panel.columns), ["AAPL_price", "GOOGL_price"])
+        self.assertEqual(panel.index[-1], pd.Timestamp("2019-12-31"))
+        self.assertTrue(panel["GOOGL_price"].iloc[:100].isna().all())
+        self.assertTrue(np.array_equal(panel["AAPL_price"], self.bars["Close"].iloc[:len(panel)]))
+
+    def test_normalize_bars(self):
+        """
+        Testing that date columns, timezones, multi-level columns and duplicates are normalized
+        """
+
+        frame = pd.DataFrame({
+            "Date": pd.to_datetime(["2025-01-02", "2025-01-01", "2025-01-02"]).tz_localize("UTC"),
+            "Close": [2.0, 1.0, 3.0]
+        })
+        frame = frame.set_index("Date")
+        frame.columns = pd.MultiIndex.from_tuples([("Close", "AAPL")])
+
+        normalized = normalize_bars(frame)
+
+        self.assertEqual(list(normalized.columns), ["Close"])
+        self.assertIsNone(normalized.index.tz)
+        self.assertEqual(normalized["Close"].tolist(), [1.0, 3.0])
+
+    def test_invalid_ticker_is_rejected(self):
+        """
+        Testing that tickers cannot escape the store directory
+        """
+
+        with self.assertRaises(ValueError):
+            self.store.write(os.path.join("..", "AAPL"), self.bars)
@@ -0,0 +1,88 @@
+"""
+Testing the Metric Sinks
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from uwqsc_algorithmic_trading.src.common.metric_sinks import (
+    HistogramSink,
+    JsonLinesSink,
+    PrometheusTextSink
+)
+
+
+class MetricSinksTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Metric Sinks
+    """
+
+    def test_histogram_percentiles(self):
+        """
+        Testing that percentiles are estimated from the buckets within a factor of two
+        """
+
+        sink = HistogramSink()
+        for millisecond in range(1, 101):
+            sink.record_timing("stage", "", millisecond / 1000)
+
+        self.assertEqual(sink.timing_count("stage"), 100)
+        self.assertTrue(0.05 <= sink.percentile("stage", 0.5) <= 0.1)
+        self.assertTrue(0.099 <= sink.percentile("stage", 0.99) <= 0.1)
+        self.assertEqual(sink.percentile("stage", 1.0), 0.1)
+        self.assertNotEqual(sink.percentile("unknown", 0.5), sink.percentile("unknown", 0.5))
+
+        sink.reset()
+        self.assertEqual(sink.timing_count("stage"), 0)
+
+    def test_json_lines_are_buffered(self):
+        """
+        Testing that measurements are written as JSON lines once the buffer is full or flushed
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.jsonl")
+            sink = JsonLinesSink(path, buffer_size=2)
+
+            sink.record_timing("stage", "component", 0.5)
+            self.assertFalse(os.path.exists(path))
+            sink.record_count("trades", "component", 3)
+            sink.record_count("trades", "component", 1)
+            sink.flush()
+
+            with open(path, "r", encoding="utf-8") as file:
+                records = [json.loads(line) for line in file]
+
+        self.assertEqual([record["kind"] for record in records], ["timing", "count", "count"])
+        self.assertEqual(records[0]["value"], 0.5)
+        self.assertEqual(records[1]["name"], "trades")
+
+    def test_prometheus_text_format(self):
+        """
+        Testing that timings render as cumulative histograms and counters as counter metrics
+        """
+
+        sink = PrometheusTextSink(buckets=[0.1, 1.0])
+        sink.record_timing("on_bar", 'SMA "fast"', 0.05)
+        sink.record_timing("on_bar", 'SMA "fast"', 0.5)
+        sink.record_timing("on_bar", 'SMA "fast"', 5.0)
+        sink.record_count("trades", "SMA", 2)
+        sink.record_count("trades", "HMM", 1)
+
+        text = sink.render()
+        labels = 'stage="on_bar",component="SMA \\"fast\\""'
+
+        self.assertIn(f'uwqsc_stage_duration_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'uwqsc_stage_duration_seconds_bucket{{{labels},le="1.0"}} 2', text)
+        self.assertIn(f'uwqsc_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3', text)
+        self.assertIn(f'uwqsc_stage_duration_seconds_count{{{labels}}} 3', text)
+        self.assertEqual(text.count("# TYPE uwqsc_trades_total counter"), 1)
+        self.assertIn('uwqsc_trades_total{component="HMM"} 1', text)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.prom")
+            sink.write(path)
+            with open(path, "r", encoding="utf-8") as file:
+                self.assertEqual(file.read(), text)
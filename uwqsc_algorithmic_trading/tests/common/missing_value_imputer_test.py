@@ -0,0 +1,132 @@
+"""
+Testing the Missing Value Imputer
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.missing_value_imputer import MissingValueImputer
+
+
+class MissingValueImputerTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Missing Value Imputer
+    """
+
+    def setUp(self):
+        self.values = np.random.uniform(100, 200, size=(40, 4))
+        mask = np.random.uniform(size=self.values.shape) < 0.3
+        mask[0] = False
+        self.values[mask] = np.nan
+
+    def test_forward_fill_matches_pandas(self):
+        """
+        Testing that forward filling with and without a maximum gap matches pandas
+        """
+
+        for max_gap in (None, 1):
+            imputer = MissingValueImputer(4, max_gap=max_gap)
+            filled, imputed, keep = imputer.impute_rows(self.values)
+            expected = pd.DataFrame(self.values).ffill(limit=max_gap).to_numpy()
+
+            np.testing.assert_array_equal(filled, expected)
+            self.assertTrue(keep.all())
+            self.assertEqual(imputer.imputed_cells, int(imputed.sum()))
+            self.assertEqual(int(imputed.sum()),
+                             int(np.isnan(self.values).sum() - np.isnan(expected).sum()))
+
+    def test_blocks_and_bars_continue_where_the_last_call_stopped(self):
+        """
+        Testing that imputing bar by bar or block by block gives the result of a single block
+        """
+
+        for policy in ("ffill", "median"):
+            whole = MissingValueImputer(4, policy).impute_rows(self.values)[0]
+
+            streaming = MissingValueImputer(4, policy)
+            by_bar = np.array([streaming.impute(row)[0] for row in self.values])
+
+            blocks = MissingValueImputer(4, policy)
+            by_block = np.vstack([blocks.impute_rows(self.values[start:start + 7])[0]
+                                  for start in range(0, 40, 7)])
+
+            np.testing.assert_allclose(by_bar, whole)
+            np.testing.assert_allclose(by_block, whole)
+
+    def test_linear_interpolates_inside_a_block(self):
+        """
+        Testing that gaps closed within the block are interpolated, including gaps that started
+        in the previous block, and that open gaps are forward filled
+        """
+
+        values = np.array([[1.0], [np.nan], [np.nan], [4.0], [np.nan]])
+        imputer = MissingValueImputer(1, "linear")
+
+        self.assertEqual(imputer.impute_rows(values[:2])[0].ravel().tolist(), [1.0, 1.0])
+        self.assertEqual(imputer.impute_rows(values[2:])[0].ravel().tolist(), [3.0, 4.0, 4.0])
+
+        filled = MissingValueImputer(1, "linear").impute_rows(values)[0]
+        self.assertEqual(filled.ravel().tolist(), [1.0, 2.0, 3.0, 4.0, 4.0])
+
+    def test_median_follows_the_cross_section(self):
+        """
+        Testing that a missing price moves with the median return of the other tickers
+        """
+
+        values = np.array([[10.0, 100.0, 200.0, 50.0],
+                           [np.nan, 110.0, 220.0, 40.0],
+                           [np.nan, 121.0, 242.0, 44.0]])
+
+        filled = MissingValueImputer(4, "median").impute_rows(values)[0]
+
+        np.testing.assert_allclose(filled[1:, 0], [11.0, 12.1])
+
+    def test_drop_removes_stale_bars(self):
+        """
+        Testing that bars where every ticker is missing for longer than max_gap are dropped
+        """
+
+        values = np.array([[1.0, 1.0], [np.nan, np.nan], [np.nan, np.nan], [4.0, np.nan]])
+        imputer = MissingValueImputer(2, "drop", max_gap=1)
+
+        filled, _, keep = imputer.impute_rows(values)
+
+        self.assertEqual(keep.tolist(), [True, True, False, True])
+        self.assertEqual(filled[1].tolist(), [1.0, 1.0])
+        self.assertTrue(np.isnan(filled[3, 1]))
+        self.assertEqual(imputer.dropped_rows, 1)
+
+        streaming = MissingValueImputer(2, "drop", max_gap=0)
+        self.assertTrue(streaming.impute(values[0])[2])
+        self.assertFalse(streaming.impute(values[1])[2])
+
+    def test_drop_keeps_the_bars_of_trading_tickers(self):
+        """
+        Testing that a halted ticker is left missing while the bars of the other tickers flow
+        """
+
+        values = np.column_stack([[1.0] + [np.nan] * 9, np.arange(1.0, 11.0)])
+        imputer = MissingValueImputer(2, "drop", max_gap=2)
+
+        filled, _, keep = imputer.impute_rows(values[:5])
+        streamed = [imputer.impute(row) for row in values[5:]]
+
+        self.assertTrue(keep.all())
+        self.assertTrue(all(result[2] for result in streamed))
+        self.assertEqual(filled[:3, 0].tolist(), [1.0, 1.0, 1.0])
+        self.assertTrue(np.isnan(filled[3:, 0]).all())
+        self.assertTrue(all(np.isnan(result[0][0]) for result in streamed))
+        self.assertEqual([result[0][1] for result in streamed], values[5:, 1].tolist())
+        self.assertEqual(imputer.dropped_rows, 0)
+
+    def test_invalid_settings_are_rejected(self):
+        """
+        Testing that unknown policies and a drop policy without a maximum gap are rejected
+        """
+
+        with self.assertRaises(ValueError):
+            MissingValueImputer(2, "bfill")
+        with self.assertRaises(ValueError):
+            MissingValueImputer(2, "drop")
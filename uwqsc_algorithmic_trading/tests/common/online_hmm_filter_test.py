@@ -0,0 +1,71 @@
+"""
+Testing the Online HMM Filter
+"""
+
+import unittest
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.gaussian_hmm import GaussianHMM
+from uwqsc_algorithmic_trading.src.common.online_hmm_filter import OnlineHMMFilter
+
+
+class OnlineHMMFilterTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Online HMM Filter
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        drift = np.repeat([0.004, -0.004, 0.004, -0.004], 60)
+        self.returns = drift[:, None] + 0.004 * rng.standard_normal((240, 3))
+        self.model = GaussianHMM(n_states=2).fit(self.returns[:120])
+        self.seen = 0
+
+    def history(self) -> np.ndarray:
+        """
+        Observations seen by the filter so far.
+        """
+
+        return self.returns[:self.seen]
+
+    def test_update_matches_full_filter(self):
+        """
+        Testing that one step per bar gives the probabilities of a full forward pass
+        """
+
+        online = OnlineHMMFilter(self.model)
+        expected = self.model.filter(self.returns)
+
+        for row, observation in enumerate(self.returns):
+            np.testing.assert_allclose(online.update(observation), expected[row])
+
+    def test_reset_from_history(self):
+        """
+        Testing that a reset from a history continues like a filter over the whole series
+        """
+
+        online = OnlineHMMFilter(self.model)
+        online.reset(self.returns[:100])
+
+        probabilities = None
+        for observation in self.returns[100:]:
+            probabilities = online.update(observation)
+
+        np.testing.assert_allclose(probabilities, self.model.filter(self.returns)[-1])
+
+    def test_background_refit_is_swapped_in(self):
+        """
+        Testing that a background refit replaces the model and catches up with the latest bars
+        """
+
+        online = OnlineHMMFilter(self.model, self.history, refit_interval=150)
+
+        for observation in self.returns:
+            self.seen += 1
+            online.update(observation)
+        online.close()
+
+        self.assertIsNot(online.model, self.model)
+        np.testing.assert_allclose(online.probabilities, online.model.filter(self.returns)[-1])
+        np.testing.assert_allclose(self.model.means, GaussianHMM(2).fit(self.returns[:120]).means)
@@ -0,0 +1,102 @@
+"""
+Testing the streaming Outlier Filter
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.outlier_filter import MAD_SCALE, OutlierFilter
+
+
+class OutlierFilterTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Outlier Filter
+    """
+
+    def setUp(self):
+        self.values = 100 + np.tile([[-1.0, 1.0, 0.5], [1.0, -1.0, -0.5]], (30, 1))
+        self.values[40, 0] = 150
+        self.values[50, 2] = 50
+
+    def test_zscore_flags_spikes(self):
+        """
+        Testing that only the spikes are flagged, scored against the preceding accepted values
+        """
+
+        _, flags = OutlierFilter(3).filter_rows(self.values)
+
+        self.assertEqual(list(zip(*np.nonzero(flags))), [(40, 0), (50, 2)])
+
+        window = pd.Series(self.values[20:40, 0])
+        self.assertGreater(abs(150 - window.mean()) / window.std(), 3)
+
+    def test_policies(self):
+        """
+        Testing that flagged values are kept, dropped, clipped or forward filled
+        """
+
+        results = {
+            policy: OutlierFilter(3, policy=policy).filter_rows(self.values)[0]
+            for policy in ("ignore", "drop", "clip", "ffill")
+        }
+
+        window = self.values[20:40, 0]
+        upper = window.mean() + 3 * window.std(ddof=1)
+
+        self.assertEqual(results["ignore"][40, 0], 150)
+        self.assertTrue(np.isnan(results["drop"][40, 0]))
+        self.assertAlmostEqual(results["clip"][40, 0], upper)
+        self.assertEqual(results["ffill"][40, 0], self.values[39, 0])
+        self.assertEqual(results["ffill"][50, 2], self.values[49, 2])
+        for cleaned in results.values():
+            self.assertTrue(np.array_equal(cleaned[:40], self.values[:40]))
+
+    def test_mad_is_robust_to_earlier_spikes(self):
+        """
+        Testing that the MAD score uses the rolling median and scaled median absolute deviation,
+        and that a spike accepted while the window fills does not mask the next one
+        """
+
+        values = np.full((30, 1), 100.0) + np.tile([[-1.0], [1.0]], (15, 1))
+        values[5, 0] = 200
+        values[25, 0] = 110
+
+        _, zscore_flags = OutlierFilter(1).filter_rows(values)
+        _, mad_flags = OutlierFilter(1, method="mad").filter_rows(values)
+
+        self.assertFalse(zscore_flags[25, 0])
+        self.assertTrue(mad_flags[25, 0])
+        window = values[5:25, 0]
+        scale = MAD_SCALE * np.median(np.abs(window - np.median(window)))
+        self.assertGreater(abs(110 - np.median(window)) / scale, 3)
+
+    def test_level_shifts_are_accepted_after_persistence_bars(self):
+        """
+        Testing that a lasting step in the price is flagged for persistence bars only, after
+        which the statistics follow the new level, while isolated spikes stay flagged
+        """
+
+        values = 100 + np.tile([[-1.0], [1.0]], (250, 1))
+        values[100:] += 50
+        values[300, 0] = 300
+
+        for method in ("zscore", "mad"):
+            outlier_filter = OutlierFilter(1, method=method, persistence=5)
+            cleaned, flags = outlier_filter.filter_rows(values)
+
+            self.assertEqual(np.flatnonzero(flags[:, 0]).tolist(), [100, 101, 102, 103, 300])
+            np.testing.assert_array_equal(cleaned, values)
+
+    def test_invalid_settings_are_rejected(self):
+        """
+        Testing that unknown methods and policies are rejected
+        """
+
+        with self.assertRaises(ValueError):
+            OutlierFilter(3, method="iqr")
+        with self.assertRaises(ValueError):
+            OutlierFilter(3, policy="interpolate")
+        with self.assertRaises(ValueError):
+            OutlierFilter(3, persistence=0)
@@ -0,0 +1,114 @@
+"""
+Testing the memory-mapped Price Panel
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.market_data_store import MarketDataStore
+from uwqsc_algorithmic_trading.src.common.price_panel import PricePanel
+
+
+class PricePanelTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Price Panel
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tickers = ["AAPL", "GOOGL", "MSFT"]
+        self.timestamps = pd.date_range(start='2025-01-01', periods=50, freq='D')
+        self.prices = np.random.uniform(100, 200, size=(50, 3))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_open_round_trip(self):
+        """
+        Testing that a written panel is opened as read-only memory maps holding the same data
+        """
+
+        written = PricePanel.write(self.directory.name, self.prices, self.timestamps, self.tickers)
+        panel = PricePanel.open(self.directory.name)
+
+        self.assertIsInstance(panel.prices, np.memmap)
+        self.assertTrue(np.array_equal(panel.prices, self.prices))
+        self.assertTrue(np.array_equal(panel.timestamps, self.timestamps.to_numpy()))
+        self.assertEqual(panel.tickers, self.tickers)
+        self.assertEqual(panel.version, written.version)
+        self.assertEqual(len(panel), 50)
+
+        with self.assertRaises(ValueError):
+            panel.prices[0, 0] = 0.0
+
+    def test_frame_shares_memory(self):
+        """
+        Testing that DataFrame views and selections do not copy the prices
+        """
+
+        panel = PricePanel.write(self.directory.name, self.prices, self.timestamps, self.tickers)
+        frame = panel.frame(10, 20)
+
+        self.assertEqual(list(frame.columns), ["AAPL_price", "GOOGL_price", "MSFT_price"])
+        self.assertTrue(frame.index.equals(self.timestamps[10:20]))
+        self.assertTrue(np.shares_memory(frame.to_numpy(), panel.prices))
+        self.assertTrue(np.shares_memory(panel.column("GOOGL"), panel.prices))
+        self.assertTrue(np.shares_memory(panel.select(self.tickers), panel.prices))
+        self.assertTrue(np.array_equal(panel.select(["MSFT", "AAPL"]), self.prices[:, [2, 0]]))
+
+    def test_version_changes_with_prices(self):
+        """
+        Testing that the fingerprint identifies the prices
+        """
+
+        first = PricePanel.write(self.directory.name, self.prices, self.timestamps, self.tickers)
+        with tempfile.TemporaryDirectory() as directory:
+            second = PricePanel.write(directory, self.prices + 1, self.timestamps, self.tickers)
+
+            self.assertNotEqual(first.version, second.version)
+
+    def test_rewrite_keeps_open_panels_intact(self):
+        """
+        Testing that rewriting a panel replaces its files, leaving panels opened before on the old
+        prices and panels opened after on the new ones
+        """
+
+        first = PricePanel.write(self.directory.name, self.prices, self.timestamps, self.tickers)
+        second = PricePanel.write(self.directory.name, self.prices[:20] + 1, self.timestamps[:20],
+                                  self.tickers)
+
+        self.assertTrue(np.array_equal(first.prices, self.prices))
+        self.assertTrue(np.array_equal(PricePanel.open(self.directory.name).prices,
+                                       self.prices[:20] + 1))
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ["meta.json", "prices.npy", "timestamps.npy"])
+
+    def test_shape_mismatch_is_rejected(self):
+        """
+        Testing that prices must match the timestamps and tickers
+        """
+
+        with self.assertRaises(ValueError):
+            PricePanel.write(self.directory.name, self.prices, self.timestamps[:10], self.tickers)
+
+    def test_from_store(self):
+        """
+        Testing that a panel can be written from the market data store
+        """
+
+        store = MarketDataStore(f"{self.directory.name}/store")
+        for column, ticker in enumerate(self.tickers):
+            store.write(ticker, pd.DataFrame(
+                index=self.timestamps.rename("Date"),
+                data={"Close": self.prices[:, column]}
+            ))
+
+        panel = PricePanel.from_store(f"{self.directory.name}/panel", store, self.tickers)
+
+        self.assertEqual(panel.tickers, self.tickers)
+        self.assertTrue(np.array_equal(panel.prices, self.prices))
@@ -0,0 +1,86 @@
+"""
+Testing the streaming Rolling Window
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.rolling_window import RollingWindow, RESYNC_INTERVAL
+
+
+class RollingWindowTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Rolling Window
+    """
+
+    def setUp(self):
+        self.values = np.random.uniform(10000, 10001, size=(RESYNC_INTERVAL + 50, 3))
+        self.window = RollingWindow(3, 20)
+
+    def test_statistics_match_pandas_rolling(self):
+        """
+        Testing that the running mean and standard deviation match pandas' rolling statistics
+        """
+
+        expected = pd.DataFrame(self.values).rolling(20, min_periods=1)
+        expected_mean = expected.mean().to_numpy()
+        expected_std = expected.std().to_numpy()
+
+        for row, values in enumerate(self.values):
+            self.window.push(values)
+
+            self.assertTrue(np.allclose(self.window.mean(), expected_mean[row]))
+            if row > 0:
+                self.assertTrue(np.allclose(self.window.std(), expected_std[row]))
+
+        self.assertTrue(np.all(self.window.counts == 20))
+
+    def test_skipped_values_leave_columns_untouched(self):
+        """
+        Testing that NaN and rejected values do not enter the window
+        """
+
+        self.window.push(np.array([1.0, 2.0, 3.0]))
+        self.window.push(np.array([np.nan, 4.0, 5.0]), np.array([True, True, False]))
+
+        self.assertEqual(self.window.counts.tolist(), [1, 2, 1])
+        self.assertEqual(self.window.mean().tolist(), [1.0, 3.0, 3.0])
+        self.assertTrue(np.isnan(self.window.std()[0]))
+
+    def test_seed_uses_the_tail_of_the_history(self):
+        """
+        Testing that seeding resets the window and keeps only the last values of the history
+        """
+
+        self.window.push(np.array([1.0, 2.0, 3.0]))
+        self.window.seed(self.values[:100])
+
+        self.assertTrue(np.allclose(self.window.mean(), self.values[80:100].mean(axis=0)))
+
+    def test_empty_window_is_rejected(self):
+        """
+        Testing that a window must hold at least one value
+        """
+
+        with self.assertRaises(ValueError):
+            RollingWindow(3, 0)
+
+    def test_robust_statistics_match_numpy(self):
+        """
+        Testing that the latest value, median and median absolute deviation follow the window
+        """
+
+        for values in self.values[:30]:
+            self.window.push(values)
+        self.window.push(np.array([np.nan, 1.0, 2.0]))
+
+        window = self.values[10:30, 0]
+        median = np.median(window)
+
+        self.assertTrue(np.allclose(self.window.median()[0], median))
+        self.assertTrue(np.allclose(self.window.median_absolute_deviation()[0],
+                                    np.median(np.abs(window - median))))
+        self.assertEqual(self.window.latest().tolist(), [self.values[29, 0], 1.0, 2.0])
+        self.assertTrue(np.isnan(RollingWindow(2, 5).median()).all())
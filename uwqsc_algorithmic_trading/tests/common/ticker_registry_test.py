@@ -0,0 +1,60 @@
+"""
+Testing the Ticker Registry
+"""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from uwqsc_algorithmic_trading.src.common.ticker_registry import TickerRegistry
+
+
+class TickerRegistryTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Ticker Registry
+    """
+
+    def setUp(self):
+        self.registry = TickerRegistry()
+
+    def test_tickers_get_dense_stable_ids(self):
+        """
+        Testing that tickers are numbered in order of first use and keep their id
+        """
+
+        np.testing.assert_array_equal(self.registry.ids(["AAPL", "MSFT", "AAPL"]), [0, 1, 0])
+        self.assertEqual(self.registry.intern("GOOGL"), 2)
+        self.assertEqual(self.registry.intern("MSFT"), 1)
+        self.assertEqual(self.registry.symbols([2, 0]), ["GOOGL", "AAPL"])
+        self.assertEqual(len(self.registry), 3)
+        self.assertIn("AAPL", self.registry)
+        self.assertNotIn("TSLA", self.registry)
+
+    def test_column_names_are_formatted_once(self):
+        """
+        Testing that column names are built once per ticker and suffix and then shared
+        """
+
+        first = self.registry.column_names(["AAPL", "MSFT"], "price")
+        second = self.registry.column_names(["MSFT", "AAPL", "TSLA"], "price")
+
+        self.assertEqual(first, ["AAPL_price", "MSFT_price"])
+        self.assertEqual(second, ["MSFT_price", "AAPL_price", "TSLA_price"])
+        self.assertIs(first[0], second[1])
+        self.assertEqual(self.registry.column_names(["TSLA"], "short"), ["TSLA_short"])
+
+    def test_concurrent_interning(self):
+        """
+        Testing that tickers interned from several threads get one id each
+        """
+
+        tickers = [f"T{number}" for number in range(500)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.registry.ids, [tickers] * 8))
+
+        self.assertEqual(len(self.registry), 500)
+        for ids in results:
+            np.testing.assert_array_equal(ids, results[0])
+        self.assertEqual(sorted(results[0].tolist()), list(range(500)))
@@ -0,0 +1,136 @@
+"""
+Testing the Timestamp Deduplicator
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.common.timestamp_deduplicator import (
+    SortedKeys,
+    TimestampDeduplicator,
+    timestamp_key,
+    timestamp_keys
+)
+
+
+class TimestampDeduplicatorTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Timestamp Deduplicator
+    """
+
+    def setUp(self):
+        self.index = pd.date_range(start='2025-01-01', periods=10, freq='D')
+        self.deduplicator = TimestampDeduplicator()
+
+    def test_timestamp_keys_agree_across_types(self):
+        """
+        Testing that dates given as an index, strings, datetime64 values or Timestamps give the
+        same keys
+        """
+
+        keys = timestamp_keys(self.index)
+
+        np.testing.assert_array_equal(timestamp_keys(self.index.strftime("%Y-%m-%d")), keys)
+        np.testing.assert_array_equal(timestamp_keys(self.index.to_numpy()), keys)
+        self.assertEqual(timestamp_key(self.index[3]), keys[3])
+        self.assertEqual(timestamp_key(self.index.to_numpy()[3]), keys[3])
+        self.assertEqual(timestamp_key("2025-01-04"), keys[3])
+
+    def test_sorted_keys_grow_and_take_late_keys(self):
+        """
+        Testing that keys appended in order and late keys stay sorted and searchable
+        """
+
+        keys = SortedKeys()
+        keys.add(np.arange(0, 100, 2))
+        keys.add(np.array([5, 7]))
+        for key in range(100, 140, 2):
+            keys.add_latest(key)
+
+        self.assertEqual(len(keys), 72)
+        self.assertEqual(keys.latest, 138)
+        self.assertEqual(keys.contains(np.array([4, 5, 6, 9, 138, 140])).tolist(),
+                         [True, True, True, False, True, False])
+
+    def test_duplicates_across_batches_are_rejected(self):
+        """
+        Testing that a resent window overlapping earlier batches only keeps its new bars, and that
+        a late bar that was never seen is kept
+        """
+
+        first = pd.DataFrame({"AAPL_price": np.arange(5.0)}, index=self.index[:5])
+        resent = pd.DataFrame({"AAPL_price": np.arange(6.0)}, index=pd.DatetimeIndex([
+            self.index[3], self.index[4], self.index[5], self.index[5], self.index[6], "2024-12-31"
+        ]))
+
+        self.assertEqual(len(self.deduplicator.deduplicate(first)), 5)
+        kept = self.deduplicator.deduplicate(resent)
+
+        self.assertEqual(list(kept.index), [self.index[5], self.index[6],
+                                            pd.Timestamp("2024-12-31")])
+        self.assertEqual(kept["AAPL_price"].tolist(), [2.0, 4.0, 5.0])
+        self.assertEqual(self.deduplicator.rejected_rows, 3)
+
+        strict = TimestampDeduplicator(reject_late=True)
+        strict.deduplicate(first)
+        self.assertEqual(list(strict.deduplicate(resent).index), [self.index[5], self.index[6]])
+
+    def test_long_format_is_deduplicated_per_ticker(self):
+        """
+        Testing that long format bars are only duplicates of bars of the same ticker
+        """
+
+        first = pd.DataFrame({
+            "Date": ["2025-01-01", "2025-01-02", "2025-01-01"],
+            "Ticker": ["AAPL", "AAPL", "GOOGL"],
+            "Close": [1.0, 2.0, 3.0]
+        })
+        second = pd.DataFrame({
+            "Date": ["2025-01-02", "2025-01-02", "2025-01-03", "2025-01-03"],
+            "Ticker": ["AAPL", "GOOGL", "GOOGL", "GOOGL"],
+            "Close": [9.0, 4.0, 5.0, 6.0]
+        })
+
+        self.deduplicator.deduplicate(first)
+        kept = self.deduplicator.deduplicate(second)
+
+        self.assertEqual(kept["Close"].tolist(), [4.0, 5.0])
+        self.assertEqual(self.deduplicator.seen("GOOGL"), 3)
+        self.assertEqual(self.deduplicator.seen("AAPL"), 2)
+
+    def test_merge_combines_duplicates_within_a_batch(self):
+        """
+        Testing that the merge policy keeps the latest non-missing value of every column
+        """
+
+        deduplicator = TimestampDeduplicator("merge")
+        batch = pd.DataFrame({
+            "AAPL_price": [1.0, np.nan, 3.0],
+            "GOOGL_price": [4.0, 5.0, np.nan]
+        }, index=self.index[[0, 0, 1]])
+
+        merged = deduplicator.deduplicate(batch)
+
+        self.assertEqual(list(merged.index), list(self.index[:2]))
+        self.assertEqual(merged.iloc[0].tolist(), [1.0, 5.0])
+        self.assertEqual(deduplicator.merged_rows, 1)
+        self.assertEqual(len(deduplicator.deduplicate(batch.iloc[2:])), 0)
+
+        with self.assertRaises(ValueError):
+            TimestampDeduplicator("keep_last")
+
+    def test_streaming_bars(self):
+        """
+        Testing that single bars are accepted once, and that bars without a timestamp always are
+        """
+
+        timestamps = self.index.to_numpy()
+
+        self.assertTrue(all(self.deduplicator.accept(timestamp) for timestamp in timestamps[:5]))
+        self.assertFalse(self.deduplicator.accept(timestamps[2]))
+        self.assertFalse(self.deduplicator.accept(self.index[4]))
+        self.assertTrue(self.deduplicator.accept(None))
+        self.assertTrue(self.deduplicator.accept(np.datetime64("2024-12-31")))
+        self.assertFalse(self.deduplicator.accept(np.datetime64("2024-12-31")))
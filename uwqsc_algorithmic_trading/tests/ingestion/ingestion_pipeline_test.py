@@ -0,0 +1,104 @@
+"""
+Testing the Ingestion Pipeline
+"""
+
+import asyncio
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.algorithms.simple_moving_average_impl import (
+    SimpleMovingAverageImpl
+)
+from uwqsc_algorithmic_trading.src.backtesting.portfolio_runner import PortfolioRunner
+from uwqsc_algorithmic_trading.src.ingestion.ingestion_pipeline import IngestionPipeline
+from uwqsc_algorithmic_trading.src.ingestion.replay_server import ReplayServer
+from uwqsc_algorithmic_trading.src.ingestion.tcp_bar_source import TcpBarSource
+
+
+class SlowPortfolioRunner(PortfolioRunner):
+    """
+    Portfolio runner taking at least a millisecond per bar.
+    """
+
+    def on_bar(self, prices, timestamp=None):
+        time.sleep(0.001)
+        return super().on_bar(prices, timestamp)
+
+
+class IngestionPipelineTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Ingestion Pipeline
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        returns = 0.01 * rng.standard_normal((300, 3))
+        index = pd.date_range(start='2024-01-01', periods=300, freq='D')
+        self.data = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                                 columns=["MSFT_price", "AAPL_price", "GOOGL_price"])
+
+    def _runner(self, runner_type=PortfolioRunner):
+        return runner_type([
+            SimpleMovingAverageImpl(["AAPL", "GOOGL"], {"position_size": 0.1, "short_window": 5,
+                                                        "long_window": 20}),
+        ], 10000)
+
+    def _ingest(self, runner, server_options, **options):
+        async def ingest():
+            async with ReplayServer(self.data.to_numpy(), self.data.index,
+                                    ["MSFT", "AAPL", "GOOGL"], **server_options) as server:
+                source = TcpBarSource(server.host, server.port, max_bars=16)
+                return await IngestionPipeline(source, runner, **options).run()
+
+        return asyncio.run(ingest())
+
+    def test_live_bars_trade_like_a_replayed_backtest(self):
+        """
+        Testing that ingesting a feed leaves the algorithms in the state of running the same bars
+        through the runner directly, whatever the batching
+        """
+
+        reference = self._runner()
+        reference.run(self.data)
+
+        for max_batch_bars in (1, 1000):
+            runner = self._runner()
+            stats = self._ingest(runner, {"chunk_bars": 7}, max_batch_bars=max_batch_bars)
+
+            np.testing.assert_allclose(runner.values(), reference.values())
+            np.testing.assert_allclose(runner.holdings[0], reference.holdings[0])
+            self.assertEqual(stats.bars, 300)
+            self.assertLessEqual(stats.largest_batch, max(max_batch_bars, 16))
+
+    def test_slow_algorithms_push_back_on_the_source(self):
+        """
+        Testing that the reader stops reading ahead once max_pending blocks wait for slow
+        algorithms, and that batches grow to catch up
+        """
+
+        stats = self._ingest(self._runner(SlowPortfolioRunner), {"chunk_bars": 16},
+                             max_batch_bars=32, max_pending=2)
+
+        self.assertEqual(stats.bars, 300)
+        self.assertGreater(stats.backpressure_waits, 0)
+        self.assertGreater(stats.largest_batch, 16)
+        self.assertGreater(stats.bars_per_second, 0)
+
+    def test_missing_tickers_are_rejected(self):
+        """
+        Testing that a source without some of the runner's tickers is rejected
+        """
+
+        self.data = self.data.drop(columns="GOOGL_price")
+
+        async def ingest():
+            async with ReplayServer(self.data.to_numpy(), self.data.index,
+                                    ["MSFT", "AAPL"]) as server:
+                source = TcpBarSource(server.host, server.port)
+                await IngestionPipeline(source, self._runner()).run()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(ingest())
@@ -0,0 +1,79 @@
+"""
+Testing the Replay Server and the TCP Bar Source
+"""
+
+import asyncio
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.ingestion.replay_server import ReplayServer
+from uwqsc_algorithmic_trading.src.ingestion.tcp_bar_source import TcpBarSource
+
+
+class ReplayServerTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Replay Server and the TCP Bar Source
+    """
+
+    def setUp(self):
+        self.timestamps = pd.date_range(start='2024-01-01', periods=1000, freq='min').to_numpy()
+        self.prices = np.random.uniform(100, 200, size=(1000, 3))
+        self.prices[5, 1] = np.nan
+        self.tickers = ["AAPL", "GOOGL", "MSFT"]
+
+    def _receive(self, max_bars, **options):
+        async def receive():
+            async with ReplayServer(self.prices, self.timestamps, self.tickers,
+                                    **options) as server:
+                source = TcpBarSource(server.host, server.port, max_bars)
+                await source.open()
+                blocks = []
+                while True:
+                    block = await source.read()
+                    if block is None:
+                        break
+                    blocks.append(block)
+                await source.close()
+                return source.tickers, blocks
+
+        return asyncio.run(receive())
+
+    def test_bars_arrive_unchanged_in_blocks(self):
+        """
+        Testing that every bar arrives once, in order and bit for bit, in blocks of at most
+        max_bars bars
+        """
+
+        tickers, blocks = self._receive(64, chunk_bars=100)
+
+        self.assertEqual(tickers, self.tickers)
+        self.assertTrue(all(1 <= len(timestamps) <= 64 for timestamps, _ in blocks))
+        np.testing.assert_array_equal(np.concatenate([block[0] for block in blocks]),
+                                      self.timestamps)
+        np.testing.assert_array_equal(np.concatenate([block[1] for block in blocks]),
+                                      self.prices)
+
+    def test_replay_is_paced(self):
+        """
+        Testing that the replay does not run ahead of the requested bar rate
+        """
+
+        self.timestamps = self.timestamps[:50]
+        self.prices = self.prices[:50]
+
+        async def timed():
+            started = asyncio.get_running_loop().time()
+            await asyncio.to_thread(self._receive, 10, chunk_bars=10, bars_per_second=500)
+            return asyncio.get_running_loop().time() - started
+
+        self.assertGreaterEqual(asyncio.run(timed()), 0.09)
+
+    def test_mismatched_shapes_are_rejected(self):
+        """
+        Testing that prices must have one row per timestamp and one column per ticker
+        """
+
+        with self.assertRaises(ValueError):
+            ReplayServer(self.prices, self.timestamps[:10], self.tickers)
@@ -3,6 +3,8 @@ Testing the Hidden Markov Model Preprocessor
 """
 
 import unittest
+
+import numpy as np
 import pandas as pd
 
 from uwqsc_algorithmic_trading.src.preprocessing.hmm_preprocessor_impl import HMMPreProcessorImpl
@@ -18,7 +20,7 @@ class HMMPreprocessorImplTest(unittest.TestCase):
         self.short_window = 50
         self.long_window = 200
 
-        self.preprocessor = HMMPreProcessorImpl()
+        self.preprocessor = HMMPreProcessorImpl(self.tickers)
 
     def test_remove_duplicate_timestamps_removes_duplicates(self):
         """
@@ -41,3 +43,54 @@ class HMMPreprocessorImplTest(unittest.TestCase):
 
         # Assert that the size is reduced after duplicates are removed.
         self.assertFalse(self.preprocessor.__processed_data__.duplicated().any())
+
+    def test_duplicates_across_batches_stay_out_of_the_history(self):
+        """
+        Testing that bars resent in a later batch or as streaming bars are not processed again
+        """
+
+        index = pd.date_range(start='2025-03-13', periods=4, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            "AAPL_price": [10.0, 11.0, 12.0, 13.0], "GOOGL_price": [20.0, 21.0, 22.0, 23.0]
+        })
+
+        self.preprocessor.process_data(prices.iloc[:3])
+        processed = self.preprocessor.process_data(prices.iloc[1:])
+
+        self.assertEqual(list(processed.index), [index[3]])
+        self.assertEqual(len(self.preprocessor.__data_history__), 4)
+        self.assertEqual(self.preprocessor.process_bar(index.to_numpy()[2],
+                                                       prices.iloc[2].to_numpy()), {})
+
+    def test_price_spikes_are_handled_before_returns(self):
+        """
+        Testing that a price spike is replaced before the log returns are computed, in batches,
+        in streamed bars and in bars following a history loaded from elsewhere
+        """
+
+        index = pd.date_range(start='2025-01-01', periods=40, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 100 + np.tile([-1.0, 1.0], 20),
+            "GOOGL_price": 100 + np.tile([1.0, -1.0], 20)
+        })
+        prices.iloc[30, 0] = 1000
+
+        batch = HMMPreProcessorImpl(self.tickers, outlier_policy="ffill").process_data(prices)
+        streaming = HMMPreProcessorImpl(self.tickers, outlier_policy="ffill")
+        returns = np.array([
+            streaming.process_bar(timestamp, row)["return"]
+            for timestamp, row in zip(index.to_numpy(), prices.to_numpy())
+        ])
+
+        self.assertEqual(batch["AAPL_price"].iloc[30], prices["AAPL_price"].iloc[29])
+        self.assertEqual(batch["AAPL_return"].iloc[30], 0.0)
+        np.testing.assert_allclose(batch[["AAPL_return", "GOOGL_return"]].to_numpy(), returns)
+
+        loaded = HMMPreProcessorImpl(self.tickers, outlier_policy="ffill")
+        loaded.__data_history__ = batch.iloc[:30]
+        features = loaded.process_bar(index.to_numpy()[30], prices.iloc[30].to_numpy())
+        self.assertEqual(features["price"][0], prices["AAPL_price"].iloc[29])
+
+        raw = HMMPreProcessorImpl(self.tickers).process_data(prices)
+        self.assertAlmostEqual(raw["AAPL_return"].iloc[30],
+                               np.log(1000 / prices["AAPL_price"].iloc[29]))
@@ -0,0 +1,95 @@
+"""
+Testing the Shared Preprocessor
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from uwqsc_algorithmic_trading.src.preprocessing.shared_preprocessor_impl \
+    import SharedPreProcessorImpl
+
+
+class SharedPreProcessorImplTest(unittest.TestCase):
+    """
+    This class is used to test each component of the Shared Preprocessor
+    """
+
+    def setUp(self):
+        self.preprocessor = SharedPreProcessorImpl(["AAPL", "GOOGL"])
+        self.index = pd.date_range(start='2025-01-01', periods=4, freq='D')
+
+    def test_process_data_fills_and_deduplicates_across_batches(self):
+        """
+        Testing that missing prices are filled from earlier batches and that timestamps already
+        processed are dropped
+        """
+
+        first = pd.DataFrame(index=self.index[:2], data={
+            "AAPL_price": [1.0, np.nan], "GOOGL_price": [np.nan, 5.0], "AAPL_volume": [1, 2]
+        })
+        second = pd.DataFrame(index=self.index[[1, 2, 2]], data={
+            "AAPL_price": [9.0, np.nan, 8.0], "GOOGL_price": [9.0, np.nan, 8.0]
+        })
+
+        self.preprocessor.process_data(first)
+        processed = self.preprocessor.process_data(second)
+
+        self.assertEqual(list(processed.index), [self.index[2]])
+        self.assertEqual(processed.to_numpy().tolist(), [[1.0, 5.0]])
+        history = self.preprocessor.__data_history__.to_frame()
+        self.assertEqual(list(history.columns), ["AAPL_price", "GOOGL_price"])
+        self.assertEqual(len(history), 3)
+
+    def test_process_bar_matches_process_data(self):
+        """
+        Testing that cleaning bar by bar keeps the same history as cleaning DataFrames
+        """
+
+        prices = np.array([[1.0, np.nan], [np.nan, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        reference = SharedPreProcessorImpl(["AAPL", "GOOGL"])
+        reference.process_data(pd.DataFrame(prices, index=self.index,
+                                            columns=["AAPL_price", "GOOGL_price"]))
+
+        for timestamp, row in zip(self.index.to_numpy(), prices):
+            self.assertTrue(self.preprocessor.process_bar(timestamp, row))
+        self.assertEqual(self.preprocessor.process_bar(self.index.to_numpy()[1], prices[1]), {})
+
+        pd.testing.assert_frame_equal(self.preprocessor.__data_history__.to_frame(),
+                                      reference.__data_history__.to_frame(),
+                                      check_names=False, check_freq=False)
+
+    def test_stale_bars_are_dropped(self):
+        """
+        Testing that the drop policy drops the bars and streaming bars where every ticker is stale
+        """
+
+        preprocessor = SharedPreProcessorImpl(["AAPL", "GOOGL"], missing_policy="drop", max_gap=1)
+        prices = pd.DataFrame(index=self.index, data={
+            "AAPL_price": [1.0, np.nan, np.nan, 4.0], "GOOGL_price": [1.0, np.nan, np.nan, 4.0]
+        })
+
+        processed = preprocessor.process_data(prices.iloc[:3])
+
+        self.assertEqual(list(processed.index), list(self.index[:2]))
+        self.assertEqual(processed["AAPL_price"].tolist(), [1.0, 1.0])
+        self.assertTrue(preprocessor.process_bar(self.index.to_numpy()[3], np.array([4.0, 4.0])))
+
+        streaming = SharedPreProcessorImpl(["AAPL", "GOOGL"], missing_policy="drop", max_gap=1)
+        results = [streaming.process_bar(timestamp, row)
+                   for timestamp, row in zip(self.index.to_numpy(), prices.to_numpy())]
+        self.assertEqual([bool(result) for result in results], [True, True, False, True])
+
+    def test_process_bar_fills_from_loaded_history(self):
+        """
+        Testing that the first streaming bar after a loaded history is filled from that history
+        """
+
+        self.preprocessor.__data_history__ = pd.DataFrame(index=self.index[:2], data={
+            "AAPL_price": [1.0, 2.0], "GOOGL_price": [3.0, 4.0]
+        })
+
+        self.assertTrue(self.preprocessor.process_bar(self.index.to_numpy()[2],
+                                                      np.array([np.nan, 5.0])))
+        self.assertEqual(self.preprocessor.__data_history__.iloc[-1].tolist(), [2.0, 5.0])
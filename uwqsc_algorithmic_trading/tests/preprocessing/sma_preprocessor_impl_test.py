@@ -8,7 +8,12 @@ import datetime as dt
 import numpy as np
 import pandas as pd
 
-from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import SMAPreProcessorImpl
+from uwqsc_algorithmic_trading.src.common.history_buffer import HistoryBuffer
+from uwqsc_algorithmic_trading.src.common.indicator_cache import IndicatorCache
+from uwqsc_algorithmic_trading.src.preprocessing.sma_preprocessor_impl import (
+    SMAPreProcessorImpl,
+    trailing_mean
+)
 
 
 class SMAPreprocessorImplTest(unittest.TestCase):
@@ -84,11 +89,190 @@ class SMAPreprocessorImplTest(unittest.TestCase):
             last_50_rolling_mean = history[f"{ticker}_price"].iloc[-50:].mean()
             last_200_rolling_mean = history[f"{ticker}_price"].iloc[-200:].mean()
 
-            self.assertEqual(
+            self.assertAlmostEqual(
                 self.preprocessor.__processed_data__[f"{ticker}_short"].iloc[-1],
                 last_50_rolling_mean
             )
-            self.assertEqual(
+            self.assertAlmostEqual(
                 self.preprocessor.__processed_data__[f"{ticker}_long"].iloc[-1],
                 last_200_rolling_mean
             )
+
+    def test_trailing_mean_matches_window_means(self):
+        """
+        Testing that the vectorized trailing mean matches the mean of the last window values,
+        skipping missing values
+        """
+
+        values = np.random.uniform(100, 200, size=(30, 2))
+        values[5, 0] = np.nan
+        means = trailing_mean(values, 10)
+
+        for row in range(len(values)):
+            for column in range(values.shape[1]):
+                window = values[max(0, row - 9):row + 1, column]
+                self.assertAlmostEqual(means[row, column], np.nanmean(window))
+
+    def test_generate_vectorized_short_long_window(self):
+        """
+        Testing that the vectorized short and long windows match the per-bar calculation
+        """
+
+        history = pd.concat(
+            [self.preprocessor.__data_history__, self.preprocessor.__processed_data__]
+        )
+        prices = history[[f"{ticker}_price" for ticker in self.tickers]].to_numpy()
+        short, long = self.preprocessor.generate_vectorized_short_long_window(prices)
+
+        for column, ticker in enumerate(self.tickers):
+            self.assertAlmostEqual(short[-1, column], history[f"{ticker}_price"].iloc[-50:].mean())
+            self.assertAlmostEqual(long[-1, column], history[f"{ticker}_price"].iloc[-200:].mean())
+
+    def test_vectorized_windows_are_shared_through_the_cache(self):
+        """
+        Testing that preprocessors with overlapping tickers reuse each other's moving averages
+        """
+
+        cache = IndicatorCache()
+        prices = np.random.uniform(100, 200, size=(300, 2))
+
+        first = SMAPreProcessorImpl(self.tickers, 20, 50, indicator_cache=cache)
+        short, long = first.generate_vectorized_short_long_window(prices)
+        self.assertEqual(cache.stats["misses"], 4)
+
+        second = SMAPreProcessorImpl(["GOOGL"], 20, 100, indicator_cache=cache)
+        shared, _ = second.generate_vectorized_short_long_window(prices[:, 1:])
+
+        self.assertEqual(cache.stats["hits"], 1)
+        np.testing.assert_array_equal(shared[:, 0], short[:, 1])
+        np.testing.assert_allclose(long, trailing_mean(prices, 50))
+
+        prices[-1, 1] += 1.0
+        first.generate_vectorized_short_long_window(prices)
+        self.assertEqual(cache.stats["hits"], 3)
+
+    def test_streaming_windows_match_full_history(self):
+        """
+        Testing that the incrementally updated windows match averages over the full history
+        after many bars, and that the windows are not rebuilt while processing them
+        """
+
+        preprocessor = SMAPreProcessorImpl(self.tickers, 5, 20)
+        index = pd.date_range(start='2025-01-27', periods=100, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            f"{ticker}_price": np.random.uniform(100, 101, size=100)
+            for ticker in self.tickers
+        })
+
+        for row in range(len(prices)):
+            processed = preprocessor.process_data(prices.iloc[row:row + 1])
+            self.assertEqual(preprocessor.__rolling_rows__, row + 1)
+
+        for ticker in self.tickers:
+            self.assertAlmostEqual(
+                processed[f"{ticker}_short"].iloc[-1],
+                prices[f"{ticker}_price"].iloc[-5:].mean()
+            )
+            self.assertAlmostEqual(
+                processed[f"{ticker}_long"].iloc[-1],
+                prices[f"{ticker}_price"].iloc[-20:].mean()
+            )
+
+    def test_outliers_are_kept_out_of_the_windows(self):
+        """
+        Testing that a price spike is flagged against the rolling z-score window and does not
+        move the moving averages
+        """
+
+        self.preprocessor.remove_outliers()
+        short_before = self.preprocessor.__processed_data__["AAPL_short"].iloc[-1]
+        self.preprocessor.__data_history__ = pd.concat(
+            [self.preprocessor.__data_history__, self.preprocessor.__processed_data__]
+        )
+
+        spike_index = pd.date_range(start='2025-01-28', periods=1, freq='D')
+        self.preprocessor.__processed_data__ = pd.DataFrame(index=spike_index, data={
+            "AAPL_price": [99999.0],
+            "GOOGL_price": [150.0]
+        })
+        self.preprocessor.remove_outliers()
+
+        self.assertEqual(self.preprocessor.__rolling_rows__, 302)
+        self.assertAlmostEqual(
+            self.preprocessor.__processed_data__["AAPL_short"].iloc[-1],
+            short_before
+        )
+
+    def test_averages_follow_a_level_shift(self):
+        """
+        Testing that after a lasting step in the price, the moving averages of the batch and of
+        the streaming path reach the new level instead of staying at the old one
+        """
+
+        index = pd.date_range(start='2025-01-27', periods=200, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 100 + np.tile([-1.0, 1.0], 100),
+            "GOOGL_price": 100 + np.tile([1.0, -1.0], 100)
+        })
+        prices.iloc[60:, 0] += 50
+
+        batch = SMAPreProcessorImpl(self.tickers, 5, 20,
+                                    outlier_persistence=5).process_data(prices)
+        streaming = SMAPreProcessorImpl(self.tickers, 5, 20, outlier_persistence=5)
+        averages = np.array([
+            [features["short"][0], features["long"][0]]
+            for features in (streaming.process_bar(timestamp, row)
+                             for timestamp, row in zip(index.to_numpy(), prices.to_numpy()))
+        ])
+
+        np.testing.assert_allclose(batch[["AAPL_short", "AAPL_long"]].to_numpy(), averages)
+        self.assertAlmostEqual(averages[-1, 0], 150, delta=1)
+        self.assertAlmostEqual(averages[-1, 1], 150, delta=1)
+        # The first bars of the step are held out of the averages, the later ones are not
+        self.assertAlmostEqual(averages[63, 0], averages[59, 0])
+        self.assertGreater(averages[64, 0], 105)
+
+    def test_process_data_keeps_a_bounded_history(self):
+        """
+        Testing that process_data stores the history in a bounded buffer
+        """
+
+        preprocessor = SMAPreProcessorImpl(self.tickers, 5, 20, max_history=30)
+        index = pd.date_range(start='2025-01-27', periods=50, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            f"{ticker}_price": np.random.uniform(100, 101, size=50)
+            for ticker in self.tickers
+        })
+
+        for row in range(len(prices)):
+            preprocessor.process_data(prices.iloc[row:row + 1])
+
+        self.assertIsInstance(preprocessor.__data_history__, HistoryBuffer)
+        self.assertEqual(len(preprocessor.__data_history__), 30)
+        self.assertTrue(preprocessor.__data_history__.index.equals(index[-30:]))
+
+    def test_outlier_policies_rewrite_processed_prices(self):
+        """
+        Testing that the "ffill" policy replaces a spike by the previous price and that "drop"
+        removes the rows left without any price
+        """
+
+        index = pd.date_range(start='2025-01-27', periods=40, freq='D')
+        prices = pd.DataFrame(index=index, data={
+            "AAPL_price": 100 + np.tile([-1.0, 1.0], 20),
+            "GOOGL_price": 100 + np.tile([1.0, -1.0], 20)
+        })
+        prices.iloc[30] = [99999.0, 99999.0]
+
+        filled = SMAPreProcessorImpl(self.tickers, 5, 20, outlier_policy="ffill")
+        processed = filled.process_data(prices)
+        self.assertEqual(processed["AAPL_price"].iloc[30], prices["AAPL_price"].iloc[29])
+        self.assertEqual(len(processed), 40)
+
+        dropped = SMAPreProcessorImpl(self.tickers, 5, 20, outlier_policy="drop")
+        processed = dropped.process_data(prices)
+        self.assertNotIn(index[30], processed.index)
+        self.assertEqual(len(processed), 39)
+
+        with self.assertRaises(ValueError):
+            SMAPreProcessorImpl(self.tickers, outlier_policy="interpolate")